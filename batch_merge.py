@@ -0,0 +1,326 @@
+"""
+Consolidação das saídas CSV de um lote em um único conjunto ordenado.
+
+Cada PDF do lote vira um CSV próprio; relatórios de períodos que se cruzam
+repetem registros. A consolidação junta todos em ordem de Placa e Data/Hora,
+sem os registros repetidos, com memória limitada (ordenação externa):
+
+1. os CSVs são lidos em blocos de até memory_rows registros; cada bloco é
+   ordenado e gravado em disco como uma sequência ordenada (run)
+2. as sequências são intercaladas em blocos: a cada passo saem de todas as
+   sequências os registros até a menor das últimas chaves em memória, que
+   são ordenados juntos; com muitas sequências a intercalação é feita em
+   passadas de até MAX_FAN_IN sequências
+3. registros idênticos em todas as colunas ficam vizinhos na ordem (a chave
+   termina com o hash do registro) e só o primeiro é gravado
+
+A saída é um CSV só ou, com partition, um CSV por placa (placa=<Placa>.csv)
+ou por dia (dia=AAAA-MM-DD.csv) numa pasta, para que a leitura posterior
+abra só o que precisa. Os textos das células saem como estavam nos CSVs.
+"""
+
+from __future__ import annotations
+
+import os
+import pickle
+import re
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Dict, IO, Iterable, Iterator, List, Optional, Tuple
+import logging
+
+from lazy_imports import lazy_module
+from record_buffer import NO_DATE, date_minutes
+
+np = lazy_module('numpy')
+pd = lazy_module('pandas')
+
+logger = logging.getLogger(__name__)
+
+PLATE = 'Placa'
+DATE = 'Data/Hora'
+
+# Partições da saída consolidada
+PARTITIONS = ('placa', 'dia')
+
+DEFAULT_MERGE_NAME = 'consolidado'
+# Registros em memória em cada sequência ordenada
+DEFAULT_MEMORY_ROWS = 500000
+# Sequências intercaladas de uma vez
+MAX_FAN_IN = 64
+# Arquivos de partição abertos ao mesmo tempo
+MAX_OPEN_FILES = 64
+
+# Colunas da chave de ordenação guardadas junto dos registros nas sequências
+_KEY_PLATE = '__placa'
+_KEY_MINUTES = '__minutos'
+_KEY_HASH = '__hash'
+
+_UNSAFE_NAME = re.compile(r'[^\w.-]+')
+
+
+def _read_csv_blocks(path: Path, columns: List[str], block_rows: int) -> Iterator[pd.DataFrame]:
+    """Blocos do CSV com todas as células em texto (vazias como NA), nas colunas do lote"""
+    reader = pd.read_csv(path, dtype=str, keep_default_na=False, na_values=[''], encoding='utf-8-sig',
+                         chunksize=block_rows)
+    with reader:
+        for block in reader:
+            yield block.reindex(columns=columns)
+
+
+def _with_keys(block: pd.DataFrame) -> pd.DataFrame:
+    """Bloco com as colunas da chave (placa, minutos, hash do registro)"""
+    keyed = block.reset_index(drop=True)
+    hashes = pd.util.hash_pandas_object(keyed, index=False).to_numpy()
+    keyed[_KEY_PLATE] = keyed[PLATE].fillna('').to_numpy(dtype=object)
+    keyed[_KEY_MINUTES] = date_minutes(keyed[DATE].fillna('').to_numpy(dtype=object))
+    keyed[_KEY_HASH] = hashes
+    return keyed
+
+
+def _sorted(keyed: pd.DataFrame) -> pd.DataFrame:
+    plates = pd.factorize(keyed[_KEY_PLATE], sort=True)[0]
+    order = np.lexsort((keyed[_KEY_HASH].to_numpy(), keyed[_KEY_MINUTES].to_numpy(), plates))
+    return keyed.take(order).reset_index(drop=True)
+
+
+def _duplicates(rows: pd.DataFrame, columns: List[str]) -> np.ndarray:
+    """Registros iguais (NA igual a NA) ao anterior em todas as colunas"""
+    same = np.ones(len(rows) - 1, dtype=bool) if len(rows) else np.zeros(0, dtype=bool)
+    for column in columns:
+        values = rows[column].to_numpy(dtype=object)
+        missing = pd.isna(values)
+        same &= (values[1:] == values[:-1]) & ~missing[1:] & ~missing[:-1] | (missing[1:] & missing[:-1])
+    return np.r_[False, same]
+
+
+def _key_le(block: pd.DataFrame, bound: tuple) -> np.ndarray:
+    """Registros do bloco com chave <= bound"""
+    plate, minutes, hashed = bound
+    plates = block[_KEY_PLATE].to_numpy(dtype=object)
+    block_minutes = block[_KEY_MINUTES].to_numpy()
+    hashes = block[_KEY_HASH].to_numpy()
+    same_plate = plates == plate
+    return (plates < plate) | same_plate & ((block_minutes < minutes)
+                                            | (block_minutes == minutes) & (hashes <= hashed))
+
+
+def _last_key(block: pd.DataFrame) -> tuple:
+    return block[_KEY_PLATE].iat[-1], block[_KEY_MINUTES].iat[-1], block[_KEY_HASH].iat[-1]
+
+
+class _Run:
+    """Sequência ordenada gravada em disco como blocos do pickle"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.rows = 0
+
+    def write(self, blocks: Iterable[pd.DataFrame]) -> '_Run':
+        with open(self.path, 'wb') as f:
+            for block in blocks:
+                pickle.dump(block, f, protocol=pickle.HIGHEST_PROTOCOL)
+                self.rows += len(block)
+        return self
+
+    def blocks(self, min_rows: int = 1) -> Iterator[pd.DataFrame]:
+        """Blocos lidos em ordem, juntados até terem pelo menos min_rows registros"""
+        pending, rows = [], 0
+        with open(self.path, 'rb') as f:
+            while True:
+                try:
+                    block = pickle.load(f)
+                except EOFError:
+                    break
+                pending.append(block)
+                rows += len(block)
+                if rows >= min_rows:
+                    yield pd.concat(pending, ignore_index=True) if len(pending) > 1 else block
+                    pending, rows = [], 0
+        if pending:
+            yield pd.concat(pending, ignore_index=True)
+
+
+class _PartitionWriter:
+    """CSVs da saída: um arquivo só ou um por partição, com no máximo MAX_OPEN_FILES abertos"""
+
+    def __init__(self, target: Path, columns: List[str], partition: Optional[str]):
+        self.target = target
+        self.columns = columns
+        self.partition = partition
+        self._open: Dict[Path, IO] = {}
+        self._started = set()
+
+    def _path(self, value: str) -> Path:
+        if self.partition is None:
+            return self.target
+        return self.target / f"{self.partition}={value}.csv"
+
+    def _handle(self, path: Path) -> IO:
+        handle = self._open.get(path)
+        if handle is None:
+            if len(self._open) >= MAX_OPEN_FILES:
+                self.close()
+            # Reaberto em modo de acréscimo: o BOM do utf-8-sig só sai no início do arquivo
+            handle = open(path, 'a' if path in self._started else 'w', encoding='utf-8-sig', newline='')
+            self._open[path] = handle
+        return handle
+
+    def write(self, rows: pd.DataFrame):
+        if self.partition is None:
+            groups = [('', rows)]
+        elif self.partition == 'placa':
+            names = rows[_KEY_PLATE].map(lambda plate: _UNSAFE_NAME.sub('_', plate) or 'sem_placa')
+            groups = rows.groupby(names.to_numpy(), sort=False)
+        else:
+            minutes = rows[_KEY_MINUTES].to_numpy()
+            days = (np.where(minutes == NO_DATE, 0, minutes) // 1440).astype('datetime64[D]').astype(str)
+            groups = rows.groupby(np.where(minutes == NO_DATE, 'sem_data', days), sort=False)
+        for value, group in groups:
+            path = self._path(value)
+            group.to_csv(self._handle(path), columns=self.columns, header=path not in self._started, index=False)
+            self._started.add(path)
+
+    @property
+    def files(self) -> int:
+        return len(self._started)
+
+    def close(self):
+        for handle in self._open.values():
+            handle.close()
+        self._open.clear()
+
+
+class BatchMerger:
+    """Ordenação externa dos CSVs de um lote por Placa e Data/Hora, sem registros repetidos"""
+
+    def __init__(self, output_dir, name: str = DEFAULT_MERGE_NAME, partition: Optional[str] = None,
+                 memory_rows: int = DEFAULT_MEMORY_ROWS):
+        if partition is not None and partition not in PARTITIONS:
+            raise ValueError(f"Partição desconhecida: {partition} (use {' ou '.join(PARTITIONS)})")
+        if memory_rows < 1:
+            raise ValueError("memory_rows precisa ser positivo")
+        self.output_dir = Path(output_dir)
+        self.name = name
+        self.partition = partition
+        self.memory_rows = memory_rows
+
+    @property
+    def target(self) -> Path:
+        """Arquivo (sem partição) ou pasta (com partição) da saída consolidada"""
+        return self.output_dir / (self.name if self.partition else f"{self.name}.csv")
+
+    def _inputs(self, paths: List[Path]) -> Tuple[List[Path], List[str]]:
+        """CSVs com Placa e Data/Hora e a união das colunas deles, na ordem em que aparecem"""
+        inputs, columns = [], {}
+        for path in paths:
+            header = pd.read_csv(path, nrows=0, encoding='utf-8-sig').columns
+            if PLATE not in header or DATE not in header:
+                logger.warning(f"{path.name} não tem as colunas {PLATE} e {DATE}, fica fora da consolidação")
+                continue
+            inputs.append(path)
+            for column in header:
+                columns.setdefault(column, None)
+        return inputs, list(columns)
+
+    def _block_rows(self, runs: int) -> int:
+        """Registros por bloco na intercalação: a memória fica em torno de memory_rows"""
+        return max(1, self.memory_rows // max(1, runs))
+
+    def _sorted_runs(self, paths: List[Path], columns: List[str], work_dir: Path) -> List[_Run]:
+        block_rows = self._block_rows(MAX_FAN_IN)
+        runs = []
+        for path in paths:
+            for block in _read_csv_blocks(path, columns, self.memory_rows):
+                ordered = _sorted(_with_keys(block))
+                blocks = (ordered.iloc[start:start + block_rows] for start in range(0, len(ordered), block_rows))
+                runs.append(_Run(work_dir / f"run_{len(runs)}.pkl").write(blocks))
+        return runs
+
+    def _merge(self, runs: List[_Run], columns: List[str]) -> Iterator[pd.DataFrame]:
+        """Blocos ordenados e sem repetidos da intercalação das sequências"""
+        sources = [run.blocks(self._block_rows(len(runs))) for run in runs]
+        buffers: List[Optional[pd.DataFrame]] = [next(source, None) for source in sources]
+        previous = None
+        while any(buffer is not None for buffer in buffers):
+            # Tudo até a menor das últimas chaves em memória já pode sair
+            bound = min(_last_key(buffer) for buffer in buffers if buffer is not None)
+            taken = []
+            for i, buffer in enumerate(buffers):
+                if buffer is None:
+                    continue
+                ready = _key_le(buffer, bound)
+                taken.append(buffer[ready])
+                rest = buffer[~ready]
+                buffers[i] = rest if len(rest) else next(sources[i], None)
+
+            rows = _sorted(pd.concat(taken, ignore_index=True))
+            if previous is not None:
+                rows = pd.concat([previous, rows], ignore_index=True)
+            rows = rows[~_duplicates(rows, columns)]
+            if previous is not None:
+                rows = rows.iloc[1:]
+            if len(rows):
+                previous = rows.iloc[-1:]
+                yield rows
+
+    def merge(self, paths: Iterable) -> Dict:
+        """Consolida os CSVs; devolve o destino e as contagens de registros"""
+        paths, columns = self._inputs([Path(path) for path in paths])
+        if not paths:
+            raise ValueError(f"Nenhum CSV com as colunas {PLATE} e {DATE} para consolidar")
+
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        work_dir = Path(tempfile.mkdtemp(prefix=f".{self.name}.", dir=self.output_dir))
+        try:
+            runs = self._sorted_runs(paths, columns, work_dir)
+            rows_in = sum(run.rows for run in runs)
+            passes = 1
+            # Muitas sequências: intercaladas em grupos até caberem numa passada
+            while len(runs) > MAX_FAN_IN:
+                block_rows = self._block_rows(MAX_FAN_IN)
+                merged = []
+                for start in range(0, len(runs), MAX_FAN_IN):
+                    group = runs[start:start + MAX_FAN_IN]
+                    blocks = (block.iloc[i:i + block_rows] for block in self._merge(group, columns)
+                              for i in range(0, len(block), block_rows))
+                    merged.append(_Run(work_dir / f"run_{passes}_{len(merged)}.pkl").write(blocks))
+                    for run in group:
+                        run.path.unlink()
+                runs = merged
+                passes += 1
+
+            staging = work_dir / (self.name if self.partition else f"{self.name}.csv")
+            if self.partition:
+                staging.mkdir()
+            writer = _PartitionWriter(staging, columns, self.partition)
+            rows_out = 0
+            try:
+                for rows in self._merge(runs, columns):
+                    writer.write(rows)
+                    rows_out += len(rows)
+            finally:
+                writer.close()
+            if not self.partition and not writer.files:
+                pd.DataFrame(columns=columns).to_csv(staging, index=False, encoding='utf-8-sig')
+
+            # A saída anterior só é trocada com a nova completa
+            target = self.target
+            if target.is_dir():
+                shutil.rmtree(target)
+            os.replace(staging, target)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+        logger.info(f"Consolidação: {len(paths)} arquivos, {rows_in} registros, "
+                    f"{rows_in - rows_out} repetidos removidos → {target}")
+        return {
+            'output': str(target),
+            'files_merged': len(paths),
+            'rows_in': rows_in,
+            'rows_out': rows_out,
+            'duplicates': rows_in - rows_out,
+            'partitions': writer.files if self.partition else None,
+            'passes': passes,
+        }
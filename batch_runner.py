@@ -0,0 +1,117 @@
+"""
+Execução em lote com um processo por arquivo.
+
+Cada PDF é convertido em um processo filho próprio, com no máximo N processos
+simultâneos. Um processo que trava além do tempo limite é encerrado e um que
+morre sem responder é registrado como falha, sem derrubar o restante do lote.
+Os resultados voltam na mesma ordem da lista de entrada.
+"""
+
+import multiprocessing
+import time
+from collections import deque
+from multiprocessing.connection import wait
+from typing import Dict, List, Optional, Tuple
+import logging
+
+from conversion_metrics import dedicate_process
+
+logger = logging.getLogger(__name__)
+
+# Tempo limite padrão por arquivo, em segundos
+DEFAULT_FILE_TIMEOUT = 600
+
+
+def _convert_in_child(converter, pdf_file: str, convert_kwargs: Dict, conn):
+    """Ponto de entrada do processo filho: converte um arquivo e devolve o resultado"""
+    # O filho só roda esta conversão: o pico de memória medido é o dela
+    dedicate_process()
+    try:
+        result = converter.convert_pdf(pdf_file, **convert_kwargs)
+    except Exception as e:
+        result = {'success': False, 'input_file': pdf_file, 'error': f'Erro inesperado: {e}'}
+    conn.send(result)
+    conn.close()
+
+
+class BatchRunner:
+    """Distribui a conversão de vários PDFs entre processos isolados"""
+
+    def __init__(self, converter, workers: int, timeout: Optional[float] = DEFAULT_FILE_TIMEOUT,
+                 convert_kwargs: Optional[Dict] = None):
+        self.converter = converter
+        self.workers = max(1, workers)
+        self.timeout = timeout
+        # Opções repassadas a convert_pdf em cada processo
+        self.convert_kwargs = convert_kwargs or {}
+
+    def _failure(self, pdf_file: str, error: str, started: float) -> Dict:
+        return {
+            'success': False,
+            'input_file': pdf_file,
+            'error': error,
+            'duration_seconds': round(time.perf_counter() - started, 3),
+        }
+
+    def _start(self, target, args: Tuple, label: str) -> Tuple:
+        """Inicia target(*args, conexão) num processo filho; label identifica a tarefa nas falhas"""
+        parent_conn, child_conn = multiprocessing.Pipe(duplex=False)
+        process = multiprocessing.Process(target=target, args=(*args, child_conn), daemon=True)
+        process.start()
+        child_conn.close()
+        return process, parent_conn, time.perf_counter(), label
+
+    def _collect(self, running: Dict) -> List[Tuple]:
+        """Espera até algum processo responder, terminar ou estourar o prazo
+
+        running mapeia uma chave para o retorno de _start; as tarefas que
+        acabaram saem de running e voltam como (chave, resultado).
+        """
+        wait_timeout = None
+        if self.timeout is not None:
+            now = time.perf_counter()
+            wait_timeout = max(0.0, min(start + self.timeout - now for _, _, start, _ in running.values()))
+        wait([conn for _, conn, _, _ in running.values()] +
+             [process.sentinel for process, _, _, _ in running.values()], timeout=wait_timeout)
+
+        finished = []
+        for key in list(running):
+            process, conn, started, label = running[key]
+            result = None
+
+            if conn.poll():
+                try:
+                    result = conn.recv()
+                    result['duration_seconds'] = round(time.perf_counter() - started, 3)
+                except EOFError:
+                    result = self._failure(label, f'Processo encerrado sem resultado (código {process.exitcode})', started)
+            elif not process.is_alive():
+                result = self._failure(label, f'Processo encerrado sem resultado (código {process.exitcode})', started)
+            elif self.timeout is not None and time.perf_counter() - started >= self.timeout:
+                process.terminate()
+                result = self._failure(label, f'Tempo limite de {self.timeout}s excedido', started)
+
+            if result is not None:
+                process.join()
+                conn.close()
+                del running[key]
+                finished.append((key, result))
+        return finished
+
+    def run(self, pdf_files: List[str]) -> List[Dict]:
+        """Converte os arquivos e retorna os resultados na ordem de entrada"""
+        results: List[Optional[Dict]] = [None] * len(pdf_files)
+        pending = deque(enumerate(pdf_files))
+        running = {}  # índice -> (processo, conexão, início, arquivo)
+
+        while pending or running:
+            # Completar o pool com novos arquivos
+            while pending and len(running) < self.workers:
+                index, pdf_file = pending.popleft()
+                running[index] = self._start(_convert_in_child, (self.converter, pdf_file, self.convert_kwargs),
+                                             pdf_file)
+
+            for index, result in self._collect(running):
+                results[index] = result
+
+        return results
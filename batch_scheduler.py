@@ -0,0 +1,306 @@
+"""
+Agendamento do lote pelo número de páginas.
+
+Com arquivos de 2 a 3.000 páginas, distribuir os PDFs na ordem da pasta
+deixa o lote preso no fim atrás de um arquivo gigante convertido por um
+processo só. O BatchScheduler:
+
+1. conta as páginas de cada PDF antes de começar (pelo PyPDF2, que lê só a
+   árvore de páginas; sem ele, pelo pdfplumber); se nenhum documento puder
+   ser dividido (um processo só, conversão em fluxo ou split_pages=0) nada é
+   contado e o tamanho dos arquivos ordena o lote
+2. divide os documentos com mais de split_pages páginas em faixas de
+   split_pages páginas, extraídas cada uma em um processo; quando todas as
+   faixas de um documento terminam, uma tarefa de junção converte o
+   documento a partir das páginas já extraídas (PDFConverter.convert_pdf
+   com extracted), com o mesmo resultado da conversão sequencial
+3. distribui as tarefas da maior para a menor (em páginas); as junções
+   passam na frente, pois cada uma é a última etapa do seu documento
+4. a cada tarefa concluída informa o progresso do lote (arquivos e páginas
+   concluídos, páginas por segundo e a previsão de término), no log e para
+   um callback; sem a contagem, a previsão vem dos arquivos concluídos
+
+Os processos, o tempo limite (por tarefa) e as falhas são os do BatchRunner.
+Se uma faixa falhar, as faixas do documento que ainda não começaram são
+descartadas e ele é convertido inteiro por uma tarefa só.
+Os resultados voltam na ordem da lista de entrada, um por arquivo.
+"""
+
+import json
+import os
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+import logging
+
+from batch_runner import BatchRunner, DEFAULT_FILE_TIMEOUT, _convert_in_child
+from extraction_backends import PdfplumberBackend, TextStreamBackend
+from page_engine import PageEngine
+
+logger = logging.getLogger(__name__)
+
+# Documentos com mais páginas que isso são divididos em faixas deste tamanho
+DEFAULT_SPLIT_PAGES = 500
+
+FILE = 'arquivo'
+RANGE = 'faixa'
+MERGE = 'junção'
+
+
+def count_pages(pdf_path) -> int:
+    """Páginas do PDF sem extrair nenhuma; 0 se o arquivo não abrir"""
+    error = None
+    for backend in (TextStreamBackend, PdfplumberBackend):
+        try:
+            opened = backend(pdf_path)
+        except Exception as e:
+            error = e
+            continue
+        try:
+            return opened.page_count
+        except Exception as e:
+            error = e
+        finally:
+            opened.close()
+    logger.warning(f"Não foi possível contar as páginas de {Path(pdf_path).name}: {error}")
+    return 0
+
+
+def _extract_range_in_child(converter, pdf_file: str, start: int, end: int, backend: str, conn):
+    """Ponto de entrada do processo de uma faixa: extrai as páginas [start, end) e devolve o conteúdo"""
+    try:
+        with PageEngine(converter.source_dir / pdf_file, cache_pages=False, backend=backend) as engine:
+            # No modo automático a faixa escolhe o backend pela amostragem das
+            # primeiras páginas, a mesma da junção; as páginas da amostra não contam
+            engine.resolve_backend()
+            scanned, skipped = engine.table_pages_scanned, engine.table_pages_skipped
+            pages = list(engine.iter_pages(start, end))
+        result = {'success': True, 'input_file': pdf_file, 'pages': pages,
+                  'table_scan': (engine.table_pages_scanned - scanned, engine.table_pages_skipped - skipped)}
+    except Exception as e:
+        result = {'success': False, 'input_file': pdf_file,
+                  'error': f'Erro nas páginas {start + 1}-{end}: {e}'}
+    conn.send(result)
+    conn.close()
+
+
+def progress_file_writer(path) -> Callable[[Dict], None]:
+    """Callback de progresso que acrescenta cada evento ao arquivo como uma linha JSON"""
+    def write(event: Dict):
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(event, ensure_ascii=False) + '\n')
+    return write
+
+
+def _file_size(pdf_path) -> int:
+    try:
+        return os.path.getsize(pdf_path)
+    except OSError:
+        return 0
+
+
+def result_pages(result: Dict) -> int:
+    """Páginas do documento pelo resultado da conversão (0 se ela falhou antes da análise)"""
+    return result.get('analysis', {}).get('pages', 0)
+
+
+def _duration(seconds: float) -> str:
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h{minutes:02d}min" if hours else f"{minutes}min{seconds:02d}s"
+
+
+class BatchProgress:
+    """Progresso do lote em páginas, com vazão e previsão de término
+
+    As páginas contam quando a tarefa que as converte (ou extrai, numa
+    faixa) termina; a previsão é o que falta dividido pela vazão média desde
+    o início do lote. Sem o total de páginas (pages_total=None, lote sem
+    contagem) a previsão usa os arquivos concluídos.
+    """
+
+    def __init__(self, files_total: int, pages_total: Optional[int] = None,
+                 callback: Optional[Callable[[Dict], None]] = None):
+        self.files_total = files_total
+        self.pages_total = pages_total
+        self.files_done = 0
+        self.pages_done = 0
+        self.callback = callback
+        self.started = time.perf_counter()
+
+    def advance(self, pages: int = 0, files: int = 0) -> Dict:
+        """Soma páginas e arquivos concluídos, registra o progresso no log e o entrega ao callback"""
+        self.pages_done += pages
+        self.files_done += files
+        elapsed = time.perf_counter() - self.started
+        rate = self.pages_done / elapsed if elapsed > 0 else 0.0
+        if self.pages_total is not None:
+            eta = max(0, self.pages_total - self.pages_done) / rate if rate > 0 else None
+        else:
+            files_rate = self.files_done / elapsed if elapsed > 0 else 0.0
+            eta = (self.files_total - self.files_done) / files_rate if files_rate > 0 else None
+        event = {
+            'files_done': self.files_done,
+            'files_total': self.files_total,
+            'pages_done': self.pages_done,
+            'pages_total': self.pages_total,
+            'elapsed_seconds': round(elapsed, 3),
+            'pages_per_second': round(rate, 2),
+            'eta_seconds': round(eta, 1) if eta is not None else None,
+            'finishes_at': (datetime.now() + timedelta(seconds=eta)).isoformat(timespec='seconds')
+                           if eta is not None else None,
+        }
+
+        if self.pages_total is not None:
+            percent = self.pages_done / self.pages_total if self.pages_total else 1.0
+            pages = f"{self.pages_done}/{self.pages_total} páginas ({percent:.0%})"
+        else:
+            pages = f"{self.pages_done} páginas"
+        forecast = (f", fim previsto em {_duration(eta)} ({event['finishes_at'][11:16]})"
+                    if eta is not None and self.files_done < self.files_total else "")
+        logger.info(f"Progresso: {self.files_done}/{self.files_total} arquivos, {pages}, "
+                    f"{rate:.1f} páginas/s{forecast}")
+        if self.callback is not None:
+            self.callback(event)
+        return event
+
+
+class _Task:
+    """Unidade de trabalho do agendador: um arquivo inteiro, uma faixa de páginas ou a junção das faixas"""
+
+    __slots__ = ('kind', 'file_index', 'pdf_file', 'pages', 'start', 'end')
+
+    def __init__(self, kind: str, file_index: int, pdf_file: str, pages: Optional[int], start: int = 0,
+                 end: int = 0):
+        self.kind = kind
+        self.file_index = file_index
+        self.pdf_file = pdf_file
+        # Páginas que a tarefa processa: a prioridade e o progresso são medidos nelas (None: não contadas)
+        self.pages = pages
+        self.start = start
+        self.end = end
+
+
+class BatchScheduler(BatchRunner):
+    """BatchRunner que distribui o lote da maior tarefa para a menor, dividindo documentos gigantes em faixas"""
+
+    def __init__(self, converter, workers: int, timeout: Optional[float] = DEFAULT_FILE_TIMEOUT,
+                 convert_kwargs: Optional[Dict] = None, split_pages: int = DEFAULT_SPLIT_PAGES,
+                 progress: Optional[Callable[[Dict], None]] = None):
+        super().__init__(converter, workers, timeout, convert_kwargs)
+        # Tamanho das faixas dos documentos grandes (0: nenhum documento é dividido)
+        self.split_pages = split_pages
+        # Recebe cada evento de progresso do lote (ver BatchProgress)
+        self.progress = progress
+
+    def may_split(self) -> bool:
+        """Algum documento pode ser dividido em faixas; sem isso a contagem de páginas não é feita"""
+        # A conversão em fluxo lê o documento de uma vez, com memória constante
+        return bool(self.split_pages) and self.workers >= 2 and not self.convert_kwargs.get('stream')
+
+    def _splits(self, pdf_file: str, pages: int) -> bool:
+        """O documento vale a divisão em faixas: grande, com processos livres e sem o resultado no cache"""
+        if not self.may_split() or pages <= self.split_pages:
+            return False
+        cache = getattr(self.converter, 'cache', None)
+        if cache is not None:
+            try:
+                return not cache.contains(self.converter._cache_key(self.converter.source_dir / pdf_file))
+            except OSError:
+                return True
+        return True
+
+    def plan(self, pdf_files: List[str], page_counts: Optional[List[int]] = None) -> List[_Task]:
+        """Tarefas iniciais em ordem de execução: da maior para a menor em páginas
+
+        Sem page_counts, um arquivo inteiro por tarefa, do maior para o menor em bytes.
+        """
+        if page_counts is None:
+            sizes = [_file_size(self.converter.source_dir / pdf_file) for pdf_file in pdf_files]
+            return [_Task(FILE, index, pdf_files[index], None)
+                    for index in sorted(range(len(pdf_files)), key=lambda index: -sizes[index])]
+        tasks = []
+        for index, (pdf_file, pages) in enumerate(zip(pdf_files, page_counts)):
+            if self._splits(pdf_file, pages):
+                tasks.extend(_Task(RANGE, index, pdf_file, min(start + self.split_pages, pages) - start,
+                                   start, min(start + self.split_pages, pages))
+                             for start in range(0, pages, self.split_pages))
+            else:
+                tasks.append(_Task(FILE, index, pdf_file, pages))
+        # Ordenação estável: com o mesmo tamanho, vale a ordem de entrada
+        return sorted(tasks, key=lambda task: -task.pages)
+
+    def _launch(self, task: _Task, extracted: Dict[int, List]):
+        if task.kind == RANGE:
+            args = (self.converter, task.pdf_file, task.start, task.end, self.converter.backend)
+            return self._start(_extract_range_in_child, args, task.pdf_file)
+        kwargs = dict(self.convert_kwargs)
+        if task.kind == MERGE:
+            kwargs['extracted'] = [page for _, pages in sorted(extracted.pop(task.file_index)) for page in pages]
+        return self._start(_convert_in_child, (self.converter, task.pdf_file, kwargs), task.pdf_file)
+
+    def run(self, pdf_files: List[str], page_counts: Optional[List[int]] = None) -> List[Dict]:
+        """Converte os arquivos e retorna os resultados na ordem de entrada
+
+        page_counts evita contar as páginas de novo, se quem chama já contou.
+        Se nenhum documento puder ser dividido, as páginas não são contadas.
+        """
+        if page_counts is None and self.may_split():
+            page_counts = [count_pages(self.converter.source_dir / pdf_file) for pdf_file in pdf_files]
+            logger.info(f"{len(pdf_files)} arquivos, {sum(page_counts)} páginas")
+        pending = self.plan(pdf_files, page_counts)
+        progress = BatchProgress(len(pdf_files), sum(page_counts) if page_counts is not None else None,
+                                 self.progress)
+        split = {task.file_index for task in pending if task.kind == RANGE}
+        if split:
+            logger.info(f"Agenda: {len(pending)} tarefas para {len(pdf_files)} arquivos, {len(split)} divididos "
+                        f"em faixas de {self.split_pages} páginas")
+
+        results: List[Optional[Dict]] = [None] * len(pdf_files)
+        ranges_left = {index: sum(1 for task in pending if task.file_index == index) for index in split}
+        extracted: Dict[int, List] = {index: [] for index in split}
+        table_scans: Dict[int, List[int]] = {index: [0, 0] for index in split}
+        file_started: Dict[int, float] = {}
+        running = {}  # tarefa -> (processo, conexão, início, arquivo)
+
+        while pending or running:
+            while pending and len(running) < self.workers:
+                task = pending.pop(0)
+                file_started.setdefault(task.file_index, time.perf_counter())
+                running[task] = self._launch(task, extracted)
+
+            for task, result in self._collect(running):
+                index = task.file_index
+                if task.kind == RANGE:
+                    if index not in ranges_left:
+                        continue  # Outra faixa já falhou: o documento inteiro foi reagendado
+                    if not result['success']:
+                        logger.warning(f"{result['error']} de {task.pdf_file}; convertendo o arquivo inteiro")
+                        del ranges_left[index]
+                        # As faixas que ainda não começaram saem da fila; as que estão rodando são ignoradas
+                        pending = [other for other in pending if other.file_index != index]
+                        # As páginas das faixas já concluídas são refeitas: voltam para o total
+                        progress.pages_total += sum(len(pages) for _, pages in extracted.pop(index))
+                        pending.insert(0, _Task(FILE, index, task.pdf_file, page_counts[index]))
+                        continue
+                    extracted[index].append((task.start, result['pages']))
+                    table_scans[index][0] += result['table_scan'][0]
+                    table_scans[index][1] += result['table_scan'][1]
+                    ranges_left[index] -= 1
+                    if not ranges_left[index]:
+                        del ranges_left[index]
+                        pending.insert(0, _Task(MERGE, index, task.pdf_file, 0))
+                    progress.advance(pages=task.pages)
+                    continue
+
+                if task.kind == MERGE:
+                    result['page_ranges'] = -(-page_counts[index] // self.split_pages)
+                    if 'table_pages' in result:
+                        result['table_pages']['scanned'] += table_scans[index][0]
+                        result['table_pages']['skipped'] += table_scans[index][1]
+                result['duration_seconds'] = round(time.perf_counter() - file_started[index], 3)
+                results[index] = result
+                progress.advance(pages=task.pages if task.pages is not None else result_pages(result), files=1)
+
+        return results
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Benchmark da análise do PDF: tempo da sondagem por amostragem e da análise
+completa para documentos de tamanhos crescentes. A sondagem lê no máximo três
+páginas, então o tempo dela não deve crescer com o documento.
+
+Uso: python benchmarks/bench_analysis.py [paginas ...]
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from pdf_converter import PDFConverter  # noqa: E402
+from synthetic_pdf import generate_report  # noqa: E402
+
+
+def timed_analysis(converter: PDFConverter, pdf_path: Path, full: bool):
+    inicio = time.perf_counter()
+    analysis = converter.analyze_pdf_content(pdf_path, full=full)
+    return time.perf_counter() - inicio, analysis['pages_inspected']
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10, 40, 160]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Backend de referência: é o único que detecta tabelas em todas as páginas
+        converter = PDFConverter(tmp, tmp, backend="pdfplumber")
+        print(f"{'páginas':>8}{'amostra (s)':>13}{'lidas':>7}{'completa (s)':>14}{'lidas':>7}")
+        for pages in sizes:
+            pdf_path = Path(tmp) / f"relatorio_{pages}.pdf"
+            generate_report(pdf_path, pages=pages)
+            amostra, lidas_amostra = timed_analysis(converter, pdf_path, full=False)
+            completa, lidas_completa = timed_analysis(converter, pdf_path, full=True)
+            print(f"{pages:>8}{amostra:>13.3f}{lidas_amostra:>7}{completa:>14.3f}{lidas_completa:>7}")
+
+
+if __name__ == "__main__":
+    import logging
+    logging.disable(logging.INFO)
+    main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Benchmark dos backends de extração: latência por página (média, p50, p95) e
+tempo total de conversão do mesmo PDF com cada backend.
+
+Uso: python benchmarks/bench_backends.py [paginas]
+"""
+
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from extraction_backends import BACKENDS  # noqa: E402
+from pdf_converter import PDFConverter  # noqa: E402
+from synthetic_pdf import generate_report  # noqa: E402
+
+
+def page_latencies(backend_class, pdf_path: Path):
+    backend = backend_class(pdf_path)
+    latencias = []
+    try:
+        for index in range(backend.page_count):
+            inicio = time.perf_counter()
+            backend.parse_page(index)
+            latencias.append(time.perf_counter() - inicio)
+    finally:
+        backend.close()
+    return latencias
+
+
+def main():
+    pages = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = Path(tmp) / "src"
+        generate_report(source / "relatorio.pdf", pages=pages)
+
+        print(f"PDF sintético com {pages} páginas")
+        print(f"{'backend':<12}{'média (ms)':>12}{'p50 (ms)':>10}{'p95 (ms)':>10}{'conversão (s)':>15}")
+        for name in (*BACKENDS, 'auto'):
+            if name in BACKENDS:
+                latencias = sorted(page_latencies(BACKENDS[name], source / "relatorio.pdf"))
+                por_pagina = (f"{statistics.mean(latencias) * 1000:>12.1f}"
+                              f"{latencias[len(latencias) // 2] * 1000:>10.1f}"
+                              f"{latencias[int(len(latencias) * 0.95)] * 1000:>10.1f}")
+            else:
+                por_pagina = f"{'-':>12}{'-':>10}{'-':>10}"
+            converter = PDFConverter(str(source), str(Path(tmp) / name), backend=name)
+            inicio = time.perf_counter()
+            converter.convert_pdf("relatorio.pdf")
+            print(f"{name:<12}{por_pagina}{time.perf_counter() - inicio:>15.2f}")
+
+
+if __name__ == "__main__":
+    import logging
+    logging.disable(logging.INFO)
+    main()
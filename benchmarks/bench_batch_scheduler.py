@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Benchmark do agendamento do lote por páginas (batch_scheduler).
+
+Monta um lote com vários PDFs pequenos e um gigante no fim da ordem da pasta
+e compara o tempo total do lote (makespan) com N processos:
+
+- ordem da pasta: o BatchRunner, um arquivo por processo na ordem de entrada
+- agendado: o BatchScheduler, do maior para o menor, com o gigante extraído
+  em faixas
+
+Confere que as saídas são idênticas e mostra a precisão da previsão de
+término do agendador ao longo do lote (erro da previsão em relação ao fim
+real, a cada evento de progresso).
+
+O ganho depende dos núcleos livres: com um núcleo só, os processos dividem
+a mesma CPU e a ordem pouco muda o tempo total.
+
+Uso: python benchmarks/bench_batch_scheduler.py [processos] [pequenos] [paginas_pequenos] [paginas_gigante] [faixa]
+     python benchmarks/bench_batch_scheduler.py 4 12 20 400 100
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from batch_runner import BatchRunner  # noqa: E402
+from batch_scheduler import BatchScheduler, count_pages  # noqa: E402
+from pdf_converter import PDFConverter  # noqa: E402
+from synthetic_pdf import generate_report  # noqa: E402
+
+
+def main():
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    small = int(sys.argv[2]) if len(sys.argv) > 2 else 12
+    small_pages = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+    giant_pages = int(sys.argv[4]) if len(sys.argv) > 4 else 400
+    split_pages = int(sys.argv[5]) if len(sys.argv) > 5 else 100
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = Path(tmp) / "src"
+        pdf_files = []
+        for i in range(small):
+            generate_report(source / f"a_{i:03d}.pdf", pages=small_pages, seed=i)
+            pdf_files.append(f"a_{i:03d}.pdf")
+        # O gigante por último, como "z_" na ordem da pasta
+        generate_report(source / "z_gigante.pdf", pages=giant_pages, flow_across_pages=True)
+        pdf_files.append("z_gigante.pdf")
+        convert_kwargs = {'output_format': 'csv'}
+
+        inicio = time.perf_counter()
+        page_counts = [count_pages(source / pdf_file) for pdf_file in pdf_files]
+        counting = time.perf_counter() - inicio
+
+        naive_converter = PDFConverter(str(source), str(Path(tmp) / "pasta"))
+        inicio = time.perf_counter()
+        naive = BatchRunner(naive_converter, workers, None, convert_kwargs).run(pdf_files)
+        naive_time = time.perf_counter() - inicio
+
+        events = []
+        scheduled_converter = PDFConverter(str(source), str(Path(tmp) / "agenda"))
+        inicio = time.perf_counter()
+        scheduled = BatchScheduler(scheduled_converter, workers, None, convert_kwargs, split_pages=split_pages,
+                                   progress=events.append).run(pdf_files, page_counts)
+        scheduled_time = time.perf_counter() - inicio
+
+        for expected, result in zip(naive, scheduled):
+            assert expected['success'] and result['success'], (expected.get('error'), result.get('error'))
+            assert Path(result['output_file']).read_bytes() == Path(expected['output_file']).read_bytes(), \
+                f"saída diferente: {result['input_file']}"
+
+        print(f"{small} PDFs de {small_pages} páginas + 1 de {giant_pages} páginas, {workers} processos, "
+              f"faixas de {split_pages} páginas")
+        print(f"{'contagem de páginas':<22} {counting:>8.2f}s ({sum(page_counts)} páginas)")
+        print(f"{'ordem da pasta':<22} {naive_time:>8.2f}s")
+        print(f"{'agendado':<22} {scheduled_time:>8.2f}s ({naive_time / scheduled_time:.2f}x)")
+
+        # Erro da previsão de término em relação ao fim real do lote agendado
+        end = events[-1]['elapsed_seconds']
+        print(f"{'progresso':>9} {'decorrido':>10} {'previsto':>9} {'erro':>7}")
+        for event in events[:-1]:
+            forecast = event['elapsed_seconds'] + event['eta_seconds']
+            print(f"{event['pages_done'] / event['pages_total']:>9.0%} {event['elapsed_seconds']:>9.2f}s "
+                  f"{forecast:>8.2f}s {(forecast - end) / end:>+7.0%}")
+
+
+if __name__ == "__main__":
+    import logging
+    logging.disable(logging.INFO)
+    main()
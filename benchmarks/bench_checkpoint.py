@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Benchmark dos checkpoints da conversão: custo de gravar um checkpoint a cada
+bloco de páginas numa conversão inteira e tempo para terminar uma conversão
+interrompida em uma fração do documento, recomeçando do zero (sem
+checkpoint) x retomando do último bloco completo.
+
+Confere que a saída retomada é idêntica à da conversão sem interrupção.
+
+Uso: python benchmarks/bench_checkpoint.py [paginas] [paginas_por_bloco] [fracao_interrompida]
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from page_engine import PageEngine  # noqa: E402
+from pdf_converter import PDFConverter  # noqa: E402
+from synthetic_pdf import generate_report  # noqa: E402
+
+
+class Interrompido(BaseException):
+    """Processo encerrado no meio da extração"""
+
+
+def timed_conversion(converter: PDFConverter, pdf_file: str):
+    inicio = time.perf_counter()
+    result = converter.convert_pdf(pdf_file, output_format='csv')
+    assert result['success'], result.get('error')
+    return time.perf_counter() - inicio, Path(result['output_file']).read_bytes()
+
+
+def interrupt_at(converter: PDFConverter, pdf_file: str, page: int):
+    """Conversão encerrada ao chegar na página (índice a partir de 0)"""
+    parse_page = PageEngine._parse_page
+
+    def dying_parse_page(engine, index):
+        if index == page:
+            raise Interrompido()
+        return parse_page(engine, index)
+
+    with mock.patch.object(PageEngine, '_parse_page', dying_parse_page):
+        try:
+            converter.convert_pdf(pdf_file, output_format='csv')
+        except Interrompido:
+            return
+    raise RuntimeError("a conversão terminou antes da interrupção")
+
+
+def main():
+    pages = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    block_pages = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    fraction = float(sys.argv[3]) if len(sys.argv) > 3 else 0.9
+    interrupted_page = int(pages * fraction)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = Path(tmp) / "src"
+        generate_report(source / "longo.pdf", pages=pages, flow_across_pages=True)
+        plain = PDFConverter(str(source), str(Path(tmp) / "sem"))
+        checkpointed = PDFConverter(str(source), str(Path(tmp) / "com"), checkpoint_pages=block_pages)
+
+        # A primeira conversão também paga o import do pandas e do pdfplumber
+        timed_conversion(plain, "longo.pdf")
+        sem, expected = timed_conversion(plain, "longo.pdf")
+        com, output = timed_conversion(checkpointed, "longo.pdf")
+        assert output == expected, "a conversão com checkpoints mudou a saída"
+
+        interrupt_at(checkpointed, "longo.pdf", interrupted_page)
+        retomada, output = timed_conversion(checkpointed, "longo.pdf")
+        assert output == expected, "a conversão retomada mudou a saída"
+
+        print(f"{pages} páginas, blocos de {block_pages}, interrupção na página {interrupted_page + 1}")
+        print(f"{'conversão inteira sem checkpoints':<40} {sem:>8.2f}s")
+        print(f"{'conversão inteira com checkpoints':<40} {com:>8.2f}s ({(com / sem - 1) * 100:+.1f}%)")
+        print(f"{'depois da interrupção, do zero':<40} {sem:>8.2f}s")
+        print(f"{'depois da interrupção, retomando':<40} {retomada:>8.2f}s")
+
+
+if __name__ == "__main__":
+    import logging
+    logging.disable(logging.INFO)
+    main()
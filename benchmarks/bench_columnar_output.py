@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Benchmark da saída colunar: tamanho do arquivo e tempo de uma consulta típica
+(velocidade média por placa num intervalo de datas, com as coordenadas) lendo
+o CSV, que precisa ser reinterpretado, e lendo o Parquet tipado.
+
+Uso: python benchmarks/bench_columnar_output.py [registros]
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pandas as pd  # noqa: E402
+
+import columnar_output  # noqa: E402
+from pdf_converter import PDFConverter  # noqa: E402
+from synthetic_pdf import generate_lines  # noqa: E402
+
+HEADER = "Data/Hora Placa Evento Velocidade Localidade Motorista"
+START = pd.Timestamp("2020-03-01 06:00")
+END = pd.Timestamp("2020-03-02 18:00")
+
+
+def query_csv(path: Path) -> pd.Series:
+    df = pd.read_csv(path, encoding='utf-8-sig', dtype=str)
+    moments = pd.to_datetime(df['Data/Hora'], format=columnar_output.DATE_FORMAT)
+    coords = df['Localidade'].str.extract(columnar_output.LOCALITY_PATTERN)
+    df = df.assign(**{'Data/Hora': moments, 'Velocidade': pd.to_numeric(df['Velocidade']),
+                      'Latitude': pd.to_numeric(coords['lat'])})
+    df = df[(df['Data/Hora'] >= START) & (df['Data/Hora'] < END) & df['Latitude'].notna()]
+    return df.groupby('Placa')['Velocidade'].mean()
+
+
+def query_parquet(path: Path) -> pd.Series:
+    df = pd.read_parquet(path, columns=['Data/Hora', 'Placa', 'Velocidade', 'Latitude'])
+    df = df[(df['Data/Hora'] >= START) & (df['Data/Hora'] < END) & df['Latitude'].notna()]
+    return df.groupby('Placa', observed=True)['Velocidade'].mean()
+
+
+def best_of(func, repeat: int = 3) -> float:
+    tempos = []
+    for _ in range(repeat):
+        inicio = time.perf_counter()
+        func()
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos)
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    converter = PDFConverter()
+    lines = [line for record in generate_lines(rows, break_ratio=0.0) for line in record]
+    header, data_lines, _ = converter._scan_text_lines([HEADER + "\n" + "\n".join(lines)])
+    data_rows = converter._parse_data_lines(data_lines, len(converter._parse_header(header)))
+    df = converter._build_text_dataframes(header, data_rows)[0]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = Path(tmp) / "saida.csv"
+        parquet_path = Path(tmp) / "saida.parquet"
+        escrita = {
+            'csv': best_of(lambda: converter._write_csv(df, csv_path), 1),
+            'parquet': best_of(lambda: columnar_output.write_parquet(df, parquet_path), 1),
+        }
+        consulta = {'csv': best_of(lambda: query_csv(csv_path)),
+                    'parquet': best_of(lambda: query_parquet(parquet_path))}
+        tamanho = {'csv': csv_path.stat().st_size, 'parquet': parquet_path.stat().st_size}
+
+    print(f"{len(df)} registros")
+    print(f"{'formato':<10}{'tamanho (MB)':>14}{'escrita (s)':>13}{'consulta (s)':>14}")
+    for formato in ('csv', 'parquet'):
+        print(f"{formato:<10}{tamanho[formato] / 1e6:>14.2f}{escrita[formato]:>13.2f}{consulta[formato]:>14.3f}")
+
+
+if __name__ == "__main__":
+    main()
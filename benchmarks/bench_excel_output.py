@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Benchmark da saída Excel: pd.ExcelWriter (openpyxl completo) contra a pasta de
+trabalho somente escrita, com os registros divididos em várias tabelas.
+
+Cada escrita roda em um processo novo e informa linhas por segundo e o pico de
+memória residente durante a escrita (VmHWM, Linux) acima do que os DataFrames
+já ocupam. Com o lxml instalado o openpyxl o usa para gerar o XML das
+planilhas; o resultado informa se ele estava disponível.
+
+Uso: python benchmarks/bench_excel_output.py [registros] [tabelas]
+"""
+
+import gc
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from synthetic_pdf import generate_lines  # noqa: E402
+
+HEADER = "Data/Hora Placa Evento Velocidade Localidade Motorista"
+
+
+def build_tables(rows: int, tables: int):
+    from pdf_converter import PDFConverter
+
+    converter = PDFConverter()
+    lines = [line for record in generate_lines(rows, break_ratio=0.0) for line in record]
+    header, data_lines, _ = converter._scan_text_lines([HEADER + "\n" + "\n".join(lines)])
+    data_rows = converter._parse_data_lines(data_lines, len(converter._parse_header(header)))
+    df = converter._build_text_dataframes(header, data_rows)[0]
+
+    size = -(-len(df) // tables)
+    frames = []
+    for i in range(tables):
+        frame = df.iloc[i * size:(i + 1) * size].reset_index(drop=True)
+        frame.attrs['name'] = f"Página_{i + 1}_Tabela_1"
+        frames.append(frame)
+    return frames
+
+
+def write_pandas(frames, output_path: Path):
+    import pandas as pd
+
+    with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
+        for i, df in enumerate(frames):
+            df.to_excel(writer, sheet_name=df.attrs.get('name', f'Tabela_{i+1}')[:31], index=False)
+
+
+def write_only(frames, output_path: Path):
+    import excel_output
+
+    excel_output.write_workbook(frames, output_path)
+
+
+def status_mb(field: str) -> float:
+    """Campo de memória de /proc/self/status (Linux), em MB"""
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith(f'{field}:'):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def reset_peak_rss():
+    """Zera o pico de memória residente (VmHWM) para medir só a escrita"""
+    with open('/proc/self/clear_refs', 'w') as f:
+        f.write('5')
+
+
+def child(mode: str, rows: int, tables: int, output_path: str):
+    import openpyxl
+
+    frames = build_tables(rows, tables)
+    gc.collect()
+    # Memória dos DataFrames prontos; o pico do parse não entra na conta
+    base_mb = status_mb('VmRSS')
+    reset_peak_rss()
+    inicio = time.perf_counter()
+    (write_pandas if mode == 'pandas' else write_only)(frames, Path(output_path))
+    segundos = time.perf_counter() - inicio
+    print(json.dumps({
+        'rows': sum(len(df) for df in frames),
+        'seconds': segundos,
+        'base_mb': base_mb,
+        'peak_mb': status_mb('VmHWM'),
+        'size_mb': Path(output_path).stat().st_size / 1e6,
+        'lxml': openpyxl.LXML,
+    }))
+
+
+def measure(mode: str, rows: int, tables: int, output_path: Path) -> dict:
+    output = subprocess.run(
+        [sys.executable, __file__, "--child", mode, str(rows), str(tables), str(output_path)],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(rows: int, tables: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        results = {mode: measure(mode, rows, tables, Path(tmp) / f"{mode}.xlsx")
+                   for mode in ('pandas', 'somente_escrita')}
+
+    print(f"{rows} registros em {tables} planilhas (lxml: {'sim' if results['pandas']['lxml'] else 'não'})")
+    print(f"{'escrita':<17}{'linhas/s':>10}{'tempo (s)':>11}{'pico acima dos dados (MB)':>27}{'arquivo (MB)':>14}")
+    for mode, result in results.items():
+        print(f"{mode:<17}{result['rows'] / result['seconds']:>10.0f}{result['seconds']:>11.1f}"
+              f"{result['peak_mb'] - result['base_mb']:>27.1f}{result['size_mb']:>14.1f}")
+
+
+if __name__ == "__main__":
+    import logging
+    logging.disable(logging.INFO)
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        child(sys.argv[2], int(sys.argv[3]), int(sys.argv[4]), sys.argv[5])
+    else:
+        main(int(sys.argv[1]) if len(sys.argv) > 1 else 500000,
+             int(sys.argv[2]) if len(sys.argv) > 2 else 10)
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark da gramática de linhas contra a implementação anterior.
+
+Mede linhas por segundo no reparo de linhas quebradas (_process_broken_lines)
+e no parse dos registros (_parse_data_line), sem PDF no caminho.
+
+Uso: python benchmarks/bench_line_grammar.py [registros]
+"""
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from legacy_parser import LegacyLineParser  # noqa: E402
+from pdf_converter import PDFConverter  # noqa: E402
+from synthetic_pdf import generate_lines  # noqa: E402
+
+
+def best_of(func, repeat: int = 5) -> float:
+    tempos = []
+    for _ in range(repeat):
+        inicio = time.perf_counter()
+        func()
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos)
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    lines = [line for record in generate_lines(rows, break_ratio=0.2) for line in record]
+
+    parsers = {
+        'anterior': LegacyLineParser(),
+        'gramática': PDFConverter(),
+    }
+    repaired = parsers['anterior']._process_broken_lines(lines)
+
+    print(f"{len(lines)} linhas cruas, {len(repaired)} linhas reparadas")
+    print(f"{'implementação':<15}{'reparo (linhas/s)':>20}{'parse (linhas/s)':>20}")
+    for nome, parser in parsers.items():
+        reparo = best_of(lambda: parser._process_broken_lines(lines))
+        parse = best_of(lambda: [parser._parse_data_line(line, 6) for line in repaired])
+        print(f"{nome:<15}{len(lines) / reparo:>20,.0f}{len(repaired) / parse:>20,.0f}")
+
+
+if __name__ == "__main__":
+    main()
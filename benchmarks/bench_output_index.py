@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Benchmark do índice das saídas CSV (output_index).
+
+Monta uma pasta de saída sintética com N CSVs no formato da conversão (um mês
+de registros de várias placas por arquivo), indexa cada um como a conversão
+com --index faria e compara, para as consultas típicas, a leitura completa
+de todos os CSVs (pandas.read_csv + filtro) com OutputIndex.query, que só lê
+o índice e os trechos dos registros encontrados. Confere que os dois
+resultados são iguais e mostra o tempo de indexação e o tamanho dos índices.
+
+Uso: python benchmarks/bench_output_index.py [arquivos] [registros_por_arquivo] [placas]
+     python benchmarks/bench_output_index.py 100 50000 200
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from output_index import FILE_COLUMN, INDEX_SUFFIX, OutputIndex, build_index, to_minutes  # noqa: E402
+from record_buffer import date_minutes  # noqa: E402
+from synthetic_pdf import EVENTOS, LOCALIDADES  # noqa: E402
+
+
+def synthetic_output(rows: int, plates: int, month: int, seed: int) -> pd.DataFrame:
+    """Registros de um mês (2020) em texto, em ordem de Data/Hora, como numa saída da conversão"""
+    rng = np.random.default_rng(seed)
+    start = (np.datetime64(f"2020-{month:02d}-01") - np.datetime64("1970-01-01")).astype(np.int64) * 1440
+    minutes = np.sort(rng.integers(start, start + 28 * 1440, rows))
+    stamps = (minutes * 60).astype('datetime64[s]').astype(str)
+    events = np.array(EVENTOS, dtype=object)[rng.integers(0, len(EVENTOS), rows)]
+    speed = np.where(events == "Em Movimento", rng.integers(1, 111, rows), 0)
+    return pd.DataFrame({
+        'Data/Hora': [f"{s[8:10]}/{s[5:7]}/{s[:4]} {s[11:16]}" for s in stamps.tolist()],
+        'Placa': [f"PLC{code:04d}" for code in rng.integers(0, plates, rows).tolist()],
+        'Evento': events,
+        'Velocidade': speed.astype(str),
+        'Localidade': [f"{LOCALIDADES[i]} ({lat:.6f},{lon:.6f})" for i, lat, lon in
+                       zip(rng.integers(0, len(LOCALIDADES), rows).tolist(), rng.uniform(-27, -22, rows).tolist(),
+                           rng.uniform(-54, -47, rows).tolist())],
+        'Motorista': pd.NA,
+    })
+
+
+def full_scan(output_dir: Path, plate=None, start=None, end=None, event=None, speed_above=None) -> pd.DataFrame:
+    """A consulta sem índice: cada CSV lido inteiro e filtrado"""
+    frames = []
+    for path in sorted(output_dir.glob("*.csv")):
+        df = pd.read_csv(path, dtype=str, keep_default_na=False, na_values=[''], encoding='utf-8-sig')
+        mask = np.ones(len(df), dtype=bool)
+        if plate is not None:
+            mask &= (df['Placa'] == plate).to_numpy()
+        if event is not None:
+            mask &= (df['Evento'] == event).to_numpy()
+        if start is not None or end is not None:
+            minutes = date_minutes(df['Data/Hora'].fillna('').to_numpy(dtype=object))
+            if start is not None:
+                mask &= minutes >= to_minutes(start)
+            if end is not None:
+                mask &= minutes <= to_minutes(end, end=True)
+        if speed_above is not None:
+            mask &= (pd.to_numeric(df['Velocidade'], errors='coerce') > speed_above).to_numpy()
+        found = df[mask].reset_index(drop=True)
+        if len(found):
+            found.insert(0, FILE_COLUMN, path.name)
+            frames.append(found)
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=[FILE_COLUMN])
+
+
+def main():
+    files = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    rows = int(sys.argv[2]) if len(sys.argv) > 2 else 50000
+    plates = int(sys.argv[3]) if len(sys.argv) > 3 else 200
+
+    queries = {
+        'placa + 3 dias': {'plate': 'PLC0007', 'start': '10/03/2020', 'end': '12/03/2020'},
+        'placa (lote todo)': {'plate': 'PLC0007'},
+        'acima de 100 km/h': {'speed_above': 100},
+        'evento + 1 dia': {'event': 'Ligado', 'start': '15/06/2020 08:00', 'end': '15/06/2020 18:00'},
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        output_dir = Path(tmp)
+        indexing = 0.0
+        for i in range(files):
+            df = synthetic_output(rows, plates, month=i % 12 + 1, seed=i)
+            csv_path = output_dir / f"relatorio_{i:03d}.csv"
+            df.to_csv(csv_path, index=False, encoding='utf-8-sig')
+            inicio = time.perf_counter()
+            build_index(csv_path, df)
+            indexing += time.perf_counter() - inicio
+
+        csv_bytes = sum(path.stat().st_size for path in output_dir.glob("*.csv"))
+        index_bytes = sum(path.stat().st_size for path in output_dir.glob(f"*{INDEX_SUFFIX}"))
+        print(f"{files} CSVs, {files * rows} registros, {csv_bytes / 1e6:.1f} MB; índices: "
+              f"{index_bytes / 1e6:.1f} MB ({index_bytes / csv_bytes:.0%}), indexação {indexing:.2f}s")
+        print(f"{'consulta':<20} {'registros':>10} {'leitura completa':>17} {'índice':>9} {'ganho':>7}")
+
+        index = OutputIndex(output_dir)
+        for label, filters in queries.items():
+            inicio = time.perf_counter()
+            expected = full_scan(output_dir, **filters)
+            scan = time.perf_counter() - inicio
+            inicio = time.perf_counter()
+            found = index.query(**filters)
+            indexed = time.perf_counter() - inicio
+            pd.testing.assert_frame_equal(found, expected)
+            print(f"{label:<20} {len(found):>10} {scan:>16.2f}s {indexed:>8.3f}s {scan / indexed:>6.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Benchmark do motor de páginas: quantas vezes cada página é extraída por conversão.
+
+"Antes" reproduz, fixo aqui, o acesso ao pdfplumber do fluxo antigo: análise,
+extração de tabelas e extração de texto abriam o PDF cada uma por conta própria
+e percorriam todas as páginas. O texto extraído passa pelo parse atual e vira
+CSV, então a diferença medida é só a das aberturas e extrações. "Depois" usa
+convert_pdf, que compartilha um único PageEngine entre as três etapas.
+
+Uso: python benchmarks/bench_page_engine.py [paginas]
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pdfplumber  # noqa: E402
+import pdfplumber.page  # noqa: E402
+
+from pdf_converter import PDFConverter  # noqa: E402
+from synthetic_pdf import generate_report  # noqa: E402
+
+
+class PageCallCounter:
+    """Conta aberturas do PDF e chamadas a extract_text/extract_tables do pdfplumber"""
+
+    def __init__(self):
+        self.opens = 0
+        self.text_calls = 0
+        self.table_calls = 0
+
+    def __enter__(self):
+        self._open = pdfplumber.open
+        self._text = pdfplumber.page.Page.extract_text
+        self._tables = pdfplumber.page.Page.extract_tables
+        counter = self
+
+        def open_pdf(*args, **kwargs):
+            counter.opens += 1
+            return counter._open(*args, **kwargs)
+
+        def extract_text(page, *args, **kwargs):
+            counter.text_calls += 1
+            return counter._text(page, *args, **kwargs)
+
+        def extract_tables(page, *args, **kwargs):
+            counter.table_calls += 1
+            return counter._tables(page, *args, **kwargs)
+
+        pdfplumber.open = open_pdf
+        pdfplumber.page.Page.extract_text = extract_text
+        pdfplumber.page.Page.extract_tables = extract_tables
+        return self
+
+    def __exit__(self, *exc):
+        pdfplumber.open = self._open
+        pdfplumber.page.Page.extract_text = self._text
+        pdfplumber.page.Page.extract_tables = self._tables
+
+
+def run_legacy_flow(converter: PDFConverter, pdf_path: Path, output_path: Path):
+    """Fluxo anterior ao motor de páginas; não chama os métodos atuais, que já usam o PageEngine"""
+    # Análise: texto e tabelas de todas as páginas
+    with pdfplumber.open(pdf_path) as pdf:
+        for page in pdf.pages:
+            page.extract_text()
+            page.extract_tables()
+    # Extração de tabelas: nova abertura, tabelas de todas as páginas de novo
+    with pdfplumber.open(pdf_path) as pdf:
+        if any(page.extract_tables() for page in pdf.pages):
+            return
+    # Extração de texto: mais uma abertura e o texto de todas as páginas
+    with pdfplumber.open(pdf_path) as pdf:
+        texts = [page.extract_text() or "" for page in pdf.pages]
+
+    header, data_lines, _ = converter._scan_text_lines(texts)
+    layout = converter.layouts.for_header(header)
+    rows = converter._parse_data_lines(data_lines, len(converter._parse_header(header)), layout=layout)
+    converter.save_to_csv(converter._build_text_dataframes(header, rows), output_path)
+
+
+def main():
+    pages = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = Path(tmp) / "src"
+        generate_report(source / "relatorio.pdf", pages=pages)
+        # Conta chamadas ao pdfplumber: o backend automático trocaria para o pypdf2
+        converter = PDFConverter(str(source), str(Path(tmp) / "out"), backend="pdfplumber")
+
+        resultados = {}
+        for nome, executar in (
+            ("antes", lambda: run_legacy_flow(converter, source / "relatorio.pdf", Path(tmp) / "antes.csv")),
+            ("depois", lambda: converter.convert_pdf("relatorio.pdf")),
+        ):
+            with PageCallCounter() as counter:
+                inicio = time.perf_counter()
+                executar()
+                duracao = time.perf_counter() - inicio
+            resultados[nome] = (counter, duracao)
+
+    print(f"PDF sintético com {pages} páginas")
+    print(f"{'fluxo':<8}{'aberturas':>10}{'extract_text':>14}{'extract_tables':>16}{'tempo (s)':>11}")
+    for nome, (counter, duracao) in resultados.items():
+        print(f"{nome:<8}{counter.opens:>10}{counter.text_calls:>14}{counter.table_calls:>16}{duracao:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark do parse dos registros e da limpeza do DataFrame, das linhas já
+reparadas até o DataFrame limpo, em registros por segundo e pico de alocação
+(tracemalloc).
+
+- anterior: parse por token e limpeza com astype/strip/replace por coluna
+- str.extract: todas as linhas em uma Series e os campos extraídos de uma vez
+  com line_grammar.FIELDS_PATTERN, com as regras do parse em operações de coluna
+- atual: FIELDS_PATTERN por linha e limpeza em uma passagem por coluna
+
+Uso: python benchmarks/bench_parse_clean.py [registros]
+"""
+
+import gc
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pandas as pd  # noqa: E402
+
+import line_grammar  # noqa: E402
+from legacy_parser import LegacyLineParser  # noqa: E402
+from pdf_converter import PDFConverter  # noqa: E402
+from synthetic_pdf import generate_lines  # noqa: E402
+
+HEADERS = ['Data/Hora', 'Placa', 'Evento', 'Velocidade', 'Localidade', 'Motorista']
+
+
+def parse_legacy(lines):
+    legacy = LegacyLineParser()
+    rows = [row for row in (legacy._parse_data_line(line, 6) for line in lines) if row]
+    return legacy.clean_dataframe(pd.DataFrame(rows, columns=HEADERS))
+
+
+def parse_str_extract(lines):
+    converter = PDFConverter()
+    series = pd.Series(lines, dtype=object)
+    fields = series.str.extract(line_grammar.FIELDS_PATTERN)
+    has_speed = fields['speed'].notna()
+    single_tail = ~has_speed & fields['tail_locality'].isna()
+    valid = fields['plate'].notna() & ~(single_tail & fields['plate_number'].isna())
+    plate = fields['plate']
+    event = fields['event'].where(has_speed, fields['tail_event'])
+    locality = fields['locality'].where(has_speed, fields['tail_locality'].where(~single_tail, fields['tail_event']))
+    irregular = series.str.contains(r'\s\s|[^\S ]', regex=True)
+    if irregular.any():
+        plate, event, locality = (column.mask(irregular, column.str.split().str.join(' '))
+                                  for column in (plate, event, locality))
+    df = pd.DataFrame({
+        'Data/Hora': fields['date'], 'Placa': plate, 'Evento': event.fillna(''),
+        'Velocidade': fields['speed'].fillna('0'), 'Localidade': locality.fillna(''), 'Motorista': '',
+    })[valid].reset_index(drop=True)
+    return converter.clean_dataframe(df)
+
+
+def parse_current(lines):
+    converter = PDFConverter()
+    return converter.clean_dataframe(converter._records_frame(converter._parse_data_lines(lines, 6), HEADERS))
+
+
+def measure(func, lines):
+    gc.collect()
+    inicio = time.perf_counter()
+    result = func(lines)
+    segundos = time.perf_counter() - inicio
+    del result
+    gc.collect()
+    tracemalloc.start()
+    func(lines)
+    pico = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return segundos, pico
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    lines = [line for record in generate_lines(rows, break_ratio=0.0) for line in record]
+
+    expected = parse_legacy(lines[:20000])
+    for func in (parse_str_extract, parse_current):
+        pd.testing.assert_frame_equal(func(lines[:20000]), expected)
+
+    print(f"{len(lines)} linhas de dados")
+    print(f"{'implementação':<15}{'registros/s':>14}{'pico (MB)':>12}")
+    for nome, func in (('anterior', parse_legacy), ('str.extract', parse_str_extract), ('atual', parse_current)):
+        segundos, pico = measure(func, lines)
+        print(f"{nome:<15}{len(lines) / segundos:>14,.0f}{pico / 1e6:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Benchmark da memória dos registros parseados: lista de listas de textos
+(como era) contra o RecordBuffer em colunas compactas.
+
+Mede, das linhas de dados já reparadas até os registros prontos, a memória
+que fica retida por registro (tracemalloc), o tempo do parse e o tempo de
+montar o DataFrame limpo a partir dos registros. Os registros sintéticos têm
+coordenadas aleatórias, então toda localidade é distinta: é o pior caso para
+o dicionário da coluna Localidade.
+
+Uso: python benchmarks/bench_record_memory.py [registros]
+"""
+
+import gc
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pandas as pd  # noqa: E402
+
+from pdf_converter import PDFConverter  # noqa: E402
+from synthetic_pdf import generate_lines  # noqa: E402
+
+HEADER = "Data/Hora Placa Evento Velocidade Localidade Motorista"
+
+
+def measure(converter: PDFConverter, lines, compact: bool):
+    # Tempos sem o tracemalloc, que deixa as alocações bem mais lentas
+    gc.collect()
+    inicio = time.perf_counter()
+    rows = converter._parse_data_lines(lines, 6, compact=compact)
+    parse_seconds = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    df = converter._build_text_dataframes(HEADER, rows)[0]
+    build_seconds = time.perf_counter() - inicio
+    del rows
+
+    gc.collect()
+    tracemalloc.start()
+    rows = converter._parse_data_lines(lines, 6, compact=compact)
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return len(rows), df, retained, parse_seconds, build_seconds
+
+
+def main(rows: int):
+    converter = PDFConverter()
+    _, lines, _ = converter._scan_text_lines(
+        [HEADER + "\n" + "\n".join(line for record in generate_lines(rows, break_ratio=0.0) for line in record)]
+    )
+
+    results = {}
+    for nome, compact in (('lista de listas', False), ('RecordBuffer', True)):
+        count, df, retained, parse_seconds, build_seconds = measure(converter, lines, compact)
+        results[nome] = df
+        print(f"{nome:<17}{retained / count:>12.0f} bytes/registro{retained / 1e6:>10.1f} MB"
+              f"{parse_seconds:>10.2f}s parse{build_seconds:>8.2f}s DataFrame limpo")
+
+    pd.testing.assert_frame_equal(results['lista de listas'], results['RecordBuffer'])
+    print(f"{len(lines)} registros, DataFrames idênticos")
+
+
+if __name__ == "__main__":
+    import logging
+    logging.disable(logging.INFO)
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000)
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Teste de carga local do serviço assíncrono de conversão.
+
+Para cada nível de concorrência, N clientes simultâneos enviam o mesmo PDF
+sintético (em memória) até completar o total de requisições. Informa a
+latência p50/p99 por requisição, a vazão em requisições e páginas por
+segundo e quantas foram recusadas pela fila cheia. No modo stream informa
+também o tempo até o primeiro bloco de registros.
+
+Uso: python benchmarks/bench_service.py [páginas] [requisições] [concorrência ...]
+     python benchmarks/bench_service.py 20 32 1 4 16 --workers 4 --mode stream
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from conversion_service import ConversionService, ServiceOverloaded  # noqa: E402
+from synthetic_pdf import generate_report, page_count  # noqa: E402
+
+
+def percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+async def one_request(service: ConversionService, data: bytes, mode: str):
+    """(latência, tempo até o primeiro bloco) de uma requisição"""
+    inicio = time.perf_counter()
+    first = None
+    if mode == 'convert':
+        result = await service.convert(data)
+        if not result['success']:
+            raise RuntimeError(result['error'])
+    else:
+        async for _ in service.stream(data):
+            if first is None:
+                first = time.perf_counter() - inicio
+    return time.perf_counter() - inicio, first
+
+
+async def run_level(service: ConversionService, data: bytes, requests: int, concurrency: int, mode: str):
+    latencies, firsts = [], []
+    rejected = 0
+    queue = asyncio.Queue()
+    for _ in range(requests):
+        queue.put_nowait(None)
+
+    async def client():
+        nonlocal rejected
+        while not queue.empty():
+            queue.get_nowait()
+            try:
+                latency, first = await one_request(service, data, mode)
+            except ServiceOverloaded:
+                rejected += 1
+                continue
+            latencies.append(latency)
+            if first is not None:
+                firsts.append(first)
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return latencies, firsts, rejected, time.perf_counter() - inicio
+
+
+async def main(pages: int, requests: int, levels, workers: int, max_queue: int, mode: str):
+    with tempfile.TemporaryDirectory() as tmp:
+        data = generate_report(Path(tmp) / "relatorio.pdf", pages=pages, seed=7, break_ratio=0.2).read_bytes()
+
+    async with ConversionService(workers=workers, max_queue=max_queue) as service:
+        # Aquecimento: processos do pool iniciados e módulos importados
+        await asyncio.gather(*(one_request(service, data, mode) for _ in range(workers)))
+
+        print(f"{pages} páginas, {requests} requisições por nível, {workers} processos, fila {max_queue}, modo {mode}")
+        print(f"{'clientes':>9}{'p50 (s)':>10}{'p99 (s)':>10}{'1º bloco p50':>14}{'req/s':>8}{'páginas/s':>11}{'recusadas':>11}")
+        for concurrency in levels:
+            latencies, firsts, rejected, wall = await run_level(service, data, requests, concurrency, mode)
+            first = f"{statistics.median(firsts):.3f}" if firsts else "-"
+            print(f"{concurrency:>9}{percentile(latencies, 0.5):>10.3f}{percentile(latencies, 0.99):>10.3f}"
+                  f"{first:>14}{len(latencies) / wall:>8.2f}{len(latencies) * pages / wall:>11.1f}{rejected:>11}")
+
+
+if __name__ == "__main__":
+    import logging
+    logging.disable(logging.INFO)
+    parser = argparse.ArgumentParser(description="Teste de carga do serviço de conversão")
+    parser.add_argument("paginas", type=page_count, nargs="?", default=20)
+    parser.add_argument("requisicoes", type=int, nargs="?", default=32)
+    parser.add_argument("concorrencia", type=int, nargs="*", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--max-queue", type=int, default=32)
+    parser.add_argument("--mode", choices=("convert", "stream"), default="convert")
+    args = parser.parse_args()
+    asyncio.run(main(args.paginas, args.requisicoes, args.concorrencia, args.workers, args.max_queue, args.mode))
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Benchmark da partida a frio do conversor (python -X importtime).
+
+Cada medição é um processo novo do Python:
+
+- import pdf_converter: tempo acumulado do import (mediana das execuções) e
+  as dependências pesadas que ele já carregou (nenhuma deveria)
+- pdf_converter.py --help: tempo de relógio do processo inteiro
+- conversão de um PDF pequeno para CSV: quais dependências foram carregadas
+  (o openpyxl não deveria)
+
+Com --budget-ms o processo termina com código 1 se a mediana do import passar
+do orçamento ou se alguma dependência pesada for carregada antes da hora, para
+uso em CI.
+
+Uso: python benchmarks/bench_startup.py [--repeat 7] [--budget-ms 300]
+"""
+
+import argparse
+import json
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from synthetic_pdf import generate_report  # noqa: E402
+
+HEAVY_MODULES = ("numpy", "pandas", "openpyxl", "pdfplumber", "pyarrow")
+DEFAULT_REPEAT = 7
+DEFAULT_BUDGET_MS = 300
+
+_IMPORT_LINE = re.compile(r"import time:\s+\d+ \|\s+(\d+) \| (\S.*)$")
+
+# Dependências pesadas já executadas no fim do processo (as de lazy_module só quando usadas)
+_LOADED = (f"import json; from lazy_imports import is_loaded; "
+           f"print(json.dumps([m for m in {HEAVY_MODULES!r} if is_loaded(m)]))")
+
+
+def import_time_ms() -> float:
+    """Tempo acumulado do import do pdf_converter em um processo novo"""
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", "import pdf_converter"],
+                               cwd=ROOT, capture_output=True, text=True, check=True)
+    for line in completed.stderr.splitlines():
+        match = _IMPORT_LINE.match(line)
+        if match and match[2] == "pdf_converter":
+            return int(match[1]) / 1000
+    raise RuntimeError("pdf_converter não aparece na saída do -X importtime")
+
+
+def loaded_after(code: str):
+    completed = subprocess.run([sys.executable, "-c", f"{code}\n{_LOADED}"], cwd=ROOT, capture_output=True,
+                               text=True, check=True)
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def help_seconds() -> float:
+    inicio = time.perf_counter()
+    subprocess.run([sys.executable, "pdf_converter.py", "--help"], cwd=ROOT, capture_output=True, check=True)
+    return time.perf_counter() - inicio
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Partida a frio do pdf_converter")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT,
+                        help=f"Processos por medição; vale a mediana (padrão: {DEFAULT_REPEAT})")
+    parser.add_argument("--budget-ms", type=float, default=None,
+                        help=f"Falha se a mediana do import passar disso (sugestão: {DEFAULT_BUDGET_MS})")
+    args = parser.parse_args(argv)
+
+    imports = [import_time_ms() for _ in range(args.repeat)]
+    helps = [help_seconds() for _ in range(args.repeat)]
+    on_import = loaded_after("import pdf_converter")
+    with tempfile.TemporaryDirectory() as tmp:
+        generate_report(Path(tmp) / "src" / "pequeno.pdf", pages=1, rows_per_page=20)
+        on_csv = loaded_after(
+            f"from pdf_converter import PDFConverter\n"
+            f"assert PDFConverter({str(Path(tmp) / 'src')!r}, {str(Path(tmp) / 'out')!r})"
+            f".convert_pdf('pequeno.pdf', output_format='csv')['success']")
+
+    median = statistics.median(imports)
+    print(f"import pdf_converter: mediana {median:.1f} ms (mín. {min(imports):.1f}, máx. {max(imports):.1f})")
+    print(f"pdf_converter.py --help: mediana {statistics.median(helps) * 1000:.0f} ms")
+    print(f"Carregadas no import: {', '.join(on_import) or 'nenhuma'}")
+    print(f"Carregadas na conversão para CSV: {', '.join(on_csv) or 'nenhuma'}")
+
+    if args.budget_ms is None:
+        return 0
+    failures = []
+    if median > args.budget_ms:
+        failures.append(f"import de {median:.1f} ms acima do orçamento de {args.budget_ms:.0f} ms")
+    if on_import:
+        failures.append(f"o import carregou {', '.join(on_import)}")
+    if "openpyxl" in on_csv:
+        failures.append("a conversão para CSV carregou o openpyxl")
+    for failure in failures:
+        print(f"REGRESSÃO: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
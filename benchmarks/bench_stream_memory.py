@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Benchmark de memória da conversão em fluxo (--stream) contra a conversão completa.
+
+Cada conversão roda em um processo novo e informa o pico de memória residente
+(ru_maxrss). Na conversão completa o pico cresce com o número de páginas; em
+fluxo ele deve ficar praticamente constante.
+
+Uso: python benchmarks/bench_stream_memory.py [paginas ...]
+"""
+
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from synthetic_pdf import generate_report  # noqa: E402
+
+
+def child(source_dir: str, output_dir: str, stream: bool):
+    import logging
+
+    from pdf_converter import PDFConverter
+
+    logging.disable(logging.INFO)
+    converter = PDFConverter(source_dir, output_dir)
+    inicio = time.perf_counter()
+    result = converter.convert_pdf("relatorio.pdf", stream=stream)
+    print(json.dumps({
+        'success': result['success'],
+        'seconds': time.perf_counter() - inicio,
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }))
+
+
+def measure(source_dir: Path, output_dir: Path, stream: bool) -> dict:
+    output = subprocess.run(
+        [sys.executable, __file__, "--child", str(source_dir), str(output_dir), "1" if stream else "0"],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(page_counts):
+    print(f"{'páginas':>8}{'completa (MB)':>15}{'fluxo (MB)':>12}{'completa (s)':>14}{'fluxo (s)':>11}")
+    for pages in page_counts:
+        with tempfile.TemporaryDirectory() as tmp:
+            source = Path(tmp) / "src"
+            generate_report(source / "relatorio.pdf", pages=pages)
+            full = measure(source, Path(tmp) / "out_full", stream=False)
+            streamed = measure(source, Path(tmp) / "out_stream", stream=True)
+        print(f"{pages:>8}{full['peak_rss_mb']:>15.1f}{streamed['peak_rss_mb']:>12.1f}"
+              f"{full['seconds']:>14.2f}{streamed['seconds']:>11.2f}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        child(sys.argv[2], sys.argv[3], sys.argv[4] == "1")
+    else:
+        main([int(arg) for arg in sys.argv[1:]] or [50, 200, 400])
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Suíte de benchmarks reproduzível dos métodos públicos do PDFConverter.
+
+Para cada tamanho de documento (1 a 10 mil páginas) gera offline um relatório
+sintético com semente fixa, no layout exato que o conversor espera, e mede
+cada método público: a análise (amostrada e completa), as extrações, a escrita
+em fluxo, a limpeza, as três gravações, a API em memória (conversão, blocos em
+fluxo e serialização), as conversões de um arquivo e do lote e a consolidação
+do lote. O resultado vai para um JSON com o ambiente (versões, commit) e pode ser
+comparado com o JSON de uma execução anterior.
+
+Uso:
+  python benchmarks/bench_suite.py --pages 1 10 100 --output base.json
+  python benchmarks/bench_suite.py --pages 1 10 100 --baseline base.json --fail-on-regression
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from importlib import metadata
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from pdf_converter import CONVERTER_VERSION, PDFConverter  # noqa: E402
+from synthetic_pdf import generate_report, page_count  # noqa: E402
+
+SEED = 2020
+BREAK_RATIO = 0.2
+DEFAULT_PAGES = [1, 10, 100]
+DEFAULT_OUTPUT = Path(__file__).resolve().parent / "results" / "latest.json"
+PACKAGES = ("pdfplumber", "pandas", "numpy", "openpyxl", "PyPDF2", "pyarrow", "lxml")
+
+# Variação tolerada antes de uma medição contar como regressão (10%), e a
+# diferença mínima em segundos: nas medições curtas o ruído passa fácil de 10%
+DEFAULT_THRESHOLD = 0.10
+DEFAULT_MIN_DELTA = 0.05
+
+
+def environment() -> Dict:
+    """Versões e máquina em que a suíte rodou, para comparar execuções com cuidado"""
+    versions = {}
+    for package in PACKAGES:
+        try:
+            versions[package] = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            versions[package] = None
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'converter_version': CONVERTER_VERSION,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'packages': versions,
+        'date': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+    }
+
+
+def time_call(func: Callable, repeat: int) -> Dict:
+    tempos = []
+    for _ in range(repeat):
+        inicio = time.perf_counter()
+        func()
+        tempos.append(time.perf_counter() - inicio)
+    return {'min_seconds': round(min(tempos), 6), 'median_seconds': round(statistics.median(tempos), 6),
+            'runs': [round(tempo, 6) for tempo in tempos]}
+
+
+def method_cases(converter: PDFConverter, pdf_path: Path, output_dir: Path) -> Tuple[Dict[str, Callable], int]:
+    """Uma chamada por método público, com as entradas já preparadas, e o número de registros"""
+    header, rows = converter._extract_text_rows(pdf_path)
+    raw = converter._records_frame(rows, converter._parse_header(header))
+    dataframes = converter.extract_text_as_table(pdf_path)
+    pdf_bytes = pdf_path.read_bytes()
+    # Saída em CSV já convertida para a consolidação
+    batch = [converter.convert_pdf(pdf_path.name, output_format='csv')]
+
+    cases = {
+        'analyze_pdf_content': lambda: converter.analyze_pdf_content(pdf_path),
+        'analyze_pdf_content[full]': lambda: converter.analyze_pdf_content(pdf_path, full=True),
+        'extract_tables_from_pdf': lambda: converter.extract_tables_from_pdf(pdf_path),
+        'extract_text_as_table': lambda: converter.extract_text_as_table(pdf_path),
+        'stream_text_to_csv': lambda: converter.stream_text_to_csv(pdf_path, output_dir / "fluxo.csv"),
+        'clean_dataframe': lambda: converter.clean_dataframe(raw),
+        'save_to_csv': lambda: converter.save_to_csv(dataframes, output_dir / "dados.csv"),
+        'save_to_excel': lambda: converter.save_to_excel(dataframes, output_dir / "dados.xlsx"),
+        'save_to_parquet': lambda: converter.save_to_parquet(dataframes, output_dir / "dados.parquet"),
+        'convert_source': lambda: converter.convert_source(pdf_bytes, 'csv', name=pdf_path.name),
+        'iter_source_batches': lambda: sum(len(chunk) for chunk in converter.iter_source_batches(pdf_bytes)),
+        'serialize': lambda: converter.serialize(dataframes, 'csv'),
+        'convert_pdf': lambda: converter.convert_pdf(pdf_path.name),
+        'convert_all_pdfs': lambda: converter.convert_all_pdfs(),
+        'merge_outputs': lambda: converter.merge_outputs(batch),
+    }
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        del cases['save_to_parquet']
+    return cases, len(dataframes[0])
+
+
+def run_suite(page_counts: List[int], repeat: int = 3, backend: str = 'auto',
+              methods: Optional[List[str]] = None) -> Dict:
+    """Executa a suíte e devolve o relatório (ambiente, configuração e medições)"""
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for pages in page_counts:
+            source = Path(tmp) / f"src_{pages}"
+            pdf_path = generate_report(source / "relatorio.pdf", pages=pages, seed=SEED, break_ratio=BREAK_RATIO)
+            output_dir = Path(tmp) / f"out_{pages}"
+            converter = PDFConverter(str(source), str(output_dir), backend=backend)
+            cases, rows = method_cases(converter, pdf_path, output_dir)
+
+            for method, func in cases.items():
+                if methods and method.split('[')[0] not in methods:
+                    continue
+                timing = time_call(func, repeat)
+                results.append({'method': method, 'pages': pages, 'rows': rows, **timing,
+                                'pages_per_second': round(pages / timing['min_seconds'], 2)})
+                print(f"{method:<28}{pages:>7} páginas {timing['min_seconds']:>10.4f}s", file=sys.stderr)
+
+    return {
+        'environment': environment(),
+        'config': {'pages': page_counts, 'repeat': repeat, 'backend': backend,
+                   'seed': SEED, 'break_ratio': BREAK_RATIO},
+        'results': results,
+    }
+
+
+def compare(current: Dict, baseline: Dict, threshold: float = DEFAULT_THRESHOLD,
+            min_delta: float = DEFAULT_MIN_DELTA) -> List[Dict]:
+    """Compara o menor tempo de cada (método, páginas) presente nas duas execuções
+
+    status: 'regressao' se ficou mais lento que a tolerância, 'melhora' se
+    ficou mais rápido na mesma proporção, 'igual' caso contrário. Diferenças
+    abaixo de min_delta segundos contam sempre como 'igual'.
+    """
+    reference = {(entry['method'], entry['pages']): entry for entry in baseline['results']}
+    comparison = []
+    for entry in current['results']:
+        before = reference.get((entry['method'], entry['pages']))
+        if before is None:
+            continue
+        ratio = entry['min_seconds'] / before['min_seconds'] if before['min_seconds'] > 0 else float('inf')
+        if abs(entry['min_seconds'] - before['min_seconds']) < min_delta:
+            status = 'igual'
+        elif ratio > 1 + threshold:
+            status = 'regressao'
+        elif ratio < 1 / (1 + threshold):
+            status = 'melhora'
+        else:
+            status = 'igual'
+        comparison.append({'method': entry['method'], 'pages': entry['pages'],
+                           'baseline_seconds': before['min_seconds'], 'current_seconds': entry['min_seconds'],
+                           'ratio': round(ratio, 3), 'status': status})
+    return comparison
+
+
+def print_comparison(comparison: List[Dict], baseline: Dict):
+    commit = baseline['environment'].get('commit') or '?'
+    print(f"Comparação com a base {commit[:12]}")
+    print(f"{'método':<28}{'páginas':>8}{'base (s)':>11}{'atual (s)':>11}{'razão':>8}  status")
+    for row in comparison:
+        print(f"{row['method']:<28}{row['pages']:>8}{row['baseline_seconds']:>11.4f}"
+              f"{row['current_seconds']:>11.4f}{row['ratio']:>8.2f}  {row['status']}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Suíte de benchmarks do PDFConverter")
+    parser.add_argument("--pages", type=page_count, nargs="+", default=DEFAULT_PAGES,
+                        help=f"Tamanhos de documento em páginas (padrão: {DEFAULT_PAGES})")
+    parser.add_argument("--repeat", type=int, default=3, help="Execuções por medição; vale a menor (padrão: 3)")
+    parser.add_argument("--backend", default="auto", help="Backend de extração (padrão: auto)")
+    parser.add_argument("--methods", nargs="+", help="Só estes métodos (padrão: todos)")
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT, help=f"JSON de saída (padrão: {DEFAULT_OUTPUT})")
+    parser.add_argument("--baseline", type=Path, help="JSON de uma execução anterior para comparar")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help=f"Tolerância antes de acusar regressão (padrão: {DEFAULT_THRESHOLD})")
+    parser.add_argument("--min-delta", type=float, default=DEFAULT_MIN_DELTA,
+                        help=f"Diferença mínima em segundos para acusar mudança (padrão: {DEFAULT_MIN_DELTA})")
+    parser.add_argument("--fail-on-regression", action="store_true",
+                        help="Sai com código 1 se alguma medição regredir além da tolerância")
+    args = parser.parse_args(argv)
+
+    report = run_suite(args.pages, args.repeat, args.backend, args.methods)
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"Resultados gravados em {args.output}")
+
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        comparison = compare(report, baseline, args.threshold, args.min_delta)
+        print_comparison(comparison, baseline)
+        if args.fail_on_regression and any(row['status'] == 'regressao' for row in comparison):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    import logging
+    logging.disable(logging.INFO)
+    sys.exit(main())
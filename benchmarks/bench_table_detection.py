@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Benchmark da detecção barata de tabelas: extração das páginas pelo pdfplumber
+procurando tabelas em todas as páginas (antes) x só nas páginas com traçado
+(has_ruling), em um relatório só de texto e em um misto, com uma tabela de
+grade a cada N páginas.
+
+Mede o tempo total de extração, o tempo dentro de extract_tables e as páginas
+procuradas x puladas, e confere que as tabelas encontradas são as mesmas.
+
+Uso: python benchmarks/bench_table_detection.py [paginas] [tabela_a_cada]
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pdfplumber  # noqa: E402
+
+import extraction_backends  # noqa: E402
+from extraction_backends import PdfplumberBackend  # noqa: E402
+from synthetic_pdf import generate_report  # noqa: E402
+
+
+def extract(pdf_path: Path, detect: bool):
+    """(tabelas por página, tempo total, tempo em extract_tables, procuradas, puladas)"""
+    gasto = [0.0]
+    original = pdfplumber.page.Page.extract_tables
+
+    def timed_extract_tables(page, *args, **kwargs):
+        inicio = time.perf_counter()
+        try:
+            return original(page, *args, **kwargs)
+        finally:
+            gasto[0] += time.perf_counter() - inicio
+
+    ruling = extraction_backends.has_ruling if detect else (lambda objects: True)
+    with mock.patch.object(pdfplumber.page.Page, 'extract_tables', timed_extract_tables), \
+            mock.patch.object(extraction_backends, 'has_ruling', ruling):
+        inicio = time.perf_counter()
+        backend = PdfplumberBackend(pdf_path)
+        try:
+            tables = [backend.parse_page(index).tables for index in range(backend.page_count)]
+        finally:
+            backend.close()
+        total = time.perf_counter() - inicio
+    return tables, total, gasto[0], backend.table_pages_scanned, backend.table_pages_skipped
+
+
+def main():
+    pages = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    table_every = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    with tempfile.TemporaryDirectory() as tmp:
+        reports = {
+            'só texto': generate_report(Path(tmp) / "texto.pdf", pages=pages),
+            f'misto (tabela a cada {table_every})': generate_report(Path(tmp) / "misto.pdf", pages=pages,
+                                                                    table_every=table_every),
+        }
+        print(f"{'relatório':<26} {'modo':<10} {'total':>8} {'tabelas':>9} {'procuradas':>11} {'puladas':>8}")
+        for label, pdf_path in reports.items():
+            before = extract(pdf_path, detect=False)
+            after = extract(pdf_path, detect=True)
+            assert before[0] == after[0], "a detecção mudou as tabelas encontradas"
+            for mode, (_, total, tables_time, scanned, skipped) in (('antes', before), ('detecção', after)):
+                print(f"{label:<26} {mode:<10} {total:>7.2f}s {tables_time:>8.3f}s {scanned:>11} {skipped:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Benchmark do pós-processamento de viagens (trip_analysis).
+
+Monta um DataFrame limpo sintético, no formato da extração (todas as colunas
+em texto), com N registros de várias placas, e mede:
+
+- as coordenadas da Localidade (trip_analysis.parse_coordinates, vetorizada
+  sobre o buffer de bytes das localidades)
+- o TripAnalyzer.process completo: coordenadas, datas, deduplicação,
+  intervalos, distâncias, viagens e o resumo por placa
+
+Uso: python benchmarks/bench_trips.py [registros] [placas]
+     python benchmarks/bench_trips.py 10000000 500
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from trip_analysis import TripAnalyzer, parse_coordinates  # noqa: E402
+from synthetic_pdf import EVENTOS, LOCALIDADES  # noqa: E402
+
+# Coordenadas distintas sorteadas para as localidades
+COORDINATE_POOL = 200000
+
+
+def synthetic_frame(rows: int, plates: int, seed: int = 7) -> pd.DataFrame:
+    """Registros em texto: cada placa anda no tempo em passos de 1 a 15 minutos, com 1% de pings repetidos"""
+    rng = np.random.default_rng(seed)
+    plate = rng.integers(0, plates, rows)
+    step = rng.integers(1, 16, rows)
+    order = np.argsort(plate, kind='stable')
+    minutes = np.empty(rows, dtype=np.int64)
+    minutes[order] = np.cumsum(step[order])
+    start = np.r_[0, np.flatnonzero(np.diff(plate[order])) + 1]
+    minutes[order] -= np.repeat(minutes[order][start], np.diff(np.r_[start, rows]))
+    minutes += 26_000_000  # 2019
+
+    days, minute_of_day = np.divmod(minutes, 1440)
+    unique_days, day_codes = np.unique(days, return_inverse=True)
+    day_texts = np.array([f"{iso[8:10]}/{iso[5:7]}/{iso[:4]}"
+                          for iso in unique_days.astype('datetime64[D]').astype(str).tolist()], dtype=object)
+    times = np.array([f" {m // 60:02d}:{m % 60:02d}" for m in range(1440)], dtype=object)
+
+    pool = np.array([f" ({lat:.6f},{lon:.6f})" for lat, lon in
+                     zip(rng.uniform(-27, -22, COORDINATE_POOL), rng.uniform(-54, -47, COORDINATE_POOL))],
+                    dtype=object)
+    events = np.array(EVENTOS, dtype=object)[rng.integers(0, len(EVENTOS), rows)]
+    speeds = np.array([str(speed) for speed in range(111)], dtype=object)
+    moving = events == "Em Movimento"
+    speed = np.where(moving, speeds[rng.integers(1, 111, rows)], "0")
+
+    df = pd.DataFrame({
+        'Data/Hora': day_texts[day_codes] + times[minute_of_day],
+        'Placa': np.array([f"PLA{number:04d}" for number in range(plates)], dtype=object)[plate],
+        'Evento': events,
+        'Velocidade': speed,
+        'Localidade': np.array(LOCALIDADES, dtype=object)[rng.integers(0, len(LOCALIDADES), rows)]
+                      + pool[rng.integers(0, COORDINATE_POOL, rows)],
+        'Motorista': pd.NA,
+    })
+    # Ping repetido: cópia do registro anterior
+    source = np.arange(rows)
+    source[1:] -= rng.random(rows - 1) < 0.01
+    return df.iloc[source].reset_index(drop=True)
+
+
+def timed(function, *args):
+    inicio = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - inicio
+
+
+def main(rows: int, plates: int):
+    print(f"Gerando {rows} registros de {plates} placas...")
+    df = synthetic_frame(rows, plates)
+
+    sample = df['Localidade'].iloc[:min(rows, 1000000)]
+    _, seconds = timed(parse_coordinates, sample)
+    print(f"Coordenadas de {len(sample)} localidades: {seconds:.2f}s ({len(sample) / seconds / 1e6:.2f} M/s)")
+
+    (registros, resumo), seconds = timed(TripAnalyzer().process, df)
+    print(f"Pós-processamento completo: {seconds:.2f}s ({rows / seconds / 1e6:.2f} M registros/s)")
+    print(f"{rows - len(registros)} pings repetidos removidos, {len(resumo)} viagens em {plates} placas")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark do pós-processamento de viagens")
+    parser.add_argument("registros", type=int, nargs="?", default=1000000)
+    parser.add_argument("placas", type=int, nargs="?", default=200)
+    args = parser.parse_args()
+    main(args.registros, args.placas)
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Gerador de PDFs sintéticos no layout dos relatórios de rastreamento Totalsat.
+
+Escreve o PDF diretamente (sem dependências externas), com uma linha de texto
+por registro, para que o pdfplumber devolva exatamente as linhas que o
+conversor espera, incluindo as quebras de coordenadas e localidades tratadas
+por PDFConverter._process_broken_lines.
+"""
+
+import random
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+
+HEADER = "Data/Hora Placa Evento Vel Localidade Motorista"
+
+PLACAS = ["AZU 8900", "BCD 1234", "MNO 4521", "QRS 7788", "XYZ 0042", "KLM 3310"]
+EVENTOS = ["Em Movimento", "Parado", "Desligado", "Ligado"]
+LOCALIDADES = [
+    "PARANAGUA - PR - AVENIDA AYRTON SENNA DA SILVA - BR-277",
+    "CURITIBA - PR - RUA XV DE NOVEMBRO",
+    "PONTA GROSSA - PR - RODOVIA DO CAFE - BR-376",
+    "JOINVILLE - SC - RUA DOUTOR JOAO COLIN",
+    "SAO JOSE DOS PINHAIS - PR - AVENIDA RUI BARBOSA",
+    "CASCAVEL - PR - RODOVIA BR-277 KM 585",
+]
+
+PAGE_WIDTH = 595
+PAGE_HEIGHT = 842
+FONT_SIZE = 7
+LINE_HEIGHT = 10
+MARGIN = 30
+
+# Maior documento aceito pela linha de comando e pelos benchmarks
+MAX_PAGES = 10000
+
+
+def generate_lines(rows: int, seed: int = 42, break_ratio: float = 0.1) -> List[List[str]]:
+    """Gera os registros como listas de linhas (uma ou duas linhas por registro)"""
+    rng = random.Random(seed)
+    timestamp = datetime(2020, 3, 1, 0, 5)
+    records = []
+
+    for _ in range(rows):
+        placa = rng.choice(PLACAS)
+        evento = rng.choice(EVENTOS)
+        velocidade = rng.randint(1, 110) if evento == "Em Movimento" else 0
+        localidade = rng.choice(LOCALIDADES)
+        lat = f"-{rng.uniform(22, 27):.6f}"
+        lon = f"-{rng.uniform(47, 54):.6f}"
+        prefixo = f"{timestamp:%d/%m/%Y %H:%M} {placa} {evento} {velocidade} {localidade}"
+        timestamp += timedelta(minutes=rng.randint(1, 15))
+
+        if rng.random() >= break_ratio:
+            records.append([f"{prefixo} ({lat},{lon})"])
+            continue
+
+        quebra = rng.randint(1, 3)
+        if quebra == 1:
+            # Quebra no início das coordenadas: "ENDEREÇO (-" + "25.123,-48.456)"
+            records.append([f"{prefixo} (-", f"{lat[1:]},{lon})"])
+        elif quebra == 2:
+            # Quebra no meio das coordenadas: "ENDEREÇO (-25.123,-" + "48.456)"
+            records.append([f"{prefixo} ({lat},-", f"{lon[1:]})"])
+        else:
+            # Localidade longa quebrada antes das coordenadas
+            records.append([prefixo, f"CENTRO ({lat},{lon})"])
+
+    return records
+
+
+def _escape(text: str) -> bytes:
+    text = text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+    return text.encode("latin-1", errors="replace")
+
+
+def _page_stream(lines: List[str]) -> bytes:
+    parts = []
+    y = PAGE_HEIGHT - MARGIN
+    for line in lines:
+        parts.append(b"BT /F1 %d Tf %d %d Td (" % (FONT_SIZE, MARGIN, y) + _escape(line) + b") Tj ET")
+        y -= LINE_HEIGHT
+    return b"\n".join(parts)
+
+
+def _table_stream(rows: List[List[str]], top: int) -> bytes:
+    """Tabela com grade (linhas e colunas traçadas) a partir da altura top"""
+    columns = max(len(row) for row in rows)
+    width = (PAGE_WIDTH - 2 * MARGIN) // columns
+    bottom = top - LINE_HEIGHT * len(rows)
+    parts = [b"0.5 w"]
+    for number in range(len(rows) + 1):
+        y = top - LINE_HEIGHT * number
+        parts.append(b"%d %d m %d %d l S" % (MARGIN, y, MARGIN + width * columns, y))
+    for number in range(columns + 1):
+        x = MARGIN + width * number
+        parts.append(b"%d %d m %d %d l S" % (x, top, x, bottom))
+    for number, row in enumerate(rows):
+        y = top - LINE_HEIGHT * (number + 1) + 3
+        for column, cell in enumerate(row):
+            parts.append(b"BT /F1 %d Tf %d %d Td (" % (FONT_SIZE, MARGIN + width * column + 2, y)
+                         + _escape(cell) + b") Tj ET")
+    return b"\n".join(parts)
+
+
+def summary_table(records: int) -> List[List[str]]:
+    """Tabela de resumo por placa, desenhada com grade nas páginas de tabela"""
+    return [["Placa", "Registros", "Km rodados"]] + [
+        [placa, str(records // len(PLACAS)), f"{(index + 1) * 12.5:.1f}"] for index, placa in enumerate(PLACAS)
+    ]
+
+
+def build_pdf(pages_lines: List[List[str]], tables: Optional[Dict[int, List[List[str]]]] = None) -> bytes:
+    """Monta um PDF mínimo com uma página por lista de linhas
+
+    tables acrescenta, abaixo das linhas da página de mesmo índice, uma tabela
+    com grade (o que o pdfplumber reconhece como tabela).
+    """
+    page_count = len(pages_lines)
+    # 1: catálogo, 2: árvore de páginas, 3: fonte, depois pares (página, conteúdo)
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+    ]
+    kids = []
+    for lines in pages_lines:
+        page_id = len(objects) + 1
+        content_id = page_id + 1
+        kids.append(b"%d 0 R" % page_id)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>"
+            % (PAGE_WIDTH, PAGE_HEIGHT, content_id)
+        )
+        stream = _page_stream(lines)
+        if tables and len(kids) - 1 in tables:
+            top = PAGE_HEIGHT - MARGIN - LINE_HEIGHT * (len(lines) + 1)
+            stream += b"\n" + _table_stream(tables[len(kids) - 1], top)
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+    objects[1] = b"<< /Type /Pages /Kids [" + b" ".join(kids) + b"] /Count %d >>" % page_count
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref_offset = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_offset)
+    return bytes(out)
+
+
+def paginate(records: List[List[str]], pages: int, rows_per_page: int, title: Optional[str],
+             flow_across_pages: bool = False, repeat_header: bool = True) -> List[List[str]]:
+    """Distribui os registros nas páginas, com título e cabeçalho no topo
+
+    Com flow_across_pages=True as linhas correm continuamente entre páginas, de
+    modo que um registro quebrado pode começar em uma página e terminar na
+    seguinte. Com repeat_header=False só a primeira página tem título e cabeçalho.
+    """
+    if flow_across_pages:
+        flat = [line for record in records for line in record]
+        chunks = [flat[page_num * rows_per_page:(page_num + 1) * rows_per_page] for page_num in range(pages)]
+        chunks[-1].extend(flat[pages * rows_per_page:])
+    else:
+        chunks = [
+            [line for record in records[page_num * rows_per_page:(page_num + 1) * rows_per_page] for line in record]
+            for page_num in range(pages)
+        ]
+
+    pages_lines = []
+    for page_num, chunk in enumerate(chunks):
+        lines = []
+        if page_num == 0 or repeat_header:
+            if title:
+                lines.append(f"{title} - Pagina {page_num + 1}")
+            lines.append(HEADER)
+        lines.extend(chunk)
+        pages_lines.append(lines)
+    return pages_lines
+
+
+def generate_report(output_path, pages: int = 10, rows_per_page: int = 40,
+                    seed: int = 42, break_ratio: float = 0.1,
+                    title: Optional[str] = "Relatorio de Posicoes - Totalsat",
+                    flow_across_pages: bool = False, repeat_header: bool = True,
+                    table_every: int = 0) -> Path:
+    """Gera um relatório sintético de rastreamento e retorna o caminho do PDF
+
+    Com table_every=N, uma a cada N páginas traz também uma tabela de resumo
+    com grade (relatório misto).
+    """
+    records = generate_lines(pages * rows_per_page, seed=seed, break_ratio=break_ratio)
+    pages_lines = paginate(records, pages, rows_per_page, title, flow_across_pages, repeat_header)
+    tables = {index: summary_table(rows_per_page) for index in range(table_every - 1, pages, table_every)
+              } if table_every else None
+
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    output_path.write_bytes(build_pdf(pages_lines, tables))
+    return output_path
+
+
+def page_count(value: str) -> int:
+    """Número de páginas aceito na linha de comando (1 a MAX_PAGES)"""
+    import argparse
+
+    pages = int(value)
+    if not 1 <= pages <= MAX_PAGES:
+        raise argparse.ArgumentTypeError(f"o número de páginas deve estar entre 1 e {MAX_PAGES}")
+    return pages
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Gera um relatório sintético de rastreamento Totalsat")
+    parser.add_argument("destino", nargs="?", default="sourcePdfs/sintetico.pdf")
+    parser.add_argument("paginas", nargs="?", type=page_count, default=10, help=f"1 a {MAX_PAGES} (padrão: 10)")
+    parser.add_argument("--linhas-por-pagina", type=int, default=40)
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--quebras", type=float, default=0.1, help="Fração de registros quebrados em duas linhas")
+    args = parser.parse_args()
+    destino = generate_report(args.destino, pages=args.paginas, rows_per_page=args.linhas_por_pagina,
+                              seed=args.semente, break_ratio=args.quebras)
+    print(f"PDF gerado: {destino}")
@@ -0,0 +1,214 @@
+"""
+Saída colunar tipada (Parquet).
+
+No CSV e no Excel tudo é texto. No Parquet as colunas do relatório de
+rastreamento ganham tipos reais:
+
+- Data/Hora: timestamp
+- Velocidade: inteiro
+- Placa e Evento: codificados por dicionário
+- Localidade: texto sem o sufixo de coordenadas, que vira as colunas
+  Latitude e Longitude (float)
+
+Os relatórios de outros layouts trazem os tipos do template em
+df.attrs['column_types'] (ver layout_templates). Colunas desconhecidas
+(tabelas genéricas) ficam como texto. O pyarrow é importado só quando a
+saída Parquet é usada.
+"""
+
+from __future__ import annotations
+
+from typing import List
+import os
+import re
+import logging
+
+import layout_templates
+import line_grammar
+from lazy_imports import lazy_module
+
+np = lazy_module('numpy')
+pd = lazy_module('pandas')
+
+logger = logging.getLogger(__name__)
+
+DATE_FORMAT = '%d/%m/%Y %H:%M'
+# Tipos pelo nome da coluna, quando o DataFrame não traz os do layout
+DEFAULT_COLUMN_TYPES = layout_templates.TOTALSAT.types
+PARQUET_COMPRESSION = 'zstd'
+
+# Localidade com as coordenadas finais opcionais: "CURITIBA - PR (-25.4284,-49.2733)"
+LOCALITY_PATTERN = (rf'^(?P<locality>.*?)\s*(?:\((?P<lat>{line_grammar.COORD}),'
+                    rf'(?P<lon>{line_grammar.COORD})\))?\s*$')
+# Coordenadas casadas a partir do último "(" da localidade
+COORDINATES_SUFFIX = re.compile(rf'\(({line_grammar.COORD}),({line_grammar.COORD})\)\s*$')
+DATE_TIME = re.compile(r'(\d{2})/(\d{2})/(\d{4})\s+(\d{2}):(\d{2})$')
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise RuntimeError("A saída Parquet requer o pacote pyarrow (pip install pyarrow)") from e
+    return pyarrow
+
+
+def _unique_names(columns) -> List[str]:
+    """Nomes de coluna em texto e sem repetição (exigência do Parquet)"""
+    names = []
+    seen = set()
+    for i, column in enumerate(columns):
+        name = str(column) if column is not None and str(column) else f'Coluna_{i+1}'
+        candidate = name
+        suffix = 2
+        while candidate in seen:
+            candidate = f'{name}_{suffix}'
+            suffix += 1
+        seen.add(candidate)
+        names.append(candidate)
+    return names
+
+
+def parse_dates(values) -> pd.Series:
+    """DD/MM/AAAA HH:MM em timestamp, via ISO 8601 (o parser em C do pandas)
+
+    Aceita espaços irregulares entre data e hora; o que não for data vira NaT.
+    Também usado pelo pós-processamento de viagens nas datas fora da forma canônica.
+    """
+    iso = []
+    for value in values:
+        if not isinstance(value, str):
+            iso.append(None)
+        elif len(value) == 16 and value[10] == ' ':
+            iso.append(f"{value[6:10]}-{value[3:5]}-{value[:2]}T{value[11:]}")
+        else:
+            # Espaços irregulares entre data e hora não invalidam a data
+            match = DATE_TIME.match(value)
+            iso.append(f"{match[3]}-{match[2]}-{match[1]}T{match[4]}:{match[5]}" if match else None)
+    return pd.Series(pd.to_datetime(iso, format='ISO8601', errors='coerce'))
+
+
+def split_localities(values) -> tuple:
+    """Separa o texto da localidade das coordenadas finais (latitude e longitude em float)
+
+    Retorna (localidades sem as coordenadas, latitudes, longitudes); sem o
+    sufixo "(lat,lon)" as coordenadas saem NaN. É a referência da leitura
+    vetorizada de trip_analysis.parse_coordinates, que recorre a ela nos
+    registros fora do formato comum.
+    """
+    localities = []
+    latitudes = []
+    longitudes = []
+    nan = float('nan')
+    for value in values:
+        match = COORDINATES_SUFFIX.match(value, value.rfind('(')) if isinstance(value, str) else None
+        if match:
+            localities.append(value[:match.start()].rstrip() or None)
+            latitudes.append(float(match[1]))
+            longitudes.append(float(match[2]))
+        else:
+            localities.append(value if isinstance(value, str) and value else None)
+            latitudes.append(nan)
+            longitudes.append(nan)
+    return (pd.Series(localities, dtype='string'),
+            np.array(latitudes, dtype='float64'), np.array(longitudes, dtype='float64'))
+
+
+def typed_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Converte as colunas de texto do DataFrame limpo para os tipos da saída colunar"""
+    column_types = df.attrs.get('column_types') or DEFAULT_COLUMN_TYPES
+    columns = {}
+    for name, (_, series) in zip(_unique_names(df.columns), df.items()):
+        if series.dtype != object and not isinstance(series.dtype, pd.StringDtype):
+            # Colunas já tipadas (as do pós-processamento de viagens) seguem como estão
+            columns[name] = series.reset_index(drop=True)
+            continue
+        values = series.tolist()
+        kind, _, date_format = column_types.get(name, layout_templates.TEXT).partition(':')
+        if kind == layout_templates.DATETIME and date_format:
+            columns[name] = pd.Series(pd.to_datetime(pd.Series(values, dtype='string'), format=date_format,
+                                                     errors='coerce'))
+        elif kind == layout_templates.DATETIME:
+            columns[name] = parse_dates(values)
+        elif kind == layout_templates.INT:
+            columns[name] = pd.to_numeric(pd.Series(values, dtype='string'), errors='coerce').astype('Int32')
+        elif kind == layout_templates.FLOAT:
+            columns[name] = pd.to_numeric(pd.Series(values, dtype='string'), errors='coerce').astype('float64')
+        elif kind == layout_templates.CATEGORY:
+            columns[name] = pd.Series(values, dtype='string').astype('category')
+        elif kind == layout_templates.LOCALITY:
+            columns[name], columns['Latitude'], columns['Longitude'] = split_localities(values)
+        else:
+            columns[name] = pd.Series(values, dtype='string')
+    typed = pd.DataFrame(columns)
+    typed.index = df.index
+    return typed
+
+
+def arrow_schema(typed: pd.DataFrame):
+    """Esquema fixo a partir das colunas tipadas, igual para todos os blocos de um arquivo"""
+    pa = _pyarrow()
+    fields = []
+    for name, dtype in typed.dtypes.items():
+        if isinstance(dtype, pd.CategoricalDtype):
+            # Índices int32 fixos: o número de placas de um bloco não muda o esquema
+            arrow_type = pa.dictionary(pa.int32(), pa.string())
+        elif pd.api.types.is_datetime64_any_dtype(dtype):
+            arrow_type = pa.timestamp('ns')
+        elif isinstance(dtype, pd.Int32Dtype):
+            arrow_type = pa.int32()
+        elif pd.api.types.is_integer_dtype(dtype):
+            arrow_type = pa.int64()
+        elif pd.api.types.is_float_dtype(dtype):
+            arrow_type = pa.float64()
+        else:
+            arrow_type = pa.string()
+        fields.append(pa.field(name, arrow_type))
+    return pa.schema(fields)
+
+
+def to_arrow_table(df: pd.DataFrame, schema=None):
+    """Tabela Arrow tipada; com schema, os blocos seguintes seguem o esquema do primeiro"""
+    pa = _pyarrow()
+    typed = typed_frame(df)
+    if schema is None:
+        schema = arrow_schema(typed)
+    return pa.Table.from_pandas(typed, schema=schema, preserve_index=False)
+
+
+def write_parquet(df: pd.DataFrame, output_path):
+    """Grava um DataFrame limpo como Parquet tipado (em um caminho ou objeto de arquivo binário)"""
+    pa = _pyarrow()
+    if isinstance(output_path, (str, os.PathLike)):
+        output_path = str(output_path)
+    pa.parquet.write_table(to_arrow_table(df), output_path, compression=PARQUET_COMPRESSION)
+
+
+class ParquetChunkWriter:
+    """Grava blocos sucessivos em um único arquivo Parquet (um row group por bloco)"""
+
+    def __init__(self, output_path):
+        self.output_path = output_path
+        self._writer = None
+        self._schema = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def write(self, df: pd.DataFrame):
+        pa = _pyarrow()
+        table = to_arrow_table(df, self._schema)
+        if self._writer is None:
+            self._schema = table.schema
+            self._writer = pa.parquet.ParquetWriter(str(self.output_path), self._schema,
+                                                    compression=PARQUET_COMPRESSION)
+        self._writer.write_table(table)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
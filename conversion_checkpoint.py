@@ -0,0 +1,144 @@
+"""
+Checkpoints da conversão de documentos longos.
+
+Um PDF de milhares de páginas que cai no meio da conversão (falta de memória,
+processo encerrado) voltaria a ser extraído desde a primeira página. Com
+checkpoints, a extração anda em blocos de N páginas e cada bloco concluído é
+gravado ao lado da saída, em output/.<nome>.checkpoint/:
+
+- bloco_NNNNN.bin: as páginas extraídas do bloco (texto e tabelas) e os
+  registros já convertidos das suas linhas de dados
+- estado.bin: a próxima página, o cabeçalho encontrado, a linha pendente de
+  _process_broken_lines (registro quebrado no fim do bloco) e as linhas de
+  dados anteriores ao cabeçalho
+
+Uma nova execução retoma do último bloco completo e o resultado é idêntico ao
+de uma conversão sem interrupção. A chave do checkpoint inclui o conteúdo do
+PDF, a versão do conversor, o backend, os layouts e o tamanho do bloco: com
+qualquer um deles diferente, o checkpoint é descartado. Os arquivos são
+gravados como no cache de extração (pickle comprimido, movido para o lugar
+de uma vez), e o estado só é gravado depois do bloco a que se refere.
+"""
+
+import hashlib
+import os
+import pickle
+import shutil
+import tempfile
+import zlib
+from pathlib import Path
+from typing import List, Optional, Tuple
+import logging
+
+from extraction_backends import PageContent
+from extraction_cache import file_digest
+
+logger = logging.getLogger(__name__)
+
+# Páginas por bloco, se o construtor não receber outro valor
+DEFAULT_CHECKPOINT_PAGES = 200
+# Sufixo da pasta do checkpoint, ao lado da saída (.<nome>.checkpoint)
+CHECKPOINT_SUFFIX = ".checkpoint"
+
+# Versão do formato dos arquivos; checkpoints de outra versão são descartados
+CHECKPOINT_FORMAT = 1
+
+_STATE_FILE = "estado.bin"
+
+
+class CheckpointState:
+    """Onde a extração parou e o que fica aberto para o bloco seguinte"""
+
+    __slots__ = ('next_page', 'blocks', 'header', 'pending', 'lines', 'table_scan')
+
+    def __init__(self, next_page: int = 0, blocks: int = 0, header: Optional[str] = None,
+                 pending: Optional[str] = None, lines: Optional[List[str]] = None,
+                 table_scan: Tuple[int, int] = (0, 0)):
+        # Primeira página ainda não extraída e blocos já gravados
+        self.next_page = next_page
+        self.blocks = blocks
+        # Primeira linha de cabeçalho do documento, se já apareceu
+        self.header = header
+        # Última linha de dados do bloco anterior, ainda aberta para a página seguinte
+        self.pending = pending
+        # Linhas de dados anteriores ao cabeçalho, convertidas quando ele aparecer
+        self.lines = lines if lines is not None else []
+        # (páginas com tabelas procuradas, páginas puladas sem traçado) até aqui
+        self.table_scan = table_scan
+
+
+class ConversionCheckpoint:
+    """Pasta de checkpoint de um PDF, com um arquivo por bloco de páginas"""
+
+    def __init__(self, directory, key: str, block_pages: int = DEFAULT_CHECKPOINT_PAGES):
+        if block_pages < 1:
+            raise ValueError(f"Bloco de checkpoint inválido: {block_pages} páginas")
+        self.directory = Path(directory)
+        self.key = key
+        self.block_pages = block_pages
+
+    @classmethod
+    def for_pdf(cls, pdf_path, directory, variant: str = "",
+                block_pages: int = DEFAULT_CHECKPOINT_PAGES) -> 'ConversionCheckpoint':
+        """Checkpoint do PDF: a chave junta o conteúdo do arquivo, a variante (versão, backend, layouts) e o bloco"""
+        key = hashlib.sha256(f"{variant}:{block_pages}:{file_digest(pdf_path)}".encode()).hexdigest()
+        return cls(directory, key, block_pages)
+
+    def _block_path(self, index: int) -> Path:
+        return self.directory / f"bloco_{index:05d}.bin"
+
+    def _read(self, path: Path):
+        return pickle.loads(zlib.decompress(path.read_bytes()))
+
+    def _write(self, path: Path, data):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(zlib.compress(pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)))
+            os.replace(tmp_name, path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+
+    def load(self) -> Tuple[CheckpointState, List[PageContent], list]:
+        """Estado gravado, páginas e registros de cada bloco completo (estado inicial se não houver)
+
+        Um checkpoint de outro PDF, versão ou configuração, ou ilegível, é
+        descartado e a extração começa do zero.
+        """
+        try:
+            cache_format, key, state = self._read(self.directory / _STATE_FILE)
+        except FileNotFoundError:
+            return CheckpointState(), [], []
+        except Exception as e:
+            logger.warning(f"Checkpoint ilegível, descartando {self.directory.name}: {e}")
+            self.discard()
+            return CheckpointState(), [], []
+        if cache_format != CHECKPOINT_FORMAT or key != self.key:
+            logger.info(f"Checkpoint de outra versão do PDF ou da configuração, descartando {self.directory.name}")
+            self.discard()
+            return CheckpointState(), [], []
+
+        pages, blocks = [], []
+        try:
+            for index in range(state.blocks):
+                block_pages, rows = self._read(self._block_path(index))
+                pages.extend(PageContent(*page) for page in block_pages)
+                blocks.append(rows)
+        except Exception as e:
+            logger.warning(f"Bloco de checkpoint ilegível, descartando {self.directory.name}: {e}")
+            self.discard()
+            return CheckpointState(), [], []
+        return state, pages, blocks
+
+    def save_block(self, state: CheckpointState, pages: List[PageContent], rows):
+        """Grava as páginas e os registros do bloco state.blocks e depois o estado que o inclui"""
+        self._write(self._block_path(state.blocks),
+                    ([(page.number, page.text, page.tables) for page in pages], rows))
+        state.blocks += 1
+        self._write(self.directory / _STATE_FILE, (CHECKPOINT_FORMAT, self.key, state))
+
+    def discard(self):
+        """Remove a pasta do checkpoint (conversão concluída ou checkpoint inválido)"""
+        shutil.rmtree(self.directory, ignore_errors=True)
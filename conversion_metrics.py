@@ -0,0 +1,267 @@
+"""
+Métricas por etapa das conversões.
+
+Cada conversão mede, por etapa (extração das páginas, linhas quebradas, parse
+dos registros, limpeza, gravação...), o tempo de relógio, o tempo de CPU e o
+número de chamadas. Os tempos são exclusivos: uma etapa que roda dentro de
+outra (a extração das páginas durante a análise, por exemplo) é descontada da
+etapa de fora, então a soma das etapas nunca passa do total da conversão. O
+que não cai em nenhuma etapa aparece como 'other'.
+
+O pico de memória é o da conversão nos processos dedicados a uma conversão
+por vez (dedicate_process: filhos do lote, workers do ConversionService e a
+linha de comando): no Linux o pico do processo (VmHWM) é zerado no início de
+cada uma. O VmHWM é do processo inteiro, então num processo que pode rodar
+conversões ao mesmo tempo (uma aplicação que usa o PDFConverter em threads,
+por exemplo) ele não é zerado; aí, ou onde o reset não é possível, vale o pico
+do processo inteiro e o relatório diz isso em 'peak_rss_scope'.
+
+O relatório de um arquivo ou de um lote é um dicionário que pode ser gravado
+em JSON ou no formato texto do Prometheus (para o textfile collector do
+node_exporter, por exemplo).
+"""
+
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Dict, List, Optional
+import logging
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+PROMETHEUS_PREFIX = 'totalsat_pdf'
+
+# Processo que roda uma conversão por vez: só nele o pico pode ser zerado
+_dedicated_process = False
+
+
+def dedicate_process():
+    """Marca o processo atual como dedicado a uma conversão por vez
+
+    A partir daí cada conversão zera o pico de memória do processo no início.
+    """
+    global _dedicated_process
+    _dedicated_process = True
+
+
+def reset_peak_rss() -> bool:
+    """Zera o pico de memória residente do processo (Linux); False se não for possível"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """Pico de memória residente desde o último reset_peak_rss (ou desde o início do processo)
+
+    None se indisponível.
+    """
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa em KB, macOS em bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class NullMetrics:
+    """Métricas desligadas: as etapas não medem nada"""
+
+    def stage(self, name: str):
+        return nullcontext()
+
+
+NULL_METRICS = NullMetrics()
+
+
+class ConversionMetrics:
+    """Tempos por etapa de uma conversão"""
+
+    def __init__(self):
+        self.stages: Dict[str, Dict] = {}
+        # Etapas abertas: [nome, tempo de relógio e de CPU das etapas internas]
+        self._stack: List[List] = []
+        self._started = time.perf_counter()
+        self._cpu_started = time.process_time()
+        # Pico medido só desta conversão ou, sem o reset, do processo inteiro
+        self._peak_scope = 'conversion' if _dedicated_process and reset_peak_rss() else 'process'
+
+    @contextmanager
+    def stage(self, name: str):
+        """Mede o bloco como a etapa name, descontando as etapas internas"""
+        if self._stack and self._stack[-1][0] == name:
+            # Mesma etapa aninhada (limpeza de um bloco que chama clean_dataframe)
+            yield
+            return
+        frame = [name, 0.0, 0.0]
+        self._stack.append(frame)
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall
+            cpu = time.process_time() - cpu
+            self._stack.pop()
+            stats = self.stages.setdefault(name, {'wall_seconds': 0.0, 'cpu_seconds': 0.0, 'calls': 0})
+            stats['wall_seconds'] += wall - frame[1]
+            stats['cpu_seconds'] += cpu - frame[2]
+            stats['calls'] += 1
+            if self._stack:
+                self._stack[-1][1] += wall
+                self._stack[-1][2] += cpu
+
+    def report(self, pages: int = 0, rows: int = 0, bytes_written: int = 0) -> Dict:
+        """Relatório da conversão: tempos totais e por etapa, vazão e memória"""
+        wall = time.perf_counter() - self._started
+        cpu = time.process_time() - self._cpu_started
+        stages = {name: {'wall_seconds': round(stats['wall_seconds'], 6),
+                         'cpu_seconds': round(stats['cpu_seconds'], 6),
+                         'calls': stats['calls']}
+                  for name, stats in self.stages.items()}
+        stages['other'] = {
+            'wall_seconds': round(max(0.0, wall - sum(s['wall_seconds'] for s in self.stages.values())), 6),
+            'cpu_seconds': round(max(0.0, cpu - sum(s['cpu_seconds'] for s in self.stages.values())), 6),
+            'calls': 1,
+        }
+        return {
+            'wall_seconds': round(wall, 6),
+            'cpu_seconds': round(cpu, 6),
+            'pages': pages,
+            'pages_per_second': round(pages / wall, 2) if wall > 0 else 0.0,
+            'rows': rows,
+            'rows_per_second': round(rows / wall, 2) if wall > 0 else 0.0,
+            'bytes_written': bytes_written,
+            'peak_rss_bytes': peak_rss_bytes(),
+            'peak_rss_scope': self._peak_scope,
+            'stages': stages,
+        }
+
+
+def batch_report(results: List[Dict], wall_seconds: float) -> Dict:
+    """Relatório de um lote: as métricas de cada arquivo e os totais
+
+    O tempo de relógio do lote é o informado (com vários processos ele é
+    menor que a soma dos arquivos); CPU, páginas, registros, bytes e etapas
+    são somados e o pico de memória é o maior entre os arquivos.
+    """
+    files = []
+    stages: Dict[str, Dict] = {}
+    totals = {'files': len(results), 'succeeded': 0, 'cpu_seconds': 0.0,
+              'pages': 0, 'rows': 0, 'bytes_written': 0, 'peak_rss_bytes': None}
+
+    for result in results:
+        metrics = result.get('metrics')
+        files.append({'input_file': result.get('input_file'), 'success': result['success'], 'metrics': metrics})
+        totals['succeeded'] += bool(result['success'])
+        if not metrics:
+            continue
+        for key in ('cpu_seconds', 'pages', 'rows', 'bytes_written'):
+            totals[key] += metrics[key]
+        if metrics['peak_rss_bytes'] is not None:
+            totals['peak_rss_bytes'] = max(totals['peak_rss_bytes'] or 0, metrics['peak_rss_bytes'])
+        for name, stats in metrics['stages'].items():
+            total = stages.setdefault(name, {'wall_seconds': 0.0, 'cpu_seconds': 0.0, 'calls': 0})
+            for key in total:
+                total[key] += stats[key]
+
+    totals['cpu_seconds'] = round(totals['cpu_seconds'], 6)
+    totals['wall_seconds'] = round(wall_seconds, 6)
+    totals['pages_per_second'] = round(totals['pages'] / wall_seconds, 2) if wall_seconds > 0 else 0.0
+    totals['rows_per_second'] = round(totals['rows'] / wall_seconds, 2) if wall_seconds > 0 else 0.0
+    totals['stages'] = {name: {key: round(value, 6) if key != 'calls' else value for key, value in stats.items()}
+                        for name, stats in stages.items()}
+    return {'files': files, 'totals': totals}
+
+
+def _label(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def prometheus_text(report: Dict) -> str:
+    """Relatório de lote no formato texto de exposição do Prometheus"""
+    metrics: Dict[str, List[str]] = {}
+    help_texts = {}
+
+    def add(name: str, help_text: str, value, **labels):
+        if value is None:
+            return
+        full_name = f'{PROMETHEUS_PREFIX}_{name}'
+        help_texts[full_name] = help_text
+        label_text = ','.join(f'{key}="{_label(val)}"' for key, val in labels.items())
+        metrics.setdefault(full_name, []).append(
+            f'{full_name}{{{label_text}}} {value}' if label_text else f'{full_name} {value}'
+        )
+
+    def add_conversion(metrics_dict: Dict, scope: str, **labels):
+        add(f'{scope}_wall_seconds', 'Tempo de relógio', metrics_dict['wall_seconds'], **labels)
+        add(f'{scope}_cpu_seconds', 'Tempo de CPU', metrics_dict['cpu_seconds'], **labels)
+        add(f'{scope}_pages', 'Páginas do documento', metrics_dict['pages'], **labels)
+        add(f'{scope}_pages_per_second', 'Páginas por segundo', metrics_dict['pages_per_second'], **labels)
+        add(f'{scope}_rows', 'Registros gravados', metrics_dict['rows'], **labels)
+        add(f'{scope}_rows_per_second', 'Registros por segundo', metrics_dict['rows_per_second'], **labels)
+        add(f'{scope}_bytes_written', 'Bytes gravados na saída', metrics_dict['bytes_written'], **labels)
+        add(f'{scope}_peak_rss_bytes', 'Pico de memória residente', metrics_dict['peak_rss_bytes'], **labels)
+        for stage, stats in metrics_dict['stages'].items():
+            add(f'{scope}_stage_wall_seconds', 'Tempo de relógio exclusivo da etapa',
+                stats['wall_seconds'], stage=stage, **labels)
+            add(f'{scope}_stage_cpu_seconds', 'Tempo de CPU exclusivo da etapa',
+                stats['cpu_seconds'], stage=stage, **labels)
+            add(f'{scope}_stage_calls', 'Execuções da etapa', stats['calls'], stage=stage, **labels)
+
+    for entry in report['files']:
+        add('file_success', 'Conversão concluída (1) ou com erro (0)', int(entry['success']),
+            file=entry['input_file'])
+        if entry['metrics']:
+            add_conversion(entry['metrics'], 'file', file=entry['input_file'])
+
+    totals = report['totals']
+    add('batch_files', 'Arquivos no lote', totals['files'])
+    add('batch_succeeded', 'Arquivos convertidos com sucesso', totals['succeeded'])
+    add_conversion(totals, 'batch')
+
+    lines = []
+    for name, samples in metrics.items():
+        lines.append(f'# HELP {name} {help_texts[name]}')
+        lines.append(f'# TYPE {name} gauge')
+        lines.extend(samples)
+    return '\n'.join(lines) + '\n'
+
+
+def _write_atomic(path, text: str):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.part")
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+def write_reports(report: Dict, json_path=None, prometheus_path=None):
+    """Grava o relatório em JSON e/ou no formato do Prometheus, substituindo o anterior"""
+    if json_path:
+        _write_atomic(json_path, json.dumps(report, ensure_ascii=False, indent=2))
+        logger.info(f"Métricas gravadas em {json_path}")
+    if prometheus_path:
+        _write_atomic(prometheus_path, prometheus_text(report))
+        logger.info(f"Métricas no formato Prometheus gravadas em {prometheus_path}")
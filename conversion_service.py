@@ -0,0 +1,265 @@
+"""
+Serviço assíncrono de conversão.
+
+Frente asyncio para usar o PDFConverter dentro de um serviço web: o trabalho
+de CPU vai para um pool de processos compartilhado e o laço de eventos só
+espera. Cada tarefa no pool ocupa uma vaga; sem vaga livre a requisição
+aguarda na fila, e a fila tem tamanho máximo: com ela cheia a requisição é
+recusada na hora com ServiceOverloaded (um 503 no HTTP), em vez de acumular
+trabalho que não vai ficar pronto a tempo.
+
+convert() devolve o resultado completo de convert_source. stream() divide o
+documento em faixas de páginas e entrega os registros limpos de cada faixa
+assim que ela termina, na ordem do documento, costurando as linhas quebradas
+entre faixas como a extração paralela por páginas. As duas aceitam um prazo
+em segundos e podem ser canceladas: as faixas que ainda não começaram são
+descartadas; a que já está em um processo termina e tem o resultado ignorado.
+
+O PDF em memória é copiado uma única vez para memória compartilhada e os
+processos leem dali, sem uma cópia por faixa.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+from typing import AsyncIterator, Dict, Optional, Tuple
+import logging
+
+from conversion_metrics import dedicate_process
+from lazy_imports import lazy_module
+from page_engine import PageEngine
+from page_parallel import ParallelPageExtractor, RangeStitcher, build_range_result, split_page_ranges
+from pdf_converter import PDFConverter
+from pdf_source import PdfSource, as_pdf_source
+
+# Só a costura das faixas no modo stream usa o pandas
+pd = lazy_module('pandas')
+
+logger = logging.getLogger(__name__)
+
+# Requisições aguardando vaga, além das que já estão no pool, antes de recusar
+DEFAULT_MAX_QUEUE = 32
+# Páginas por tarefa no modo stream: faixas menores entregam os primeiros registros antes
+DEFAULT_PAGES_PER_TASK = 10
+
+
+class ServiceOverloaded(Exception):
+    """Fila de espera cheia: a requisição foi recusada sem ser processada"""
+
+
+class SharedPdf:
+    """Referência a um PDF em memória compartilhada, enviada aos processos no lugar dos bytes"""
+
+    def __init__(self, shm_name: str, size: int, name: str):
+        self.shm_name = shm_name
+        self.size = size
+        self.name = name
+
+    @contextmanager
+    def attach(self):
+        shm = shared_memory.SharedMemory(name=self.shm_name)
+        view = shm.buf[:self.size]
+        try:
+            yield PdfSource(view, self.name)
+        finally:
+            # Os leitores dos backends já foram fechados com o motor de páginas
+            view.release()
+            shm.close()
+
+
+@contextmanager
+def _opened(pdf):
+    """PdfSource no processo do pool, a partir de um caminho ou de um SharedPdf"""
+    if isinstance(pdf, SharedPdf):
+        with pdf.attach() as source:
+            yield source
+    else:
+        yield as_pdf_source(pdf)
+
+
+def _convert_task(converter: PDFConverter, pdf, output_format: Optional[str]) -> Dict:
+    with _opened(pdf) as source:
+        return converter.convert_source(source, output_format)
+
+
+def _probe_task(converter: PDFConverter, pdf) -> Tuple[int, Optional[str], str, bool]:
+    """Número de páginas, cabeçalho, backend resolvido e se as páginas lidas têm tabelas"""
+    with _opened(pdf) as source, PageEngine(source, backend=converter.backend) as engine:
+        header = ParallelPageExtractor(converter, 1).find_header(engine)
+        has_tables = any(page.tables for page in engine.iter_pages(0, engine.pages_parsed))
+        return engine.page_count, header, engine.resolve_backend(), has_tables
+
+
+def _range_task(converter: PDFConverter, pdf, start: int, end: int, header: str, backend: str):
+    """Registros limpos de uma faixa de páginas, com as pontas abertas para a costura"""
+    with _opened(pdf) as source, PageEngine(source, cache_pages=False, backend=backend) as engine:
+        pages = list(engine.iter_pages(start, end))
+    if any(page.tables for page in pages):
+        return None
+    result = build_range_result(converter, start, pages, header)
+    # As páginas não voltam ao processo principal, só os registros
+    result.pages = []
+    result.rows = converter._clean_chunk(result.rows, converter._parse_header(header))
+    return result
+
+
+class ConversionService:
+    """Conversões assíncronas com concorrência limitada e fila com tamanho máximo
+
+    Uso:
+        async with ConversionService(workers=4) as service:
+            result = await service.convert(pdf_bytes, deadline=30)
+            async for chunk in service.stream(pdf_bytes):
+                ...
+    """
+
+    def __init__(self, converter: Optional[PDFConverter] = None, workers: Optional[int] = None,
+                 max_queue: int = DEFAULT_MAX_QUEUE, pages_per_task: int = DEFAULT_PAGES_PER_TASK):
+        # Só a API em memória é usada: a pasta de saída do conversor nunca é criada
+        self.converter = converter or PDFConverter()
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.max_queue = max_queue
+        self.pages_per_task = pages_per_task
+        self.requests = 0
+        self.rejected = 0
+        self._active = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    async def __aenter__(self):
+        self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    def start(self):
+        if self._executor is None:
+            # Cada processo do pool roda uma tarefa por vez: o pico de memória é por conversão
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=dedicate_process)
+            # Uma vaga por processo: o pool nunca tem tarefas esperando, a fila fica aqui
+            self._slots = asyncio.Semaphore(self.workers)
+
+    async def close(self):
+        if self._executor is not None:
+            executor, self._executor = self._executor, None
+            await asyncio.get_running_loop().run_in_executor(None, executor.shutdown)
+
+    @property
+    def active(self) -> int:
+        """Requisições aceitas e ainda não concluídas (rodando ou na fila)"""
+        return self._active
+
+    @contextmanager
+    def _admit(self):
+        if self._executor is None:
+            raise RuntimeError("Serviço de conversão não iniciado")
+        if self._active >= self.workers + self.max_queue:
+            self.rejected += 1
+            raise ServiceOverloaded(f"{self._active} conversões em andamento; tente novamente mais tarde")
+        self._active += 1
+        self.requests += 1
+        try:
+            yield
+        finally:
+            self._active -= 1
+
+    async def _submit(self, func, *args):
+        """Executa func no pool assim que houver vaga; cancelar antes de começar descarta a tarefa"""
+        loop = asyncio.get_running_loop()
+        await self._slots.acquire()
+        try:
+            future = self._executor.submit(func, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        # A vaga só volta quando o processo termina de fato, mesmo com a requisição cancelada
+        future.add_done_callback(lambda _: loop.call_soon_threadsafe(self._slots.release))
+        return await asyncio.wrap_future(future)
+
+    @contextmanager
+    def _shared(self, source, name: Optional[str]):
+        """Caminho do PDF, ou o conteúdo em memória copiado uma vez para memória compartilhada"""
+        pdf = as_pdf_source(source, name)
+        if not pdf.in_memory:
+            yield str(pdf.path)
+            return
+        with memoryview(pdf.buffer) as view, view.cast('B') as data:
+            size = len(data)
+            shm = shared_memory.SharedMemory(create=True, size=max(1, size))
+            shm.buf[:size] = data
+        try:
+            yield SharedPdf(shm.name, size, pdf.name)
+        finally:
+            shm.close()
+            shm.unlink()
+
+    async def convert(self, source, output_format: Optional[str] = None, name: Optional[str] = None,
+                      deadline: Optional[float] = None) -> Dict:
+        """Resultado de convert_source calculado no pool; deadline em segundos"""
+        with self._admit(), self._shared(source, name) as pdf:
+            return await asyncio.wait_for(self._submit(_convert_task, self.converter, pdf, output_format), deadline)
+
+    async def stream(self, source, name: Optional[str] = None,
+                     deadline: Optional[float] = None) -> AsyncIterator[pd.DataFrame]:
+        """Registros limpos de um relatório de texto, uma faixa de páginas por vez
+
+        Os blocos saem na ordem do documento, cada um assim que a sua faixa
+        termina. O prazo vale para o documento inteiro. Numa página com
+        tabelas a iteração para com ValueError (use convert).
+        """
+        loop = asyncio.get_running_loop()
+        limit = None if deadline is None else loop.time() + deadline
+
+        def remaining() -> Optional[float]:
+            return None if limit is None else max(0.0, limit - loop.time())
+
+        with self._admit(), self._shared(source, name) as pdf:
+            page_count, header, backend, has_tables = await asyncio.wait_for(
+                self._submit(_probe_task, self.converter, pdf), remaining())
+            if has_tables:
+                raise ValueError(f"{as_pdf_source(source, name).name} tem tabelas; use convert")
+            if not header:
+                return
+
+            converter = self.converter
+            stitcher = RangeStitcher(converter, len(converter._parse_header(header)),
+                                     converter.layouts.for_header(header))
+            ranges = deque(split_page_ranges(page_count, self.workers, self.pages_per_task))
+            # Poucas faixas adiantadas por requisição, para as outras também andarem
+            running: deque = deque()
+            try:
+                while ranges or running:
+                    while ranges and len(running) < self.workers:
+                        start, end = ranges.popleft()
+                        running.append(asyncio.ensure_future(
+                            self._submit(_range_task, converter, pdf, start, end, header, backend)))
+                    result = await asyncio.wait_for(running[0], remaining())
+                    running.popleft()
+                    if result is None:
+                        raise ValueError(f"{as_pdf_source(source, name).name} tem tabelas; use convert")
+
+                    chunk = self._joined(stitcher.seam(result), result.rows, header)
+                    if len(chunk):
+                        yield chunk
+
+                tail = stitcher.tail()
+                if tail is not None:
+                    chunk = self._joined(tail, None, header)
+                    if len(chunk):
+                        yield chunk
+            finally:
+                for task in running:
+                    task.cancel()
+
+    def _joined(self, seam, rows: Optional[pd.DataFrame], header: str) -> pd.DataFrame:
+        """Registro costurado na divisa das faixas (de RangeStitcher) seguido dos registros da faixa"""
+        if seam is None or not len(seam):
+            return rows
+        seam_df = self.converter._clean_chunk(seam, self.converter._parse_header(header))
+        return seam_df if rows is None else pd.concat([seam_df, rows], ignore_index=True)
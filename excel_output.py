@@ -0,0 +1,201 @@
+"""
+Saída Excel em modo somente escrita.
+
+O pd.ExcelWriter monta o modelo de objetos inteiro da pasta de trabalho no
+openpyxl (uma célula por valor) antes de gravar. Com muitas tabelas ou
+centenas de milhares de linhas isso leva minutos e gigabytes. Aqui a pasta de
+trabalho é aberta com write_only=True: cada linha é anexada à planilha e vai
+direto para o arquivo temporário da planilha, com memória constante.
+
+O resultado é o mesmo do pandas: cabeçalho em negrito com bordas, uma linha
+por registro, células vazias para valores ausentes. Os nomes das planilhas são
+limpos dos caracteres proibidos, limitados a 31 caracteres e nunca repetidos
+(o Excel não diferencia maiúsculas de minúsculas nos nomes).
+"""
+
+from __future__ import annotations
+
+import os
+from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, List, Optional
+import re
+import logging
+
+from lazy_imports import lazy_module
+
+# O openpyxl só é importado quando uma pasta de trabalho é gravada
+pd = lazy_module('pandas')
+
+if TYPE_CHECKING:
+    from openpyxl.cell import WriteOnlyCell
+
+logger = logging.getLogger(__name__)
+
+SHEET_NAME_LIMIT = 31
+# Linhas por planilha no formato xlsx, incluindo o cabeçalho
+MAX_SHEET_ROWS = 1048576
+# Linhas convertidas para valores do openpyxl de cada vez
+WRITE_BLOCK_ROWS = 20000
+
+INVALID_SHEET_CHARS = re.compile(r'[\[\]:*?/\\]')
+
+
+def sheet_names(names: Iterable[Optional[str]]) -> List[str]:
+    """Nomes válidos e únicos para as planilhas, na ordem recebida
+
+    Nomes ausentes viram Tabela_N. Quando o nome truncado em 31 caracteres já
+    foi usado, o final dá lugar a um sufixo _2, _3...
+    """
+    result = []
+    used = set()
+    for i, name in enumerate(names):
+        base = INVALID_SHEET_CHARS.sub('_', str(name)).strip("'") if name else ''
+        base = base or f'Tabela_{i+1}'
+        candidate = base[:SHEET_NAME_LIMIT]
+        suffix = 2
+        while candidate.casefold() in used:
+            tail = f'_{suffix}'
+            candidate = base[:SHEET_NAME_LIMIT - len(tail)] + tail
+            suffix += 1
+        used.add(candidate.casefold())
+        result.append(candidate)
+    return result
+
+
+@lru_cache(maxsize=None)
+def _header_style():
+    """Fonte, borda e alinhamento do cabeçalho, o mesmo estilo do DataFrame.to_excel"""
+    from openpyxl.styles import Alignment, Border, Font, Side
+
+    thin = Side(style='thin')
+    return (Font(bold=True), Border(left=thin, right=thin, top=thin, bottom=thin),
+            Alignment(horizontal='center', vertical='top'))
+
+
+def _header_row(sheet, columns) -> List[WriteOnlyCell]:
+    from openpyxl.cell import WriteOnlyCell
+
+    font, border, alignment = _header_style()
+    cells = []
+    for column in columns:
+        cell = WriteOnlyCell(sheet, value=None if column is None else column)
+        cell.font = font
+        cell.border = border
+        cell.alignment = alignment
+        cells.append(cell)
+    return cells
+
+
+def _rows(df: pd.DataFrame, block_rows: int = WRITE_BLOCK_ROWS):
+    """Linhas do DataFrame como tuplas, com None nos valores ausentes"""
+    for start in range(0, len(df), block_rows):
+        block = df.iloc[start:start + block_rows]
+        block = block.astype(object).where(block.notna(), None)
+        yield from block.itertuples(index=False, name=None)
+
+
+class ExcelWorkbookWriter:
+    """Pasta de trabalho somente escrita: planilhas e linhas gravadas em sequência
+
+    Uma planilha que chega ao limite de linhas do xlsx continua em outra com o
+    mesmo nome e sufixo (_2, _3...), repetindo o cabeçalho.
+    """
+
+    def __init__(self, output_path, max_sheet_rows: int = MAX_SHEET_ROWS):
+        self.output_path = output_path
+        self.max_sheet_rows = max_sheet_rows
+        from openpyxl import Workbook
+        self._workbook = Workbook(write_only=True)
+        self._used = []
+        self._sheet = None
+        self._sheet_name = None
+        self._columns = None
+        self._sheet_rows = 0
+        self._parts = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+    def _reserve_name(self, name: Optional[str]) -> str:
+        unique = sheet_names(self._used + [name])[-1]
+        self._used.append(unique)
+        return unique
+
+    def _open_sheet(self, title: str):
+        self._sheet = self._workbook.create_sheet(title=title)
+        self._sheet.append(_header_row(self._sheet, self._columns))
+        self._sheet_rows = 1
+
+    def add_sheet(self, name: Optional[str], columns):
+        """Começa uma planilha nova com o cabeçalho das colunas"""
+        self._sheet_name = self._reserve_name(name)
+        self._columns = list(columns)
+        self._parts = 1
+        self._open_sheet(self._sheet_name)
+
+    def write(self, df: pd.DataFrame):
+        """Anexa as linhas do DataFrame à planilha atual"""
+        for row in _rows(df):
+            if self._sheet_rows >= self.max_sheet_rows:
+                self._parts += 1
+                title = self._reserve_name(f'{self._sheet_name}_{self._parts}')
+                logger.info(f"Planilha {self._sheet_name} cheia, continuando em {title}")
+                self._open_sheet(title)
+            self._sheet.append(row)
+            self._sheet_rows += 1
+
+    def close(self):
+        if self._workbook is not None:
+            if not self._used:
+                # O xlsx precisa de ao menos uma planilha
+                self._workbook.create_sheet(title='Dados')
+            # Caminho ou objeto de arquivo binário (saída em memória)
+            target = self.output_path
+            is_path = isinstance(target, (str, os.PathLike))
+            try:
+                self._workbook.save(str(target) if is_path else target)
+            except BaseException:
+                self.discard()
+                if is_path:
+                    # Nada de xlsx pela metade no destino
+                    Path(target).unlink(missing_ok=True)
+                raise
+            self._workbook = None
+
+    def discard(self):
+        """Abandona a pasta de trabalho sem gravar, removendo os arquivos temporários das planilhas"""
+        if self._workbook is None:
+            return
+        for sheet in self._workbook.worksheets:
+            if getattr(sheet, '_writer', None) is None:
+                continue
+            try:
+                if not sheet.closed:
+                    # Fecha os elementos XML abertos e o arquivo da planilha
+                    sheet.close()
+                sheet._writer.cleanup()
+            except (OSError, ValueError):
+                # Planilha já gravada (e o temporário removido) pelo save que falhou
+                pass
+        self._workbook = None
+        self._sheet = None
+
+
+def table_name(df: pd.DataFrame) -> Optional[str]:
+    """Nome dado à tabela na extração (df.attrs['name'])"""
+    return df.attrs.get('name')
+
+
+def write_workbook(dataframes: List[pd.DataFrame], output_path):
+    """Grava cada DataFrame em uma planilha; um único DataFrame vai para 'Dados'"""
+    with ExcelWorkbookWriter(output_path) as writer:
+        for df in dataframes:
+            writer.add_sheet('Dados' if len(dataframes) == 1 else table_name(df), df.columns)
+            writer.write(df)
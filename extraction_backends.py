@@ -0,0 +1,283 @@
+"""
+Backends de extração das páginas usados pelo PageEngine.
+
+- pdfplumber: análise de layout completa, com texto e tabelas. É o backend de
+  referência.
+- pypdf2: lê só o fluxo de texto da página, sem montar os objetos de layout
+  caractere a caractere. Muito mais rápido, mas não detecta tabelas: as
+  páginas com traçado (page_has_ruling, lido dos operadores de desenho do
+  conteúdo) vão para o pdfplumber, então uma tabela em qualquer página do
+  documento continua sendo encontrada.
+
+No modo automático o PageEngine extrai as primeiras páginas com os dois e
+passa para o pypdf2 só se as linhas de texto forem idênticas e não houver
+tabelas nessas páginas.
+
+O pdfplumber só procura tabelas (extract_tables) nas páginas com traçado: a
+estratégia padrão dele monta as células a partir de linhas e retângulos, então
+uma página sem esses objetos (o caso dos relatórios de texto) não tem tabela
+a encontrar. has_ruling é a verificação barata, sobre os objetos que a
+extração do texto já leu.
+"""
+
+import re
+import warnings
+from typing import Dict, List, Optional, Sequence, Tuple, Type
+
+from lazy_imports import lazy_module
+from pdf_source import as_pdf_source
+
+# Carregado na abertura do primeiro PDF (um PDF do cache de extração nem chega a abrir)
+pdfplumber = lazy_module('pdfplumber')
+
+AUTO = 'auto'
+DEFAULT_BACKEND = 'pdfplumber'
+
+# Páginas comparadas entre os dois backends antes de escolher o rápido
+DEFAULT_SAMPLE_PAGES = 3
+
+# Comprimento mínimo de uma linha de tabela (o edge_min_length padrão do pdfplumber)
+MIN_EDGE_LENGTH = 3
+
+# Operadores que podem desenhar traçado: retângulo, segmentos de caminho e objetos externos
+_DRAWING_OPERATOR = re.compile(rb'(?:^|\s)(?:re|l|c|v|y|Do)(?=\s|$)')
+# Operadores que pintam ou descartam o caminho em construção
+_PATH_END_OPERATORS = frozenset([b'S', b's', b'f', b'F', b'f*', b'B', b'B*', b'b', b'b*', b'n'])
+
+
+class PageContent:
+    """Resultado da extração de uma página: texto e tabelas brutas"""
+
+    __slots__ = ('number', 'text', 'tables')
+
+    def __init__(self, number: int, text: str, tables: List[List[List]]):
+        self.number = number
+        self.text = text
+        self.tables = tables
+
+
+def has_ruling(objects: Dict[str, List[Dict]]) -> bool:
+    """A página tem traçado suficiente para uma tabela na estratégia de linhas do pdfplumber
+
+    Conservadora: um retângulo ou curva já basta (um retângulo sozinho forma
+    uma célula); só com linhas são precisas duas horizontais e duas verticais.
+    """
+    if objects.get('rect') or objects.get('curve'):
+        return True
+    horizontal = vertical = 0
+    for line in objects.get('line', ()):
+        if line['top'] == line['bottom'] and line['x1'] - line['x0'] >= MIN_EDGE_LENGTH:
+            horizontal += 1
+        elif line['x0'] == line['x1'] and line['bottom'] - line['top'] >= MIN_EDGE_LENGTH:
+            vertical += 1
+        if horizontal >= 2 and vertical >= 2:
+            return True
+    return False
+
+
+def _transform(ctm: Sequence[float], x, y) -> Tuple[float, float]:
+    a, b, c, d, e, f = ctm
+    x, y = float(x), float(y)
+    return a * x + c * y + e, b * x + d * y + f
+
+
+def _concat(matrix: Sequence, ctm: Sequence[float]) -> Tuple[float, ...]:
+    """Matriz do operador cm aplicada antes da matriz de transformação atual"""
+    a, b, c, d, e, f = (float(value) for value in matrix)
+    ca, cb, cc, cd, ce, cf = ctm
+    return (a * ca + b * cc, a * cb + b * cd, c * ca + d * cc, c * cb + d * cd,
+            e * ca + f * cc + ce, e * cb + f * cd + cf)
+
+
+def drawing_objects(operations, xobjects=None) -> Dict[str, List[Dict]]:
+    """Linhas, retângulos e curvas dos operadores de desenho, no formato de page.objects do pdfplumber
+
+    Só o que has_ruling usa: como no pdfminer, um subcaminho de um único
+    segmento reto é uma linha, com as coordenadas na página (matriz cm
+    aplicada); os demais caminhos contam como retângulo ou curva. Um
+    formulário (XObject /Form) pode desenhar qualquer coisa e conta como curva.
+    """
+    objects: Dict[str, List[Dict]] = {'line': [], 'rect': [], 'curve': []}
+    ctm: Tuple[float, ...] = (1.0, 0.0, 0.0, 1.0, 0.0, 0.0)
+    saved = []
+    # Pontos do subcaminho em construção; None marca um trecho curvo ou fechado
+    points: List = []
+
+    def end_subpath():
+        if len(points) == 2 and None not in points:
+            (x0, y0), (x1, y1) = points
+            objects['line'].append({'x0': min(x0, x1), 'x1': max(x0, x1), 'top': min(y0, y1), 'bottom': max(y0, y1)})
+        elif len(points) > 1:
+            objects['curve'].append({})
+        points.clear()
+
+    for operands, operator in operations:
+        if operator == b'q':
+            saved.append(ctm)
+        elif operator == b'Q':
+            ctm = saved.pop() if saved else ctm
+        elif operator == b'cm':
+            ctm = _concat(operands, ctm)
+        elif operator == b'm':
+            end_subpath()
+            points.append(_transform(ctm, *operands))
+        elif operator == b'l':
+            points.append(_transform(ctm, *operands))
+        elif operator in (b'c', b'v', b'y', b'h'):
+            points.append(None)
+        elif operator == b're':
+            end_subpath()
+            objects['rect'].append({})
+        elif operator in _PATH_END_OPERATORS:
+            end_subpath()
+        elif operator == b'Do' and xobjects is not None:
+            xobject = xobjects.get(operands[0])
+            if xobject is not None and xobject.get_object().get('/Subtype') == '/Form':
+                objects['curve'].append({})
+    end_subpath()
+    return objects
+
+
+class ExtractionBackend:
+    """Interface de um backend: número de páginas e extração de uma página"""
+
+    name = ''
+    # Páginas em que as tabelas foram procuradas e em que a procura foi evitada
+    table_pages_scanned = 0
+    table_pages_skipped = 0
+
+    def __init__(self, pdf_path):
+        # Caminho ou conteúdo em memória (pdf_source.PdfSource)
+        self.source = as_pdf_source(pdf_path)
+        self._stream = None
+
+    def _open_source(self):
+        """Caminho ou leitor em memória para a biblioteca do backend; close() fecha o leitor"""
+        target = self.source.open()
+        if not isinstance(target, str):
+            self._stream = target
+        return target
+
+    @property
+    def page_count(self) -> int:
+        raise NotImplementedError
+
+    def parse_page(self, index: int) -> PageContent:
+        raise NotImplementedError
+
+    def close(self):
+        # As bibliotecas não fecham um leitor recebido pronto; fechá-lo libera
+        # o buffer (um mmap só pode ser fechado sem leitores abertos)
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+
+
+class PdfplumberBackend(ExtractionBackend):
+    """Texto e tabelas com a análise de layout do pdfplumber"""
+
+    name = 'pdfplumber'
+
+    def __init__(self, pdf_path):
+        super().__init__(pdf_path)
+        self._pdf = pdfplumber.open(self._open_source())
+
+    @property
+    def page_count(self) -> int:
+        return len(self._pdf.pages)
+
+    def parse_page(self, index: int) -> PageContent:
+        page = self._pdf.pages[index]
+        text = page.extract_text() or ""
+        if has_ruling(page.objects):
+            tables = page.extract_tables()
+            self.table_pages_scanned += 1
+        else:
+            tables = []
+            self.table_pages_skipped += 1
+        content = PageContent(index + 1, text, tables)
+        # Liberar objetos de layout da página, o resultado já está guardado.
+        # O mapa de texto fica em um lru_cache próprio que flush_cache não limpa.
+        page.flush_cache()
+        if hasattr(page.get_textmap, 'cache_clear'):
+            page.get_textmap.cache_clear()
+        return content
+
+    def close(self):
+        self._pdf.close()
+        super().close()
+
+
+class TextStreamBackend(ExtractionBackend):
+    """Fluxo de texto de cada página via PyPDF2; as páginas com traçado, que podem ter tabelas, pelo pdfplumber"""
+
+    name = 'pypdf2'
+
+    def __init__(self, pdf_path):
+        super().__init__(pdf_path)
+        # Aberto na primeira página com traçado
+        self._ruled: Optional[PdfplumberBackend] = None
+        try:
+            with warnings.catch_warnings():
+                # O PyPDF2 avisa que foi renomeado para pypdf; a versão fixada em requirements é esta
+                warnings.simplefilter('ignore', DeprecationWarning)
+                from PyPDF2 import PdfReader
+        except ImportError as e:
+            raise RuntimeError("O backend pypdf2 requer o pacote PyPDF2 (pip install PyPDF2)") from e
+        self._reader = PdfReader(self._open_source())
+
+    @property
+    def page_count(self) -> int:
+        return len(self._reader.pages)
+
+    def page_has_ruling(self, index: int) -> bool:
+        """has_ruling da página a partir dos operadores de desenho do conteúdo, sem a análise de layout
+
+        Conservadora: sem nenhum operador de desenho a resposta é imediata;
+        com conteúdo que não dá para ler, a página conta como tendo traçado.
+        """
+        try:
+            page = self._reader.pages[index]
+            contents = page.get_contents()
+            if contents is None or not _DRAWING_OPERATOR.search(contents.get_data()):
+                return False
+            from PyPDF2.generic import ContentStream
+            resources = page.get('/Resources')
+            xobjects = resources.get_object().get('/XObject') if resources is not None else None
+            operations = ContentStream(contents, self._reader).operations
+            return has_ruling(drawing_objects(operations, xobjects.get_object() if xobjects is not None else None))
+        except Exception:
+            return True
+
+    def parse_page(self, index: int) -> PageContent:
+        if self.page_has_ruling(index):
+            # O PyPDF2 não vê tabelas: a página com traçado é extraída pelo pdfplumber
+            if self._ruled is None:
+                self._ruled = PdfplumberBackend(self.source)
+            scanned, skipped = self._ruled.table_pages_scanned, self._ruled.table_pages_skipped
+            content = self._ruled.parse_page(index)
+            self.table_pages_scanned += self._ruled.table_pages_scanned - scanned
+            self.table_pages_skipped += self._ruled.table_pages_skipped - skipped
+            return content
+        self.table_pages_skipped += 1
+        return PageContent(index + 1, self._reader.pages[index].extract_text() or "", [])
+
+    def close(self):
+        if self._ruled is not None:
+            self._ruled.close()
+            self._ruled = None
+        super().close()
+
+
+BACKENDS: Dict[str, Type[ExtractionBackend]] = {
+    PdfplumberBackend.name: PdfplumberBackend,
+    TextStreamBackend.name: TextStreamBackend,
+}
+
+# Opções aceitas pelo PageEngine e pela linha de comando
+BACKEND_CHOICES = (AUTO,) + tuple(BACKENDS)
+
+
+def same_lines(reference: PageContent, candidate: PageContent) -> bool:
+    """O candidato reproduz exatamente as linhas de texto da referência"""
+    return reference.text.splitlines() == candidate.text.splitlines()
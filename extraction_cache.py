@@ -0,0 +1,176 @@
+"""
+Cache persistente da extração, endereçado pelo conteúdo do PDF.
+
+A chave de cada entrada é o SHA-256 do arquivo junto com a versão do
+conversor: renomear ou copiar um PDF não invalida o cache, mas qualquer
+alteração no conteúdo ou no conversor gera uma chave nova. Cada entrada guarda
+o texto e as tabelas de cada página e o resultado do parse do texto, em pickle
+comprimido com zlib. Um PDF já visto é convertido sem abrir o pdfplumber.
+
+O tamanho total é limitado; ao passar do limite, as entradas usadas há mais
+tempo são removidas (a data de modificação do arquivo marca o último uso).
+
+Confiança: as entradas são lidas com pickle, então quem consegue gravar na
+pasta do cache consegue executar código no conversor. Por isso a pasta padrão
+fica no cache do usuário ($XDG_CACHE_HOME ou ~/.cache; %LOCALAPPDATA% no
+Windows), é criada com permissão 0700, e uma pasta de outro usuário ou com
+escrita para grupo ou outros é ignorada (sem ler nem gravar entradas). No
+Windows essa conferência não é feita: a pasta deve ficar no perfil do usuário.
+"""
+
+import hashlib
+import os
+import pickle
+import tempfile
+import zlib
+from pathlib import Path
+from typing import List, Optional, Tuple
+import logging
+
+from page_engine import PageContent
+
+logger = logging.getLogger(__name__)
+
+# Subpasta do cache do usuário usada por padrão
+CACHE_SUBDIR = Path("totalsat-pdf-to-csv") / "extraction"
+DEFAULT_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+# Versão do formato das entradas; entradas de outra versão são ignoradas
+CACHE_FORMAT = 1
+
+_ENTRY_SUFFIX = ".bin"
+
+
+def default_cache_dir() -> Path:
+    """Pasta padrão do cache, dentro do cache do usuário"""
+    base = os.environ.get('LOCALAPPDATA' if os.name == 'nt' else 'XDG_CACHE_HOME')
+    # Um XDG_CACHE_HOME relativo é inválido pela especificação e fica de fora
+    if not base or not os.path.isabs(base):
+        base = Path.home() / ".cache"
+    return Path(base) / CACHE_SUBDIR
+
+
+def file_digest(path, chunk_size: int = 1024 * 1024) -> str:
+    """SHA-256 do conteúdo do arquivo, lido em blocos"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class CacheEntry:
+    """Resultado guardado de um PDF: páginas extraídas e, se houve, o parse do texto"""
+
+    __slots__ = ('pages', 'text_result')
+
+    def __init__(self, pages: List[PageContent], text_result: Optional[Tuple] = None):
+        self.pages = pages
+        # (linha de cabeçalho, registros) ou None se a etapa de texto não rodou
+        self.text_result = text_result
+
+
+class ExtractionCache:
+    """Cache em disco com limite de tamanho e remoção das entradas menos usadas
+
+    Seguro para vários processos: cada entrada é gravada em um arquivo
+    temporário e movida para o lugar final de uma vez. Sem cache_dir usa
+    default_cache_dir(); a pasta só é usada se for privada do usuário (ver o
+    início do módulo).
+    """
+
+    def __init__(self, cache_dir=None, version: str = "",
+                 max_bytes: int = DEFAULT_CACHE_MAX_BYTES, rebuild: bool = False):
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else default_cache_dir()
+        self.version = version
+        self.max_bytes = max_bytes
+        # Ignora as entradas existentes e grava por cima
+        self.rebuild = rebuild
+        self._untrusted_logged = False
+
+    def _trusted(self) -> bool:
+        """Só o usuário atual grava na pasta do cache (uma pasta que ainda não existe será criada assim)"""
+        if not hasattr(os, 'getuid'):
+            return True
+        try:
+            stat = self.cache_dir.stat()
+        except FileNotFoundError:
+            return True
+        if stat.st_uid == os.getuid() and not stat.st_mode & 0o022:
+            return True
+        if not self._untrusted_logged:
+            logger.warning(f"Cache de extração ignorado: {self.cache_dir} é de outro usuário ou pode ser "
+                           f"gravada por grupo/outros (as entradas são lidas com pickle)")
+            self._untrusted_logged = True
+        return False
+
+    def key(self, pdf_path, variant: str = "") -> str:
+        """Chave do PDF: hash do conteúdo com a versão do conversor e a variante (backend)"""
+        return hashlib.sha256(f"{self.version}:{variant}:{file_digest(pdf_path)}".encode()).hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}{_ENTRY_SUFFIX}"
+
+    def contains(self, key: str) -> bool:
+        """Há uma entrada para a chave (sem lê-la); sempre False com rebuild"""
+        return not self.rebuild and self._trusted() and self._entry_path(key).exists()
+
+    def load(self, key: str) -> Optional[CacheEntry]:
+        """Lê a entrada da chave, ou None se não existir ou estiver ilegível"""
+        if self.rebuild or not self._trusted():
+            return None
+        path = self._entry_path(key)
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        try:
+            cache_format, pages, text_result = pickle.loads(zlib.decompress(data))
+        except Exception as e:
+            logger.warning(f"Entrada de cache ilegível, descartando {path.name}: {e}")
+            path.unlink(missing_ok=True)
+            return None
+        if cache_format != CACHE_FORMAT:
+            return None
+        try:
+            # Marcar o uso para a remoção por antiguidade
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return CacheEntry([PageContent(*page) for page in pages], text_result)
+
+    def store(self, key: str, entry: CacheEntry):
+        """Grava a entrada e remove as mais antigas se o cache passar do limite"""
+        pages = [(page.number, page.text, page.tables) for page in entry.pages]
+        data = zlib.compress(pickle.dumps((CACHE_FORMAT, pages, entry.text_result),
+                                          protocol=pickle.HIGHEST_PROTOCOL))
+        self.cache_dir.mkdir(mode=0o700, parents=True, exist_ok=True)
+        if not self._trusted():
+            return
+        fd, tmp_name = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_name, self._entry_path(key))
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+        self.evict()
+
+    def evict(self):
+        """Remove as entradas usadas há mais tempo até o total caber no limite"""
+        entries = []
+        for path in self.cache_dir.glob(f"*{_ENTRY_SUFFIX}"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            logger.info(f"Cache: removida entrada antiga {path.name}")
@@ -0,0 +1,165 @@
+"""
+Modo de observação da pasta de entrada.
+
+Verifica a pasta sourcePdfs periodicamente e converte só os PDFs novos ou
+alterados. Um manifesto em JSON na pasta de saída guarda, para cada PDF já
+processado, data de modificação, tamanho, hash do conteúdo e os arquivos
+gerados (todas as partes _parte_N, quando a saída é dividida):
+
+- data e tamanho iguais e saídas existentes: nada a fazer, sem ler o PDF;
+- data ou tamanho diferentes mas o mesmo hash: só o manifesto é atualizado;
+- conteúdo novo: o PDF é convertido e a latência desde a chegada é registrada.
+
+Um arquivo só é convertido depois de ficar settle_seconds sem ser modificado,
+para não ler um PDF que ainda está sendo copiado para a pasta.
+"""
+
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+import logging
+
+from extraction_cache import file_digest
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POLL_INTERVAL = 5.0
+DEFAULT_SETTLE_SECONDS = 2.0
+MANIFEST_NAME = ".manifest.json"
+
+
+class FolderWatcher:
+    """Converte continuamente os PDFs novos ou alterados da pasta de entrada"""
+
+    def __init__(self, converter, manifest_path=None, interval: float = DEFAULT_POLL_INTERVAL,
+                 settle_seconds: float = DEFAULT_SETTLE_SECONDS, convert_kwargs: Optional[Dict] = None):
+        self.converter = converter
+        self.manifest_path = Path(manifest_path) if manifest_path else converter.output_dir / MANIFEST_NAME
+        self.interval = interval
+        self.settle_seconds = settle_seconds
+        # Opções repassadas a convert_pdf
+        self.convert_kwargs = convert_kwargs or {}
+        self.manifest: Dict[str, Dict] = self._load_manifest()
+
+    def _load_manifest(self) -> Dict[str, Dict]:
+        try:
+            with open(self.manifest_path, encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Manifesto ilegível, começando do zero: {e}")
+            return {}
+
+    def _save_manifest(self):
+        self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.manifest_path.with_name(f".{self.manifest_path.name}.{os.getpid()}.part")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, ensure_ascii=False, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
+
+    @staticmethod
+    def _outputs_exist(entry: Dict) -> bool:
+        """Todos os arquivos gerados na conversão registrada ainda existem"""
+        # Manifestos antigos só guardam output_file
+        output_files = entry.get('output_files') or [entry['output_file']]
+        return all(Path(output_file).exists() for output_file in output_files)
+
+    def _is_current(self, entry: Optional[Dict], stat: os.stat_result) -> bool:
+        """A entrada do manifesto corresponde ao arquivo e as saídas ainda existem"""
+        if entry is None or entry['mtime_ns'] != stat.st_mtime_ns or entry['size'] != stat.st_size:
+            return False
+        return entry.get('error') is not None or self._outputs_exist(entry)
+
+    def pending_files(self) -> List[str]:
+        """PDFs novos ou alterados, já estáveis, na ordem de chegada"""
+        if not self.converter.source_dir.exists():
+            return []
+
+        now = time.time()
+        pending = []
+        present = set()
+        changed = False
+
+        for pdf_path in self.converter.source_dir.glob("*.pdf"):
+            try:
+                stat = pdf_path.stat()
+            except FileNotFoundError:
+                continue
+            present.add(pdf_path.name)
+            entry = self.manifest.get(pdf_path.name)
+
+            if self._is_current(entry, stat):
+                continue
+            if now - stat.st_mtime < self.settle_seconds:
+                # Ainda sendo copiado: fica para a próxima verificação
+                continue
+            if entry is not None and entry.get('error') is None and self._outputs_exist(entry):
+                # Data ou tamanho mudaram: só converte se o conteúdo mudou
+                if file_digest(pdf_path) == entry['sha256']:
+                    entry['mtime_ns'] = stat.st_mtime_ns
+                    entry['size'] = stat.st_size
+                    changed = True
+                    continue
+            pending.append((stat.st_mtime, pdf_path.name))
+
+        # PDFs removidos da pasta saem do manifesto (as saídas ficam)
+        for name in set(self.manifest) - present:
+            del self.manifest[name]
+            changed = True
+
+        if changed:
+            self._save_manifest()
+        return [name for _, name in sorted(pending)]
+
+    def convert(self, pdf_file: str) -> Dict:
+        """Converte um PDF e registra o resultado no manifesto"""
+        pdf_path = self.converter.source_dir / pdf_file
+        stat = pdf_path.stat()
+        sha256 = file_digest(pdf_path)
+
+        started = time.perf_counter()
+        try:
+            result = self.converter.convert_pdf(pdf_file, **self.convert_kwargs)
+        except Exception as e:
+            result = {'success': False, 'input_file': pdf_file, 'error': f'Erro inesperado: {e}'}
+        result['duration_seconds'] = round(time.perf_counter() - started, 3)
+        # Da chegada do arquivo (última modificação) até a saída pronta
+        result['latency_seconds'] = round(time.time() - stat.st_mtime, 3)
+
+        self.manifest[pdf_file] = {
+            'mtime_ns': stat.st_mtime_ns,
+            'size': stat.st_size,
+            'sha256': sha256,
+            'output_file': result.get('output_file'),
+            'output_files': result.get('output_files', []),
+            'error': None if result['success'] else result['error'],
+        }
+        self._save_manifest()
+
+        if result['success']:
+            logger.info(f"✓ Convertido: {pdf_file} → {result['output_file']} em {result['duration_seconds']}s "
+                        f"(latência desde a chegada: {result['latency_seconds']}s)")
+        else:
+            logger.error(f"✗ Erro: {pdf_file} - {result['error']}")
+        return result
+
+    def poll(self) -> List[Dict]:
+        """Uma verificação da pasta: converte o que estiver pendente"""
+        return [self.convert(pdf_file) for pdf_file in self.pending_files()]
+
+    def run(self, max_polls: Optional[int] = None):
+        """Verifica a pasta a cada interval segundos até ser interrompido (Ctrl+C)"""
+        logger.info(f"Observando {self.converter.source_dir} a cada {self.interval}s "
+                    f"(manifesto: {self.manifest_path})")
+        polls = 0
+        try:
+            while max_polls is None or polls < max_polls:
+                self.poll()
+                polls += 1
+                if max_polls is None or polls < max_polls:
+                    time.sleep(self.interval)
+        except KeyboardInterrupt:
+            logger.info("Observação encerrada")
@@ -0,0 +1,231 @@
+"""
+Layouts de relatório: cabeçalho, gramática das linhas e tipos das colunas.
+
+Cada fornecedor de rastreador (e cada versão do relatório) tem um layout
+próprio. Um LayoutTemplate descreve um deles de forma declarativa:
+
+- header: textos que aparecem todos na linha de cabeçalho
+- columns: nomes das colunas da saída
+- row: expressão regular da linha de dados, um grupo por coluna
+- row_start: início de uma linha de dados (padrão: a própria row)
+- types: tipo de cada coluna na saída Parquet (ver COLUMN_TYPES)
+
+As expressões são compiladas uma única vez, na criação do template. O layout
+Totalsat é o embutido; outros são carregados de arquivos JSON com os mesmos
+campos (LayoutRegistry.load).
+
+O layout de um documento é escolhido pela primeira página: uma assinatura
+barata (as linhas sem dígitos do topo da página, isto é, títulos fixos e o
+cabeçalho) indexa a decisão já tomada para documentos com o mesmo topo. Só
+uma assinatura nova passa pelos templates; num lote misto cada layout é
+reconhecido uma vez e os demais documentos dele vão direto para a gramática
+certa.
+"""
+
+import hashlib
+import json
+import re
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+import logging
+
+import line_grammar
+
+logger = logging.getLogger(__name__)
+
+# Tipos de coluna aceitos nos templates (a saída colunar converte cada um)
+DATETIME = 'datetime'
+INT = 'int'
+FLOAT = 'float'
+CATEGORY = 'category'
+LOCALITY = 'locality'
+TEXT = 'text'
+COLUMN_TYPES = (DATETIME, INT, FLOAT, CATEGORY, LOCALITY, TEXT)
+
+# Linhas do topo da primeira página usadas na assinatura
+FINGERPRINT_LINES = 12
+
+_DIGIT = re.compile(r'\d')
+
+
+def _check_type(column: str, column_type: str):
+    # 'datetime:<formato do strptime>' para datas fora do formato DD/MM/AAAA HH:MM
+    base = column_type.split(':', 1)[0]
+    if base not in COLUMN_TYPES or (base != DATETIME and base != column_type):
+        raise ValueError(f"Tipo desconhecido para a coluna {column}: {column_type}")
+
+
+def _normalize(text: Optional[str]) -> str:
+    return ' '.join(text.split()) if text else ''
+
+
+class LayoutTemplate:
+    """Layout de um relatório, com as expressões já compiladas"""
+
+    def __init__(self, name: str, header: Sequence[str], columns: Sequence[str], row: Optional[str] = None,
+                 row_start: Optional[str] = None, types: Optional[Dict[str, str]] = None,
+                 parse_row: Optional[Callable[[str], Optional[List[str]]]] = None,
+                 joins_broken_lines: bool = False, compact_records: bool = False):
+        if not header:
+            raise ValueError(f"Layout {name}: o cabeçalho precisa de pelo menos um texto")
+        if row is None and parse_row is None:
+            raise ValueError(f"Layout {name}: falta a gramática das linhas (row)")
+        self.name = name
+        self.header = tuple(header)
+        self.columns = tuple(columns)
+        self.types = dict(types or {})
+        for column, column_type in self.types.items():
+            _check_type(column, column_type)
+
+        try:
+            self._row = re.compile(row) if row is not None else None
+            self._row_start = re.compile(row_start) if row_start is not None else self._row
+        except re.error as e:
+            raise ValueError(f"Layout {name}: expressão inválida: {e}") from e
+        if self._row is not None and self._row.groups != len(self.columns):
+            raise ValueError(f"Layout {name}: a linha tem {self._row.groups} grupos para "
+                             f"{len(self.columns)} colunas")
+        self._parse_row = parse_row
+        # Só o layout Totalsat: linhas de dados quebradas nas coordenadas (PDFConverter._process_broken_lines)
+        self.joins_broken_lines = joins_broken_lines
+        # Registros no formato de line_grammar.parse_fields, que cabem no RecordBuffer
+        self.compact_records = compact_records
+        # Identifica a definição do template (faz parte da chave do cache de extração)
+        self.signature = hashlib.sha256(
+            repr((name, self.header, self.columns, row, row_start, sorted(self.types.items()))).encode()
+        ).hexdigest()[:16]
+
+    @classmethod
+    def from_dict(cls, spec: Dict) -> 'LayoutTemplate':
+        """Template a partir da forma declarativa (JSON)"""
+        missing = [key for key in ('name', 'header', 'columns', 'row') if key not in spec]
+        if missing:
+            raise ValueError(f"Layout {spec.get('name', '?')}: faltam os campos {', '.join(missing)}")
+        return cls(spec['name'], spec['header'], spec['columns'], spec['row'],
+                   spec.get('row_start'), spec.get('types'))
+
+    def is_header(self, line: str) -> bool:
+        return all(marker in line for marker in self.header)
+
+    def is_row(self, line: str) -> bool:
+        """A linha (já sem espaços nas pontas) começa como uma linha de dados"""
+        return self._row_start.match(line) is not None
+
+    def parse(self, line: str) -> Optional[List[str]]:
+        """Campos da linha de dados, um por coluna, ou None se ela não seguir a gramática"""
+        if self._parse_row is not None:
+            return self._parse_row(line)
+        match = self._row.fullmatch(line.strip())
+        if match is None:
+            return None
+        return [_normalize(value) for value in match.groups()]
+
+    def __repr__(self):
+        return f"LayoutTemplate({self.name!r})"
+
+
+TOTALSAT = LayoutTemplate(
+    'totalsat',
+    header=('Data/Hora', 'Placa'),
+    columns=('Data/Hora', 'Placa', 'Evento', 'Velocidade', 'Localidade', 'Motorista'),
+    row_start=line_grammar.DATE_PREFIX,
+    types={'Data/Hora': DATETIME, 'Placa': CATEGORY, 'Evento': CATEGORY, 'Velocidade': INT,
+           'Localidade': LOCALITY, 'Motorista': TEXT},
+    parse_row=line_grammar.parse_fields,
+    joins_broken_lines=True,
+    compact_records=True,
+)
+
+BUILTIN_LAYOUTS = (TOTALSAT,)
+
+
+def fingerprint(text: str) -> str:
+    """Assinatura da primeira página: as linhas sem dígitos do topo, com os espaços normalizados
+
+    Títulos fixos e o cabeçalho entram; datas, registros e números de página
+    ficam de fora, então relatórios do mesmo layout têm a mesma assinatura.
+    """
+    lines = text.split('\n', FINGERPRINT_LINES)[:FINGERPRINT_LINES]
+    labels = [_normalize(line) for line in lines if line.strip() and not _DIGIT.search(line)]
+    return hashlib.blake2b('\n'.join(labels).encode(), digest_size=8).hexdigest()
+
+
+class LayoutRegistry:
+    """Templates conhecidos e a decisão de layout já tomada para cada assinatura"""
+
+    def __init__(self, templates: Iterable[LayoutTemplate] = BUILTIN_LAYOUTS):
+        self._templates: List[LayoutTemplate] = []
+        self._by_columns: Dict[tuple, LayoutTemplate] = {}
+        # Assinatura da primeira página -> template (None: nenhum reconheceu)
+        self._dispatch: Dict[str, Optional[LayoutTemplate]] = {}
+        self.hits = 0
+        self.misses = 0
+        for template in templates:
+            self.register(template)
+
+    @property
+    def templates(self) -> List[LayoutTemplate]:
+        """Templates na ordem em que são testados: os registrados por último primeiro"""
+        return list(reversed(self._templates))
+
+    @property
+    def default(self) -> LayoutTemplate:
+        """Layout usado quando a primeira página não tem o cabeçalho de nenhum (o primeiro registrado)"""
+        return self._templates[0]
+
+    def register(self, template: LayoutTemplate):
+        """Adiciona um template; ele passa na frente dos anteriores com o mesmo cabeçalho"""
+        if any(known.name == template.name for known in self._templates):
+            raise ValueError(f"Layout já registrado: {template.name}")
+        self._templates.append(template)
+        self._by_columns.setdefault(template.columns, template)
+        # Um template novo pode reconhecer assinaturas já decididas
+        self._dispatch.clear()
+
+    def load(self, path) -> List[LayoutTemplate]:
+        """Registra os templates de um arquivo JSON (um objeto ou uma lista) ou dos *.json de uma pasta"""
+        path = Path(path)
+        files = sorted(path.glob('*.json')) if path.is_dir() else [path]
+        loaded = []
+        for file in files:
+            with open(file, encoding='utf-8') as f:
+                specs = json.load(f)
+            for spec in specs if isinstance(specs, list) else [specs]:
+                template = LayoutTemplate.from_dict(spec)
+                self.register(template)
+                loaded.append(template)
+        logger.info(f"Layouts carregados: {', '.join(template.name for template in loaded) or 'nenhum'}")
+        return loaded
+
+    def signature(self) -> str:
+        """Identifica os templates além dos embutidos ('' sem nenhum), para a chave do cache"""
+        extra = [template.signature for template in self._templates if template not in BUILTIN_LAYOUTS]
+        return hashlib.sha256(':'.join(extra).encode()).hexdigest()[:16] if extra else ''
+
+    def for_header(self, line: str) -> Optional[LayoutTemplate]:
+        """Template cujo cabeçalho é a linha"""
+        for template in reversed(self._templates):
+            if template.is_header(line):
+                return template
+        return None
+
+    def for_columns(self, columns: Sequence[str]) -> Optional[LayoutTemplate]:
+        """Template com exatamente essas colunas"""
+        return self._by_columns.get(tuple(columns))
+
+    def detect(self, text: str) -> Optional[LayoutTemplate]:
+        """Layout da primeira página (texto), com a decisão guardada pela assinatura"""
+        key = fingerprint(text)
+        if key in self._dispatch:
+            self.hits += 1
+            return self._dispatch[key]
+
+        self.misses += 1
+        template = None
+        for line in text.split('\n'):
+            template = self.for_header(line)
+            if template is not None:
+                break
+        self._dispatch[key] = template
+        logger.debug(f"Layout da assinatura {key}: {template.name if template else 'nenhum'}")
+        return template
@@ -0,0 +1,39 @@
+"""
+Importação sob demanda das dependências pesadas.
+
+numpy, pandas e openpyxl levam a maior parte da partida do conversor
+(python -X importtime). Com lazy_module o nome fica disponível no import do
+módulo, mas a biblioteca só é carregada no primeiro acesso a um atributo:
+uma execução que não monta DataFrame (--help, erro de argumento, pasta
+vazia) não paga o pandas, e uma saída CSV não carrega o openpyxl.
+
+Os módulos que usam lazy_module têm `from __future__ import annotations`,
+para que as anotações (pd.DataFrame, np.ndarray) não carreguem a biblioteca
+na definição das funções.
+"""
+
+import importlib.util
+import sys
+from types import ModuleType
+
+
+def lazy_module(name: str) -> ModuleType:
+    """Módulo registrado em sys.modules e executado só no primeiro acesso a um atributo"""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named '{name}'", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+def is_loaded(name: str) -> bool:
+    """O módulo já foi executado (importado normalmente ou carregado por um acesso)"""
+    module = sys.modules.get(name)
+    return module is not None and not isinstance(module, getattr(importlib.util, '_LazyModule', ()))
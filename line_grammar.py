@@ -0,0 +1,135 @@
+"""
+Gramática das linhas dos relatórios de rastreamento Totalsat.
+
+Um único padrão compilado classifica cada linha (cabeçalho, dados, continuação
+de coordenadas ou ruído) e, nas linhas de dados, já captura data/hora, placa,
+evento, velocidade, localidade e coordenadas no mesmo casamento.
+
+Formato de uma linha de dados:
+    DD/MM/AAAA HH:MM PLACA [NÚMERO] EVENTO... VEL LOCALIDADE... (LAT,LON)
+"""
+
+import re
+from typing import List, Optional
+
+HEADER = 'header'
+DATA = 'data'
+CONTINUATION = 'continuation'
+NOISE = 'noise'
+
+DATE_PREFIX = r'\d{2}/\d{2}/\d{4}\s+\d{2}:\d{2}'
+COORD = r'-?\d+\.?\d*'
+
+# Resto de uma linha de dados depois da data/hora; {locality} é o padrão da localidade
+_DATA_BODY = r'''
+    \s*
+    # Placa: primeiro token, mais o segundo se começar com dígito ("AZU 8900").
+    # O lookahead com referência impede o retrocesso (grupo atômico).
+    (?=(?P<plate>\S+(?:\s+(?P<plate_number>\d\S*))?))(?P=plate)
+    (?:
+        # Evento: tokens até o primeiro token só de dígitos, que é a velocidade
+        (?:\s+(?P<event>(?!\d+(?!\S))\S+(?:\s+(?!\d+(?!\S))\S+)*))?
+        \s+(?P<speed>\d+)(?!\S)
+        (?:\s+(?P<locality>{locality}))?
+      |
+        # Sem velocidade: o último token é a localidade
+        \s+(?P<tail_event>.+?)(?:\s+(?P<tail_locality>\S+))?
+    )
+    \s*$
+'''
+_LOCALITY = r'\S(?:.*\S)?'
+# Localidade com as coordenadas finais capturadas à parte
+_LOCALITY_WITH_COORDS = rf'.*\((?P<lat>{COORD}),(?P<lon>{COORD})\)|{_LOCALITY}'
+
+LINE_PATTERN = re.compile(rf'''
+    # Cabeçalho: marcado à parte, vale também para linhas que começam com data
+    (?: (?=.*Data/Hora)(?=.*Placa)(?P<header>) )?
+    (?:
+        (?P<date>{DATE_PREFIX})
+        (?: {_DATA_BODY.format(locality=_LOCALITY_WITH_COORDS)} )?
+      # Continuações de uma linha de dados quebrada
+      | (?P<coord_tail>{COORD},{COORD}\))
+      | (?P<lon_tail>{COORD}\)$)
+      | (?P<paren>\()
+      | (?=.*?(?P<coords>\({COORD},{COORD}\)))
+    )?
+''', re.VERBOSE)
+
+# Só os campos de uma linha já classificada como dados: sem o teste de
+# cabeçalho nem as continuações, o casamento por linha sai bem mais barato
+FIELDS_PATTERN = re.compile(rf'(?P<date>{DATE_PREFIX}){_DATA_BODY.format(locality=_LOCALITY)}', re.VERBOSE)
+
+DATE_PATTERN = re.compile(DATE_PREFIX)
+
+# Linha que termina no meio das coordenadas: "ENDEREÇO (-25.123,-"
+OPEN_LATITUDE_PATTERN = re.compile(rf'\({COORD},-$')
+
+_FIELD_GROUPS = ('date', 'plate', 'plate_number', 'event', 'speed', 'locality', 'tail_event', 'tail_locality')
+
+
+def match_line(line: str) -> re.Match:
+    """Casa a linha (já sem espaços nas pontas) com a gramática; sempre retorna um Match"""
+    return LINE_PATTERN.match(line)
+
+
+def line_kind(match: re.Match) -> str:
+    """Classifica uma linha a partir do seu Match"""
+    if match.group('header') is not None:
+        return HEADER
+    if match.group('date') is not None:
+        return DATA
+    if is_continuation(match):
+        return CONTINUATION
+    return NOISE
+
+
+def is_continuation(match: re.Match) -> bool:
+    """A linha pode completar as coordenadas ou a localidade da linha anterior"""
+    return (match.group('coord_tail') is not None or match.group('lon_tail') is not None or
+            match.group('paren') is not None or match.group('coords') is not None)
+
+
+def _normalize(text: Optional[str]) -> str:
+    return ' '.join(text.split()) if text else ''
+
+
+def parse_fields(line: str, match: Optional[re.Match] = None) -> Optional[List[str]]:
+    """Extrai [Data/Hora, Placa, Evento, Velocidade, Localidade, Motorista] de uma linha de dados
+
+    Retorna None quando a linha não começa com data/hora ou tem menos de três
+    tokens depois dela.
+    """
+    if match is None:
+        match = FIELDS_PATTERN.match(line)
+        if match is None:
+            return None
+    date_time, plate, plate_number, event, speed, locality, tail_event, tail_locality = match.group(*_FIELD_GROUPS)
+    if plate is None:
+        return None
+
+    if speed is None:
+        speed = '0'
+        event = tail_event
+        locality = tail_locality
+        if locality is None:
+            # Um token só depois da placa: só vale com placa de dois tokens,
+            # e o token é usado como evento e como localidade
+            if plate_number is None:
+                return None
+            locality = tail_event
+
+    # Espaço duplo ou qualquer espaço que não seja ' ' (isprintable falha neles):
+    # normalizar como no split por tokens
+    if '  ' in line or not line.isprintable():
+        plate = _normalize(plate)
+        event = _normalize(event)
+        locality = _normalize(locality)
+
+    return [date_time, plate, event or '', speed, locality or '', '']
+
+
+def coordinates(match: re.Match) -> Optional[tuple]:
+    """Latitude e longitude do fim da localidade, como texto, se houver"""
+    if match.group('lat') is None:
+        return None
+    return match.group('lat'), match.group('lon')
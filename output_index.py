@@ -0,0 +1,365 @@
+"""
+Índice das saídas CSV para consultas sem ler os arquivos inteiros.
+
+As perguntas mais comuns sobre os dados convertidos são "todos os eventos da
+placa X entre as datas Y e Z" ou "todos os registros acima de 80 km/h". Sem
+índice, cada consulta lê e interpreta todos os CSVs da pasta de saída. Com
+--index, cada CSV de rastreamento ganha ao lado um <nome>.idx com, por
+registro:
+
+- a posição (em bytes) do registro no CSV
+- Data/Hora em minutos desde 1970 (como em record_buffer), em 4 bytes
+- Placa e Evento como códigos no dicionário de valores distintos (1 a 4 bytes)
+- Velocidade inteira em 2 bytes (NO_SPEED quando não é um número)
+
+O arquivo começa por um cabeçalho JSON (colunas do CSV, dicionários, primeira
+e última Data/Hora, posição de cada coluna do índice) seguido das colunas
+cruas. Uma consulta lê o cabeçalho, descarta o arquivo se a placa ou o
+evento não estão no dicionário ou se o período não se cruza com o dele, lê
+só as colunas dos filtros pedidos e, do CSV, só os trechos dos registros
+encontrados, com seek. O índice guarda o tamanho e a data de modificação do
+CSV: se o CSV mudou depois, o índice é refeito na consulta.
+
+Consulta pela linha de comando: pdf_converter.py consultar --help.
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import os
+import struct
+import sys
+import tempfile
+from datetime import date, datetime
+from pathlib import Path
+from typing import List, Optional, Union
+import logging
+
+from lazy_imports import lazy_module
+from record_buffer import NO_DATE, date_minutes
+
+np = lazy_module('numpy')
+pd = lazy_module('pandas')
+
+logger = logging.getLogger(__name__)
+
+PLATE = 'Placa'
+DATE = 'Data/Hora'
+EVENT = 'Evento'
+SPEED = 'Velocidade'
+
+# Sufixo do índice ao lado do CSV (relatorio.csv -> relatorio.idx)
+INDEX_SUFFIX = '.idx'
+# Versão do formato do índice; índices de outra versão são refeitos
+INDEX_FORMAT = 1
+# Velocidade guardada quando a célula não é um número
+NO_SPEED = -1
+# Data/Hora guardada quando a célula não é uma data (menor int32)
+NO_MINUTE = -2 ** 31
+
+# Tamanho do cabeçalho JSON, no início do arquivo
+_HEADER_SIZE = struct.Struct('<Q')
+# Coluna do resultado da consulta com o nome do CSV de origem
+FILE_COLUMN = 'Arquivo'
+# Subcomando do pdf_converter.py para consultas
+QUERY_COMMAND = 'consultar'
+
+DateValue = Union[str, date, datetime]
+
+
+def index_path(csv_path) -> Path:
+    """Caminho do índice de um CSV"""
+    csv_path = Path(csv_path)
+    return csv_path.with_name(f"{csv_path.stem}{INDEX_SUFFIX}")
+
+
+def _csv_path(path: Path) -> Path:
+    return path.with_name(f"{path.name[:-len(INDEX_SUFFIX)]}.csv")
+
+
+def _row_offsets(data: bytes) -> np.ndarray:
+    """Início de cada registro depois do cabeçalho e, no fim, o tamanho do arquivo"""
+    ends = np.flatnonzero(np.frombuffer(data, dtype=np.uint8) == ord('\n')) + 1
+    if data and not data.endswith(b'\n'):
+        ends = np.append(ends, len(data))
+    return ends.astype(np.int64)
+
+
+def _codes(values: pd.Series):
+    """(código de cada valor no menor inteiro sem sinal que cabe, valores distintos), com as células vazias como ''"""
+    codes, distinct = pd.factorize(values.fillna('').astype(str))
+    return codes.astype(np.min_scalar_type(max(len(distinct) - 1, 0))), distinct.tolist()
+
+
+def _write_index(path: Path, header: dict, arrays: dict):
+    """Cabeçalho JSON e colunas cruas, gravados num temporário e movidos para o lugar de uma vez"""
+    position = 0
+    header['arrays'] = {}
+    for name, values in arrays.items():
+        header['arrays'][name] = [values.dtype.str, position, len(values)]
+        position += values.nbytes
+    encoded = json.dumps(header, ensure_ascii=False).encode()
+
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(_HEADER_SIZE.pack(len(encoded)))
+            f.write(encoded)
+            for values in arrays.values():
+                f.write(np.ascontiguousarray(values).tobytes())
+        os.replace(tmp_name, path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+
+class _IndexFile:
+    """Índice aberto: cabeçalho lido, colunas lidas do disco só quando pedidas"""
+
+    def __init__(self, path: Path):
+        self.file = open(path, 'rb')
+        try:
+            size, = _HEADER_SIZE.unpack(self.file.read(_HEADER_SIZE.size))
+            self.header = json.loads(self.file.read(size))
+        except BaseException:
+            self.file.close()
+            raise
+        self._start = _HEADER_SIZE.size + size
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.file.close()
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        dtype, position, length = self.header['arrays'][name]
+        self.file.seek(self._start + position)
+        return np.fromfile(self.file, dtype=np.dtype(dtype), count=length)
+
+
+def build_index(csv_path, frame: Optional[pd.DataFrame] = None) -> Optional[Path]:
+    """Grava o índice do CSV; retorna o caminho, ou None se o CSV não tiver Placa e Data/Hora
+
+    frame é o DataFrame que acabou de ser gravado no CSV (as mesmas linhas,
+    na mesma ordem); sem ele, as colunas do índice são lidas do próprio CSV.
+    """
+    csv_path = Path(csv_path)
+    data = csv_path.read_bytes()
+    columns = pd.read_csv(io.BytesIO(data), nrows=0, encoding='utf-8-sig').columns.tolist()
+    if PLATE not in columns or DATE not in columns:
+        return None
+    if frame is None:
+        frame = pd.read_csv(io.BytesIO(data), dtype=str, keep_default_na=False, na_values=[''],
+                            encoding='utf-8-sig', usecols=[c for c in (DATE, PLATE, EVENT, SPEED) if c in columns])
+
+    offsets = _row_offsets(data)
+    if len(offsets) - 1 != len(frame):
+        raise ValueError(f"{csv_path.name}: {len(frame)} registros em {len(offsets) - 1} linhas "
+                         "(quebra de linha dentro de uma célula)")
+
+    plate_codes, plates = _codes(frame[PLATE])
+    event_codes, events = _codes(frame[EVENT] if EVENT in frame.columns else pd.Series([''] * len(frame)))
+    speed = (pd.to_numeric(frame[SPEED], errors='coerce').to_numpy(dtype=float) if SPEED in frame.columns
+             else np.full(len(frame), np.nan))
+    speed = np.nan_to_num(speed, nan=NO_SPEED).clip(NO_SPEED, np.iinfo(np.int16).max).astype(np.int16)
+    minutes = date_minutes(frame[DATE].fillna('').to_numpy(dtype=object))
+    valid = minutes != NO_DATE
+    minutes = np.where(valid & (minutes > NO_MINUTE) & (minutes <= np.iinfo(np.int32).max),
+                       minutes, NO_MINUTE).astype(np.int32)
+    stat = os.stat(csv_path)
+
+    path = index_path(csv_path)
+    _write_index(path, {
+        'format': INDEX_FORMAT, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'columns': columns,
+        'rows': len(frame), 'plates': plates, 'events': events,
+        # Período dos registros: consultas fora dele não leem nenhuma coluna
+        'first_minute': int(minutes[valid].min()) if valid.any() else None,
+        'last_minute': int(minutes[valid].max()) if valid.any() else None,
+    }, {'offsets': offsets, 'minutes': minutes, 'plate_codes': plate_codes, 'event_codes': event_codes,
+        'speed': speed})
+    return path
+
+
+def to_minutes(value: DateValue, end: bool = False) -> int:
+    """Minutos desde 1970 de 'DD/MM/AAAA HH:MM', 'DD/MM/AAAA', date ou datetime
+
+    Uma data sem hora vale desde 00:00 ou, com end=True, até 23:59 do dia.
+    """
+    if isinstance(value, datetime):
+        value = value.strftime('%d/%m/%Y %H:%M')
+    elif isinstance(value, date):
+        value = value.strftime('%d/%m/%Y')
+    text = value.strip()
+    if len(text) == 10:
+        text += ' 23:59' if end else ' 00:00'
+    minutes = int(date_minutes(np.array([text], dtype=object))[0])
+    if minutes == NO_DATE:
+        raise ValueError(f"Data inválida: {value!r} (use DD/MM/AAAA ou DD/MM/AAAA HH:MM)")
+    return minutes
+
+
+def _read_rows(csv_path: Path, offsets: np.ndarray, rows: np.ndarray, columns: List[str]) -> pd.DataFrame:
+    """Só os registros pedidos do CSV: um seek e uma leitura por sequência de registros vizinhos"""
+    chunks = []
+    with open(csv_path, 'rb') as f:
+        for run in np.split(rows, np.flatnonzero(np.diff(rows) != 1) + 1):
+            f.seek(offsets[run[0]])
+            chunks.append(f.read(offsets[run[-1] + 1] - offsets[run[0]]))
+    return pd.read_csv(io.BytesIO(b''.join(chunks)), header=None, names=columns, dtype=str,
+                       keep_default_na=False, na_values=[''])
+
+
+class OutputIndex:
+    """Consultas aos CSVs indexados de uma pasta de saída"""
+
+    def __init__(self, output_dir="output"):
+        self.output_dir = Path(output_dir)
+        # Contagens da última consulta: arquivos com índice, descartados pelo índice e registros lidos
+        self.files_indexed = 0
+        self.files_skipped = 0
+        self.rows_read = 0
+
+    def indexes(self) -> List[Path]:
+        """Índices da pasta, em ordem de nome"""
+        return sorted(self.output_dir.glob(f"*{INDEX_SUFFIX}"))
+
+    def query(self, plate: Optional[str] = None, start: Optional[DateValue] = None,
+              end: Optional[DateValue] = None, event: Optional[str] = None,
+              speed_above: Optional[int] = None) -> pd.DataFrame:
+        """Registros de todos os CSVs indexados que atendem a todos os filtros dados
+
+        plate e event comparam o texto exato da célula; start e end limitam
+        Data/Hora (inclusive; ver to_minutes); speed_above deixa só Velocidade
+        acima do valor. O resultado tem as colunas dos CSVs, em texto como
+        estão nos arquivos, e a coluna Arquivo com o CSV de origem; os
+        registros saem na ordem dos arquivos e, dentro de cada um, na ordem
+        do CSV.
+        """
+        low = to_minutes(start) if start is not None else None
+        high = to_minutes(end, end=True) if end is not None else None
+        self.files_indexed = self.files_skipped = self.rows_read = 0
+
+        frames = []
+        for path in self.indexes():
+            self.files_indexed += 1
+            found = self._query_file(path, plate, low, high, event, speed_above)
+            if found is None:
+                self.files_skipped += 1
+                continue
+            self.rows_read += len(found)
+            if len(found):
+                found.insert(0, FILE_COLUMN, _csv_path(path).name)
+                frames.append(found)
+        if not frames:
+            return pd.DataFrame(columns=[FILE_COLUMN])
+        return pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+
+    def _open(self, path: Path) -> Optional[_IndexFile]:
+        """Índice aberto, refeito antes se o CSV mudou ou se está ilegível; None se não há o que consultar"""
+        csv_path = _csv_path(path)
+        for attempt in range(2):
+            try:
+                stat = os.stat(csv_path)
+            except FileNotFoundError:
+                logger.warning(f"Índice sem CSV, ignorado: {path.name}")
+                return None
+            try:
+                index = _IndexFile(path)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Índice ilegível {path.name}: {e}")
+            else:
+                header = index.header
+                if (header.get('format'), header.get('size'), header.get('mtime_ns')) == (
+                        INDEX_FORMAT, stat.st_size, stat.st_mtime_ns):
+                    return index
+                index.file.close()
+            if attempt == 0:
+                logger.info(f"CSV alterado depois do índice, refazendo {path.name}")
+                if build_index(csv_path) is None:
+                    path.unlink(missing_ok=True)
+                    return None
+        return None
+
+    def _query_file(self, path: Path, plate: Optional[str], low: Optional[int], high: Optional[int],
+                    event: Optional[str], speed_above: Optional[int]) -> Optional[pd.DataFrame]:
+        """Registros do CSV do índice que atendem aos filtros; None se o cabeçalho já descarta o arquivo"""
+        index = self._open(path)
+        if index is None:
+            return None
+        with index:
+            header = index.header
+            codes = {}
+            for value, distinct in ((plate, 'plates'), (event, 'events')):
+                if value is not None:
+                    try:
+                        codes[distinct] = header[distinct].index(value.strip())
+                    except ValueError:
+                        return None
+            if low is not None or high is not None:
+                first, last = header['first_minute'], header['last_minute']
+                if first is None or (low is not None and last < low) or (high is not None and first > high):
+                    return None
+
+            # Só as colunas dos filtros pedidos são lidas do disco
+            conditions = []
+            if 'plates' in codes:
+                conditions.append(index['plate_codes'] == codes['plates'])
+            if 'events' in codes:
+                conditions.append(index['event_codes'] == codes['events'])
+            if low is not None or high is not None:
+                minutes = index['minutes']
+                conditions.append(minutes != NO_MINUTE)
+                if low is not None:
+                    conditions.append(minutes >= low)
+                if high is not None:
+                    conditions.append(minutes <= high)
+            if speed_above is not None:
+                conditions.append(index['speed'] > speed_above)
+
+            rows = np.flatnonzero(np.logical_and.reduce(conditions)) if conditions else np.arange(header['rows'])
+            offsets = index['offsets'] if rows.size else None
+        if not rows.size:
+            return pd.DataFrame(columns=header['columns'])
+        return _read_rows(_csv_path(path), offsets, rows, header['columns'])
+
+
+def parse_query_args(argv=None) -> argparse.Namespace:
+    """Argumentos do subcomando consultar"""
+    parser = argparse.ArgumentParser(
+        prog=f"pdf_converter.py {QUERY_COMMAND}",
+        description="Consulta os CSVs indexados da pasta de saída (conversão com --index) sem ler os arquivos "
+                    "inteiros; os filtros se somam")
+    parser.add_argument("--placa", help="Placa exata, como no CSV (ex.: 'AZU 8900')")
+    parser.add_argument("--de", metavar="DATA", help="Data/Hora inicial: DD/MM/AAAA ou 'DD/MM/AAAA HH:MM'")
+    parser.add_argument("--ate", metavar="DATA", help="Data/Hora final, inclusive (uma data sem hora vai até 23:59)")
+    parser.add_argument("--evento", help="Evento exato (ex.: 'Em Movimento')")
+    parser.add_argument("--acima-de", type=int, metavar="KMH", help="Só registros com Velocidade acima disso")
+    parser.add_argument("--pasta", default="output", help="Pasta de saída com os CSVs indexados (padrão: output)")
+    parser.add_argument("--saida", metavar="ARQUIVO", help="Grava o resultado neste CSV em vez de imprimir")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    """Subcomando consultar: imprime (ou grava) os registros encontrados em CSV"""
+    args = parse_query_args(argv)
+    index = OutputIndex(args.pasta)
+    try:
+        found = index.query(plate=args.placa, start=args.de, end=args.ate, event=args.evento,
+                            speed_above=args.acima_de)
+    except ValueError as e:
+        print(f"Erro na consulta: {e}", file=sys.stderr)
+        return 2
+    if not index.files_indexed:
+        print(f"Nenhum CSV indexado em {args.pasta} (converta com --index)", file=sys.stderr)
+        return 1
+
+    if args.saida:
+        found.to_csv(args.saida, index=False, encoding='utf-8-sig')
+    else:
+        found.to_csv(sys.stdout, index=False)
+    print(f"{len(found)} registros de {index.files_indexed} arquivos indexados "
+          f"({index.files_skipped} descartados pelo índice)", file=sys.stderr)
+    return 0
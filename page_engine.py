@@ -0,0 +1,174 @@
+"""
+Motor de páginas de passagem única.
+
+Abre cada PDF uma única vez e extrai o texto e as tabelas de cada página uma
+única vez. As etapas de análise, extração de tabelas e extração de texto do
+PDFConverter leem o mesmo resultado por página em vez de reabrir o arquivo.
+
+A extração em si fica com um backend (extraction_backends): pdfplumber,
+pypdf2 ou 'auto', que compara os dois nas primeiras páginas e só fica com o
+pypdf2 se ele reproduzir as mesmas linhas.
+"""
+
+from typing import Dict, Iterable, Iterator, List, Optional
+import logging
+
+from conversion_metrics import NULL_METRICS
+from pdf_source import as_pdf_source
+from extraction_backends import (AUTO, BACKENDS, DEFAULT_BACKEND, DEFAULT_SAMPLE_PAGES, ExtractionBackend,
+                                 PageContent, PdfplumberBackend, TextStreamBackend, same_lines)
+
+logger = logging.getLogger(__name__)
+
+
+class PageEngine:
+    """Abre o PDF sob demanda e mantém o resultado de cada página em cache
+
+    Com cache_pages=False nada é guardado: cada página é extraída, entregue e
+    descartada, para percorrer documentos enormes com memória constante.
+    """
+
+    def __init__(self, pdf_path, cache_pages: bool = True, backend: str = DEFAULT_BACKEND,
+                 sample_pages: int = DEFAULT_SAMPLE_PAGES, metrics=NULL_METRICS):
+        if backend != AUTO and backend not in BACKENDS:
+            raise ValueError(f"Backend de extração desconhecido: {backend}")
+        # Caminho do PDF ou conteúdo em memória (bytes, objeto de arquivo, mmap)
+        self.source = as_pdf_source(pdf_path)
+        self.pdf_path = self.source.path
+        self.cache_pages = cache_pages
+        self.backend = backend
+        self.sample_pages = sample_pages
+        # Tempo de extração das páginas entra na etapa 'page_extraction'
+        self.metrics = metrics
+        self.pages_parsed = 0
+        # Páginas em que o backend procurou tabelas e em que pulou a procura (sem traçado)
+        self.table_pages_scanned = 0
+        self.table_pages_skipped = 0
+        self._backend: Optional[ExtractionBackend] = None
+        # Nome do backend em uso (continua disponível depois de close)
+        self._backend_name = PdfplumberBackend.name if backend == AUTO else backend
+        # Modo automático: páginas em que o pypdf2 já reproduziu o pdfplumber
+        self._deciding = backend == AUTO
+        self._matched_pages = 0
+        self._candidate: Optional[ExtractionBackend] = None
+        self._page_count: Optional[int] = None
+        self._pages: Dict[int, PageContent] = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _open(self) -> ExtractionBackend:
+        # Abertura tardia: erros de leitura aparecem dentro da etapa que usa o PDF
+        if self._backend is None:
+            name = PdfplumberBackend.name if self.backend == AUTO else self.backend
+            with self.metrics.stage('page_extraction'):
+                self._backend = BACKENDS[name](self.source)
+        return self._backend
+
+    def close(self):
+        for backend in (self._backend, self._candidate):
+            if backend is not None:
+                backend.close()
+        self._backend = None
+        self._candidate = None
+
+    @property
+    def backend_name(self) -> str:
+        """Backend em uso; no modo automático, pdfplumber até a escolha"""
+        return self._backend_name
+
+    @property
+    def page_count(self) -> int:
+        if self._page_count is None:
+            self._page_count = self._open().page_count
+        return self._page_count
+
+    def _parse_page(self, index: int) -> PageContent:
+        with self.metrics.stage('page_extraction'):
+            backend = self._open()
+            scanned, skipped = backend.table_pages_scanned, backend.table_pages_skipped
+            content = backend.parse_page(index)
+            self.pages_parsed += 1
+            self.table_pages_scanned += backend.table_pages_scanned - scanned
+            self.table_pages_skipped += backend.table_pages_skipped - skipped
+            if self._deciding:
+                self._compare_with_candidate(content, index)
+        return content
+
+    def _compare_with_candidate(self, reference: PageContent, index: int):
+        """Modo automático: confere a página no pypdf2 e troca de backend se todas baterem"""
+        try:
+            if self._candidate is None:
+                self._candidate = TextStreamBackend(self.source)
+            matches = not reference.tables and same_lines(reference, self._candidate.parse_page(index))
+        except Exception as e:
+            logger.debug(f"Backend pypdf2 indisponível para {self.source.name}: {e}")
+            matches = False
+
+        if not matches:
+            self._deciding = False
+            if self._candidate is not None:
+                self._candidate.close()
+                self._candidate = None
+            logger.info(f"Backend de extração: pdfplumber (página {index + 1} difere no pypdf2 ou tem tabelas)")
+            return
+
+        self._matched_pages += 1
+        if self._matched_pages >= min(self.sample_pages, self.page_count):
+            self._deciding = False
+            self._backend.close()
+            self._backend, self._candidate = self._candidate, None
+            self._backend_name = self._backend.name
+            logger.info(f"Backend de extração: pypdf2 (texto idêntico nas {self._matched_pages} primeiras páginas)")
+
+    def resolve_backend(self) -> str:
+        """Extrai as páginas de amostra, se preciso, até o modo automático escolher o backend"""
+        index = 0
+        while self._deciding and index < self.page_count:
+            if index not in self._pages:
+                page = self._parse_page(index)
+                if self.cache_pages:
+                    self._pages[index] = page
+            index += 1
+        return self.backend_name
+
+    def page(self, index: int) -> PageContent:
+        """Conteúdo de uma página (índice a partir de 0), extraída apenas na primeira vez"""
+        if index in self._pages:
+            return self._pages[index]
+        content = self._parse_page(index)
+        if self.cache_pages:
+            self._pages[index] = content
+        return content
+
+    def iter_pages(self, start: int = 0, end: Optional[int] = None) -> Iterator[PageContent]:
+        """Itera pelas páginas [start, end), extraindo cada uma apenas na primeira vez"""
+        end = self.page_count if end is None else min(end, self.page_count)
+        for index in range(start, end):
+            yield self.page(index)
+
+    def add_pages(self, pages: Iterable[PageContent]):
+        """Guarda páginas extraídas fora deste motor (por exemplo, em outro processo)"""
+        for page in pages:
+            if page.number - 1 not in self._pages:
+                self._pages[page.number - 1] = page
+                self.pages_parsed += 1
+
+    def restore(self, pages: List[PageContent]):
+        """Carrega todas as páginas de uma extração anterior; o PDF não é aberto"""
+        self._pages = {page.number - 1: page for page in pages}
+        self._page_count = len(pages)
+        self._deciding = False
+
+    def extracted_pages(self) -> Optional[List[PageContent]]:
+        """Todas as páginas já extraídas, em ordem, ou None se faltar alguma"""
+        if len(self._pages) != self.page_count:
+            return None
+        return [self._pages[index] for index in range(self.page_count)]
+
+    def pages(self) -> List[PageContent]:
+        """Retorna o conteúdo de todas as páginas"""
+        return list(self.iter_pages())
@@ -0,0 +1,185 @@
+"""
+Paralelismo por faixas de páginas dentro de um único PDF.
+
+O documento é dividido em faixas contíguas de páginas. Cada processo abre o
+PDF, extrai suas páginas e já devolve os registros de rastreamento da faixa,
+usando o cabeçalho detectado pelo processo principal. As linhas quebradas na
+divisa entre duas faixas são unidas na junção, com a mesma regra de
+PDFConverter._process_broken_lines, então o resultado é idêntico ao sequencial.
+"""
+
+import math
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+import logging
+
+from conversion_metrics import NULL_METRICS
+from extraction_backends import DEFAULT_BACKEND
+from layout_templates import LayoutTemplate
+from page_engine import PageContent, PageEngine
+from record_buffer import RecordBuffer
+
+logger = logging.getLogger(__name__)
+
+# Menor faixa que vale a pena enviar para outro processo
+MIN_PAGES_PER_RANGE = 20
+
+
+class PageRangeResult:
+    """Resultado de uma faixa de páginas processada por um worker"""
+
+    def __init__(self, start: int, pages: List[PageContent], rows: RecordBuffer,
+                 first_line: Optional[str], pending: Optional[str]):
+        self.start = start
+        self.pages = pages
+        self.rows = rows
+        # Primeira linha crua da faixa: pode completar a linha pendente da faixa anterior
+        self.first_line = first_line
+        # Última linha de dados da faixa, ainda aberta para a faixa seguinte
+        self.pending = pending
+        # (páginas com tabelas procuradas, páginas puladas sem traçado) no worker
+        self.table_scan = (0, 0)
+
+
+def split_page_ranges(page_count: int, workers: int,
+                      min_pages: int = MIN_PAGES_PER_RANGE) -> List[Tuple[int, int]]:
+    """Divide [0, page_count) em faixas contíguas, algumas por worker para equilibrar a carga"""
+    if page_count <= 0:
+        return []
+    size = max(min_pages, math.ceil(page_count / (workers * 4)))
+    return [(start, min(start + size, page_count)) for start in range(0, page_count, size)]
+
+
+def extract_page_range(converter, pdf_path, start: int, end: int, header: str,
+                       backend: str = DEFAULT_BACKEND) -> PageRangeResult:
+    """Processa as páginas [start, end) em um worker e devolve registros e costuras"""
+    with PageEngine(pdf_path, backend=backend) as engine:
+        pages = list(engine.iter_pages(start, end))
+
+    result = build_range_result(converter, start, pages, header)
+    result.table_scan = (engine.table_pages_scanned, engine.table_pages_skipped)
+    return result
+
+
+def build_range_result(converter, start: int, pages: List[PageContent], header: str) -> PageRangeResult:
+    """Extrai os registros de uma faixa já lida, deixando a última linha aberta para a costura"""
+    expected_cols = len(converter._parse_header(header))
+    # A faixa pode não conter a primeira página: o layout vem do cabeçalho do documento
+    layout = converter.layouts.for_header(header)
+    texts = [page.text for page in pages if page.text]
+    first_line = texts[0].split('\n')[0] if texts else None
+    _, data_lines, pending = converter._scan_text_lines(texts, flush=False, layout=layout)
+    rows = converter._parse_data_lines(data_lines, expected_cols, layout=layout)
+
+    return PageRangeResult(start, pages, rows, first_line, pending)
+
+
+class RangeStitcher:
+    """Costura as linhas quebradas na divisa entre faixas consecutivas
+
+    Recebe os resultados das faixas na ordem do documento: seam devolve o
+    registro que a linha pendente da faixa anterior forma com a primeira
+    linha da faixa atual, e tail o que sobrou aberto na última faixa.
+    """
+
+    def __init__(self, converter, expected_cols: int, layout: Optional[LayoutTemplate] = None,
+                 metrics=NULL_METRICS):
+        self.converter = converter
+        self.expected_cols = expected_cols
+        self.layout = layout
+        self.metrics = metrics
+        self.pending: Optional[str] = None
+
+    def _parse(self, line: str):
+        return self.converter._parse_data_lines([line], self.expected_cols, layout=self.layout,
+                                                metrics=self.metrics)
+
+    def seam(self, result: PageRangeResult):
+        """Registros da divisa antes dos registros de result (None se não houver costura)"""
+        rows = None
+        if self.pending is not None and result.first_line is not None:
+            rows = self._parse(self.converter._process_broken_lines([self.pending, result.first_line])[0])
+            self.pending = None
+        if result.pending is not None:
+            self.pending = result.pending
+        return rows
+
+    def tail(self):
+        """Registros da linha que ficou aberta no fim da última faixa (None se não houver)"""
+        if self.pending is None:
+            return None
+        rows, self.pending = self._parse(self.pending), None
+        return rows
+
+
+class ParallelPageExtractor:
+    """Extrai os registros de texto de um PDF grande usando vários processos"""
+
+    def __init__(self, converter, workers: int, min_pages: int = MIN_PAGES_PER_RANGE):
+        self.converter = converter
+        self.workers = workers
+        self.min_pages = min_pages
+
+    def find_header(self, engine: PageEngine) -> Optional[str]:
+        """Procura a linha de cabeçalho do layout do documento nas primeiras páginas (normalmente a primeira)"""
+        layout = None
+        for page in engine.iter_pages():
+            if layout is None and page.text:
+                layout = self.converter._detect_layout(page.text)
+            for line in page.text.split('\n'):
+                if layout is not None and layout.is_header(line):
+                    return line.strip()
+        return None
+
+    def merge(self, results: List[PageRangeResult], expected_cols: int,
+              layout: Optional[LayoutTemplate] = None, metrics=NULL_METRICS) -> RecordBuffer:
+        """Junta os registros das faixas, costurando as linhas quebradas entre elas"""
+        # Mesmo tipo de registros das faixas (RecordBuffer no Totalsat)
+        rows = self.converter._parse_data_lines([], expected_cols, layout=layout, metrics=metrics)
+        stitcher = RangeStitcher(self.converter, expected_cols, layout, metrics)
+
+        for result in results:
+            seam = stitcher.seam(result)
+            if seam is not None:
+                rows.extend(seam)
+            rows.extend(result.rows)
+
+        tail = stitcher.tail()
+        if tail is not None:
+            rows.extend(tail)
+        return rows
+
+    def run(self, engine: PageEngine) -> Tuple[Optional[str], RecordBuffer]:
+        """Retorna (cabeçalho, registros); as páginas extraídas ficam no cache do motor"""
+        header = self.find_header(engine)
+        if not header:
+            return None, RecordBuffer()
+
+        expected_cols = len(self.converter._parse_header(header))
+        layout = self.converter.layouts.for_header(header)
+        ranges = split_page_ranges(engine.page_count, self.workers, self.min_pages)
+        if len(ranges) < 2 or engine.source.in_memory:
+            # Documento pequeno: não compensa abrir processos. Em memória o PDF
+            # teria de ser copiado para cada faixa, então também fica sequencial
+            _, data_lines, _ = self.converter._scan_text_lines((page.text for page in engine.iter_pages()),
+                                                               layout=layout, metrics=engine.metrics)
+            return header, self.converter._parse_data_lines(data_lines, expected_cols, layout=layout,
+                                                            metrics=engine.metrics)
+
+        # Os workers usam o backend já escolhido pelo motor, sem repetir a amostragem
+        backend = engine.resolve_backend()
+        logger.info(f"Processando {engine.page_count} páginas em {len(ranges)} faixas com {self.workers} processos")
+
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            futures = [
+                executor.submit(extract_page_range, self.converter, engine.pdf_path, start, end, header, backend)
+                for start, end in ranges
+            ]
+            results = [future.result() for future in futures]
+
+        for result in results:
+            engine.add_pages(result.pages)
+            engine.table_pages_scanned += result.table_scan[0]
+            engine.table_pages_skipped += result.table_scan[1]
+
+        return header, self.merge(results, expected_cols, layout, engine.metrics)
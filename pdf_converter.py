@@ -1,44 +1,172 @@
-import pdfplumber
-import pandas as pd
+from __future__ import annotations
+
+import argparse
+import cProfile
+import io
 import os
 import sys
+import time
 from pathlib import Path
 import re
-from typing import List, Dict, Tuple, Optional
+from contextlib import contextmanager
+from typing import Callable, Iterable, Iterator, List, Dict, Tuple, Optional
 import logging
 
+from lazy_imports import lazy_module
+import line_grammar
+from layout_templates import LayoutRegistry, LayoutTemplate
+from page_engine import PageContent, PageEngine
+from pdf_source import MEMORY_NAME, PdfSource, as_pdf_source
+from record_buffer import RecordBuffer
+from trip_analysis import DEFAULT_IDLE_GAP_MINUTES, TRIPS_SUFFIX, TripAnalyzer
+from extraction_backends import BACKEND_CHOICES, DEFAULT_BACKEND
+from batch_runner import DEFAULT_FILE_TIMEOUT
+from batch_scheduler import BatchProgress, BatchScheduler, DEFAULT_SPLIT_PAGES, progress_file_writer, result_pages
+from page_parallel import ParallelPageExtractor
+from folder_watcher import FolderWatcher, DEFAULT_POLL_INTERVAL
+import columnar_output
+import excel_output
+from extraction_cache import CacheEntry, ExtractionCache, DEFAULT_CACHE_MAX_BYTES, default_cache_dir
+from batch_merge import BatchMerger, DEFAULT_MEMORY_ROWS, DEFAULT_MERGE_NAME, PARTITIONS
+from conversion_checkpoint import CHECKPOINT_SUFFIX, DEFAULT_CHECKPOINT_PAGES, ConversionCheckpoint
+import output_index
+from conversion_metrics import ConversionMetrics, NULL_METRICS, batch_report, dedicate_process, write_reports
+
+# Carregados no primeiro uso: a partida do CLI não paga o numpy e o pandas
+np = lazy_module('numpy')
+pd = lazy_module('pandas')
+
 # Configurar logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Registros por bloco na escrita em fluxo (--stream)
+STREAM_CHUNK_ROWS = 20000
+
+# Formatos de saída e a extensão de cada um
+OUTPUT_EXTENSIONS = {'csv': 'csv', 'excel': 'xlsx', 'parquet': 'parquet'}
+# Formatos que a conversão em fluxo sabe gravar em blocos
+STREAM_FORMATS = ('csv', 'parquet', 'excel')
+
+# Versão da extração e do parse; faz parte da chave do cache de extração.
+# Incrementar sempre que uma mudança alterar as linhas geradas.
+CONVERTER_VERSION = "2"
+
+# Pasta padrão das estatísticas do cProfile (--profile)
+DEFAULT_PROFILE_DIR = "profiles"
+
+
+# Textos que viram célula vazia (NA) na limpeza
+_EMPTY_TEXTS = frozenset(['', 'None', 'nan', 'NaN'])
+
+
+def _clean_text_column(values: list) -> np.ndarray:
+    """str + strip de cada célula, com os textos vazios trocados por NA"""
+    return np.array([pd.NA if (text := str(value).strip()) in _EMPTY_TEXTS else text for value in values],
+                    dtype=object)
+
+
+class _TablesFound(Exception):
+    """Interrompe a conversão em fluxo quando o PDF tem tabelas"""
+
 class PDFConverter:
-    def __init__(self, source_dir: str = "sourcePdfs", output_dir: str = "output"):
+    def __init__(self, source_dir: str = "sourcePdfs", output_dir: str = "output",
+                 cache: Optional[ExtractionCache] = None, backend: str = DEFAULT_BACKEND, profile_dir=None,
+                 layouts: Optional[LayoutRegistry] = None, trips: Optional[TripAnalyzer] = None,
+                 checkpoint_pages: int = 0, index_outputs: bool = False):
         self.source_dir = Path(source_dir)
+        # Criada na primeira gravação (_atomic_output): a API em memória não usa pastas
         self.output_dir = Path(output_dir)
-        self.output_dir.mkdir(exist_ok=True)
+        # Backend de extração das páginas ('auto', 'pdfplumber' ou 'pypdf2')
+        self.backend = backend
+        # Cache de extração opcional: PDFs já vistos não passam pelo pdfplumber
+        self.cache = cache
+        # Com uma pasta, cada conversão grava ali as estatísticas do cProfile
+        self.profile_dir = Path(profile_dir) if profile_dir else None
+        # Cada conversor guarda as próprias decisões de layout por assinatura da primeira página
+        self.layouts = layouts if layouts is not None else LayoutRegistry()
+        # Pós-processamento opcional dos registros: coordenadas, repetidos e viagens por placa
+        self.trips = trips
+        # Com N > 0, a extração grava um checkpoint a cada N páginas e retoma do último bloco completo
+        self.checkpoint_pages = checkpoint_pages
+        # Cada CSV de rastreamento gravado ganha um índice ao lado (<nome>.idx)
+        self.index_outputs = index_outputs
+    
+    @contextmanager
+    def _page_engine(self, pdf_path, engine: Optional[PageEngine] = None):
+        """Reaproveita o motor de páginas recebido (e as métricas dele) ou abre um novo para o PDF"""
+        if engine is not None:
+            yield engine
+        else:
+            with PageEngine(pdf_path, backend=self.backend) as engine:
+                yield engine
         
-    def analyze_pdf_content(self, pdf_path: str) -> Dict:
-        """Analisa o conteúdo do PDF para determinar o melhor formato de saída"""
-        analysis = {
+    @contextmanager
+    def _atomic_output(self, output_path):
+        """Caminho temporário na pasta do destino, movido para o destino só no fim
+        
+        Quem lê a pasta de saída nunca vê um arquivo pela metade: ou o arquivo
+        anterior, ou o novo completo.
+        """
+        output_path = Path(output_path)
+        # A pasta de saída só é criada quando algo é gravado nela
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        # Mantém a extensão: o pandas escolhe o formato do Excel por ela
+        tmp_path = output_path.with_name(f".{output_path.stem}.{os.getpid()}.part{output_path.suffix}")
+        try:
+            yield tmp_path
+            os.replace(tmp_path, output_path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+    
+    def _write_csv(self, df: pd.DataFrame, output_path):
+        with self._atomic_output(output_path) as tmp_path:
+            df.to_csv(tmp_path, index=False, encoding='utf-8-sig')
+    
+    def _empty_analysis(self) -> Dict:
+        return {
             'has_tables': False,
             'table_count': 0,
             'text_length': 0,
             'pages': 0,
             'structured_data': False,
-            'recommended_format': 'csv'
+            'recommended_format': 'csv',
+            'pages_inspected': 0
         }
         
+    def _format_settled(self, analysis: Dict) -> bool:
+        """Tabelas já vistas bastam para recomendar Excel; mais páginas não mudam a decisão"""
+        return analysis['table_count'] > 3 or (analysis['has_tables'] and analysis['pages'] > 2)
+    
+    def _sample_indexes(self, page_count: int) -> List[int]:
+        """Primeira, do meio e última página, sem repetição"""
+        return list(dict.fromkeys((0, page_count // 2, page_count - 1))) if page_count else []
+    
+    def analyze_pdf_content(self, pdf_path: str, engine: Optional[PageEngine] = None,
+                            full: bool = False) -> Dict:
+        """Analisa o conteúdo do PDF para determinar o melhor formato de saída
+        
+        Por padrão é uma sondagem em etapas: número de páginas pelos metadados,
+        depois a primeira, a do meio e a última página, parando assim que a
+        recomendação estiver decidida. O tempo não depende do tamanho do
+        documento. Com full=True todas as páginas são lidas e text_length e
+        table_count valem para o documento inteiro. pages_inspected informa
+        quantas páginas foram de fato lidas.
+        """
+        analysis = self._empty_analysis()
+        
         try:
-            with pdfplumber.open(pdf_path) as pdf:
-                analysis['pages'] = len(pdf.pages)
+            with self._page_engine(pdf_path, engine) as engine:
+                analysis['pages'] = engine.page_count
+                indexes = range(analysis['pages']) if full else self._sample_indexes(analysis['pages'])
                 
-                for page_num, page in enumerate(pdf.pages):
-                    # Extrair texto
-                    text = page.extract_text() or ""
-                    analysis['text_length'] += len(text)
+                for index in indexes:
+                    # Texto e tabelas já extraídos pelo motor de páginas
+                    page = engine.page(index)
+                    analysis['pages_inspected'] += 1
+                    analysis['text_length'] += len(page.text)
                     
-                    # Tentar extrair tabelas
-                    tables = page.extract_tables()
+                    tables = page.tables
                     if tables:
                         analysis['has_tables'] = True
                         analysis['table_count'] += len(tables)
@@ -47,9 +175,12 @@ class PDFConverter:
                         for table in tables:
                             if len(table) > 1 and len(set(len(row) for row in table)) == 1:
                                 analysis['structured_data'] = True
+                    
+                    if not full and self._format_settled(analysis):
+                        break
                 
                 # Determinar formato recomendado
-                if analysis['table_count'] > 3 or (analysis['has_tables'] and analysis['pages'] > 2):
+                if self._format_settled(analysis):
                     analysis['recommended_format'] = 'excel'
                 elif analysis['has_tables'] and analysis['structured_data']:
                     analysis['recommended_format'] = 'csv'
@@ -61,14 +192,14 @@ class PDFConverter:
             
         return analysis
     
-    def extract_tables_from_pdf(self, pdf_path: str) -> List[pd.DataFrame]:
+    def extract_tables_from_pdf(self, pdf_path: str, engine: Optional[PageEngine] = None) -> List[pd.DataFrame]:
         """Extrai tabelas do PDF usando pdfplumber"""
         dataframes = []
         
         try:
-            with pdfplumber.open(pdf_path) as pdf:
-                for page_num, page in enumerate(pdf.pages):
-                    tables = page.extract_tables()
+            with self._page_engine(pdf_path, engine) as engine:
+                for page_num, page in enumerate(engine.iter_pages()):
+                    tables = page.tables
                     
                     for table_num, table in enumerate(tables):
                         if table and len(table) > 0:
@@ -85,10 +216,11 @@ class PDFConverter:
                                 df = pd.DataFrame(table)
                             
                             # Limpar DataFrame
-                            df = self.clean_dataframe(df)
+                            with engine.metrics.stage('clean'):
+                                df = self.clean_dataframe(df)
                             
                             if not df.empty:
-                                df.name = f"Página_{page_num+1}_Tabela_{table_num+1}"
+                                df.attrs['name'] = f"Página_{page_num+1}_Tabela_{table_num+1}"
                                 dataframes.append(df)
                                 
         except Exception as e:
@@ -96,60 +228,395 @@ class PDFConverter:
             
         return dataframes
     
-    def extract_text_as_table(self, pdf_path: str) -> List[pd.DataFrame]:
-        """Extrai texto e tenta estruturar como tabela baseado em padrões"""
+    def extract_text_as_table(self, pdf_path: str, engine: Optional[PageEngine] = None,
+                              workers: int = 1, checkpoint: Optional[ConversionCheckpoint] = None
+                              ) -> List[pd.DataFrame]:
+        """Extrai texto e tenta estruturar como tabela baseado em padrões
+        
+        Com workers > 1 as páginas são divididas em faixas processadas em
+        paralelo; o resultado é idêntico ao da extração sequencial. Com um
+        checkpoint a extração é sequencial, em blocos gravados no checkpoint,
+        e retoma do último bloco completo de uma execução interrompida; o
+        checkpoint é removido quando os registros ficam prontos.
+        """
         dataframes = []
         
         try:
-            with pdfplumber.open(pdf_path) as pdf:
-                all_lines = []
-                header_found = None
-                
-                for page in pdf.pages:
-                    text = page.extract_text()
-                    if text:
-                        lines = text.split('\n')
-                        processed_lines = self._process_broken_lines(lines)
-                        
-                        for line in processed_lines:
-                            line = line.strip()
-                            if not line:
-                                continue
-                                
-                            # Detectar cabeçalho comum
-                            if 'Data/Hora' in line and 'Placa' in line:
-                                if not header_found:
-                                    header_found = line
-                                continue
-                            
-                            # Detectar linhas de dados (começam com data)
-                            if re.match(r'\d{2}/\d{2}/\d{4}\s+\d{2}:\d{2}', line):
-                                all_lines.append(line)
+            dataframes = self._build_text_dataframes(*self._extract_text_rows(pdf_path, engine, workers,
+                                                                              checkpoint))
+            if checkpoint is not None:
+                checkpoint.discard()
+        except Exception as e:
+            logger.error(f"Erro ao extrair texto como tabela do PDF {pdf_path}: {e}")
+            
+        return dataframes
+    
+    def _extract_text_rows(self, pdf_path: str, engine: Optional[PageEngine] = None, workers: int = 1,
+                           checkpoint: Optional[ConversionCheckpoint] = None
+                           ) -> Tuple[Optional[str], Optional[RecordBuffer]]:
+        """Linha de cabeçalho e registros do texto do PDF, antes de virar DataFrame"""
+        try:
+            with self._page_engine(pdf_path, engine) as engine:
+                if checkpoint is not None:
+                    return self._checkpointed_text_rows(engine, checkpoint)
+                if workers > 1:
+                    return ParallelPageExtractor(self, workers).run(engine)
                 
-                if all_lines and header_found:
-                    # Processar cabeçalho
-                    headers = self._parse_header(header_found)
-                    
-                    # Processar dados
-                    data_rows = []
-                    for line in all_lines:
-                        row = self._parse_data_line(line, len(headers))
-                        if row:
-                            data_rows.append(row)
-                    
-                    if data_rows:
-                        df = pd.DataFrame(data_rows, columns=headers)
-                        df = self.clean_dataframe(df)
-                        
-                        if not df.empty:
-                            df.name = "Dados_Rastreamento"
-                            dataframes.append(df)
+                header_found, data_lines, _ = self._scan_text_lines((page.text for page in engine.iter_pages()),
+                                                                    metrics=engine.metrics)
+                data_rows = None
+                if data_lines and header_found:
+                    data_rows = self._parse_data_lines(data_lines, len(self._parse_header(header_found)),
+                                                       layout=self.layouts.for_header(header_found),
+                                                       metrics=engine.metrics)
+                return header_found, data_rows
                 
         except Exception as e:
             logger.error(f"Erro ao extrair texto como tabela do PDF {pdf_path}: {e}")
             
+        return None, None
+    
+    def _checkpoint(self, pdf_path: Path) -> ConversionCheckpoint:
+        """Checkpoint do PDF na pasta de saída (.<nome>.checkpoint), válido para o mesmo conteúdo e configuração"""
+        directory = self.output_dir / f".{pdf_path.stem}{CHECKPOINT_SUFFIX}"
+        variant = f"{CONVERTER_VERSION}:{self.backend}:{self.layouts.signature()}"
+        return ConversionCheckpoint.for_pdf(pdf_path, directory, variant, self.checkpoint_pages)
+    
+    def _checkpointed_text_rows(self, engine: PageEngine, checkpoint: ConversionCheckpoint
+                                ) -> Tuple[Optional[str], Optional[RecordBuffer]]:
+        """Versão de _extract_text_rows em blocos de páginas, com o estado gravado a cada bloco
+        
+        Cada bloco guarda as páginas extraídas e os registros das suas linhas;
+        a linha pendente do fim do bloco e as linhas anteriores ao cabeçalho
+        ficam no estado e seguem para o bloco seguinte, como em
+        _scan_text_lines. As páginas dos blocos já gravados voltam para o
+        motor, então a análise e as tabelas também não as extraem de novo.
+        """
+        # O modo automático escolhe o backend pelas primeiras páginas: a escolha
+        # acontece antes de as páginas gravadas voltarem, como numa execução inteira
+        engine.resolve_backend()
+        metrics = engine.metrics
+        with metrics.stage('checkpoint'):
+            state, pages, blocks = checkpoint.load()
+        if state.next_page:
+            logger.info(f"Checkpoint: retomando na página {state.next_page + 1} de {engine.page_count} "
+                        f"({state.blocks} blocos de {checkpoint.block_pages} páginas já gravados)")
+            engine.add_pages(pages)
+            engine.table_pages_scanned += state.table_scan[0]
+            engine.table_pages_skipped += state.table_scan[1]
+        
+        # Layout do documento pelo primeiro texto, como em _scan_text_lines
+        layout = next((self._detect_layout(page.text) for page in pages if page.text), None)
+        
+        def parse(lines: List[str]):
+            return self._parse_data_lines(lines, len(self._parse_header(state.header)),
+                                          layout=self.layouts.for_header(state.header), metrics=metrics)
+        
+        for start in range(state.next_page, engine.page_count, checkpoint.block_pages):
+            scanned, skipped = engine.table_pages_scanned, engine.table_pages_skipped
+            block = list(engine.iter_pages(start, start + checkpoint.block_pages))
+            texts = [page.text for page in block if page.text]
+            if layout is None and texts:
+                layout = self._detect_layout(texts[0])
+            
+            header, lines, state.pending = self._scan_text_lines(texts, flush=False, layout=layout,
+                                                                 pending=state.pending, metrics=metrics)
+            state.header = state.header or header
+            state.lines.extend(lines)
+            rows = None
+            if state.header is not None:
+                rows = parse(state.lines)
+                state.lines = []
+            
+            state.next_page = start + len(block)
+            state.table_scan = (state.table_scan[0] + engine.table_pages_scanned - scanned,
+                                state.table_scan[1] + engine.table_pages_skipped - skipped)
+            with metrics.stage('checkpoint'):
+                checkpoint.save_block(state, block, rows)
+            blocks.append(rows)
+        
+        if state.header is None:
+            return None, None
+        if state.pending is not None:
+            state.lines.append(state.pending)
+        data_rows = parse([])
+        for rows in blocks:
+            if rows is not None:
+                data_rows.extend(rows)
+        data_rows.extend(parse(state.lines))
+        return state.header, data_rows
+    
+    def _build_text_dataframes(self, header_found: Optional[str], data_rows: Optional[RecordBuffer],
+                               metrics=NULL_METRICS) -> List[pd.DataFrame]:
+        """Monta o DataFrame de rastreamento a partir das linhas já processadas"""
+        dataframes = []
+        
+        if data_rows and header_found:
+            headers = self._parse_header(header_found)
+            with metrics.stage('clean'):
+                df = self._clean_records(data_rows, headers)
+            
+            if not df.empty:
+                df.attrs['name'] = "Dados_Rastreamento"
+                dataframes.append(df)
+        
         return dataframes
     
+    def _scan_text_lines(self, texts: Iterable[str], flush: bool = True,
+                         layout: Optional[LayoutTemplate] = None, pending: Optional[str] = None,
+                         metrics=NULL_METRICS) -> Tuple[Optional[str], List[str], Optional[str]]:
+        """Percorre o texto das páginas e separa cabeçalho e linhas de dados
+        
+        Uma linha de dados no fim de uma página que ainda pode ser completada
+        pela primeira linha da página seguinte fica pendente até lá. Retorna
+        (cabeçalho, linhas de dados, linha pendente); com flush=True a linha
+        pendente do fim do texto entra nas linhas de dados. Sem layout, ele é
+        escolhido pelo primeiro texto (a primeira página). pending continua a
+        linha pendente de uma passagem anterior (bloco de checkpoint).
+        """
+        header_found = None
+        data_lines = []
+        
+        for text in texts:
+            if not text:
+                continue
+            if layout is None:
+                layout = self._detect_layout(text)
+            
+            processed_lines, pending = self._repair_page_lines(text, pending, layout, metrics)
+            
+            for is_header, line in self._classify_lines(processed_lines, layout):
+                if is_header:
+                    if not header_found:
+                        header_found = line
+                else:
+                    data_lines.append(line)
+        
+        if flush and pending is not None:
+            data_lines.append(pending)
+            pending = None
+        
+        return header_found, data_lines, pending
+    
+    def _iter_page_lines(self, texts: Iterable[str], metrics=NULL_METRICS) -> Iterator[List[Tuple[bool, str]]]:
+        """Versão em fluxo de _scan_text_lines: gera a lista de (é_cabeçalho, linha) de cada página"""
+        pending = None
+        layout = None
+        
+        for text in texts:
+            if not text:
+                continue
+            if layout is None:
+                layout = self._detect_layout(text)
+            
+            processed_lines, pending = self._repair_page_lines(text, pending, layout, metrics)
+            yield list(self._classify_lines(processed_lines, layout))
+        
+        if pending is not None:
+            yield [(False, pending)]
+    
+    def _detect_layout(self, text: str) -> LayoutTemplate:
+        """Layout do documento pela primeira página; sem cabeçalho conhecido, o layout padrão"""
+        return self.layouts.detect(text) or self.layouts.default
+    
+    def _classify_lines(self, processed_lines: Iterable[str],
+                        layout: Optional[LayoutTemplate] = None) -> Iterator[Tuple[bool, str]]:
+        """Gera (é_cabeçalho, linha) para cabeçalhos e linhas de dados, ignorando o resto"""
+        layout = layout or self.layouts.default
+        for line in processed_lines:
+            line = line.strip()
+            if not line:
+                continue
+                
+            # Detectar cabeçalho do layout
+            if layout.is_header(line):
+                yield True, line
+                continue
+            
+            # Detectar linhas de dados (no Totalsat, começam com data)
+            if layout.is_row(line):
+                yield False, line
+    
+    def _repair_page_lines(self, text: str, pending: Optional[str] = None,
+                           layout: Optional[LayoutTemplate] = None, metrics=NULL_METRICS
+                           ) -> Tuple[List[str], Optional[str]]:
+        """Une as linhas quebradas de uma página, incluindo a pendente da página anterior
+        
+        Retorna as linhas processadas e a nova linha pendente: a última linha
+        da página, quando é uma linha de dados sem coordenadas fechadas. Só o
+        layout Totalsat tem linhas quebradas; nos demais as linhas passam como estão.
+        """
+        lines = text.split('\n')
+        if not (layout or self.layouts.default).joins_broken_lines:
+            return lines, None
+        if pending is not None:
+            lines.insert(0, pending)
+        
+        with metrics.stage('line_repair'):
+            processed_lines = self._process_broken_lines(lines)
+        
+        # Linhas com data nunca são absorvidas por outra, então a última linha
+        # crua com data é também a última linha processada
+        last_line = lines[-1].strip()
+        if line_grammar.DATE_PATTERN.match(last_line) and not last_line.endswith(')'):
+            return processed_lines[:-1], processed_lines[-1]
+        
+        return processed_lines, None
+    
+    def _parse_data_lines(self, data_lines: Iterable[str], expected_cols: int, compact: bool = True,
+                          layout: Optional[LayoutTemplate] = None, metrics=NULL_METRICS):
+        """Converte as linhas de dados em registros, descartando as inválidas
+        
+        Os registros ficam em um RecordBuffer (colunas compactas), que é o que
+        vai para o DataFrame, o cache e a junção das faixas de páginas; com
+        compact=False sai uma lista de registros, para quem só os percorre.
+        Layouts que não são o Totalsat sempre saem em lista. Sem layout, vale
+        o padrão (Totalsat).
+        """
+        layout = layout or self.layouts.default
+        with metrics.stage('record_parse'):
+            rows = filter(None, (self._parse_data_line(line, expected_cols, layout) for line in data_lines))
+            return RecordBuffer(rows) if compact and layout.compact_records else list(rows)
+    
+    def _iter_text_rows(self, texts: Iterable[str], metrics=NULL_METRICS) -> Iterator[Tuple[List[str], List[str]]]:
+        """Gera (colunas, registro) em fluxo a partir do texto das páginas
+        
+        Linhas de dados anteriores ao cabeçalho ficam retidas até ele aparecer;
+        sem cabeçalho no documento nenhum registro é gerado, como na extração
+        completa.
+        """
+        headers = None
+        layout = None
+        data_lines = []
+        
+        for page_lines in self._iter_page_lines(texts, metrics):
+            for is_header, line in page_lines:
+                if not is_header:
+                    data_lines.append(line)
+                elif headers is None:
+                    headers = self._parse_header(line)
+                    layout = self.layouts.for_header(line)
+            
+            # Os registros de cada página são convertidos de uma vez
+            if headers is not None and data_lines:
+                for row in self._parse_data_lines(data_lines, len(headers), compact=False, layout=layout,
+                                                  metrics=metrics):
+                    yield headers, row
+                data_lines = []
+    
+    def _iter_clean_chunks(self, rows: Iterable[Tuple[List[str], List[str]]],
+                           chunk_rows: int = STREAM_CHUNK_ROWS, metrics=NULL_METRICS) -> Iterator[pd.DataFrame]:
+        """Agrupa os registros em blocos de DataFrame já limpos"""
+        headers = None
+        chunk = []
+        
+        for headers, row in rows:
+            chunk.append(row)
+            if len(chunk) >= chunk_rows:
+                yield self._clean_chunk(chunk, headers, metrics)
+                chunk = []
+        
+        if chunk:
+            yield self._clean_chunk(chunk, headers, metrics)
+    
+    def _typed_columns(self, df: pd.DataFrame, headers: List[str]) -> pd.DataFrame:
+        """Anota no DataFrame os tipos de coluna do layout, usados pela saída Parquet"""
+        layout = self.layouts.for_columns(headers)
+        if layout is not None and layout.types:
+            df.attrs['column_types'] = layout.types
+        return df
+    
+    def _records_frame(self, data_rows, headers: List[str]) -> pd.DataFrame:
+        """DataFrame de texto dos registros, de um RecordBuffer ou de uma lista (cache antigo)"""
+        if isinstance(data_rows, RecordBuffer):
+            return data_rows.to_dataframe(headers)
+        return pd.DataFrame(data_rows, columns=headers)
+    
+    def _clean_records(self, data_rows, headers: List[str]) -> pd.DataFrame:
+        """clean_dataframe dos registros; num RecordBuffer cada valor distinto é limpo uma vez só"""
+        if isinstance(data_rows, RecordBuffer):
+            # Registros nunca têm célula ausente: não há linha nem coluna vazia a remover
+            df = data_rows.to_dataframe(headers, clean=_clean_text_column)
+        else:
+            df = self.clean_dataframe(pd.DataFrame(data_rows, columns=headers))
+        return self._typed_columns(df, headers)
+    
+    def _clean_chunk(self, chunk, headers: List[str], metrics=NULL_METRICS) -> pd.DataFrame:
+        # Manter todas as colunas em todos os blocos para o CSV ter um esquema só
+        with metrics.stage('clean'):
+            return self._typed_columns(self._clean_records(chunk, headers).reindex(columns=headers), headers)
+    
+    def stream_text_to_csv(self, pdf_path: str, output_path: str, engine: Optional[PageEngine] = None,
+                           chunk_rows: int = STREAM_CHUNK_ROWS) -> int:
+        """Extrai os dados de rastreamento do texto direto para CSV, em blocos
+        
+        Páginas, linhas, registros e blocos limpos passam um a um por geradores,
+        então a memória fica constante independente do número de páginas.
+        Retorna o número de registros gravados; sem registros o arquivo não é criado.
+        """
+        with self._page_engine(pdf_path, engine) as engine:
+            chunks = self._iter_clean_chunks(
+                self._iter_text_rows((page.text for page in engine.iter_pages()), engine.metrics), chunk_rows,
+                engine.metrics
+            )
+            return self._write_csv_chunks(chunks, output_path)
+    
+    def _write_csv_chunks(self, chunks: Iterable[pd.DataFrame], output_path) -> int:
+        """Grava os blocos em um único CSV, com o cabeçalho só no primeiro
+        
+        O CSV só aparece no destino depois do último bloco; com erro no meio
+        nada fica para trás. Sem nenhum bloco, nenhum arquivo é criado.
+        """
+        chunks = iter(chunks)
+        first_chunk = next(chunks, None)
+        if first_chunk is None:
+            return 0
+        
+        with self._atomic_output(output_path) as tmp_path:
+            with open(tmp_path, 'w', encoding='utf-8-sig', newline='') as handle:
+                first_chunk.to_csv(handle, index=False)
+                rows_written = len(first_chunk)
+                for chunk in chunks:
+                    chunk.to_csv(handle, index=False, header=False)
+                    rows_written += len(chunk)
+        
+        return rows_written
+    
+    def _write_parquet_chunks(self, chunks: Iterable[pd.DataFrame], output_path) -> int:
+        """Grava os blocos em um único Parquet tipado, um row group por bloco"""
+        chunks = iter(chunks)
+        first_chunk = next(chunks, None)
+        if first_chunk is None:
+            return 0
+        
+        with self._atomic_output(output_path) as tmp_path:
+            with columnar_output.ParquetChunkWriter(tmp_path) as writer:
+                writer.write(first_chunk)
+                rows_written = len(first_chunk)
+                for chunk in chunks:
+                    writer.write(chunk)
+                    rows_written += len(chunk)
+        
+        return rows_written
+    
+    def _write_excel_chunks(self, chunks: Iterable[pd.DataFrame], output_path) -> int:
+        """Grava os blocos em uma única planilha 'Dados' de uma pasta de trabalho somente escrita"""
+        chunks = iter(chunks)
+        first_chunk = next(chunks, None)
+        if first_chunk is None:
+            return 0
+        
+        with self._atomic_output(output_path) as tmp_path:
+            with excel_output.ExcelWorkbookWriter(tmp_path) as writer:
+                writer.add_sheet('Dados', first_chunk.columns)
+                writer.write(first_chunk)
+                rows_written = len(first_chunk)
+                for chunk in chunks:
+                    writer.write(chunk)
+                    rows_written += len(chunk)
+        
+        return rows_written
+    
     def _process_broken_lines(self, lines: List[str]) -> List[str]:
         """Processa linhas quebradas, unindo-as quando necessário"""
         processed_lines = []
@@ -158,52 +625,37 @@ class PDFConverter:
         while i < len(lines):
             current_line = lines[i].strip()
             
-            # Se a linha atual começa com data/hora, pode ser uma linha de dados
-            if re.match(r'\d{2}/\d{2}/\d{4}\s+\d{2}:\d{2}', current_line):
-                # Verificar diferentes padrões de quebra
+            # Só uma linha de dados sem coordenadas fechadas pode continuar na próxima
+            if (i + 1 < len(lines) and not current_line.endswith(')') and
+                    line_grammar.DATE_PATTERN.match(current_line)):
+                next_line = lines[i + 1].strip()
+                next_match = line_grammar.match_line(next_line)
+                joined = None
                 
                 # Padrão 1: linha termina com "(-" (coordenadas quebradas no início)
                 if current_line.endswith('(-'):
-                    if i + 1 < len(lines):
-                        next_line = lines[i + 1].strip()
-                        if re.match(r'-?\d+\.?\d*,-?\d+\.?\d*\)', next_line):
-                            current_line = current_line[:-2] + ' (' + next_line
-                            i += 1
+                    if next_match.group('coord_tail') is not None:
+                        joined = current_line[:-2] + ' (' + next_line
                 
-                # Padrão 2: linha termina com "(-25.123,-" ou similar (coordenadas quebradas no meio)
-                elif re.search(r'\(-?\d+\.?\d*,-$', current_line):
-                    if i + 1 < len(lines):
-                        next_line = lines[i + 1].strip()
-                        # Se a próxima linha tem apenas a segunda coordenada
-                        if re.match(r'-?\d+\.?\d*\)$', next_line):
-                            current_line = current_line + next_line
-                            i += 1
+                # Padrão 2: linha termina com "(-25.123,-" (coordenadas quebradas no meio)
+                # e a próxima linha tem apenas a segunda coordenada
+                elif line_grammar.OPEN_LATITUDE_PATTERN.search(current_line):
+                    if next_match.group('lon_tail') is not None:
+                        joined = current_line + next_line
                 
-                # Padrão 3: linha termina com coordenada incompleta (números + vírgula + traço)
-                elif re.search(r'\(-?\d+\.?\d*,-$', current_line):
-                    if i + 1 < len(lines):
-                        next_line = lines[i + 1].strip()
-                        # Verificar se a próxima linha completa a coordenada
-                        if re.match(r'-?\d+\.?\d*\)$', next_line):
-                            current_line = current_line + next_line
-                            i += 1
+                # Padrão 3: outros tipos de quebra (localidade longa sem coordenadas completas)
+                # Se a próxima linha não começa com data/hora, não é cabeçalho,
+                # não é longa demais e parece continuação
+                elif (next_match.group('date') is None and 
+                      'Data/Hora' not in next_line and 
+                      next_line and 
+                      len(next_line) < 100 and
+                      line_grammar.is_continuation(next_match)):
+                    joined = current_line + ' ' + next_line
                 
-                # Padrão 4: outros tipos de quebra (localidade longa sem coordenadas completas)
-                elif not current_line.endswith(')') and i + 1 < len(lines):
-                    next_line = lines[i + 1].strip()
-                    # Se a próxima linha não começa com data/hora e não é cabeçalho
-                    if (not re.match(r'\d{2}/\d{2}/\d{4}\s+\d{2}:\d{2}', next_line) and 
-                        'Data/Hora' not in next_line and 
-                        next_line and 
-                        len(next_line) < 100):  # Evitar unir linhas muito longas
-                        
-                        # Se a próxima linha parece ser continuação
-                        if (re.search(r'\(-?\d+\.?\d*,-?\d+\.?\d*\)', next_line) or
-                            next_line.startswith('(') or
-                            re.match(r'-?\d+\.?\d*,-?\d+\.?\d*\)', next_line) or
-                            re.match(r'-?\d+\.?\d*\)$', next_line)):  # Apenas segunda coordenada
-                            current_line += ' ' + next_line
-                            i += 1
+                if joined is not None:
+                    current_line = joined
+                    i += 1
             
             processed_lines.append(current_line)
             i += 1
@@ -212,160 +664,277 @@ class PDFConverter:
 
     def _parse_header(self, header_line: str) -> List[str]:
         """Parse do cabeçalho para identificar colunas"""
-        # Para o formato específico: Data/Hora Placa Evento Vel Localidade Motorista
-        if 'Data/Hora' in header_line:
-            return ['Data/Hora', 'Placa', 'Evento', 'Velocidade', 'Localidade', 'Motorista']
+        # Colunas do layout do cabeçalho (Totalsat: Data/Hora Placa Evento Vel Localidade Motorista)
+        layout = self.layouts.for_header(header_line)
+        if layout is not None:
+            return list(layout.columns)
         
         # Fallback genérico
         return re.split(r'\s{2,}', header_line.strip())
     
-    def _parse_data_line(self, line: str, expected_cols: int) -> List[str]:
-        """Parse de uma linha de dados"""
+    def _parse_data_line(self, line: str, expected_cols: int,
+                         layout: Optional[LayoutTemplate] = None) -> List[str]:
+        """Parse de uma linha de dados
+        
+        Formato Totalsat: DD/MM/YYYY HH:MM PLACA EVENTO VEL LOCALIDADE... (ver
+        line_grammar); nos outros layouts, a gramática do template.
+        """
         try:
-            # Padrão específico para dados de rastreamento
-            # Formato: DD/MM/YYYY HH:MM PLACA EVENTO VEL LOCALIDADE...
-            
-            # Extrair data/hora (primeiro grupo)
-            date_match = re.match(r'(\d{2}/\d{2}/\d{4}\s+\d{2}:\d{2})', line)
-            if not date_match:
-                return None
-                
-            date_time = date_match.group(1)
-            remaining = line[len(date_time):].strip()
-            
-            # Dividir por espaços e tentar agrupar
-            tokens = remaining.split()
-            if len(tokens) >= 3:
-                # Primeiro token + número = placa (ex: "AZU 8900")
-                placa = f"{tokens[0]} {tokens[1]}" if len(tokens) > 1 and re.match(r'\d+', tokens[1]) else tokens[0]
-                start_idx = 2 if len(tokens) > 1 and re.match(r'\d+', tokens[1]) else 1
-                
-                # Encontrar onde começa a velocidade (primeiro número isolado após placa)
-                vel_index = -1
-                for i, token in enumerate(tokens[start_idx:], start_idx):
-                    if re.match(r'^\d+$', token):
-                        vel_index = i
-                        break
-                
-                if vel_index > 0:
-                    evento = ' '.join(tokens[start_idx:vel_index])
-                    velocidade = tokens[vel_index]
-                    localidade = ' '.join(tokens[vel_index+1:]) if vel_index+1 < len(tokens) else ''
-                else:
-                    evento = ' '.join(tokens[start_idx:-1]) if len(tokens) > start_idx+1 else (tokens[start_idx] if len(tokens) > start_idx else '')
-                    velocidade = '0'
-                    localidade = tokens[-1] if tokens else ''
-                
-                motorista = ''
-                
-                return [date_time, placa, evento, velocidade, localidade, motorista]
+            return (layout or self.layouts.default).parse(line)
             
         except Exception as e:
             logger.warning(f"Erro ao processar linha: {line[:50]}... - {e}")
             return None
     
     def clean_dataframe(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Limpa e formata o DataFrame"""
-        # Remover linhas completamente vazias
-        df = df.dropna(how='all')
+        """Limpa e formata o DataFrame
         
-        # Remover colunas completamente vazias
-        df = df.dropna(axis=1, how='all')
+        Cada coluna de texto é percorrida uma única vez: strip e troca de
+        vazios por NA no mesmo laço, sem as cópias de astype/strip/replace.
+        """
+        # Remover linhas e colunas completamente vazias (sem copiar se não houver)
+        missing = df.isna()
+        empty_rows = missing.all(axis=1)
+        if empty_rows.any():
+            df = df[~empty_rows]
+        empty_cols = missing.all(axis=0)
+        if empty_cols.any():
+            df = df.loc[:, ~empty_cols.values]
         
-        # Limpar espaços em branco
-        for col in df.columns:
-            if df[col].dtype == 'object':
-                df[col] = df[col].astype(str).str.strip()
-                # Substituir strings vazias ou 'None' por NaN
-                df[col] = df[col].replace(['', 'None', 'nan', 'NaN'], pd.NA)
+        # Limpar espaços em branco e substituir strings vazias ou 'None' por NaN
+        df = df.copy(deep=False)
+        for position, dtype in enumerate(df.dtypes):
+            if dtype == 'object':
+                df.isetitem(position, _clean_text_column(df.iloc[:, position].tolist()))
         
         return df
     
+    def _output_parts(self, dataframes: List[pd.DataFrame]) -> List[Tuple[str, pd.DataFrame]]:
+        """(sufixo do nome, DataFrame) de cada arquivo de saída do CSV e do Parquet
+        
+        Tabelas com o mesmo número de colunas são concatenadas em um arquivo só;
+        com estruturas diferentes sai um arquivo por tabela (_parte_N).
+        """
+        if len(dataframes) > 1:
+            # Tentar concatenar se tiverem estrutura similar
+            try:
+                if all(len(df.columns) == len(dataframes[0].columns) for df in dataframes):
+                    return [('', pd.concat(dataframes, ignore_index=True))]
+            except Exception as e:
+                logger.warning(f"Erro ao concatenar DataFrames: {e}")
+            # Salvar separadamente
+            return [(f"_parte_{i+1}", df) for i, df in enumerate(dataframes)]
+        return [('', df) for df in dataframes]
+    
+    def _part_path(self, output_path, suffix: str) -> Path:
+        output_path = Path(output_path)
+        return output_path.with_name(f"{output_path.stem}{suffix}{output_path.suffix}")
+    
     def save_to_csv(self, dataframes: List[pd.DataFrame], output_path: str):
         """Salva DataFrames em arquivo CSV"""
-        if len(dataframes) == 1:
-            # Um único DataFrame
-            dataframes[0].to_csv(output_path, index=False, encoding='utf-8-sig')
-        else:
-            # Múltiplos DataFrames - concatenar ou salvar separadamente
-            if len(dataframes) > 1:
-                # Tentar concatenar se tiverem estrutura similar
-                try:
-                    if all(len(df.columns) == len(dataframes[0].columns) for df in dataframes):
-                        combined_df = pd.concat(dataframes, ignore_index=True)
-                        combined_df.to_csv(output_path, index=False, encoding='utf-8-sig')
-                    else:
-                        # Salvar separadamente
-                        base_path = output_path.rsplit('.', 1)[0]
-                        for i, df in enumerate(dataframes):
-                            df.to_csv(f"{base_path}_parte_{i+1}.csv", index=False, encoding='utf-8-sig')
-                except Exception as e:
-                    logger.warning(f"Erro ao concatenar DataFrames: {e}")
-                    # Salvar separadamente como fallback
-                    base_path = output_path.rsplit('.', 1)[0]
-                    for i, df in enumerate(dataframes):
-                        df.to_csv(f"{base_path}_parte_{i+1}.csv", index=False, encoding='utf-8-sig')
+        for suffix, df in self._output_parts(dataframes):
+            self._write_csv(df, self._part_path(output_path, suffix))
     
     def save_to_excel(self, dataframes: List[pd.DataFrame], output_path: str):
-        """Salva DataFrames em arquivo Excel"""
-        with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
-            if len(dataframes) == 1:
-                dataframes[0].to_excel(writer, sheet_name='Dados', index=False)
-            else:
-                for i, df in enumerate(dataframes):
-                    sheet_name = getattr(df, 'name', f'Tabela_{i+1}')[:31]  # Excel sheet name limit
-                    df.to_excel(writer, sheet_name=sheet_name, index=False)
+        """Salva DataFrames em arquivo Excel, uma planilha por tabela"""
+        with self._atomic_output(output_path) as tmp_path:
+            # Pasta de trabalho somente escrita: linhas gravadas em fluxo, planilha a planilha
+            excel_output.write_workbook(dataframes, tmp_path)
+    
+    def save_to_parquet(self, dataframes: List[pd.DataFrame], output_path: str):
+        """Salva DataFrames em Parquet com colunas tipadas (data, velocidade, coordenadas)"""
+        for suffix, df in self._output_parts(dataframes):
+            with self._atomic_output(self._part_path(output_path, suffix)) as tmp_path:
+                columnar_output.write_parquet(df, tmp_path)
+    
+    def convert_pdf(self, pdf_file: str, page_workers: int = 1, stream: bool = False,
+                    output_format: Optional[str] = None, metrics_path=None, prometheus_path=None,
+                    extracted: Optional[List[PageContent]] = None) -> Dict:
+        """Converte um arquivo PDF específico
+        
+        Com page_workers > 1 as páginas do documento são extraídas em paralelo
+        por faixas antes das etapas de análise e extração. Com stream=True os
+        relatórios de texto são gravados em CSV, Parquet ou Excel em blocos, com memória
+        constante (sem passar pelo cache de extração, que guardaria o documento
+        inteiro). output_format ('csv', 'excel' ou 'parquet') substitui o
+        formato recomendado pela análise. Com checkpoint_pages no construtor,
+        a extração sequencial grava um checkpoint a cada bloco de páginas e
+        uma conversão interrompida retoma do último bloco completo (ver
+        conversion_checkpoint); a conversão em fluxo e a paralela não usam
+        checkpoints. extracted traz páginas já extraídas em outros processos
+        (as faixas de um documento grande no BatchScheduler): só as que
+        faltarem são extraídas aqui, e o resultado é o mesmo da conversão
+        sequencial.
+        
+        O resultado traz em 'metrics' os tempos por etapa, a vazão e o pico de
+        memória da conversão; com metrics_path e/ou prometheus_path o relatório
+        também é gravado em JSON e/ou no formato do Prometheus.
+        """
+        result = self._measured(pdf_file, lambda metrics: self._convert_pdf(pdf_file, page_workers, stream,
+                                                                            output_format, extracted, metrics))
+        result.setdefault('input_file', pdf_file)
+        if metrics_path or prometheus_path:
+            write_reports(batch_report([result], result['metrics']['wall_seconds']), metrics_path, prometheus_path)
+        return result
+    
+    def _measured(self, label: str, convert: Callable[[ConversionMetrics], Dict]) -> Dict:
+        """Executa convert(métricas) com as métricas por etapa ligadas (e o cProfile, se pedido)"""
+        metrics = ConversionMetrics()
+        profiler = cProfile.Profile() if self.profile_dir is not None else None
+        try:
+            if profiler is not None:
+                profiler.enable()
+            result = convert(metrics)
+        finally:
+            if profiler is not None:
+                profiler.disable()
+        
+        result['metrics'] = metrics.report(
+            pages=result.get('analysis', {}).get('pages', 0),
+            rows=result.get('rows_written', 0),
+            bytes_written=self._bytes_written(result),
+        )
+        if profiler is not None:
+            self._dump_profile(profiler, label)
+        return result
+    
+    def _bytes_written(self, result: Dict) -> int:
+        """Bytes das saídas da conversão: todas as partes e o resumo das viagens"""
+        if 'outputs' in result:
+            return sum(len(data) for data in result['outputs'].values())
+        paths = list(result.get('output_files', []))
+        if result.get('trips_file'):
+            paths.append(result['trips_file'])
+        return sum(path.stat().st_size for path in map(Path, paths) if path.exists())
     
-    def convert_pdf(self, pdf_file: str) -> Dict:
-        """Converte um arquivo PDF específico"""
+    def _dump_profile(self, profiler: cProfile.Profile, pdf_file: str):
+        """Grava as estatísticas do cProfile da conversão (leitura: python -m pstats arquivo)"""
+        try:
+            self.profile_dir.mkdir(parents=True, exist_ok=True)
+            profile_path = self.profile_dir / f"{pdf_file.rsplit('.', 1)[0]}.prof"
+            profiler.dump_stats(str(profile_path))
+            logger.info(f"Perfil da conversão gravado em {profile_path}")
+        except OSError as e:
+            logger.warning(f"Falha ao gravar o perfil de {pdf_file}: {e}")
+    
+    def _convert_pdf(self, pdf_file: str, page_workers: int, stream: bool,
+                     output_format: Optional[str], extracted: Optional[List[PageContent]] = None,
+                     metrics=NULL_METRICS) -> Dict:
         pdf_path = self.source_dir / pdf_file
         
+        if output_format is not None and output_format not in OUTPUT_EXTENSIONS:
+            return {'success': False, 'error': f'Formato de saída desconhecido: {output_format}'}
+        
         if not pdf_path.exists():
             return {'success': False, 'error': f'Arquivo {pdf_file} não encontrado'}
         
         logger.info(f"Processando: {pdf_file}")
         
-        # Analisar conteúdo
-        analysis = self.analyze_pdf_content(pdf_path)
-        logger.info(f"Análise do PDF: {analysis}")
+        if stream and self.trips is not None:
+            # As viagens precisam de todos os registros de cada placa
+            logger.info("Viagens pedidas, seguindo com a conversão completa em vez do fluxo...")
+        elif stream and (output_format or 'csv') in STREAM_FORMATS:
+            result = self._convert_streaming(pdf_file, pdf_path, output_format or 'csv', metrics)
+            if result is not None:
+                return result
+            logger.info("PDF com tabelas, seguindo com a conversão completa...")
         
-        # Extrair dados
-        dataframes = self.extract_tables_from_pdf(pdf_path)
+        cache_key, cached = self._load_cached(pdf_path, metrics)
         
-        # Se não encontrou tabelas, tentar extrair texto estruturado
-        if not dataframes:
-            logger.info("Nenhuma tabela encontrada, tentando extrair dados do texto...")
-            dataframes = self.extract_text_as_table(pdf_path)
+        # Uma única abertura do PDF: cada página é extraída uma vez e
+        # compartilhada entre análise, extração de tabelas e de texto
+        with PageEngine(pdf_path, backend=self.backend, metrics=metrics) as engine:
+            text_result = None
+            checkpoint = None
+            if cached is not None:
+                engine.restore(cached.pages)
+                text_result = cached.text_result
+            elif extracted is not None:
+                # O modo automático escolhe o backend pelas primeiras páginas antes
+                # de receber as demais, como na extração sequencial; a procura de
+                # tabelas nessas páginas já foi contada na faixa que as extraiu
+                scanned, skipped = engine.table_pages_scanned, engine.table_pages_skipped
+                engine.resolve_backend()
+                engine.table_pages_scanned, engine.table_pages_skipped = scanned, skipped
+                engine.add_pages(extracted)
+            elif page_workers > 1:
+                try:
+                    # Nos processos de faixa o tempo só é medido de fora, como extração
+                    with metrics.stage('page_extraction'):
+                        text_result = ParallelPageExtractor(self, page_workers).run(engine)
+                except Exception as e:
+                    logger.warning(f"Falha na extração paralela de páginas, seguindo sequencialmente: {e}")
+            elif self.checkpoint_pages > 0:
+                try:
+                    checkpoint = self._checkpoint(pdf_path)
+                    text_result = self._checkpointed_text_rows(engine, checkpoint)
+                except Exception as e:
+                    logger.warning(f"Falha na extração com checkpoints, seguindo sem eles: {e}")
+            
+            analysis, dataframes, text_result = self._extract_dataframes(engine, text_result)
+            
+            if cache_key is not None and cached is None:
+                self._store_cached(cache_key, engine, text_result)
+        
+        logger.info(f"Páginas extraídas: {engine.pages_parsed} ({engine.backend_name}); tabelas procuradas em "
+                    f"{engine.table_pages_scanned}, puladas em {engine.table_pages_skipped} sem traçado")
         
         if not dataframes:
+            if checkpoint is not None:
+                checkpoint.discard()
             return {
                 'success': False, 
                 'error': 'Nenhuma tabela ou dados estruturados encontrados no PDF',
                 'analysis': analysis
             }
         
+        trips = self._postprocess(dataframes, metrics)
+        
         # Determinar nome do arquivo de saída
         base_name = pdf_file.rsplit('.', 1)[0]
         
-        # Salvar no formato recomendado
+        # Salvar no formato pedido ou no recomendado
+        output_format = output_format or analysis['recommended_format']
+        output_path = self.output_dir / f"{base_name}.{OUTPUT_EXTENSIONS[output_format]}"
+        # Excel: um arquivo só; CSV e Parquet: uma parte por estrutura de tabela
+        output_files = ([output_path] if output_format == 'excel'
+                        else [self._part_path(output_path, suffix) for suffix, _ in self._output_parts(dataframes)])
         try:
-            if analysis['recommended_format'] == 'excel':
-                output_file = f"{base_name}.xlsx"
-                output_path = self.output_dir / output_file
-                self.save_to_excel(dataframes, output_path)
-            else:
-                output_file = f"{base_name}.csv"
-                output_path = self.output_dir / output_file
-                self.save_to_csv(dataframes, output_path)
+            with metrics.stage('write'):
+                if output_format == 'excel':
+                    self.save_to_excel(dataframes, output_path)
+                elif output_format == 'parquet':
+                    self.save_to_parquet(dataframes, output_path)
+                else:
+                    self.save_to_csv(dataframes, output_path)
+                if trips is not None:
+                    trips_path = self.output_dir / f"{base_name}{TRIPS_SUFFIX}.csv"
+                    self._write_csv(trips, trips_path)
+            # Saída gravada: o checkpoint não é mais necessário
+            if checkpoint is not None:
+                checkpoint.discard()
+            if output_format == 'csv' and self.index_outputs:
+                self._index_csv([(self._part_path(output_path, suffix), df)
+                                 for suffix, df in self._output_parts(dataframes)], metrics)
             
-            return {
+            result = {
                 'success': True,
                 'input_file': pdf_file,
                 'output_file': str(output_path),
-                'format': analysis['recommended_format'],
+                'output_files': [str(path) for path in output_files],
+                'format': output_format,
                 'tables_found': len(dataframes),
+                'rows_written': sum(len(df) for df in dataframes),
+                'pages_parsed': engine.pages_parsed,
+                'table_pages': self._table_pages(engine),
+                'backend': engine.backend_name,
+                'cache': self._cache_status(cache_key, cached),
                 'analysis': analysis
             }
+            if trips is not None:
+                result['trips_file'] = str(trips_path)
+                result['trips_found'] = len(trips)
+            return result
             
         except Exception as e:
             return {
@@ -374,9 +943,280 @@ class PDFConverter:
                 'analysis': analysis
             }
     
-    def convert_all_pdfs(self) -> List[Dict]:
-        """Converte todos os PDFs na pasta source"""
+    def _extract_dataframes(self, engine: PageEngine, text_result: Optional[Tuple] = None
+                            ) -> Tuple[Dict, List[pd.DataFrame], Optional[Tuple]]:
+        """Análise, tabelas e, sem tabelas, os registros do texto, todos do mesmo motor de páginas"""
+        # Analisar conteúdo: as tabelas de todas as páginas são extraídas
+        # logo em seguida, então a análise completa não lê páginas a mais
+        with engine.metrics.stage('analysis'):
+            analysis = self.analyze_pdf_content(engine.source, engine, full=True)
+        logger.info(f"Análise do PDF: {analysis}")
+        
+        # Extrair dados
+        with engine.metrics.stage('table_extraction'):
+            dataframes = self.extract_tables_from_pdf(engine.source, engine)
+        
+        # Se não encontrou tabelas, tentar extrair texto estruturado
+        if not dataframes:
+            logger.info("Nenhuma tabela encontrada, tentando extrair dados do texto...")
+            if text_result is None:
+                text_result = self._extract_text_rows(engine.source, engine)
+            dataframes = self._build_text_dataframes(*text_result, metrics=engine.metrics)
+        
+        return analysis, dataframes, text_result
+    
+    def _postprocess(self, dataframes: List[pd.DataFrame], metrics=NULL_METRICS) -> Optional[pd.DataFrame]:
+        """Aplica o TripAnalyzer às tabelas de rastreamento (substituídas na lista) e devolve o resumo das viagens"""
+        if self.trips is None:
+            return None
+        summaries = []
+        with metrics.stage('trips'):
+            for i, df in enumerate(dataframes):
+                if self.trips.applies(df):
+                    dataframes[i], summary = self.trips.process(df)
+                    summaries.append(summary)
+        if not summaries:
+            logger.info("Nenhuma tabela com as colunas de rastreamento, viagens não calculadas")
+            return None
+        return pd.concat(summaries, ignore_index=True) if len(summaries) > 1 else summaries[0]
+    
+    def convert_source(self, source, output_format: Optional[str] = None, name: Optional[str] = None) -> Dict:
+        """Converte um PDF em memória, sem ler nem gravar arquivos
+        
+        source pode ser bytes, bytearray, memoryview, um mmap ou um objeto de
+        arquivo binário (lido a partir da posição atual); um caminho também é
+        aceito. O resultado traz os DataFrames em 'dataframes' e a análise;
+        com output_format ('csv', 'excel' ou 'parquet') traz também em
+        'outputs' o conteúdo serializado, {nome do arquivo: bytes}, igual ao
+        que convert_pdf gravaria na pasta de saída. name só dá nome às saídas
+        e aparece nos logs.
+        """
+        if output_format is not None and output_format not in OUTPUT_EXTENSIONS:
+            return {'success': False, 'error': f'Formato de saída desconhecido: {output_format}'}
+        try:
+            pdf = as_pdf_source(source, name)
+        except (TypeError, OSError) as e:
+            return {'success': False, 'error': f'Origem do PDF inválida: {e}'}
+        
+        return self._measured(pdf.name, lambda metrics: self._convert_source(pdf, output_format, metrics))
+    
+    def _convert_source(self, pdf: PdfSource, output_format: Optional[str], metrics=NULL_METRICS) -> Dict:
+        logger.info(f"Processando: {pdf.name}")
+        with PageEngine(pdf, backend=self.backend, metrics=metrics) as engine:
+            analysis, dataframes, _ = self._extract_dataframes(engine)
+        
+        if not dataframes:
+            return {
+                'success': False,
+                'input_file': pdf.name,
+                'error': 'Nenhuma tabela ou dados estruturados encontrados no PDF',
+                'analysis': analysis
+            }
+        
+        trips = self._postprocess(dataframes, metrics)
+        result = {
+            'success': True,
+            'input_file': pdf.name,
+            'dataframes': dataframes,
+            'tables_found': len(dataframes),
+            'rows_written': sum(len(df) for df in dataframes),
+            'pages_parsed': engine.pages_parsed,
+            'table_pages': self._table_pages(engine),
+            'backend': engine.backend_name,
+            'analysis': analysis
+        }
+        if trips is not None:
+            result['trips'] = trips
+        if output_format is not None:
+            base_name = pdf.name.rsplit('.', 1)[0] if pdf.name != MEMORY_NAME else 'documento'
+            with metrics.stage('write'):
+                result['format'] = output_format
+                result['outputs'] = self.serialize(dataframes, output_format, base_name)
+                if trips is not None:
+                    buffer = io.BytesIO()
+                    trips.to_csv(buffer, index=False, encoding='utf-8-sig')
+                    result['outputs'][f"{base_name}{TRIPS_SUFFIX}.csv"] = buffer.getvalue()
+        return result
+    
+    def iter_source_batches(self, source, chunk_rows: int = STREAM_CHUNK_ROWS,
+                            name: Optional[str] = None) -> Iterator[pd.DataFrame]:
+        """Registros de um relatório de texto em memória, em blocos de DataFrame já limpos
+        
+        Versão em fluxo de convert_source: as páginas são extraídas e
+        descartadas uma a uma e cada bloco sai assim que fica pronto, com as
+        mesmas colunas em todos. Só serve para relatórios de texto: numa página
+        com tabelas a iteração para com ValueError (use convert_source).
+        """
+        pdf = as_pdf_source(source, name)
+        
+        def texts(engine):
+            for page in engine.iter_pages():
+                if page.tables:
+                    raise ValueError(f"{pdf.name}: página {page.number} tem tabelas; use convert_source")
+                yield page.text
+        
+        with PageEngine(pdf, cache_pages=False, backend=self.backend) as engine:
+            yield from self._iter_clean_chunks(self._iter_text_rows(texts(engine)), chunk_rows)
+    
+    def serialize(self, dataframes: List[pd.DataFrame], output_format: str, base_name: str = 'documento'
+                  ) -> Dict[str, bytes]:
+        """Conteúdo das saídas em memória, {nome do arquivo: bytes}, como save_to_* gravaria"""
+        extension = OUTPUT_EXTENSIONS[output_format]
+        if output_format == 'excel':
+            buffer = io.BytesIO()
+            excel_output.write_workbook(dataframes, buffer)
+            return {f"{base_name}.{extension}": buffer.getvalue()}
+        
+        outputs = {}
+        for suffix, df in self._output_parts(dataframes):
+            buffer = io.BytesIO()
+            if output_format == 'csv':
+                df.to_csv(buffer, index=False, encoding='utf-8-sig')
+            else:
+                columnar_output.write_parquet(df, buffer)
+            outputs[f"{base_name}{suffix}.{extension}"] = buffer.getvalue()
+        return outputs
+    
+    def _index_csv(self, outputs: List[Tuple[Path, Optional[pd.DataFrame]]], metrics=NULL_METRICS):
+        """Grava o índice de consulta de cada (CSV, DataFrame gravado nele); falhas não interrompem a conversão"""
+        with metrics.stage('index'):
+            for csv_path, df in outputs:
+                try:
+                    output_index.build_index(csv_path, df)
+                except Exception as e:
+                    logger.warning(f"Falha ao indexar {csv_path.name}: {e}")
+    
+    def _table_pages(self, engine: PageEngine) -> Dict[str, int]:
+        """Páginas em que as tabelas foram procuradas e em que a procura foi pulada por não haver traçado"""
+        return {'scanned': engine.table_pages_scanned, 'skipped': engine.table_pages_skipped}
+    
+    def _load_cached(self, pdf_path: Path, metrics=NULL_METRICS) -> Tuple[Optional[str], Optional[CacheEntry]]:
+        """Chave do PDF no cache de extração e a entrada guardada, se houver"""
+        if self.cache is None:
+            return None, None
+        try:
+            with metrics.stage('cache'):
+                cache_key = self._cache_key(pdf_path)
+                cached = self.cache.load(cache_key)
+        except Exception as e:
+            logger.warning(f"Cache de extração indisponível: {e}")
+            return None, None
+        if cached is not None:
+            logger.info("Cache: PDF já extraído, usando o resultado guardado")
+        return cache_key, cached
+    
+    def _cache_key(self, pdf_path: Path) -> str:
+        """Chave do PDF no cache de extração"""
+        # Templates carregados além do embutido mudam o parse: entram na chave
+        layouts = self.layouts.signature()
+        return self.cache.key(pdf_path, f"{self.backend}:{layouts}" if layouts else self.backend)
+    
+    def _store_cached(self, cache_key: str, engine: PageEngine, text_result: Optional[Tuple]):
+        """Guarda as páginas e o parse do texto; falhas no cache não interrompem a conversão"""
+        try:
+            pages = engine.extracted_pages()
+            if pages is not None:
+                with engine.metrics.stage('cache'):
+                    self.cache.store(cache_key, CacheEntry(pages, text_result))
+        except Exception as e:
+            logger.warning(f"Falha ao gravar o cache de extração: {e}")
+    
+    def _cache_status(self, cache_key: Optional[str], cached: Optional[CacheEntry]) -> Optional[str]:
+        if cache_key is None:
+            return None
+        return 'hit' if cached is not None else 'miss'
+    
+    def _convert_streaming(self, pdf_file: str, pdf_path: Path, output_format: str = 'csv',
+                           metrics=NULL_METRICS) -> Optional[Dict]:
+        """Conversão em fluxo de um relatório de texto, em CSV ou Parquet
+        
+        A análise é acumulada durante a mesma passagem pelas páginas. Retorna
+        None ao encontrar uma tabela, para a conversão completa assumir.
+        """
+        analysis = self._empty_analysis()
+        output_path = self.output_dir / f"{pdf_file.rsplit('.', 1)[0]}.{OUTPUT_EXTENSIONS[output_format]}"
+        write_chunks = {
+            'csv': self._write_csv_chunks,
+            'parquet': self._write_parquet_chunks,
+            'excel': self._write_excel_chunks,
+        }[output_format]
+        
+        def texts(engine):
+            for page in engine.iter_pages():
+                if page.tables:
+                    raise _TablesFound()
+                analysis['pages_inspected'] += 1
+                analysis['text_length'] += len(page.text)
+                yield page.text
+        
+        try:
+            with PageEngine(pdf_path, cache_pages=False, backend=self.backend, metrics=metrics) as engine:
+                analysis['pages'] = engine.page_count
+                # As etapas puxadas pelos blocos (páginas, linhas, parse, limpeza) são descontadas
+                with metrics.stage('write'):
+                    rows_written = write_chunks(
+                        self._iter_clean_chunks(self._iter_text_rows(texts(engine), metrics), metrics=metrics),
+                        output_path
+                    )
+        except _TablesFound:
+            return None
+        except Exception as e:
+            return {
+                'success': False,
+                'error': f'Erro na conversão em fluxo: {e}',
+                'analysis': analysis
+            }
+        
+        if output_format == 'csv' and rows_written and self.index_outputs:
+            # Os blocos já foram descartados: as colunas do índice são lidas do CSV
+            self._index_csv([(output_path, None)], metrics)
+        
+        logger.info(f"Análise do PDF: {analysis}")
+        logger.info(f"Páginas extraídas: {engine.pages_parsed} ({engine.backend_name}); tabelas procuradas em "
+                    f"{engine.table_pages_scanned}, puladas em {engine.table_pages_skipped} sem traçado")
+        
+        if not rows_written:
+            return {
+                'success': False, 
+                'error': 'Nenhuma tabela ou dados estruturados encontrados no PDF',
+                'analysis': analysis
+            }
+        
+        return {
+            'success': True,
+            'input_file': pdf_file,
+            'output_file': str(output_path),
+            'output_files': [str(output_path)],
+            'format': output_format,
+            'tables_found': 1,
+            'rows_written': rows_written,
+            'pages_parsed': engine.pages_parsed,
+            'table_pages': self._table_pages(engine),
+            'backend': engine.backend_name,
+            'analysis': analysis
+        }
+    
+    def convert_all_pdfs(self, workers: int = 1, timeout: Optional[float] = DEFAULT_FILE_TIMEOUT,
+                         page_workers: int = 1, stream: bool = False,
+                         output_format: Optional[str] = None, metrics_path=None,
+                         prometheus_path=None, split_pages: int = DEFAULT_SPLIT_PAGES,
+                         progress: Optional[Callable[[Dict], None]] = None) -> List[Dict]:
+        """Converte todos os PDFs na pasta source
+        
+        Com workers > 1 cada arquivo é convertido em um processo isolado, com
+        tempo limite por arquivo (timeout, em segundos), do maior para o menor
+        em páginas; documentos com mais de split_pages páginas são extraídos
+        em faixas, em processos separados (0 desliga a divisão e a contagem
+        prévia das páginas: o lote vai do maior para o menor arquivo). Os resultados
+        voltam sempre na ordem dos arquivos de entrada. page_workers só é usado
+        na conversão sequencial (workers = 1). O progresso do lote (páginas por
+        segundo e previsão de término) vai para o log e, a cada arquivo ou
+        faixa concluída, para o callback progress. Com metrics_path e/ou
+        prometheus_path o relatório do lote (métricas de cada arquivo e totais)
+        é gravado em JSON e/ou no formato do Prometheus.
+        """
         results = []
+        batch_started = time.perf_counter()
         
         if not self.source_dir.exists():
             logger.error(f"Diretório {self.source_dir} não existe")
@@ -388,25 +1228,166 @@ class PDFConverter:
             logger.warning("Nenhum arquivo PDF encontrado")
             return results
         
-        for pdf_file in pdf_files:
-            result = self.convert_pdf(pdf_file.name)
-            results.append(result)
-            
+        if workers > 1:
+            logger.info(f"Convertendo {len(pdf_files)} arquivos com {workers} processos")
+            scheduler = BatchScheduler(self, workers, timeout, {'stream': stream, 'output_format': output_format},
+                                       split_pages=split_pages, progress=progress)
+            results = scheduler.run([pdf_file.name for pdf_file in pdf_files])
+        else:
+            # Sem divisão em faixas não há o que ordenar: as páginas não são contadas antes
+            batch_progress = BatchProgress(len(pdf_files), callback=progress)
+            for pdf_file in pdf_files:
+                started = time.perf_counter()
+                result = self.convert_pdf(pdf_file.name, page_workers=page_workers, stream=stream,
+                                          output_format=output_format)
+                result['duration_seconds'] = round(time.perf_counter() - started, 3)
+                results.append(result)
+                batch_progress.advance(pages=result_pages(result), files=1)
+        
+        for pdf_file, result in zip(pdf_files, results):
             if result['success']:
-                logger.info(f"✓ Convertido: {result['input_file']} → {result['output_file']} ({result['format']})")
+                logger.info(f"✓ Convertido: {result['input_file']} → {result['output_file']} ({result['format']}) em {result['duration_seconds']}s")
             else:
                 logger.error(f"✗ Erro: {pdf_file.name} - {result['error']}")
         
+        if metrics_path or prometheus_path:
+            write_reports(batch_report(results, time.perf_counter() - batch_started), metrics_path, prometheus_path)
+        
         return results
 
-def main():
+    def merge_outputs(self, results: List[Dict], partition: Optional[str] = None,
+                      memory_rows: int = DEFAULT_MEMORY_ROWS, name: str = DEFAULT_MERGE_NAME) -> Optional[Dict]:
+        """Consolida os CSVs de um lote em um conjunto só, ordenado por Placa e Data/Hora
+        
+        Registros repetidos entre relatórios de períodos que se cruzam saem uma
+        vez só. partition ('placa' ou 'dia') grava um CSV por partição numa
+        pasta; memory_rows limita os registros em memória (ver batch_merge).
+        Só entram as saídas em CSV.
+        """
+        paths = []
+        for result in results:
+            if not result['success']:
+                continue
+            if result['format'] != 'csv':
+                logger.warning(f"Consolidação só lê CSV: {result['input_file']} ({result['format']}) fica de fora")
+                continue
+            output_path = Path(result['output_file'])
+            # Tabelas com estruturas diferentes saem em partes (_output_parts)
+            paths.extend([output_path] if output_path.exists()
+                         else sorted(output_path.parent.glob(f"{output_path.stem}_parte_*.csv")))
+        if not paths:
+            logger.warning("Nenhuma saída CSV para consolidar")
+            return None
+        try:
+            return BatchMerger(self.output_dir, name, partition, memory_rows).merge(paths)
+        except ValueError as e:
+            logger.warning(f"Consolidação não realizada: {e}")
+            return None
+
+def parse_args(argv=None) -> argparse.Namespace:
+    """Argumentos da linha de comando"""
+    parser = argparse.ArgumentParser(description="Converte PDFs de rastreamento Totalsat para CSV/Excel",
+                                     epilog=f"Consultas às saídas indexadas (--index): "
+                                            f"pdf_converter.py {output_index.QUERY_COMMAND} --help")
+    parser.add_argument("pdf_file", nargs="?", help="Arquivo PDF específico dentro de sourcePdfs (padrão: todos)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Número de processos para converter os PDFs em paralelo (padrão: 1)")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_FILE_TIMEOUT,
+                        help=f"Tempo limite por arquivo em segundos com --workers > 1 (padrão: {DEFAULT_FILE_TIMEOUT})")
+    parser.add_argument("--split-pages", type=int, default=DEFAULT_SPLIT_PAGES, metavar="N",
+                        help=f"Com --workers > 1, extrai PDFs com mais de N páginas em faixas de N páginas, "
+                             f"em processos separados; 0 desliga (padrão: {DEFAULT_SPLIT_PAGES})")
+    parser.add_argument("--progress-file", metavar="ARQUIVO",
+                        help="Acrescenta o progresso do lote (páginas/s e previsão de término) ao arquivo, "
+                             "um JSON por linha")
+    parser.add_argument("--page-workers", type=int, default=1,
+                        help="Número de processos para extrair as páginas de um mesmo PDF (padrão: 1)")
+    parser.add_argument("--stream", action="store_true",
+                        help="Grava relatórios de texto em blocos (CSV, Parquet ou Excel), com memória constante")
+    parser.add_argument("--format", choices=sorted(OUTPUT_EXTENSIONS), default=None,
+                        help="Formato de saída (padrão: o recomendado pela análise, CSV ou Excel)")
+    parser.add_argument("--backend", choices=BACKEND_CHOICES, default=DEFAULT_BACKEND,
+                        help="Backend de extração das páginas; 'auto' usa o pypdf2 quando ele reproduz "
+                             f"as mesmas linhas do pdfplumber nas primeiras páginas (padrão: {DEFAULT_BACKEND})")
+    parser.add_argument("--layouts", metavar="CAMINHO",
+                        help="Arquivo JSON ou pasta com templates de layout de outros relatórios, "
+                             "além do Totalsat (ver layout_templates.py)")
+    parser.add_argument("--trips", action="store_true",
+                        help="Extrai as coordenadas, remove pings repetidos e grava o resumo das viagens "
+                             f"por placa em <nome>{TRIPS_SUFFIX}.csv")
+    parser.add_argument("--trip-idle-gap", type=float, default=DEFAULT_IDLE_GAP_MINUTES, metavar="MIN",
+                        help="Minutos sem registro que encerram uma viagem com --trips "
+                             f"(padrão: {DEFAULT_IDLE_GAP_MINUTES})")
+    parser.add_argument("--merge", action="store_true",
+                        help=f"Consolida as saídas CSV do lote em {DEFAULT_MERGE_NAME}.csv, ordenado por Placa e "
+                             "Data/Hora e sem registros repetidos")
+    parser.add_argument("--merge-by", choices=PARTITIONS, default=None,
+                        help=f"Com --merge, grava um CSV por placa ou por dia na pasta {DEFAULT_MERGE_NAME}/")
+    parser.add_argument("--merge-memory-rows", type=int, default=DEFAULT_MEMORY_ROWS, metavar="N",
+                        help=f"Registros em memória na ordenação da consolidação (padrão: {DEFAULT_MEMORY_ROWS})")
+    parser.add_argument("--index", action="store_true",
+                        help="Grava ao lado de cada CSV um índice por Placa, Data/Hora, Evento e Velocidade "
+                             f"(<nome>{output_index.INDEX_SUFFIX}) para o subcomando {output_index.QUERY_COMMAND}")
+    parser.add_argument("--checkpoint", action="store_true",
+                        help="Grava o progresso da extração em output/.<nome>.checkpoint; uma conversão "
+                             "interrompida retoma do último bloco de páginas completo")
+    parser.add_argument("--checkpoint-pages", type=int, default=DEFAULT_CHECKPOINT_PAGES, metavar="N",
+                        help=f"Páginas por bloco com --checkpoint (padrão: {DEFAULT_CHECKPOINT_PAGES})")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Não usa o cache de extração (sempre reprocessa os PDFs)")
+    parser.add_argument("--rebuild-cache", action="store_true",
+                        help="Ignora o cache de extração existente e grava os resultados de novo")
+    parser.add_argument("--cache-dir",
+                        help=f"Pasta do cache de extração, privada do usuário (padrão: {default_cache_dir()})")
+    parser.add_argument("--cache-max-mb", type=int, default=DEFAULT_CACHE_MAX_BYTES // (1024 * 1024),
+                        help="Tamanho máximo do cache em MB; as entradas menos usadas são removidas "
+                             f"(padrão: {DEFAULT_CACHE_MAX_BYTES // (1024 * 1024)})")
+    parser.add_argument("--metrics", metavar="ARQUIVO",
+                        help="Grava em JSON as métricas por etapa de cada arquivo e do lote")
+    parser.add_argument("--metrics-prometheus", metavar="ARQUIVO",
+                        help="Grava as mesmas métricas no formato texto do Prometheus")
+    parser.add_argument("--profile", action="store_true",
+                        help="Grava as estatísticas do cProfile de cada arquivo em --profile-dir")
+    parser.add_argument("--profile-dir", default=DEFAULT_PROFILE_DIR,
+                        help=f"Pasta dos perfis do --profile (padrão: {DEFAULT_PROFILE_DIR})")
+    parser.add_argument("--watch", action="store_true",
+                        help="Observa sourcePdfs e converte só os PDFs novos ou alterados, até Ctrl+C")
+    parser.add_argument("--watch-interval", type=float, default=DEFAULT_POLL_INTERVAL,
+                        help=f"Intervalo entre verificações da pasta em segundos (padrão: {DEFAULT_POLL_INTERVAL})")
+    return parser.parse_args(argv)
+
+def main(argv=None):
     """Função principal"""
-    converter = PDFConverter()
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == [output_index.QUERY_COMMAND]:
+        return output_index.main(argv[1:])
+    args = parse_args(argv)
+    # A linha de comando converte um arquivo por vez neste processo
+    dedicate_process()
+    cache = None
+    if not args.no_cache:
+        cache = ExtractionCache(args.cache_dir, CONVERTER_VERSION, args.cache_max_mb * 1024 * 1024,
+                                rebuild=args.rebuild_cache)
+    layouts = LayoutRegistry()
+    if args.layouts:
+        layouts.load(args.layouts)
+    trips = TripAnalyzer(idle_gap_minutes=args.trip_idle_gap) if args.trips else None
+    converter = PDFConverter(cache=cache, backend=args.backend,
+                             profile_dir=args.profile_dir if args.profile else None, layouts=layouts,
+                             trips=trips, checkpoint_pages=args.checkpoint_pages if args.checkpoint else 0,
+                             index_outputs=args.index)
+    metrics_kwargs = {'metrics_path': args.metrics, 'prometheus_path': args.metrics_prometheus}
     
-    if len(sys.argv) > 1:
+    if args.watch:
+        # O relatório de métricas é o do último arquivo convertido
+        FolderWatcher(converter, interval=args.watch_interval,
+                      convert_kwargs={'page_workers': args.page_workers, 'stream': args.stream,
+                                      'output_format': args.format, **metrics_kwargs}).run()
+    elif args.pdf_file:
         # Converter arquivo específico
-        pdf_file = sys.argv[1]
-        result = converter.convert_pdf(pdf_file)
+        pdf_file = args.pdf_file
+        result = converter.convert_pdf(pdf_file, page_workers=args.page_workers, stream=args.stream,
+                                       output_format=args.format, **metrics_kwargs)
         
         if result['success']:
             print(f"Arquivo convertido com sucesso!")
@@ -414,11 +1395,19 @@ def main():
             print(f"Saída: {result['output_file']}")
             print(f"Formato: {result['format']}")
             print(f"Tabelas encontradas: {result['tables_found']}")
+            if 'trips_file' in result:
+                print(f"Viagens: {result['trips_found']} em {result['trips_file']}")
         else:
             print(f"Erro na conversão: {result['error']}")
     else:
         # Converter todos os PDFs
-        results = converter.convert_all_pdfs()
+        started = time.perf_counter()
+        results = converter.convert_all_pdfs(workers=args.workers, timeout=args.timeout,
+                                             page_workers=args.page_workers, stream=args.stream,
+                                             output_format=args.format, split_pages=args.split_pages,
+                                             progress=progress_file_writer(args.progress_file)
+                                             if args.progress_file else None,
+                                             **metrics_kwargs)
         
         if results:
             success_count = sum(1 for r in results if r['success'])
@@ -426,8 +1415,19 @@ def main():
             print(f"Total de arquivos: {len(results)}")
             print(f"Convertidos com sucesso: {success_count}")
             print(f"Erros: {len(results) - success_count}")
+            print(f"Tempo total: {time.perf_counter() - started:.1f}s")
+            if cache is not None:
+                hits = sum(1 for r in results if r.get('cache') == 'hit')
+                misses = sum(1 for r in results if r.get('cache') == 'miss')
+                print(f"Cache: {hits} acertos, {misses} ausências")
+            if args.merge:
+                merged = converter.merge_outputs(results, partition=args.merge_by,
+                                                 memory_rows=args.merge_memory_rows)
+                if merged is not None:
+                    print(f"Consolidado: {merged['rows_out']} registros ({merged['duplicates']} repetidos "
+                          f"removidos) em {merged['output']}")
         else:
             print("Nenhum arquivo PDF encontrado para converter.")
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,108 @@
+"""
+Origem do PDF: um caminho no disco ou o conteúdo já em memória.
+
+Os backends de extração recebem um PdfSource. Com um caminho, cada backend
+abre o arquivo como antes. Em memória o conteúdo pode chegar como bytes,
+bytearray, memoryview, mmap ou um objeto de arquivo (upload de um serviço web,
+por exemplo), que é lido uma única vez. Cada backend recebe o seu próprio
+leitor sobre o mesmo buffer, sem cópia: o pdfplumber e o pypdf2 do modo
+automático leem o mesmo documento sem disputar a posição de leitura.
+"""
+
+import io
+import mmap
+import os
+from pathlib import Path
+from typing import Optional, Union
+
+MEMORY_NAME = "<memória>"
+
+
+class _BufferRaw(io.RawIOBase):
+    """Leitura sequencial e posicionável sobre um buffer, sem copiá-lo"""
+
+    def __init__(self, buffer: memoryview):
+        super().__init__()
+        self._buffer = buffer
+        self._position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, target) -> int:
+        chunk = self._buffer[self._position:self._position + len(target)]
+        size = len(chunk)
+        target[:size] = chunk
+        self._position += size
+        return size
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += len(self._buffer)
+        if offset < 0:
+            raise ValueError(f"Posição negativa: {offset}")
+        self._position = offset
+        return offset
+
+    def tell(self) -> int:
+        return self._position
+
+    def close(self):
+        if not self.closed:
+            self._buffer.release()
+        super().close()
+
+
+class PdfSource:
+    """PDF em um caminho ou em memória, com um nome para as mensagens de log"""
+
+    __slots__ = ('path', 'buffer', 'name')
+
+    def __init__(self, source, name: Optional[str] = None):
+        self.path: Optional[Path] = None
+        self.buffer = None
+        if isinstance(source, (str, os.PathLike)):
+            self.path = Path(source)
+        elif isinstance(source, (bytes, bytearray, memoryview, mmap.mmap)):
+            self.buffer = source
+        elif hasattr(source, 'read'):
+            # Objeto de arquivo: lido a partir da posição atual
+            self.buffer = source.read()
+            if not isinstance(self.buffer, bytes):
+                raise TypeError("O objeto de arquivo do PDF deve ser aberto em modo binário")
+            name = name or getattr(source, 'name', None)
+        else:
+            raise TypeError(f"Origem de PDF não suportada: {type(source).__name__}")
+        if self.path is not None:
+            self.name = name or self.path.name
+        else:
+            self.name = os.path.basename(str(name)) if name else MEMORY_NAME
+
+    @property
+    def in_memory(self) -> bool:
+        return self.path is None
+
+    def open(self) -> Union[str, io.IOBase]:
+        """O que os backends recebem: o caminho, ou um leitor novo sobre o buffer"""
+        if self.path is not None:
+            return str(self.path)
+        if isinstance(self.buffer, bytes):
+            # BytesIO compartilha o objeto bytes até alguém escrever nele
+            return io.BytesIO(self.buffer)
+        return io.BufferedReader(_BufferRaw(memoryview(self.buffer).cast('B')))
+
+    def __str__(self) -> str:
+        return str(self.path) if self.path is not None else self.name
+
+    def __repr__(self) -> str:
+        return f"PdfSource({self.name!r})"
+
+
+def as_pdf_source(source, name: Optional[str] = None) -> PdfSource:
+    """Aceita um PdfSource pronto, um caminho ou o conteúdo do PDF em memória"""
+    return source if isinstance(source, PdfSource) else PdfSource(source, name)
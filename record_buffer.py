@@ -0,0 +1,285 @@
+"""
+Registros de rastreamento em colunas compactas.
+
+Uma lista de seis textos por registro custa perto de 500 bytes: a lista, a
+data/hora (quase sempre um texto novo), placa, evento, velocidade e
+localidade repetidos registro a registro. O RecordBuffer guarda os mesmos
+registros em colunas:
+
+- Data/Hora: minutos desde 1970 (inteiro de 8 bytes)
+- Velocidade: inteiro de 4 bytes
+- Placa, Evento e Motorista: código de 4 bytes num dicionário de valores
+  distintos (cada texto repetido é guardado uma vez só)
+- Localidade: o texto, como antes; com as coordenadas ela quase nunca se
+  repete e o dicionário só custaria mais
+
+Os registros chegam um a um, mas são convertidos em blocos de BLOCK_ROWS,
+com operações de coluna do pandas: o custo por registro fica perto do de
+guardar a lista. O texto original sempre volta idêntico: data ou velocidade
+fora da forma canônica ("7/1/2020", "080", dígitos não ASCII, data
+inexistente) fica guardada como texto à parte. O DataFrame é montado direto
+das colunas, com cada valor distinto convertido para texto uma única vez.
+"""
+
+from __future__ import annotations
+
+from array import array
+from functools import lru_cache
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence
+import re
+
+from lazy_imports import lazy_module
+
+np = lazy_module('numpy')
+pd = lazy_module('pandas')
+
+FIELDS = 6
+# Posição de cada coluna no registro de line_grammar.parse_fields
+DATE, PLATE, EVENT, SPEED, LOCALITY, DRIVER = range(FIELDS)
+_CODED = (PLATE, EVENT, DRIVER)
+
+# Registros acumulados como listas antes de virarem colunas
+BLOCK_ROWS = 65536
+
+# Forma canônica da data, 'DD/MM/AAAA HH:MM': posições dos dígitos e dos separadores
+_DATE_LENGTH = 16
+_DATE_DIGITS = [0, 1, 3, 4, 6, 7, 8, 9, 11, 12, 14, 15]
+_DATE_SEPARATORS = {2: '/', 5: '/', 10: ' ', 13: ':'}
+# Velocidade canônica: só nela o número volta exatamente ao mesmo texto
+_CANONICAL_SPEED = re.compile(r'0|[1-9]\d{0,8}', re.ASCII)
+
+# Valor guardado no lugar de uma data ou velocidade mantida como texto
+# (menor int64 e menor int32, sem carregar o numpy no import)
+NO_DATE = -2 ** 63
+_SPEED_TEXT = -2 ** 31
+
+@lru_cache(maxsize=None)
+def _times() -> np.ndarray:
+    """" HH:MM" de cada minuto do dia"""
+    return np.array([f" {minute // 60:02d}:{minute % 60:02d}" for minute in range(1440)], dtype=object)
+
+
+def date_minutes(dates: np.ndarray) -> np.ndarray:
+    """Minutos desde 1970 de cada data canônica; NO_DATE nas demais (e nas inexistentes)"""
+    # Um caractere a mais que a forma canônica para reconhecer textos mais longos
+    chars = np.array(dates, dtype=f'U{_DATE_LENGTH + 1}').view(np.uint32).reshape(len(dates), _DATE_LENGTH + 1)
+    digits = chars[:, _DATE_DIGITS].astype(np.int64) - ord('0')
+    valid = (chars[:, _DATE_LENGTH] == 0) & ((digits >= 0) & (digits <= 9)).all(axis=1)
+    for position, separator in _DATE_SEPARATORS.items():
+        valid &= chars[:, position] == ord(separator)
+
+    day, month, year, hour, minute = (digits[:, 0] * 10 + digits[:, 1], digits[:, 2] * 10 + digits[:, 3],
+                                      digits[:, 4:8] @ np.array([1000, 100, 10, 1]),
+                                      digits[:, 8] * 10 + digits[:, 9], digits[:, 10] * 10 + digits[:, 11])
+    valid &= (month >= 1) & (month <= 12) & (year >= 1) & (day >= 1) & (hour < 24) & (minute < 60)
+    months = np.where(valid, (year - 1970) * 12 + month - 1, 0).astype('datetime64[M]')
+    first_day = months.astype('datetime64[D]').astype(np.int64)
+    valid &= day <= (months + 1).astype('datetime64[D]').astype(np.int64) - first_day
+    return np.where(valid, ((first_day + day - 1) * 24 + hour) * 60 + minute, NO_DATE)
+
+
+def _day_texts(days: np.ndarray) -> np.ndarray:
+    """'DD/MM/AAAA' de cada dia (dias desde 1970)"""
+    texts = np.empty(len(days), dtype=object)
+    # 'AAAA-MM-DD' do numpy vale para os anos 1 a 9999, sem o limite do pandas
+    texts[:] = [f"{iso[8:10]}/{iso[5:7]}/{iso[0:4]}" for iso in days.astype('datetime64[D]').astype(str).tolist()]
+    return texts
+
+
+class RecordBuffer:
+    """Registros [Data/Hora, Placa, Evento, Velocidade, Localidade, Motorista] em colunas"""
+
+    __slots__ = ('_dates', '_speeds', '_codes', '_values', '_index', '_localities', '_date_texts', '_speed_texts',
+                 '_pending')
+
+    def __init__(self, rows: Iterable[Sequence[str]] = ()):
+        self._dates = array('q')
+        self._speeds = array('i')
+        # Colunas codificadas: códigos, valores distintos e o índice valor -> código
+        self._codes: Dict[int, array] = {column: array('I') for column in _CODED}
+        self._values: Dict[int, List[str]] = {column: [] for column in _CODED}
+        self._index: Dict[int, Dict[str, int]] = {column: {} for column in _CODED}
+        self._localities: List[str] = []
+        # Linha -> texto original, para datas e velocidades fora da forma canônica
+        self._date_texts: Dict[int, str] = {}
+        self._speed_texts: Dict[int, str] = {}
+        # Registros ainda não convertidos (no máximo BLOCK_ROWS)
+        self._pending: List[Sequence[str]] = []
+        self.extend(rows)
+
+    def __len__(self) -> int:
+        return len(self._dates) + len(self._pending)
+
+    def __getstate__(self):
+        # O índice se refaz; sem ele o cache e os workers recebem só as colunas
+        self._flush()
+        return (self._dates, self._speeds, self._codes, self._values, self._localities,
+                self._date_texts, self._speed_texts)
+
+    def __setstate__(self, state):
+        (self._dates, self._speeds, self._codes, self._values, self._localities,
+         self._date_texts, self._speed_texts) = state
+        self._index = {column: {value: code for code, value in enumerate(values)}
+                       for column, values in self._values.items()}
+        self._pending = []
+
+    def append(self, row: Sequence[str]):
+        """Acrescenta um registro de seis textos"""
+        if len(row) != FIELDS:
+            raise ValueError(f"Registro com {len(row)} campos, esperados {FIELDS}")
+        self._pending.append(row)
+        if len(self._pending) >= BLOCK_ROWS:
+            self._flush()
+
+    def extend(self, rows):
+        """Acrescenta outro RecordBuffer (recodificando os dicionários) ou registros soltos"""
+        if not isinstance(rows, RecordBuffer):
+            rows = iter(rows)
+            while True:
+                block = list(islice(rows, BLOCK_ROWS - len(self._pending)))
+                if not block:
+                    return
+                self._pending.extend(block)
+                if len(self._pending) >= BLOCK_ROWS:
+                    self._flush()
+        self._flush()
+        rows._flush()
+        offset = len(self._dates)
+        for column in _CODED:
+            mapping = self._encode(column, rows._values[column])
+            self._codes[column].frombytes(mapping[np.frombuffer(rows._codes[column], dtype=np.uint32)].tobytes())
+        self._localities.extend(rows._localities)
+        self._dates.extend(rows._dates)
+        self._speeds.extend(rows._speeds)
+        self._date_texts.update((offset + position, text) for position, text in rows._date_texts.items())
+        self._speed_texts.update((offset + position, text) for position, text in rows._speed_texts.items())
+
+    def _encode(self, column: int, values) -> np.ndarray:
+        """Código no dicionário da coluna de cada valor, acrescentando os novos"""
+        index = self._index[column]
+        # O código de um valor novo é o tamanho do dicionário antes de incluí-lo
+        codes = np.array([index.setdefault(value, len(index)) for value in values], dtype=np.uint32)
+        if len(index) != len(self._values[column]):
+            self._values[column].extend(islice(index, len(self._values[column]), None))
+        return codes
+
+    def _flush(self):
+        """Converte os registros pendentes em colunas, com operações sobre o bloco inteiro"""
+        if not self._pending:
+            return
+        offset = len(self._dates)
+        if any(len(row) != FIELDS for row in self._pending):
+            raise ValueError(f"Registros devem ter {FIELDS} campos")
+        table = np.empty((len(self._pending), FIELDS), dtype=object)
+        table[:] = self._pending
+        columns = [np.ascontiguousarray(table[:, column]) for column in range(FIELDS)]
+        self._pending = []
+
+        for column in _CODED:
+            codes, uniques = pd.factorize(columns[column])
+            self._codes[column].frombytes(self._encode(column, uniques)[codes].tobytes())
+        self._localities.extend(columns[LOCALITY].tolist())
+
+        dates = columns[DATE]
+        minutes = date_minutes(dates)
+        self._dates.frombytes(minutes.tobytes())
+        for position in np.flatnonzero(minutes == NO_DATE).tolist():
+            self._date_texts[offset + position] = dates[position]
+
+        # Poucas velocidades distintas: cada uma é conferida uma vez
+        codes, uniques = pd.factorize(columns[SPEED])
+        values = np.array([int(speed) if _CANONICAL_SPEED.fullmatch(speed) else _SPEED_TEXT for speed in uniques],
+                          dtype=np.int32)[codes]
+        self._speeds.frombytes(values.tobytes())
+        for position in np.flatnonzero(values == _SPEED_TEXT).tolist():
+            self._speed_texts[offset + position] = columns[SPEED][position]
+
+    def _text_column(self, column: int, clean: Optional[Callable[[list], np.ndarray]] = None) -> np.ndarray:
+        """Coluna como array de objetos; cada valor distinto vira texto (e é limpo) uma vez só"""
+        def distinct(values: list) -> np.ndarray:
+            if clean is not None:
+                return clean(values)
+            array_ = np.empty(len(values), dtype=object)
+            array_[:] = values
+            return array_
+
+        if column in _CODED:
+            return distinct(self._values[column])[np.frombuffer(self._codes[column], dtype=np.uint32)]
+        if column == LOCALITY:
+            return distinct(self._localities)
+
+        if column == DATE:
+            minutes = np.frombuffer(self._dates, dtype=np.int64)
+            # O marcador de texto cai num dia qualquer; a posição é sobrescrita abaixo.
+            # A data canônica não tem o que limpar: sem espaços nas pontas e nunca vazia
+            days, minute_of_day = np.divmod(np.where(minutes == NO_DATE, 0, minutes), 1440)
+            unique, inverse = np.unique(days, return_inverse=True)
+            result = _day_texts(unique)[inverse] + _times()[minute_of_day]
+            fallback = self._date_texts
+        else:
+            unique, inverse = np.unique(np.frombuffer(self._speeds, dtype=np.int32), return_inverse=True)
+            result = distinct([str(speed) for speed in unique.tolist()])[inverse]
+            fallback = self._speed_texts
+        if fallback:
+            positions = list(fallback)
+            result[positions] = distinct(list(fallback.values()))
+        return result
+
+    def row(self, position: int) -> List[str]:
+        self._flush()
+        date = self._date_texts.get(position)
+        if date is None:
+            days, minute = divmod(self._dates[position], 1440)
+            date = _day_texts(np.array([days]))[0] + _times()[minute]
+        speed = self._speed_texts.get(position)
+        if speed is None:
+            speed = str(self._speeds[position])
+        codes, values = self._codes, self._values
+        return [
+            date,
+            values[PLATE][codes[PLATE][position]],
+            values[EVENT][codes[EVENT][position]],
+            speed,
+            self._localities[position],
+            values[DRIVER][codes[DRIVER][position]],
+        ]
+
+    def __getitem__(self, position: int) -> List[str]:
+        if position < 0:
+            position += len(self)
+        if not 0 <= position < len(self):
+            raise IndexError("Registro fora do intervalo")
+        return self.row(position)
+
+    def __iter__(self) -> Iterator[List[str]]:
+        self._flush()
+        if not len(self._dates):
+            return
+        columns = [self._text_column(column).tolist() for column in range(FIELDS)]
+        for row in zip(*columns):
+            yield list(row)
+
+    def __eq__(self, other) -> bool:
+        # Mesmos registros, vindos de outro RecordBuffer ou de uma lista
+        if not isinstance(other, (RecordBuffer, list)):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    def to_dataframe(self, columns: Optional[Sequence[str]] = None,
+                     clean: Optional[Callable[[list], np.ndarray]] = None) -> pd.DataFrame:
+        """DataFrame de texto, igual a pd.DataFrame(list(self), columns=columns)
+
+        clean, se dado, recebe uma lista de textos e devolve o array limpo;
+        é aplicado aos valores distintos de cada coluna, não célula a célula.
+        """
+        columns = list(columns) if columns is not None else list(range(FIELDS))
+        if len(columns) != FIELDS:
+            raise ValueError(f"{FIELDS} columns passed, passed data had {len(columns)} columns")
+        self._flush()
+        if not len(self._dates):
+            return pd.DataFrame(columns=columns)
+        # Colunas por posição: o cabeçalho genérico pode repetir nomes
+        df = pd.DataFrame({column: self._text_column(column, clean) for column in range(FIELDS)}, copy=False)
+        df.columns = columns
+        return df
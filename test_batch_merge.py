@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Testes da consolidação do lote: ordenação externa com pouca memória igual à
+ordenação em memória, registros repetidos entre relatórios removidos,
+partições por placa e por dia e a consolidação das saídas do conversor
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / "benchmarks"))
+
+import batch_merge
+from batch_merge import BatchMerger
+from pdf_converter import PDFConverter
+from record_buffer import date_minutes
+from synthetic_pdf import generate_report
+
+
+def read_text_csv(path) -> pd.DataFrame:
+    return pd.read_csv(path, dtype=str, keep_default_na=False, na_values=[''], encoding='utf-8-sig')
+
+
+@pytest.fixture
+def overlapping_csvs(tmp_path):
+    rng = np.random.default_rng(3)
+    rows = 2000
+    df = pd.DataFrame({
+        'Data/Hora': [f"{day:02d}/03/2020 {hour:02d}:{minute:02d}" for day, hour, minute in
+                      zip(rng.integers(1, 6, rows), rng.integers(0, 24, rows), rng.integers(0, 60, rows))],
+        'Placa': rng.choice(['ABC1D23', 'QRS7788', 'AZU 8900', None], rows),
+        'Evento': rng.choice(['Parado', 'Em Movimento'], rows),
+        'Velocidade': rng.integers(0, 3, rows).astype(str),
+    })
+    # Três relatórios de períodos que se cruzam
+    paths = []
+    for i, (start, stop) in enumerate([(0, 900), (600, 1500), (1400, 2000)]):
+        paths.append(tmp_path / f"relatorio_{i}.csv")
+        df.iloc[start:stop].to_csv(paths[-1], index=False, encoding='utf-8-sig')
+    return paths
+
+
+def test_external_merge_sorts_and_drops_overlaps(tmp_path, overlapping_csvs, monkeypatch):
+    # Sequências pequenas e poucas por passada para exercitar a intercalação em várias passadas
+    monkeypatch.setattr(batch_merge, "MAX_FAN_IN", 3)
+    result = BatchMerger(tmp_path / "out", memory_rows=150).merge(overlapping_csvs)
+
+    merged = read_text_csv(result['output'])
+    expected = pd.concat([read_text_csv(path) for path in overlapping_csvs]).drop_duplicates()
+    assert (result['rows_in'], result['rows_out']) == (2000 + 300 + 100, len(expected))
+    assert result['passes'] > 1
+    keys = pd.DataFrame({'placa': merged['Placa'].fillna(''),
+                         'minutos': date_minutes(merged['Data/Hora'].to_numpy(dtype=object))})
+    assert keys.equals(keys.sort_values(['placa', 'minutos'], kind='stable'))
+    pd.testing.assert_frame_equal(merged.sort_values(list(merged.columns)).reset_index(drop=True),
+                                  expected.sort_values(list(expected.columns)).reset_index(drop=True))
+
+
+def test_partitions_by_plate_and_day(tmp_path, overlapping_csvs):
+    full = read_text_csv(BatchMerger(tmp_path / "full").merge(overlapping_csvs)['output'])
+
+    by_plate = BatchMerger(tmp_path / "out", partition='placa', memory_rows=300).merge(overlapping_csvs)
+    files = sorted(Path(by_plate['output']).iterdir())
+    assert [path.name for path in files] == ['placa=ABC1D23.csv', 'placa=AZU_8900.csv', 'placa=QRS7788.csv',
+                                             'placa=sem_placa.csv']
+    assert read_text_csv(files[0]).equals(full[full['Placa'] == 'ABC1D23'].reset_index(drop=True))
+
+    by_day = BatchMerger(tmp_path / "out", partition='dia', memory_rows=300).merge(overlapping_csvs)
+    files = sorted(Path(by_day['output']).iterdir())
+    assert [path.name for path in files] == [f"dia=2020-03-0{day}.csv" for day in range(1, 6)]
+    assert sum(len(read_text_csv(path)) for path in files) == len(full)
+
+    with pytest.raises(ValueError, match="Partição"):
+        BatchMerger(tmp_path, partition='mes')
+
+
+def test_converter_merges_batch_outputs(tmp_path):
+    source = tmp_path / "sourcePdfs"
+    source.mkdir()
+    generate_report(source / "marco.pdf", pages=2, seed=11)
+    # O mesmo período exportado duas vezes
+    (source / "marco_copia.pdf").write_bytes((source / "marco.pdf").read_bytes())
+    converter = PDFConverter(str(source), str(tmp_path / "out"))
+
+    results = converter.convert_all_pdfs(output_format="csv")
+    merged = converter.merge_outputs(results)
+
+    single = read_text_csv(results[0]['output_file'])
+    assert merged['files_merged'] == 2 and merged['rows_out'] == len(single.drop_duplicates())
+    assert merged['output'] == str(tmp_path / "out" / "consolidado.csv")
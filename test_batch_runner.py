@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Testes do lote com processos isolados: ordem dos resultados, processo que
+trava além do tempo limite e processo que morre sem responder
+"""
+
+import os
+import time
+
+from batch_runner import BatchRunner
+
+
+class ScriptedConverter:
+    """Conversor de mentira: o nome do arquivo diz o que o processo filho faz"""
+
+    def convert_pdf(self, pdf_file: str, **kwargs):
+        if pdf_file.startswith("trava"):
+            time.sleep(60)
+        if pdf_file.startswith("morre"):
+            os._exit(3)
+        if pdf_file.startswith("erro"):
+            raise RuntimeError("PDF corrompido")
+        return {'success': True, 'input_file': pdf_file, 'kwargs': kwargs}
+
+
+def test_results_in_input_order_with_kwargs():
+    files = [f"ok_{i}.pdf" for i in range(5)]
+    results = BatchRunner(ScriptedConverter(), workers=3, timeout=30, convert_kwargs={'stream': True}).run(files)
+
+    assert [result['input_file'] for result in results] == files
+    assert all(result['success'] and result['kwargs'] == {'stream': True} for result in results)
+    assert all(result['duration_seconds'] >= 0 for result in results)
+
+
+def test_hung_child_is_terminated_at_timeout():
+    started = time.perf_counter()
+    results = BatchRunner(ScriptedConverter(), workers=2, timeout=1).run(["trava.pdf", "ok.pdf"])
+
+    assert time.perf_counter() - started < 30
+    assert not results[0]['success']
+    assert results[0]['error'] == "Tempo limite de 1s excedido"
+    assert results[0]['duration_seconds'] >= 1
+    assert results[1]['success']
+
+
+def test_dying_child_and_exception_are_failures():
+    results = BatchRunner(ScriptedConverter(), workers=2, timeout=30).run(["morre.pdf", "erro.pdf", "ok.pdf"])
+
+    assert results[0] == {'success': False, 'input_file': "morre.pdf",
+                          'error': "Processo encerrado sem resultado (código 3)",
+                          'duration_seconds': results[0]['duration_seconds']}
+    assert not results[1]['success'] and results[1]['error'] == "Erro inesperado: PDF corrompido"
+    assert results[2]['success']
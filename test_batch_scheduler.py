@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Testes do agendamento do lote por páginas: ordem da maior tarefa para a
+menor, divisão dos documentos grandes em faixas com a mesma saída da
+conversão sequencial, volta ao arquivo inteiro quando uma faixa falha,
+progresso até 100% e lote sem contagem de páginas quando nada é dividido
+"""
+
+import json
+import sys
+import time
+from pathlib import Path
+from unittest import mock
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / "benchmarks"))
+
+import batch_scheduler
+from batch_scheduler import FILE, RANGE, BatchScheduler, count_pages, progress_file_writer
+from pdf_converter import PDFConverter
+from synthetic_pdf import generate_report
+
+
+def test_plan_is_largest_first_with_ranges(tmp_path):
+    converter = PDFConverter(str(tmp_path), str(tmp_path / "out"))
+    plan = BatchScheduler(converter, workers=3, split_pages=100).plan(["a.pdf", "b.pdf", "c.pdf"], [30, 250, 80])
+
+    assert [(task.pdf_file, task.kind, task.start, task.end, task.pages) for task in plan] == [
+        ("b.pdf", RANGE, 0, 100, 100),
+        ("b.pdf", RANGE, 100, 200, 100),
+        ("c.pdf", FILE, 0, 0, 80),
+        ("b.pdf", RANGE, 200, 250, 50),
+        ("a.pdf", FILE, 0, 0, 30),
+    ]
+    # Sem divisão: um processo só, conversão em fluxo ou split_pages=0
+    for scheduler in (BatchScheduler(converter, workers=1, split_pages=100),
+                      BatchScheduler(converter, workers=3, convert_kwargs={'stream': True}, split_pages=100),
+                      BatchScheduler(converter, workers=3, split_pages=0)):
+        assert [task.pdf_file for task in scheduler.plan(["a.pdf", "b.pdf"], [30, 250])] == ["b.pdf", "a.pdf"]
+
+
+def test_count_pages(tmp_path):
+    generate_report(tmp_path / "relatorio.pdf", pages=7)
+    (tmp_path / "quebrado.pdf").write_bytes(b"nada de PDF")
+
+    assert count_pages(tmp_path / "relatorio.pdf") == 7
+    assert count_pages(tmp_path / "quebrado.pdf") == 0
+
+
+@pytest.mark.parametrize("backend", ["pdfplumber", "auto"])
+def test_split_batch_identical_to_sequential(tmp_path, backend):
+    source = tmp_path / "sourcePdfs"
+    generate_report(source / "grande.pdf", pages=12, rows_per_page=15, break_ratio=0.4,
+                    flow_across_pages=True, repeat_header=False)
+    generate_report(source / "pequeno_1.pdf", pages=2, seed=1)
+    generate_report(source / "pequeno_2.pdf", pages=3, seed=2)
+    events_path = tmp_path / "progresso.jsonl"
+
+    sequential = PDFConverter(str(source), str(tmp_path / "seq"), backend=backend).convert_all_pdfs(
+        output_format="csv")
+    scheduled = PDFConverter(str(source), str(tmp_path / "lote"), backend=backend).convert_all_pdfs(
+        workers=2, output_format="csv", split_pages=5, progress=progress_file_writer(events_path))
+
+    assert [result['input_file'] for result in scheduled] == [result['input_file'] for result in sequential]
+    for expected, result in zip(sequential, scheduled):
+        assert result['success'], result.get('error')
+        assert Path(result['output_file']).read_bytes() == Path(expected['output_file']).read_bytes()
+        assert (result['backend'], result['table_pages']) == (expected['backend'], expected['table_pages'])
+    assert {result['input_file']: result.get('page_ranges') for result in scheduled} == {
+        "grande.pdf": 3, "pequeno_1.pdf": None, "pequeno_2.pdf": None}
+
+    events = [json.loads(line) for line in events_path.read_text(encoding='utf-8').splitlines()]
+    # Uma linha por faixa e por arquivo concluído
+    assert len(events) == 3 + 3
+    assert [event['pages_done'] for event in events] == sorted(event['pages_done'] for event in events)
+    assert events[-1]['files_done'] == events[-1]['files_total'] == 3
+    assert events[-1]['pages_done'] == events[-1]['pages_total'] == 17
+    assert events[-1]['eta_seconds'] == 0
+
+
+def failed_range(converter, pdf_file, start, end, backend, conn):
+    conn.send({'success': False, 'input_file': pdf_file, 'error': f'Erro nas páginas {start + 1}-{end}: teste'})
+    conn.close()
+
+
+def test_failed_range_converts_whole_file(tmp_path):
+    source = tmp_path / "sourcePdfs"
+    generate_report(source / "grande.pdf", pages=6, flow_across_pages=True)
+    converter = PDFConverter(str(source), str(tmp_path / "out"))
+    events = []
+
+    with mock.patch.object(batch_scheduler, '_extract_range_in_child', failed_range):
+        results = BatchScheduler(converter, workers=2, convert_kwargs={'output_format': 'csv'}, split_pages=2,
+                                 progress=events.append).run(["grande.pdf"])
+
+    assert results[0]['success'] and 'page_ranges' not in results[0]
+    assert events[-1]['files_done'] == 1
+    assert events[-1]['pages_done'] == events[-1]['pages_total'] == 6
+
+
+def failed_first_range(converter, pdf_file, start, end, backend, conn):
+    with open(converter.output_dir / "faixas.log", "a") as log:
+        log.write(f"{start}\n")
+    if start:
+        time.sleep(1)
+    failed_range(converter, pdf_file, start, end, backend, conn)
+
+
+def test_failed_range_drops_queued_ranges(tmp_path):
+    source = tmp_path / "sourcePdfs"
+    generate_report(source / "grande.pdf", pages=6, flow_across_pages=True)
+    converter = PDFConverter(str(source), str(tmp_path / "out"))
+    converter.output_dir.mkdir()
+
+    with mock.patch.object(batch_scheduler, '_extract_range_in_child', failed_first_range):
+        results = BatchScheduler(converter, workers=2, convert_kwargs={'output_format': 'csv'},
+                                 split_pages=2).run(["grande.pdf"])
+
+    assert results[0]['success']
+    # A faixa das páginas 5-6 ainda estava na fila quando a primeira falhou
+    assert (converter.output_dir / "faixas.log").read_text().split() == ["0", "2"]
+
+
+@pytest.mark.parametrize("workers, split_pages", [(1, 100), (2, 0)])
+def test_no_page_count_without_splitting(tmp_path, workers, split_pages):
+    source = tmp_path / "sourcePdfs"
+    generate_report(source / "a.pdf", pages=2, seed=1)
+    generate_report(source / "b.pdf", pages=3, seed=2)
+    converter = PDFConverter(str(source), str(tmp_path / "out"))
+    events = []
+
+    with mock.patch.object(batch_scheduler, 'count_pages', side_effect=AssertionError("contou as páginas")):
+        results = converter.convert_all_pdfs(workers=workers, output_format="csv", split_pages=split_pages,
+                                             progress=events.append)
+
+    assert all(result['success'] for result in results)
+    assert events[-1]['files_done'] == 2 and events[-1]['pages_done'] == 5
+    assert events[-1]['pages_total'] is None and events[-1]['eta_seconds'] == 0
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Testes da suíte de benchmarks: medições dos métodos públicos e comparação com
+uma execução de base
+"""
+
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / "benchmarks"))
+
+import bench_suite
+
+
+def report(**seconds):
+    return {'environment': {'commit': 'abc'},
+            'results': [{'method': method, 'pages': 10, 'min_seconds': value} for method, value in seconds.items()]}
+
+
+def test_compare_flags_regressions_beyond_both_tolerances():
+    baseline = report(convert_pdf=1.0, clean_dataframe=0.010, save_to_csv=1.0, save_to_excel=2.0)
+    current = report(convert_pdf=1.5, clean_dataframe=0.020, save_to_csv=1.05, save_to_excel=1.0, novo=1.0)
+    status = {row['method']: row['status'] for row in bench_suite.compare(current, baseline)}
+
+    assert status == {'convert_pdf': 'regressao', 'clean_dataframe': 'igual',
+                      'save_to_csv': 'igual', 'save_to_excel': 'melhora'}
+
+
+def test_suite_writes_json_and_compares_with_baseline(tmp_path):
+    args = ["--pages", "1", "--repeat", "1", "--methods", "clean_dataframe", "save_to_csv", "convert_pdf",
+            "convert_source", "iter_source_batches", "serialize", "merge_outputs"]
+    assert bench_suite.main(args + ["--output", str(tmp_path / "base.json")]) == 0
+    assert bench_suite.main(args + ["--output", str(tmp_path / "atual.json"),
+                                    "--baseline", str(tmp_path / "base.json")]) == 0
+
+    data = json.loads((tmp_path / "atual.json").read_text(encoding="utf-8"))
+    assert data['config']['pages'] == [1]
+    assert {entry['method'] for entry in data['results']} == {'clean_dataframe', 'save_to_csv', 'convert_pdf',
+                                                              'convert_source', 'iter_source_batches',
+                                                              'serialize', 'merge_outputs'}
+    assert all(entry['rows'] == 40 and entry['min_seconds'] > 0 for entry in data['results'])
+    assert data['environment']['packages']['pandas']
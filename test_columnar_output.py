@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Testes da saída colunar tipada (Parquet)
+"""
+
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / "benchmarks"))
+
+import columnar_output
+from pdf_converter import PDFConverter
+from synthetic_pdf import generate_report
+
+pytest.importorskip("pyarrow")
+
+HEADERS = ["Data/Hora", "Placa", "Evento", "Velocidade", "Localidade", "Motorista"]
+
+
+def test_typed_columns():
+    df = pd.DataFrame([
+        ["01/03/2020 00:05", "AZU 8900", "Em Movimento", "42", "PARANAGUA - PR (-25.548758,-48.549416)", pd.NA],
+        ["01/03/2020  23:59", "ABC1D23", "Parado", "0", "CURITIBA", pd.NA],
+        ["data ruim", "AZU 8900", "Parado", "x", pd.NA, pd.NA],
+    ], columns=HEADERS)
+
+    typed = columnar_output.typed_frame(df)
+
+    assert list(typed.columns) == HEADERS[:5] + ["Latitude", "Longitude", "Motorista"]
+    assert typed["Data/Hora"].tolist()[:2] == [pd.Timestamp("2020-03-01 00:05"), pd.Timestamp("2020-03-01 23:59")]
+    assert pd.isna(typed["Data/Hora"][2])
+    assert typed["Velocidade"].tolist()[:2] == [42, 0] and pd.isna(typed["Velocidade"][2])
+    assert str(typed["Placa"].dtype) == "category"
+    assert typed["Localidade"].tolist()[:2] == ["PARANAGUA - PR", "CURITIBA"]
+    assert typed["Latitude"][0] == -25.548758 and typed["Longitude"][0] == -48.549416
+    assert typed["Latitude"].isna().tolist() == [False, True, True]
+
+
+def test_parquet_output_matches_csv_and_stream(tmp_path):
+    source = tmp_path / "src"
+    generate_report(source / "relatorio.pdf", pages=4)
+    converter = PDFConverter(str(source), str(tmp_path / "out"))
+
+    csv_result = converter.convert_pdf("relatorio.pdf")
+    parquet_result = converter.convert_pdf("relatorio.pdf", output_format="parquet")
+    converter.output_dir = tmp_path / "stream"
+    converter.output_dir.mkdir()
+    stream_result = converter.convert_pdf("relatorio.pdf", stream=True, output_format="parquet")
+
+    assert parquet_result["format"] == stream_result["format"] == "parquet"
+    expected = columnar_output.typed_frame(pd.read_csv(csv_result["output_file"], dtype=str, encoding="utf-8-sig"))
+    full = pd.read_parquet(parquet_result["output_file"])
+    streamed = pd.read_parquet(stream_result["output_file"])
+    pd.testing.assert_frame_equal(full, expected, check_dtype=False, check_categorical=False)
+    pd.testing.assert_frame_equal(streamed, full)
+
+
+def test_parquet_chunks_share_one_schema(tmp_path):
+    converter = PDFConverter(str(tmp_path), str(tmp_path / "out"))
+    chunks = [
+        converter._clean_chunk([["01/03/2020 00:05", "AZU 8900", "Parado", "0", "CURITIBA (-25.4,-49.2)", ""]], HEADERS),
+        converter._clean_chunk([["01/03/2020 00:10", f"P{i:03d}", "Ligado", "1", "CURITIBA", ""] for i in range(300)],
+                               HEADERS),
+    ]
+    output_path = tmp_path / "out" / "blocos.parquet"
+
+    assert converter._write_parquet_chunks(chunks, output_path) == 301
+    result = pd.read_parquet(output_path)
+    assert len(result) == 301 and result["Placa"].nunique() == 301
+
+
+def test_unknown_format_is_rejected(tmp_path):
+    converter = PDFConverter(str(tmp_path), str(tmp_path / "out"))
+    result = converter.convert_pdf("relatorio.pdf", output_format="json")
+    assert not result["success"] and "json" in result["error"]
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
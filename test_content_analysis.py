@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Testes da análise por amostragem: poucas páginas lidas, mesma recomendação
+de formato da análise completa
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / "benchmarks"))
+
+from page_engine import PageContent, PageEngine
+from pdf_converter import PDFConverter
+from synthetic_pdf import generate_report
+
+TABLE = [["Placa", "Evento"], ["ABC1D23", "Ignição ligada"]]
+
+
+def restored_engine(pdf_path, tables_by_page, page_count):
+    """Motor com páginas já carregadas, sem abrir o PDF"""
+    engine = PageEngine(pdf_path)
+    engine.restore([PageContent(i + 1, f"página {i + 1}", tables_by_page.get(i, []))
+                    for i in range(page_count)])
+    return engine
+
+
+@pytest.mark.parametrize("pages", [1, 2, 12])
+def test_sampled_analysis_reads_at_most_three_pages(tmp_path, pages):
+    generate_report(tmp_path / "relatorio.pdf", pages=pages, rows_per_page=10)
+    converter = PDFConverter(str(tmp_path), str(tmp_path / "saida"))
+
+    sampled = converter.analyze_pdf_content(tmp_path / "relatorio.pdf")
+    full = converter.analyze_pdf_content(tmp_path / "relatorio.pdf", full=True)
+
+    assert sampled['pages'] == full['pages'] == pages
+    assert sampled['pages_inspected'] == min(pages, 3)
+    assert full['pages_inspected'] == pages
+    assert sampled['recommended_format'] == full['recommended_format'] == 'csv'
+
+
+def test_sampled_analysis_stops_once_format_is_settled(tmp_path):
+    engine = restored_engine(tmp_path / "relatorio.pdf", {0: [TABLE]}, page_count=50)
+    analysis = PDFConverter(str(tmp_path), str(tmp_path)).analyze_pdf_content("relatorio.pdf", engine)
+
+    assert analysis['recommended_format'] == 'excel'
+    assert analysis['pages_inspected'] == 1
+
+
+def test_short_document_counts_tables_on_every_page(tmp_path):
+    # Com duas páginas a recomendação depende de table_count > 3
+    engine = restored_engine(tmp_path / "relatorio.pdf", {0: [TABLE, TABLE], 1: [TABLE, TABLE]}, page_count=2)
+    analysis = PDFConverter(str(tmp_path), str(tmp_path)).analyze_pdf_content("relatorio.pdf", engine)
+
+    assert analysis['table_count'] == 4
+    assert analysis['recommended_format'] == 'excel'
+    assert analysis['pages_inspected'] == 2
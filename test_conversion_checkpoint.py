@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Testes dos checkpoints da conversão: os registros em blocos são os mesmos da
+extração sequencial, uma conversão interrompida retoma do último bloco
+completo com a saída idêntica e um checkpoint de outro PDF é descartado
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / "benchmarks"))
+
+from conversion_checkpoint import ConversionCheckpoint
+from page_engine import PageEngine
+from pdf_converter import PDFConverter
+from synthetic_pdf import generate_report
+
+
+class Killed(BaseException):
+    """Simula o processo encerrado no meio da extração (não é capturado como Exception)"""
+
+
+def report(path, seed=5):
+    # Linhas correndo entre as páginas: registros quebrados na divisa entre blocos
+    return generate_report(path, pages=9, rows_per_page=12, seed=seed, break_ratio=0.4, flow_across_pages=True)
+
+
+def kill_at_page(monkeypatch, index):
+    parse_page = PageEngine._parse_page
+
+    def dying_parse_page(engine, page_index):
+        if page_index == index:
+            raise Killed()
+        return parse_page(engine, page_index)
+
+    monkeypatch.setattr(PageEngine, "_parse_page", dying_parse_page)
+
+
+def test_blocks_match_sequential_extraction(tmp_path):
+    pdf_path = report(tmp_path / "relatorio.pdf")
+    converter = PDFConverter(str(tmp_path), str(tmp_path / "out"))
+    expected = converter._extract_text_rows(pdf_path)
+
+    for block_pages in (1, 2, 4, 9):
+        checkpoint = ConversionCheckpoint(tmp_path / f"ck{block_pages}", "k", block_pages)
+        with PageEngine(pdf_path) as engine:
+            assert converter._checkpointed_text_rows(engine, checkpoint) == expected
+        # Tudo já gravado: a segunda passagem só lê os blocos
+        with PageEngine(pdf_path) as engine:
+            assert converter._checkpointed_text_rows(engine, checkpoint) == expected
+            assert engine.pages_parsed == 9 and engine.page_count == 9
+
+
+def test_interrupted_conversion_resumes_with_identical_output(tmp_path, monkeypatch):
+    report(tmp_path / "src" / "longo.pdf")
+    reference = PDFConverter(str(tmp_path / "src"), str(tmp_path / "ref")).convert_pdf("longo.pdf", output_format="csv")
+    converter = PDFConverter(str(tmp_path / "src"), str(tmp_path / "out"), checkpoint_pages=2)
+
+    with monkeypatch.context() as patch:
+        kill_at_page(patch, 7)
+        with pytest.raises(Killed):
+            converter.convert_pdf("longo.pdf", output_format="csv")
+    checkpoint_dir = tmp_path / "out" / ".longo.checkpoint"
+    assert sorted(path.name for path in checkpoint_dir.iterdir()) == [
+        "bloco_00000.bin", "bloco_00001.bin", "bloco_00002.bin", "estado.bin"]
+
+    parsed = []
+    parse_page = PageEngine._parse_page
+    monkeypatch.setattr(PageEngine, "_parse_page", lambda engine, index: parsed.append(index) or
+                        parse_page(engine, index))
+    result = converter.convert_pdf("longo.pdf", output_format="csv")
+
+    # Só as páginas de amostra do backend automático e as do bloco interrompido em diante
+    assert set(parsed) <= {0, 1, 2, 6, 7, 8} and {6, 7, 8} <= set(parsed)
+    assert result['rows_written'] == reference['rows_written']
+    assert Path(result['output_file']).read_bytes() == Path(reference['output_file']).read_bytes()
+    assert not checkpoint_dir.exists()
+
+
+def test_checkpoint_of_another_pdf_is_discarded(tmp_path, monkeypatch):
+    pdf_path = report(tmp_path / "src" / "longo.pdf")
+    converter = PDFConverter(str(tmp_path / "src"), str(tmp_path / "out"), checkpoint_pages=3)
+    with monkeypatch.context() as patch:
+        kill_at_page(patch, 4)
+        with pytest.raises(Killed):
+            converter.convert_pdf("longo.pdf", output_format="csv")
+
+    # O PDF foi exportado de novo com outro conteúdo antes da nova execução
+    report(pdf_path, seed=6)
+    reference = PDFConverter(str(tmp_path / "src"), str(tmp_path / "ref")).convert_pdf("longo.pdf", output_format="csv")
+    result = converter.convert_pdf("longo.pdf", output_format="csv")
+
+    assert Path(result['output_file']).read_bytes() == Path(reference['output_file']).read_bytes()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Testes das métricas por etapa: tempos exclusivos, relatório de cada conversão,
+relatórios do lote em JSON e Prometheus e perfis do cProfile
+"""
+
+import json
+import pstats
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / "benchmarks"))
+
+from conversion_metrics import ConversionMetrics, dedicate_process, peak_rss_bytes, prometheus_text
+from pdf_converter import PDFConverter
+from synthetic_pdf import generate_report
+from trip_analysis import TripAnalyzer
+
+PIPELINE_STAGES = {'page_extraction', 'analysis', 'line_repair', 'record_parse', 'clean', 'write'}
+
+
+@pytest.fixture
+def source_dir(tmp_path):
+    source = tmp_path / "src"
+    generate_report(source / "a.pdf", pages=3, seed=1, break_ratio=0.3)
+    generate_report(source / "b.pdf", pages=2, seed=2)
+    return source
+
+
+def test_nested_stages_are_exclusive():
+    metrics = ConversionMetrics()
+    with metrics.stage('outer'):
+        time.sleep(0.02)
+        with metrics.stage('inner'):
+            time.sleep(0.05)
+        with metrics.stage('inner'):
+            pass
+    report = metrics.report()
+
+    assert report['stages']['inner']['calls'] == 2
+    assert report['stages']['inner']['wall_seconds'] >= 0.05
+    assert 0.02 <= report['stages']['outer']['wall_seconds'] < 0.05
+    assert sum(stage['wall_seconds'] for stage in report['stages'].values()) == pytest.approx(
+        report['wall_seconds'], abs=1e-3)
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_conversion_reports_stages_and_throughput(source_dir, tmp_path, stream):
+    converter = PDFConverter(str(source_dir), str(tmp_path / "out"), backend="pdfplumber")
+    result = converter.convert_pdf("a.pdf", stream=stream)
+    metrics = result['metrics']
+
+    rows = len(pd.read_csv(result['output_file'], dtype=str))
+    assert metrics['pages'] == 3
+    assert metrics['rows'] == rows
+    assert metrics['bytes_written'] == Path(result['output_file']).stat().st_size
+    assert metrics['pages_per_second'] > 0 and metrics['rows_per_second'] > 0
+    expected = PIPELINE_STAGES - {'analysis'} if stream else PIPELINE_STAGES
+    assert expected <= set(metrics['stages'])
+    assert metrics['stages']['page_extraction']['calls'] >= 3
+
+
+def test_bytes_written_counts_every_output_file(source_dir, tmp_path):
+    converter = PDFConverter(str(source_dir), str(tmp_path / "out"), trips=TripAnalyzer())
+    result = converter.convert_pdf("a.pdf", output_format="csv")
+
+    written = [Path(path) for path in result['output_files']] + [Path(result['trips_file'])]
+    assert result['metrics']['bytes_written'] == sum(path.stat().st_size for path in written)
+
+
+def peak_after_large_allocation():
+    """(pico do processo com 200 MB alocados, relatório de uma conversão iniciada depois de liberá-los)"""
+    big = bytearray(200 * 1024 * 1024)
+    big[::4096] = b'x' * len(big[::4096])
+    process_peak = peak_rss_bytes()
+    del big
+    return process_peak, ConversionMetrics().report()
+
+
+def test_peak_rss_is_per_conversion_only_in_dedicated_processes():
+    # Processo compartilhado (o do pytest): o pico não é zerado
+    process_peak, report = peak_after_large_allocation()
+    assert report['peak_rss_scope'] == 'process'
+    assert report['peak_rss_bytes'] > process_peak - 100 * 1024 * 1024
+
+    with ProcessPoolExecutor(max_workers=1, initializer=dedicate_process) as executor:
+        process_peak, report = executor.submit(peak_after_large_allocation).result()
+    if report['peak_rss_scope'] != 'conversion':
+        pytest.skip("pico de memória só do processo nesta plataforma")
+    assert report['peak_rss_bytes'] < process_peak - 100 * 1024 * 1024
+
+
+def test_batch_reports_json_and_prometheus(source_dir, tmp_path):
+    converter = PDFConverter(str(source_dir), str(tmp_path / "out"))
+    results = converter.convert_all_pdfs(metrics_path=tmp_path / "metricas.json",
+                                         prometheus_path=tmp_path / "metricas.prom")
+
+    report = json.loads((tmp_path / "metricas.json").read_text(encoding="utf-8"))
+    assert [entry['input_file'] for entry in report['files']] == [r['input_file'] for r in results]
+    assert report['totals']['succeeded'] == 2
+    assert report['totals']['rows'] == sum(r['metrics']['rows'] for r in results)
+
+    text = (tmp_path / "metricas.prom").read_text(encoding="utf-8")
+    assert text == prometheus_text(report)
+    sample = re.compile(r'^[a-z_]+(\{[a-z_]+="[^"]*"(,[a-z_]+="[^"]*")*\})? [-0-9.e]+$')
+    for line in text.splitlines():
+        assert line.startswith('# ') or sample.match(line), line
+    assert 'totalsat_pdf_file_stage_wall_seconds{stage="record_parse",file="a.pdf"}' in text
+    assert re.search(r'^totalsat_pdf_batch_rows \d+$', text, re.M)
+
+
+def test_profile_written_per_file(source_dir, tmp_path):
+    converter = PDFConverter(str(source_dir), str(tmp_path / "out"), profile_dir=tmp_path / "perfis")
+    converter.convert_pdf("b.pdf")
+
+    stats = pstats.Stats(str(tmp_path / "perfis" / "b.prof"))
+    assert any(name == '_parse_data_line' for _, _, name in stats.stats)
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Testes do serviço assíncrono: mesmo resultado da API em memória, blocos em
+fluxo iguais à conversão completa, fila cheia, prazo e cancelamento
+"""
+
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / "benchmarks"))
+
+from conversion_service import ConversionService, ServiceOverloaded
+from pdf_converter import PDFConverter
+from synthetic_pdf import generate_report
+
+
+@pytest.fixture(scope="module")
+def report(tmp_path_factory):
+    source = tmp_path_factory.mktemp("src")
+    # Registros quebrados atravessam as quatro divisas das faixas de 5 páginas
+    pdf_path = generate_report(source / "relatorio.pdf", pages=24, seed=35, break_ratio=0.4,
+                               flow_across_pages=True, repeat_header=False)
+    expected = PDFConverter(str(source), str(tmp_path_factory.mktemp("out"))).convert_source(pdf_path)
+    return pdf_path, expected
+
+
+def test_convert_and_stream_match_in_memory_api(report):
+    pdf_path, expected = report
+
+    async def scenario():
+        async with ConversionService(workers=2, pages_per_task=5) as service:
+            result = await service.convert(pdf_path.read_bytes(), output_format="csv", name="relatorio.pdf")
+            chunks = [chunk async for chunk in service.stream(pdf_path.read_bytes())]
+            from_path = [chunk async for chunk in service.stream(pdf_path)]
+            return result, chunks, from_path, service.active
+
+    result, chunks, from_path, active = asyncio.run(scenario())
+    assert result["rows_written"] == expected["rows_written"]
+    assert list(result["outputs"]) == ["relatorio.csv"]
+    # Os processos do pool rodam uma conversão por vez: o pico de memória é zerado em cada uma
+    assert result["metrics"]["peak_rss_scope"] == ("conversion" if os.access("/proc/self/clear_refs", os.W_OK)
+                                                   else "process")
+    # 24 páginas em faixas de 5: os registros chegam em vários blocos, na ordem do documento
+    assert len(chunks) > 1
+    pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), expected["dataframes"][0])
+    pd.testing.assert_frame_equal(pd.concat(from_path, ignore_index=True), expected["dataframes"][0])
+    assert active == 0
+
+
+def test_full_queue_rejects_and_deadline_frees_the_slot(report):
+    pdf_path, _ = report
+    data = pdf_path.read_bytes()
+
+    async def scenario():
+        async with ConversionService(workers=1, max_queue=1) as service:
+            requests = [asyncio.ensure_future(service.convert(data)) for _ in range(3)]
+            outcomes = await asyncio.gather(*requests, return_exceptions=True)
+
+            with pytest.raises(asyncio.TimeoutError):
+                await service.convert(data, deadline=0.01)
+
+            stream = service.stream(data)
+            first = await stream.__anext__()
+            await stream.aclose()
+            after = await service.convert(data)
+            return outcomes, len(first), after, service.active, service.rejected
+
+    outcomes, first_rows, after, active, rejected = asyncio.run(scenario())
+    assert sum(isinstance(outcome, ServiceOverloaded) for outcome in outcomes) == 1
+    assert sum(isinstance(outcome, dict) and outcome["success"] for outcome in outcomes) == 2
+    assert first_rows > 0
+    assert after["success"]
+    assert active == 0 and rejected == 1
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Testes da saída Excel somente escrita: nomes de planilha sem colisão, mesmos
+valores do pd.ExcelWriter, nenhum arquivo deixado para trás num erro e
+conversão em fluxo para xlsx
+"""
+
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from openpyxl import load_workbook
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / "benchmarks"))
+
+import excel_output
+from pdf_converter import PDFConverter
+from synthetic_pdf import generate_report
+
+
+def named(df: pd.DataFrame, name: str) -> pd.DataFrame:
+    df.attrs['name'] = name
+    return df
+
+
+def test_sheet_names_are_unique_after_truncation():
+    long_name = "Página_1_Tabela_1_" + "x" * 40
+    names = excel_output.sheet_names([long_name, long_name, "dados", "Dados", None, "a/b:c"])
+
+    assert names[0] == long_name[:31]
+    assert names[1] == long_name[:29] + "_2"
+    assert names[2:4] == ["dados", "Dados_2"]
+    assert names[4] == "Tabela_5"
+    assert names[5] == "a_b_c"
+    assert all(len(name) <= 31 for name in names)
+
+
+def test_workbook_matches_pandas_writer(tmp_path):
+    frames = [
+        named(pd.DataFrame({"Placa": ["ABC1D23", None], "name": ["x", "y"]}), "Página_1_Tabela_1"),
+        named(pd.DataFrame({"Evento": ["Parado", "Em movimento"]}), "Página_1_Tabela_1"),
+        pd.DataFrame([["1", "2"], ["3", float("nan")]]),
+    ]
+    excel_output.write_workbook(frames, tmp_path / "novo.xlsx")
+
+    with pd.ExcelWriter(tmp_path / "pandas.xlsx", engine="openpyxl") as writer:
+        for name, df in zip(["Página_1_Tabela_1", "Página_1_Tabela_1_2", "Tabela_3"], frames):
+            df.to_excel(writer, sheet_name=name, index=False)
+
+    ours = pd.read_excel(tmp_path / "novo.xlsx", sheet_name=None, dtype=str)
+    reference = pd.read_excel(tmp_path / "pandas.xlsx", sheet_name=None, dtype=str)
+    assert list(ours) == list(reference)
+    for name in reference:
+        pd.testing.assert_frame_equal(ours[name], reference[name])
+    assert load_workbook(tmp_path / "novo.xlsx")["Tabela_3"]["A1"].font.bold
+
+
+def test_full_sheet_continues_in_next_sheet(tmp_path):
+    df = pd.DataFrame({"Placa": [f"P{i}" for i in range(5)]})
+    with excel_output.ExcelWorkbookWriter(tmp_path / "dividido.xlsx", max_sheet_rows=3) as writer:
+        writer.add_sheet("Dados", df.columns)
+        writer.write(df)
+
+    sheets = pd.read_excel(tmp_path / "dividido.xlsx", sheet_name=None, dtype=str)
+    assert list(sheets) == ["Dados", "Dados_2", "Dados_3"]
+    assert pd.concat(sheets.values())["Placa"].tolist() == df["Placa"].tolist()
+
+
+def test_error_while_writing_leaves_no_files(tmp_path):
+    output = tmp_path / "falha.xlsx"
+    with pytest.raises(RuntimeError):
+        with excel_output.ExcelWorkbookWriter(output) as writer:
+            writer.add_sheet("Dados", ["Placa"])
+            writer.write(pd.DataFrame({"Placa": ["ABC1D23"]}))
+            sheet_file = Path(writer._sheet._writer.out)
+            assert sheet_file.exists()
+            raise RuntimeError("bloco com erro")
+
+    assert not output.exists()
+    assert not sheet_file.exists()
+
+
+def test_streamed_excel_matches_full_conversion(tmp_path):
+    generate_report(tmp_path / "src" / "relatorio.pdf", pages=4, seed=5, break_ratio=0.3)
+    converter = PDFConverter(str(tmp_path / "src"), str(tmp_path / "out"))
+
+    full = converter.convert_pdf("relatorio.pdf", output_format="excel")
+    full_df = pd.read_excel(full["output_file"], sheet_name=None, dtype=str)
+    streamed = converter.convert_pdf("relatorio.pdf", stream=True, output_format="excel")
+    streamed_df = pd.read_excel(streamed["output_file"], sheet_name=None, dtype=str)
+
+    assert streamed["rows_written"] == len(full_df["Dados"])
+    assert list(streamed_df) == ["Dados"]
+    pd.testing.assert_frame_equal(streamed_df["Dados"], full_df["Dados"])
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Testes dos backends de extração: paridade byte a byte dos CSVs entre
+pdfplumber e pypdf2, escolha automática do backend, procura de tabelas só
+nas páginas com traçado e tabelas depois das páginas de amostra
+"""
+
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pdfplumber
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / "benchmarks"))
+
+from extraction_backends import PdfplumberBackend, TextStreamBackend, drawing_objects, has_ruling
+from page_engine import PageEngine
+from pdf_converter import PDFConverter
+from synthetic_pdf import generate_report
+
+# Relatórios de amostra: quebras de linha variadas, registros atravessando páginas
+SAMPLE_REPORTS = {
+    "curto.pdf": dict(pages=1, rows_per_page=10, seed=1),
+    "quebras.pdf": dict(pages=6, seed=2, break_ratio=0.4),
+    "atravessando.pdf": dict(pages=8, seed=3, break_ratio=0.3, flow_across_pages=True, repeat_header=False),
+}
+
+
+@pytest.fixture(scope="module")
+def sample_dir(tmp_path_factory):
+    source = tmp_path_factory.mktemp("amostras")
+    for name, options in SAMPLE_REPORTS.items():
+        generate_report(source / name, **options)
+    return source
+
+
+@pytest.mark.parametrize("pdf_file", sorted(SAMPLE_REPORTS))
+def test_backends_produce_identical_csv(sample_dir, tmp_path, pdf_file):
+    outputs = {}
+    for backend in ("pdfplumber", "pypdf2", "auto"):
+        converter = PDFConverter(str(sample_dir), str(tmp_path / backend), backend=backend)
+        result = converter.convert_pdf(pdf_file)
+        assert result["success"], result
+        outputs[backend] = Path(result["output_file"]).read_bytes()
+
+    assert outputs["pypdf2"] == outputs["pdfplumber"]
+    assert outputs["auto"] == outputs["pdfplumber"]
+
+
+def test_auto_switches_after_sample_pages(sample_dir):
+    with PageEngine(sample_dir / "quebras.pdf", backend="auto", sample_pages=2) as engine:
+        pages = engine.pages()
+        assert engine.backend_name == "pypdf2"
+    assert engine.backend_name == "pypdf2"
+    assert [page.number for page in pages] == list(range(1, 7))
+
+
+def test_auto_keeps_pdfplumber_when_lines_differ(sample_dir, monkeypatch):
+    parse_page = TextStreamBackend.parse_page
+
+    def shifted(self, index):
+        page = parse_page(self, index)
+        page.text = page.text.replace("\n", " \n", 1)
+        return page
+
+    monkeypatch.setattr(TextStreamBackend, "parse_page", shifted)
+    with PageEngine(sample_dir / "quebras.pdf", backend="auto") as engine:
+        assert engine.resolve_backend() == "pdfplumber"
+        engine.pages()
+        assert engine.backend_name == "pdfplumber"
+
+
+def test_auto_keeps_pdfplumber_when_page_has_tables(sample_dir, monkeypatch):
+    parse_page = PdfplumberBackend.parse_page
+
+    def with_table(self, index):
+        page = parse_page(self, index)
+        page.tables = [[["a", "b"], ["1", "2"]]] if index == 1 else []
+        return page
+
+    monkeypatch.setattr(PdfplumberBackend, "parse_page", with_table)
+    with PageEngine(sample_dir / "quebras.pdf", backend="auto") as engine:
+        assert engine.resolve_backend() == "pdfplumber"
+
+
+def test_tables_scanned_only_on_ruled_pages(tmp_path):
+    mixed = generate_report(tmp_path / "misto.pdf", pages=6, rows_per_page=10, table_every=3)
+
+    with PageEngine(mixed) as engine:
+        tables = [page.tables for page in engine.pages()]
+    with pdfplumber.open(mixed) as pdf:
+        assert tables == [page.extract_tables() for page in pdf.pages]
+    assert [bool(page_tables) for page_tables in tables] == [False, False, True, False, False, True]
+    assert (engine.table_pages_scanned, engine.table_pages_skipped) == (2, 4)
+
+    result = PDFConverter(str(tmp_path), str(tmp_path / "out")).convert_pdf("misto.pdf")
+    assert result["tables_found"] == 2 and result["table_pages"] == {"scanned": 2, "skipped": 4}
+
+
+@pytest.mark.parametrize("backend", ["auto", "pypdf2"])
+def test_table_after_sample_pages_is_kept(tmp_path, backend):
+    # Tabelas só nas páginas 6 e 12, depois das 3 páginas de amostra do modo automático
+    generate_report(tmp_path / "misto.pdf", pages=12, rows_per_page=20, table_every=6)
+    expected = PDFConverter(str(tmp_path), str(tmp_path / "pdfplumber"), backend="pdfplumber").convert_pdf("misto.pdf")
+    result = PDFConverter(str(tmp_path), str(tmp_path / backend), backend=backend).convert_pdf("misto.pdf")
+
+    assert (result["format"], result["tables_found"], result["analysis"]["has_tables"]) == ("excel", 2, True)
+    assert result["table_pages"] == expected["table_pages"] == {"scanned": 2, "skipped": 10}
+    # O xlsx guarda a hora da gravação: a comparação é pelo conteúdo das planilhas
+    sheets = pd.read_excel(result["output_file"], sheet_name=None)
+    expected_sheets = pd.read_excel(expected["output_file"], sheet_name=None)
+    assert list(sheets) == list(expected_sheets)
+    for name, df in sheets.items():
+        pd.testing.assert_frame_equal(df, expected_sheets[name])
+    if backend == "auto":
+        assert result["backend"] == "pypdf2"
+
+
+def test_ruling_read_from_content_stream(tmp_path):
+    mixed = generate_report(tmp_path / "misto.pdf", pages=6, rows_per_page=10, table_every=3)
+
+    backend = TextStreamBackend(mixed)
+    try:
+        with pdfplumber.open(mixed) as pdf:
+            assert [backend.page_has_ruling(i) for i in range(6)] == [has_ruling(page.objects) for page in pdf.pages]
+    finally:
+        backend.close()
+
+
+def test_drawing_objects_apply_the_transformation_matrix():
+    grid = [([10, 10], b'm'), ([100, 10], b'l'), ([], b'S'), ([10, 40], b'm'), ([100, 40], b'l'), ([], b'S'),
+            ([10, 10], b'm'), ([10, 40], b'l'), ([], b'S'), ([100, 10], b'm'), ([100, 40], b'l'), ([], b'S')]
+    assert has_ruling(drawing_objects(grid))
+    # Girada 45°: nenhuma linha horizontal ou vertical
+    rotated = [([], b'q'), ([0.7071, 0.7071, -0.7071, 0.7071, 0, 0], b'cm')] + grid + [([], b'Q')]
+    assert not has_ruling(drawing_objects(rotated))
+    assert drawing_objects([([0, 0, 10, 10], b're'), ([], b'f')])['rect']
+    assert drawing_objects([([0, 0], b'm'), ([5, 5, 8, 8, 10, 0], b'c'), ([], b'S')])['curve']
+
+
+def test_ruling_needs_a_rect_or_a_grid_of_lines():
+    def line(x0, top, x1, bottom):
+        return {"x0": x0, "top": top, "x1": x1, "bottom": bottom}
+
+    underlines = [line(10, 50, 200, 50), line(10, 80, 200, 80), line(10, 90, 10, 91)]
+    assert not has_ruling({"char": [{}]})
+    assert not has_ruling({"line": underlines})
+    assert has_ruling({"line": underlines + [line(10, 50, 10, 80), line(200, 50, 200, 80)]})
+    assert has_ruling({"rect": [line(10, 10, 20, 20)]})
+
+
+def test_unknown_backend_is_rejected(sample_dir):
+    with pytest.raises(ValueError):
+        PageEngine(sample_dir / "curto.pdf", backend="ocr")
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
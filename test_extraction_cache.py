@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Testes do cache de extração endereçado pelo conteúdo do PDF
+"""
+
+import os
+import shutil
+import sys
+from pathlib import Path
+
+import pdfplumber
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / "benchmarks"))
+
+from extraction_cache import CACHE_SUBDIR, CacheEntry, ExtractionCache
+from page_engine import PageContent
+from pdf_converter import CONVERTER_VERSION, PDFConverter
+from synthetic_pdf import generate_report
+
+
+def make_entry(text):
+    return CacheEntry([PageContent(1, text, []), PageContent(2, "", [[["a", "b"]]])], ("cabeçalho", [["1"]]))
+
+
+def test_store_and_load_round_trip(tmp_path):
+    cache = ExtractionCache(tmp_path, "v1")
+    cache.store("k", make_entry("texto"))
+
+    entry = cache.load("k")
+    assert [(p.number, p.text, p.tables) for p in entry.pages] == [(1, "texto", []), (2, "", [[["a", "b"]]])]
+    assert entry.text_result == ("cabeçalho", [["1"]])
+    assert cache.load("outra") is None
+    assert ExtractionCache(tmp_path, "v1", rebuild=True).load("k") is None
+
+
+def test_key_follows_content_and_version(tmp_path):
+    first = tmp_path / "a.pdf"
+    first.write_bytes(b"%PDF conteudo")
+    copy = tmp_path / "b.pdf"
+    copy.write_bytes(b"%PDF conteudo")
+
+    assert ExtractionCache(tmp_path, "v1").key(first) == ExtractionCache(tmp_path, "v1").key(copy)
+    assert ExtractionCache(tmp_path, "v1").key(first) != ExtractionCache(tmp_path, "v2").key(first)
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = ExtractionCache(tmp_path, "v1")
+    for index, key in enumerate(["velha", "usada", "nova"]):
+        cache.store(key, make_entry(os.urandom(2000).hex()))
+        os.utime(cache._entry_path(key), (index, index))
+    cache.load("usada")
+
+    cache.max_bytes = sum(path.stat().st_size for path in tmp_path.glob("*.bin")) - 1
+    cache.evict()
+
+    assert cache.load("velha") is None
+    assert cache.load("usada") is not None
+    assert cache.load("nova") is not None
+
+
+def test_corrupt_entry_is_discarded(tmp_path):
+    cache = ExtractionCache(tmp_path, "v1")
+    cache._entry_path("k").write_bytes(b"lixo")
+    assert cache.load("k") is None
+    assert not cache._entry_path("k").exists()
+
+
+def test_default_directory_is_private_to_the_user(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "xdg"))
+    monkeypatch.setenv("LOCALAPPDATA", str(tmp_path / "xdg"))
+    cache = ExtractionCache(version="v1")
+    cache.store("k", make_entry("texto"))
+
+    assert cache.cache_dir == tmp_path / "xdg" / CACHE_SUBDIR
+    assert cache.load("k") is not None
+    if os.name == "posix":
+        assert cache.cache_dir.stat().st_mode & 0o777 == 0o700
+
+
+@pytest.mark.skipif(not hasattr(os, "getuid"), reason="permissões POSIX")
+def test_directory_writable_by_others_is_ignored(tmp_path):
+    cache = ExtractionCache(tmp_path / "cache", "v1")
+    cache.store("k", make_entry("texto"))
+    (tmp_path / "cache").chmod(0o777)
+
+    # Outro usuário poderia ter trocado a entrada: nada é lido nem gravado
+    assert not cache.contains("k")
+    assert cache.load("k") is None
+    cache.store("nova", make_entry("texto"))
+    assert not cache._entry_path("nova").exists()
+
+
+def test_unchanged_pdf_skips_pdfplumber(tmp_path, monkeypatch):
+    source = tmp_path / "src"
+    generate_report(source / "relatorio.pdf", pages=3)
+    cache = ExtractionCache(tmp_path / "cache", CONVERTER_VERSION)
+
+    first = PDFConverter(str(source), str(tmp_path / "out1"), cache=cache).convert_pdf("relatorio.pdf")
+    assert first['success'] and first['cache'] == 'miss'
+
+    def fail_open(*args, **kwargs):
+        raise AssertionError("pdfplumber não deveria ser aberto")
+
+    monkeypatch.setattr(pdfplumber, "open", fail_open)
+    # Cópia com outro nome: a chave depende só do conteúdo
+    shutil.copy(source / "relatorio.pdf", source / "copia.pdf")
+    second = PDFConverter(str(source), str(tmp_path / "out2"), cache=cache).convert_pdf("copia.pdf")
+
+    assert second['success'] and second['cache'] == 'hit'
+    assert second['pages_parsed'] == 0
+    assert Path(first['output_file']).read_bytes() == Path(second['output_file']).read_bytes()
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
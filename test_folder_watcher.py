@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Testes do modo de observação da pasta de entrada
+"""
+
+import os
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / "benchmarks"))
+
+from folder_watcher import FolderWatcher
+from pdf_converter import PDFConverter
+from synthetic_pdf import generate_report
+
+
+class CountingConverter(PDFConverter):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.converted = []
+
+    def convert_pdf(self, pdf_file, **kwargs):
+        self.converted.append(pdf_file)
+        return super().convert_pdf(pdf_file, **kwargs)
+
+
+def age(path, seconds=60):
+    stat = path.stat()
+    os.utime(path, (stat.st_atime - seconds, stat.st_mtime - seconds))
+
+
+def test_only_new_or_changed_pdfs_are_converted(tmp_path):
+    source = tmp_path / "src"
+    generate_report(source / "a.pdf", pages=2, seed=1)
+    generate_report(source / "b.pdf", pages=2, seed=2)
+    age(source / "a.pdf")
+    age(source / "b.pdf")
+    converter = CountingConverter(str(source), str(tmp_path / "out"))
+
+    results = FolderWatcher(converter).poll()
+    assert sorted(converter.converted) == ["a.pdf", "b.pdf"]
+    assert all(r['success'] and r['latency_seconds'] >= 60 for r in results)
+
+    # Novo processo de observação: o manifesto evita reconverter
+    converter.converted.clear()
+    watcher = FolderWatcher(converter)
+    assert watcher.poll() == []
+
+    # Data alterada sem mudança de conteúdo: nada a converter
+    os.utime(source / "a.pdf")
+    age(source / "a.pdf", 30)
+    assert watcher.poll() == []
+
+    # Conteúdo alterado, saída apagada e arquivo novo
+    generate_report(source / "a.pdf", pages=3, seed=3)
+    age(source / "a.pdf")
+    (tmp_path / "out" / "b.csv").unlink()
+    shutil.copy(source / "b.pdf", source / "c.pdf")
+    age(source / "c.pdf")
+    watcher.poll()
+    assert sorted(converter.converted) == ["a.pdf", "b.pdf", "c.pdf"]
+    assert (tmp_path / "out" / "b.csv").exists()
+
+
+class SplittingConverter(CountingConverter):
+    """Grava cada conversão em duas partes (_parte_1 e _parte_2)"""
+
+    def _output_parts(self, dataframes):
+        df = dataframes[0]
+        return [("_parte_1", df.iloc[:10]), ("_parte_2", df.iloc[10:])]
+
+
+def test_split_outputs_stay_current(tmp_path):
+    source = tmp_path / "src"
+    generate_report(source / "a.pdf", pages=1)
+    age(source / "a.pdf")
+    converter = SplittingConverter(str(source), str(tmp_path / "out"))
+    watcher = FolderWatcher(converter)
+
+    [result] = watcher.poll()
+    assert [Path(path).name for path in result['output_files']] == ["a_parte_1.csv", "a_parte_2.csv"]
+    assert not (tmp_path / "out" / "a.csv").exists()
+    assert watcher.poll() == []
+    assert FolderWatcher(converter).poll() == []
+    assert converter.converted == ["a.pdf"]
+
+    # Uma parte apagada: converte de novo
+    (tmp_path / "out" / "a_parte_2.csv").unlink()
+    watcher.poll()
+    assert converter.converted == ["a.pdf", "a.pdf"]
+
+
+def test_files_still_being_written_wait_for_next_poll(tmp_path):
+    source = tmp_path / "src"
+    generate_report(source / "a.pdf", pages=1)
+    converter = CountingConverter(str(source), str(tmp_path / "out"))
+    watcher = FolderWatcher(converter, settle_seconds=30)
+
+    assert watcher.poll() == []
+    age(source / "a.pdf")
+    assert [r['input_file'] for r in watcher.poll()] == ["a.pdf"]
+
+
+def test_outputs_are_replaced_atomically(tmp_path):
+    converter = PDFConverter(str(tmp_path), str(tmp_path / "out"))
+    output_path = tmp_path / "out" / "saida.csv"
+    output_path.parent.mkdir()
+    output_path.write_text("anterior")
+
+    def failing_chunks():
+        yield converter._clean_chunk([["01/03/2020 00:05", "AZU 8900", "Parado", "0", "CURITIBA", ""]],
+                                     ["Data/Hora", "Placa", "Evento", "Vel", "Localidade", "Motorista"])
+        raise RuntimeError("falha no meio")
+
+    with pytest.raises(RuntimeError):
+        converter._write_csv_chunks(failing_chunks(), output_path)
+    assert output_path.read_text() == "anterior"
+    assert sorted(p.name for p in output_path.parent.iterdir()) == ["saida.csv"]
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Testes da API em memória: bytes, objetos de arquivo e mmap convertidos sem
+tocar o disco, com o mesmo resultado de convert_pdf
+"""
+
+import io
+import mmap
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / "benchmarks"))
+
+from pdf_converter import PDFConverter
+from synthetic_pdf import generate_report
+
+
+@pytest.fixture
+def report(tmp_path):
+    pdf_path = generate_report(tmp_path / "src" / "relatorio.pdf", pages=3, seed=11, break_ratio=0.3)
+    converter = PDFConverter(str(tmp_path / "src"), str(tmp_path / "out"))
+    return converter, pdf_path
+
+
+def test_bytes_and_streams_match_convert_pdf(report):
+    converter, pdf_path = report
+    on_disk = converter.convert_pdf("relatorio.pdf", output_format="csv")
+    expected = converter.extract_text_as_table(pdf_path)[0]
+    data = pdf_path.read_bytes()
+
+    with open(pdf_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        for source in (data, bytearray(data), io.BytesIO(data), mapped):
+            result = converter.convert_source(source)
+            assert result["success"], result
+            assert result["rows_written"] == on_disk["rows_written"]
+            assert result["analysis"] == on_disk["analysis"]
+            pd.testing.assert_frame_equal(result["dataframes"][0], expected)
+
+
+def test_serialized_csv_is_the_file_convert_pdf_writes(report):
+    converter, pdf_path = report
+    on_disk = converter.convert_pdf("relatorio.pdf", output_format="csv")
+
+    with open(pdf_path, "rb") as f:
+        result = converter.convert_source(f, output_format="csv")
+
+    assert result["input_file"] == "relatorio.pdf"
+    assert result["outputs"] == {"relatorio.csv": Path(on_disk["output_file"]).read_bytes()}
+    assert result["metrics"]["bytes_written"] == len(result["outputs"]["relatorio.csv"])
+
+
+def test_in_memory_conversion_creates_no_folder(report):
+    converter, pdf_path = report
+    result = converter.convert_source(pdf_path.read_bytes(), output_format="csv")
+
+    assert result["success"] and not converter.output_dir.exists()
+
+
+def test_serialized_parquet_and_excel(report):
+    pytest.importorskip("pyarrow")
+    converter, pdf_path = report
+    data = pdf_path.read_bytes()
+
+    parquet = converter.convert_source(data, output_format="parquet", name="dia.pdf")
+    table = pd.read_parquet(io.BytesIO(parquet["outputs"]["dia.parquet"]))
+    assert len(table) == parquet["rows_written"]
+
+    excel = converter.convert_source(data, output_format="excel")
+    sheets = pd.read_excel(io.BytesIO(excel["outputs"]["documento.xlsx"]), sheet_name=None, dtype=str)
+    assert list(sheets) == ["Dados"]
+    assert len(sheets["Dados"]) == excel["rows_written"]
+
+
+def test_batches_match_full_conversion(report):
+    converter, pdf_path = report
+    data = pdf_path.read_bytes()
+    full = converter.convert_source(data)["dataframes"][0]
+
+    batches = list(converter.iter_source_batches(memoryview(data), chunk_rows=7))
+    assert all(len(batch) <= 7 for batch in batches)
+    pd.testing.assert_frame_equal(pd.concat(batches, ignore_index=True), full)
+
+
+def test_invalid_source(report):
+    converter, _ = report
+    assert not converter.convert_source(12345)["success"]
+    assert not converter.convert_source(b"isto nao e um PDF")["success"]
+    assert not converter.convert_source(b"", output_format="xml")["success"]
+    assert not converter.convert_source(io.StringIO("texto"))["success"]
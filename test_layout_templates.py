@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Testes dos templates de layout: relatório de outro fornecedor descrito em
+JSON, decisão de layout guardada pela assinatura da primeira página e
+templates inválidos recusados na carga
+"""
+
+import io
+import json
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / "benchmarks"))
+
+from layout_templates import LayoutRegistry, LayoutTemplate, fingerprint
+from pdf_converter import PDFConverter
+from synthetic_pdf import build_pdf, generate_report
+
+VENDOR_LAYOUT = {
+    "name": "rastreador_x",
+    "header": ["Momento", "Veiculo", "Ocorrencia"],
+    "columns": ["Data/Hora", "Placa", "Evento", "Velocidade", "Localidade"],
+    "row": r"(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})\s+(\S+)\s+(.+?)\s+(\d+)\s+(.+)",
+    "row_start": r"\d{4}-\d{2}-\d{2}",
+    "types": {"Data/Hora": "datetime:%Y-%m-%d %H:%M:%S", "Placa": "category", "Evento": "category",
+              "Velocidade": "int", "Localidade": "locality"},
+}
+
+
+def vendor_pdf(client: str) -> bytes:
+    header = "Momento Veiculo Ocorrencia Km/h Endereco"
+    return build_pdf([
+        [f"Rastreador X - Cliente {client}", header,
+         "2024-03-01 10:05:00 ABC1D23 Em movimento 54 CURITIBA - PR (-25.4280,-49.2700)",
+         "2024-03-01 10:20:00 ABC1D23 Parado 0 CURITIBA - PR (-25.4300,-49.2710)"],
+        [header, "2024-03-01 11:00:00 QRS7788 Ignicao  desligada 0 PONTA GROSSA - PR (-25.0900,-50.1600)"],
+    ])
+
+
+@pytest.fixture
+def layouts(tmp_path):
+    (tmp_path / "rastreador_x.json").write_text(json.dumps(VENDOR_LAYOUT), encoding="utf-8")
+    registry = LayoutRegistry()
+    registry.load(tmp_path)
+    return registry
+
+
+def test_vendor_layout_from_json_converts_with_typed_columns(tmp_path, layouts):
+    converter = PDFConverter(str(tmp_path), str(tmp_path / "out"), layouts=layouts)
+    result = converter.convert_source(vendor_pdf("ACME"), output_format="parquet", name="x.pdf")
+
+    df = result["dataframes"][0]
+    assert list(df.columns) == VENDOR_LAYOUT["columns"]
+    assert df["Evento"].tolist() == ["Em movimento", "Parado", "Ignicao desligada"]
+    typed = pd.read_parquet(io.BytesIO(result["outputs"]["x.parquet"]))
+    assert typed["Data/Hora"].iloc[0] == pd.Timestamp("2024-03-01 10:05:00")
+    assert typed["Velocidade"].tolist() == [54, 0, 0]
+    assert typed["Latitude"].iloc[2] == pytest.approx(-25.09)
+
+    # Só com o layout embutido o relatório não tem dados reconhecíveis
+    assert not PDFConverter(str(tmp_path), str(tmp_path / "out")).convert_source(vendor_pdf("ACME"))["success"]
+
+
+def test_mixed_batch_decides_each_layout_once(tmp_path, layouts):
+    converter = PDFConverter(str(tmp_path), str(tmp_path / "out"), layouts=layouts)
+    totalsat = [generate_report(tmp_path / f"t{seed}.pdf", pages=2, seed=seed).read_bytes() for seed in (1, 2)]
+    batch = [totalsat[0], vendor_pdf("ACME"), totalsat[1], vendor_pdf("ACME")]
+
+    results = [converter.convert_source(data) for data in batch]
+
+    assert all(result["success"] for result in results)
+    assert (layouts.misses, layouts.hits) == (2, 2)
+    assert list(results[1]["dataframes"][0].columns) == VENDOR_LAYOUT["columns"]
+    # O relatório Totalsat sai igual ao do conversor só com o layout embutido
+    expected = PDFConverter(str(tmp_path), str(tmp_path / "out")).convert_source(totalsat[1])
+    pd.testing.assert_frame_equal(results[2]["dataframes"][0], expected["dataframes"][0])
+
+
+def test_fingerprint_ignores_numbers_and_invalid_templates_fail_early():
+    assert fingerprint("Relatorio - Pagina 1\nData/Hora Placa\n01/03/2020 00:05 X") == \
+        fingerprint("Relatorio - Pagina 7\nData/Hora  Placa\n02/03/2021 10:15 Y")
+
+    with pytest.raises(ValueError, match="grupos"):
+        LayoutTemplate.from_dict({**VENDOR_LAYOUT, "columns": ["Data/Hora", "Placa"]})
+    with pytest.raises(ValueError, match="Tipo desconhecido"):
+        LayoutTemplate.from_dict({**VENDOR_LAYOUT, "types": {"Velocidade": "decimal"}})
+    with pytest.raises(ValueError, match="já registrado"):
+        LayoutRegistry().register(LayoutTemplate.from_dict({**VENDOR_LAYOUT, "name": "totalsat"}))
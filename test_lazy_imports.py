@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Testes da importação sob demanda: o import do conversor não carrega numpy,
+pandas, openpyxl nem pdfplumber, a saída CSV não carrega o openpyxl e a
+saída Excel continua funcionando
+"""
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / "benchmarks"))
+
+from lazy_imports import is_loaded, lazy_module
+from synthetic_pdf import generate_report
+
+ROOT = Path(__file__).resolve().parent
+HEAVY_MODULES = ["numpy", "pandas", "openpyxl", "pdfplumber"]
+
+
+def loaded_after(code: str):
+    """Dependências pesadas executadas num processo novo depois do código"""
+    script = (f"{code}\nimport json\nfrom lazy_imports import is_loaded\n"
+              f"print(json.dumps([m for m in {HEAVY_MODULES!r} if is_loaded(m)]))")
+    completed = subprocess.run([sys.executable, "-c", script], cwd=ROOT, capture_output=True, text=True,
+                               check=True)
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def test_importing_the_converter_loads_no_heavy_dependency():
+    assert loaded_after("import pdf_converter; pdf_converter.parse_args(['--format', 'csv'])") == []
+
+
+def test_importing_the_service_loads_no_heavy_dependency():
+    assert loaded_after("import conversion_service; conversion_service.ConversionService()") == []
+
+
+@pytest.mark.parametrize("output_format, with_openpyxl", [("csv", False), ("excel", True)])
+def test_openpyxl_only_for_excel_output(tmp_path, output_format, with_openpyxl):
+    generate_report(tmp_path / "src" / "pequeno.pdf", pages=1, rows_per_page=10)
+    loaded = loaded_after(
+        f"from pdf_converter import PDFConverter\n"
+        f"assert PDFConverter({str(tmp_path / 'src')!r}, {str(tmp_path / 'out')!r})"
+        f".convert_pdf('pequeno.pdf', output_format={output_format!r})['success']")
+
+    assert {"numpy", "pandas", "pdfplumber"} <= set(loaded)
+    assert ("openpyxl" in loaded) == with_openpyxl
+
+
+def test_lazy_module_loads_on_first_attribute(monkeypatch):
+    monkeypatch.delitem(sys.modules, "colorsys", raising=False)
+    module = lazy_module("colorsys")
+
+    assert not is_loaded("colorsys")
+    assert module.rgb_to_hsv(1.0, 0.0, 0.0) == (0.0, 1.0, 1.0)
+    assert is_loaded("colorsys")
+    with pytest.raises(ModuleNotFoundError):
+        lazy_module("modulo_que_nao_existe")
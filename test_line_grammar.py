@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Testes da gramática de linhas: casos reais de linhas quebradas e comparação
+com a implementação anterior (benchmarks/legacy_parser.py)
+"""
+
+import random
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / "benchmarks"))
+
+import line_grammar
+from legacy_parser import LegacyLineParser
+from pdf_converter import PDFConverter
+
+converter = PDFConverter()
+legacy = LegacyLineParser()
+
+# (linhas cruas, linhas esperadas depois do reparo)
+BROKEN_LINES = [
+    # Quebra no início das coordenadas (o espaço duplo some no parse por tokens)
+    (["01/03/2020 00:05 AZU 8900 Desligado 0 PARANAGUA - PR - AVENIDA AYRTON SENNA DA SILVA - BR-277 (-",
+      "25.548758,-48.549416)"],
+     ["01/03/2020 00:05 AZU 8900 Desligado 0 PARANAGUA - PR - AVENIDA AYRTON SENNA DA SILVA - BR-277  "
+      "(25.548758,-48.549416)"]),
+    # Quebra no meio das coordenadas
+    (["01/03/2020 00:10 AZU 8900 Em Movimento 42 PARANAGUA - PR - BR-277 (-25.548758,-",
+      "48.549416)"],
+     ["01/03/2020 00:10 AZU 8900 Em Movimento 42 PARANAGUA - PR - BR-277 (-25.548758,-48.549416)"]),
+    # Localidade longa quebrada antes das coordenadas
+    (["01/03/2020 00:15 AZU 8900 Parado 0 CURITIBA - PR - RUA XV DE",
+      "NOVEMBRO (-25.4284,-49.2733)"],
+     ["01/03/2020 00:15 AZU 8900 Parado 0 CURITIBA - PR - RUA XV DE NOVEMBRO (-25.4284,-49.2733)"]),
+    # Só as coordenadas na linha seguinte
+    (["01/03/2020 00:20 AZU 8900 Parado 0 CURITIBA - PR - RUA XV DE NOVEMBRO",
+      "(-25.4284,-49.2733)"],
+     ["01/03/2020 00:20 AZU 8900 Parado 0 CURITIBA - PR - RUA XV DE NOVEMBRO (-25.4284,-49.2733)"]),
+    # Próxima linha é outro registro: nada a unir
+    (["01/03/2020 00:25 AZU 8900 Parado 0 CURITIBA - PR (-",
+      "01/03/2020 00:30 AZU 8900 Parado 0 CURITIBA - PR (-25.4284,-49.2733)"],
+     ["01/03/2020 00:25 AZU 8900 Parado 0 CURITIBA - PR (-",
+      "01/03/2020 00:30 AZU 8900 Parado 0 CURITIBA - PR (-25.4284,-49.2733)"]),
+    # Cabeçalho e rodapé nunca são absorvidos
+    (["01/03/2020 00:35 AZU 8900 Parado 0 CURITIBA - PR",
+      "Data/Hora Placa Evento Vel Localidade Motorista",
+      "Pagina 2 de 99"],
+     ["01/03/2020 00:35 AZU 8900 Parado 0 CURITIBA - PR",
+      "Data/Hora Placa Evento Vel Localidade Motorista",
+      "Pagina 2 de 99"]),
+]
+
+PARSED_LINES = [
+    ("01/03/2020 00:05 AZU 8900 Desligado 0 PARANAGUA - PR - AVENIDA AYRTON SENNA DA SILVA - BR-277 "
+     "(-25.548758,-48.549416)",
+     ["01/03/2020 00:05", "AZU 8900", "Desligado", "0",
+      "PARANAGUA - PR - AVENIDA AYRTON SENNA DA SILVA - BR-277 (-25.548758,-48.549416)", ""]),
+    ("01/03/2020 00:10 AZU 8900 Em Movimento 42 BR-277 KM 5 (-25.5,-48.5)",
+     ["01/03/2020 00:10", "AZU 8900", "Em Movimento", "42", "BR-277 KM 5 (-25.5,-48.5)", ""]),
+    ("01/03/2020 00:15 ABC1D23 Parado 0 CURITIBA",
+     ["01/03/2020 00:15", "ABC1D23", "Parado", "0", "CURITIBA", ""]),
+    # Sem velocidade: o último token vira localidade
+    ("01/03/2020 00:20 AZU 8900 Sem Sinal CURITIBA",
+     ["01/03/2020 00:20", "AZU 8900", "Sem Sinal", "0", "CURITIBA", ""]),
+    ("01/03/2020 00:25 AZU 8900 Parado",
+     ["01/03/2020 00:25", "AZU 8900", "Parado", "0", "Parado", ""]),
+    # Espaços irregulares são normalizados como no split por tokens
+    ("01/03/2020  00:30 AZU  8900 Em\tMovimento 12 CURITIBA  - PR",
+     ["01/03/2020  00:30", "AZU 8900", "Em Movimento", "12", "CURITIBA - PR", ""]),
+    ("01/03/2020 00:35 AZU Parado", None),
+    ("01/03/2020 00:40 AZU 8900", None),
+    ("Pagina 1 de 99", None),
+]
+
+
+@pytest.mark.parametrize("lines, expected", BROKEN_LINES)
+def test_broken_lines_golden(lines, expected):
+    assert converter._process_broken_lines(lines) == expected
+    assert legacy._process_broken_lines(lines) == expected
+
+
+@pytest.mark.parametrize("line, expected", PARSED_LINES)
+def test_parse_data_line_golden(line, expected):
+    assert converter._parse_data_line(line, 6) == expected
+    assert legacy._parse_data_line(line, 6) == expected
+
+
+def test_line_kinds():
+    kinds = {
+        "Data/Hora Placa Evento Vel Localidade Motorista": line_grammar.HEADER,
+        "01/03/2020 00:05 AZU 8900 Desligado 0 PARANAGUA (-25.5,-48.5)": line_grammar.DATA,
+        "25.548758,-48.549416)": line_grammar.CONTINUATION,
+        "48.549416)": line_grammar.CONTINUATION,
+        "(-25.4284,-49.2733)": line_grammar.CONTINUATION,
+        "NOVEMBRO (-25.4284,-49.2733)": line_grammar.CONTINUATION,
+        "Relatorio de Posicoes - Pagina 1": line_grammar.NOISE,
+        "": line_grammar.NOISE,
+    }
+    for line, kind in kinds.items():
+        assert line_grammar.line_kind(line_grammar.match_line(line)) == kind, line
+
+
+def test_coordinates_captured_with_fields():
+    match = line_grammar.match_line("01/03/2020 00:05 AZU 8900 Desligado 0 PARANAGUA (-25.548758,-48.549416)")
+    assert line_grammar.coordinates(match) == ("-25.548758", "-48.549416")
+
+
+def test_clean_dataframe_matches_legacy():
+    df = pd.DataFrame({
+        "a": [None, " x ", None, 5, float("nan"), pd.NA],
+        "b": [None, "None", "", None, "y\t", "NaN"],
+        "c": [None] * 6,
+        "d": [None, 1.0, None, 2.0, None, None],
+    })
+    pd.testing.assert_frame_equal(converter.clean_dataframe(df), legacy.clean_dataframe(df))
+    assert df["a"][1] == " x "
+
+
+def random_line(rng):
+    tokens = ["AZU", "8900", "ABC1D23", "Em", "Movimento", "Parado", "0", "42", "110", "CURITIBA", "-",
+              "PR", "BR-277", "(-", "(-25.5,-", "48.5)", "25.5,-48.5)", "(-25.5,-48.5)", "Data/Hora", "Placa",
+              "1a", "KM", "5"]
+    separators = [" ", " ", " ", " ", "  ", "\t"]
+    line = "".join(rng.choice(separators) + rng.choice(tokens) for _ in range(rng.randint(0, 9)))
+    if rng.random() < 0.7:
+        line = "01/03/2020" + rng.choice(separators) + "00:05" + line
+    return line.strip()
+
+
+def test_matches_legacy_on_random_lines():
+    rng = random.Random(7)
+    for _ in range(3000):
+        lines = [random_line(rng) for _ in range(rng.randint(1, 6))]
+        assert converter._process_broken_lines(lines) == legacy._process_broken_lines(lines), lines
+        for line in lines:
+            assert converter._parse_data_line(line, 6) == legacy._parse_data_line(line, 6), line
+            assert line_grammar.parse_fields(line, line_grammar.match_line(line)) == legacy._parse_data_line(line, 6)
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Testes do índice das saídas CSV: consultas por placa, período, evento e
+velocidade iguais ao filtro sobre os CSVs inteiros, índice refeito quando o
+CSV muda e o subcomando consultar
+"""
+
+import os
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / "benchmarks"))
+
+import pdf_converter
+from output_index import FILE_COLUMN, INDEX_SUFFIX, OutputIndex, to_minutes
+from pdf_converter import PDFConverter
+from record_buffer import date_minutes
+from synthetic_pdf import generate_report
+
+
+def read_text_csv(path) -> pd.DataFrame:
+    return pd.read_csv(path, dtype=str, keep_default_na=False, na_values=[''], encoding='utf-8-sig')
+
+
+def full_scan(output_dir, plate=None, start=None, end=None, event=None, speed_above=None) -> pd.DataFrame:
+    """O mesmo filtro lendo os CSVs inteiros"""
+    frames = []
+    for path in sorted(Path(output_dir).glob("*.csv")):
+        df = read_text_csv(path)
+        mask = pd.Series(True, index=df.index)
+        if plate is not None:
+            mask &= df['Placa'] == plate
+        if event is not None:
+            mask &= df['Evento'] == event
+        minutes = date_minutes(df['Data/Hora'].fillna('').to_numpy(dtype=object))
+        if start is not None:
+            mask &= minutes >= to_minutes(start)
+        if end is not None:
+            mask &= minutes <= to_minutes(end, end=True)
+        if speed_above is not None:
+            mask &= pd.to_numeric(df['Velocidade'], errors='coerce') > speed_above
+        found = df[mask].reset_index(drop=True)
+        found.insert(0, FILE_COLUMN, path.name)
+        frames.append(found)
+    return pd.concat(frames, ignore_index=True)
+
+
+@pytest.fixture(scope="module")
+def indexed_output(tmp_path_factory):
+    tmp_path = tmp_path_factory.mktemp("indice")
+    source = tmp_path / "sourcePdfs"
+    for seed in range(3):
+        generate_report(source / f"relatorio_{seed}.pdf", pages=3, seed=seed)
+    converter = PDFConverter(str(source), str(tmp_path / "out"), index_outputs=True)
+    results = converter.convert_all_pdfs(output_format="csv")
+    # A conversão em fluxo também indexa, lendo as colunas do CSV gravado
+    generate_report(source / "fluxo.pdf", pages=2, seed=9)
+    results.append(converter.convert_pdf("fluxo.pdf", stream=True, output_format="csv"))
+    assert all(result['success'] for result in results)
+    return tmp_path / "out"
+
+
+@pytest.mark.parametrize("filters", [
+    {'plate': 'AZU 8900', 'start': '01/03/2020 06:00', 'end': '02/03/2020'},
+    {'speed_above': 80},
+    {'event': 'Ligado', 'plate': 'KLM 3310'},
+    {'plate': 'NAO EXISTE'},
+    {},
+])
+def test_query_matches_full_scan(indexed_output, filters):
+    index = OutputIndex(indexed_output)
+    found = index.query(**filters)
+
+    assert sorted(path.name for path in indexed_output.glob(f"*{INDEX_SUFFIX}")) == [
+        "fluxo.idx", "relatorio_0.idx", "relatorio_1.idx", "relatorio_2.idx"]
+    expected = full_scan(indexed_output, **filters)
+    if expected.empty:
+        assert found.empty and index.files_skipped == index.files_indexed == 4
+    else:
+        pd.testing.assert_frame_equal(found, expected)
+
+
+def test_changed_csv_is_reindexed(tmp_path):
+    source = tmp_path / "sourcePdfs"
+    generate_report(source / "relatorio.pdf", pages=2, seed=4)
+    converter = PDFConverter(str(source), str(tmp_path / "out"), index_outputs=True)
+    csv_path = Path(converter.convert_pdf("relatorio.pdf", output_format="csv")['output_file'])
+
+    # O CSV foi editado depois do índice: só metade dos registros, em outra ordem
+    df = read_text_csv(csv_path)
+    df.iloc[::-2].to_csv(csv_path, index=False, encoding='utf-8-sig')
+    os.utime(csv_path, ns=(1, 1))
+
+    pd.testing.assert_frame_equal(OutputIndex(tmp_path / "out").query(speed_above=50),
+                                  full_scan(tmp_path / "out", speed_above=50))
+    with pytest.raises(ValueError, match="Data inválida"):
+        OutputIndex(tmp_path / "out").query(start="31/02/2020")
+
+
+def test_query_subcommand(indexed_output, tmp_path, capsys):
+    saida = tmp_path / "acima_de_80.csv"
+
+    assert pdf_converter.main(["consultar", "--pasta", str(indexed_output), "--placa", "QRS 7788",
+                               "--acima-de", "80", "--saida", str(saida)]) == 0
+    pd.testing.assert_frame_equal(read_text_csv(saida), full_scan(indexed_output, plate="QRS 7788",
+                                                                  speed_above=80))
+    assert "registros de 4 arquivos indexados" in capsys.readouterr().err
+    assert pdf_converter.main(["consultar", "--pasta", str(tmp_path / "vazia")]) == 1
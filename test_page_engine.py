@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Testes do motor de páginas: uma abertura do PDF por conversão e cada página
+extraída uma vez só, compartilhada entre análise, tabelas e texto
+"""
+
+import sys
+from pathlib import Path
+
+import pdfplumber
+import pdfplumber.page
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / "benchmarks"))
+
+from pdf_converter import PDFConverter
+from synthetic_pdf import generate_report
+
+
+def test_convert_pdf_opens_once_and_parses_each_page_once(tmp_path, monkeypatch):
+    generate_report(tmp_path / "src" / "relatorio.pdf", pages=6, rows_per_page=10, seed=3, break_ratio=0.3)
+    converter = PDFConverter(str(tmp_path / "src"), str(tmp_path / "out"), backend="pdfplumber")
+
+    opens, texts = [], []
+    open_pdf, extract_text = pdfplumber.open, pdfplumber.page.Page.extract_text
+
+    def counted_open(*args, **kwargs):
+        opens.append(args)
+        return open_pdf(*args, **kwargs)
+
+    def counted_text(page, *args, **kwargs):
+        texts.append(page.page_number)
+        return extract_text(page, *args, **kwargs)
+
+    monkeypatch.setattr(pdfplumber, "open", counted_open)
+    monkeypatch.setattr(pdfplumber.page.Page, "extract_text", counted_text)
+
+    result = converter.convert_pdf("relatorio.pdf")
+
+    assert result['success']
+    assert result['pages_parsed'] == result['analysis']['pages'] == 6
+    assert len(opens) == 1
+    assert sorted(texts) == [1, 2, 3, 4, 5, 6]
+
+
+if __name__ == "__main__":
+    import pytest
+
+    sys.exit(pytest.main([__file__, "-q"]))
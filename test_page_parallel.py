@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Testes da extração paralela por faixas de páginas
+"""
+
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / "benchmarks"))
+
+from page_engine import PageContent, PageEngine
+from page_parallel import ParallelPageExtractor, build_range_result, split_page_ranges
+from pdf_converter import PDFConverter
+from synthetic_pdf import generate_report
+
+HEADER = "Data/Hora Placa Evento Vel Localidade Motorista"
+
+# Páginas cujas linhas quebradas atravessam a divisa entre páginas
+PAGES = [
+    HEADER + "\n"
+    "01/03/2020 00:05 AZU 8900 Desligado 0 PARANAGUA - PR - AVENIDA AYRTON SENNA (-25.548758,-48.549416)\n"
+    "01/03/2020 00:10 AZU 8900 Em Movimento 42 PARANAGUA - PR - BR-277 (-",
+    "25.551234,-48.561234)\n"
+    "01/03/2020 00:15 AZU 8900 Parado 0 CURITIBA - PR - RUA XV DE NOVEMBRO (-25.4284,-",
+    "49.2733)\n"
+    "01/03/2020 00:20 AZU 8900 Ligado 0 CURITIBA - PR - RUA XV DE NOVEMBRO",
+    "CENTRO (-25.4290,-49.2740)\n"
+    "01/03/2020 00:25 AZU 8900 Desligado 0 CURITIBA - PR - PRACA TIRADENTES (-25.4295,-49.2710)",
+]
+
+
+def sequential_rows(converter, texts):
+    header, data_lines, _ = converter._scan_text_lines(texts)
+    return converter._parse_data_lines(data_lines, len(converter._parse_header(header)))
+
+
+def test_page_seams_are_joined_sequentially():
+    converter = PDFConverter()
+    rows = sequential_rows(converter, PAGES)
+
+    assert [row[0] for row in rows] == [
+        "01/03/2020 00:05", "01/03/2020 00:10", "01/03/2020 00:15", "01/03/2020 00:20", "01/03/2020 00:25",
+    ]
+    assert rows[1][4].endswith("(25.551234,-48.561234)")
+    assert rows[2][4].endswith("(-25.4284,-49.2733)")
+    assert rows[3][4].endswith("NOVEMBRO CENTRO (-25.4290,-49.2740)")
+
+
+def test_range_merge_matches_sequential_for_every_split():
+    converter = PDFConverter()
+    pages = [PageContent(number, text, []) for number, text in enumerate(PAGES, 1)]
+    expected = sequential_rows(converter, PAGES)
+    extractor = ParallelPageExtractor(converter, workers=2)
+
+    for size in range(1, len(pages) + 1):
+        results = [
+            build_range_result(converter, start, pages[start:start + size], HEADER)
+            for start in range(0, len(pages), size)
+        ]
+        assert extractor.merge(results, 6) == expected
+
+
+def test_split_page_ranges_covers_all_pages():
+    ranges = split_page_ranges(1003, workers=4, min_pages=10)
+    assert ranges[0][0] == 0 and ranges[-1][1] == 1003
+    assert all(a[1] == b[0] for a, b in zip(ranges, ranges[1:]))
+
+
+def test_parallel_dataframe_identical_to_sequential(tmp_path):
+    generate_report(tmp_path / "grande.pdf", pages=12, rows_per_page=15, break_ratio=0.4,
+                    flow_across_pages=True, repeat_header=False)
+    converter = PDFConverter(str(tmp_path), str(tmp_path / "out"))
+
+    sequential = converter.extract_text_as_table(tmp_path / "grande.pdf")
+    with PageEngine(tmp_path / "grande.pdf") as engine:
+        parallel = converter._build_text_dataframes(*ParallelPageExtractor(converter, 3, min_pages=2).run(engine))
+        assert engine.pages_parsed == 12
+
+    assert len(sequential) == 1
+    pd.testing.assert_frame_equal(sequential[0], parallel[0])
+
+
+if __name__ == "__main__":
+    import pytest
+
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Testes do RecordBuffer: os registros voltam com o texto idêntico (inclusive
+datas e velocidades fora da forma canônica) e o DataFrame limpo é o mesmo da
+lista de listas
+"""
+
+import pickle
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / "benchmarks"))
+
+import record_buffer
+from pdf_converter import PDFConverter
+from record_buffer import RecordBuffer
+from synthetic_pdf import generate_lines
+
+HEADERS = ['Data/Hora', 'Placa', 'Evento', 'Velocidade', 'Localidade', 'Motorista']
+ROWS = [
+    ["01/03/2020 00:05", "ABC1D23", "Ignição Ligada", "12", "CURITIBA - PR (-25.4280,-49.2700)", ""],
+    ["29/02/2024 23:59", "AZU 8900", "", "0", "", ""],
+    ["31/02/2020 10:00", "ABC1D23", "Parado", "080", " x ", ""],
+    ["01/03/2020  10:00", "ABC1D23", "Parado", "٣", "None", "Motorista"],
+    ["01/01/1500 00:00", "Q", "E", "9999999999", "z", ""],
+    ["00/00/0000 00:00", "Q", "E", "5", "z", ""],
+]
+
+
+def test_rows_round_trip_exactly():
+    records = RecordBuffer(ROWS)
+
+    assert len(records) == len(ROWS)
+    assert list(records) == ROWS
+    assert records[2] == ROWS[2] and records[-1] == ROWS[-1]
+    pd.testing.assert_frame_equal(records.to_dataframe(HEADERS), pd.DataFrame(ROWS, columns=HEADERS))
+
+
+def test_extend_and_pickle_keep_the_records(monkeypatch):
+    # Blocos pequenos para exercitar a conversão em vários blocos
+    monkeypatch.setattr(record_buffer, "BLOCK_ROWS", 4)
+    records = RecordBuffer(ROWS)
+    copy = pickle.loads(pickle.dumps(records))
+    copy.extend(RecordBuffer(reversed(ROWS)))
+    copy.extend(ROWS[:2])
+    copy.append(ROWS[3])
+
+    assert list(copy) == ROWS + ROWS[::-1] + ROWS[:2] + [ROWS[3]]
+    assert RecordBuffer() == [] and len(RecordBuffer().to_dataframe(HEADERS)) == 0
+
+
+def test_clean_dataframe_matches_list_of_lists():
+    converter = PDFConverter()
+    lines = [line for record in generate_lines(3000, break_ratio=0.0) for line in record]
+    records = converter._parse_data_lines(lines, 6)
+    rows = converter._parse_data_lines(lines, 6, compact=False)
+
+    assert isinstance(records, RecordBuffer) and records == rows
+    expected = converter.clean_dataframe(pd.DataFrame(rows + ROWS, columns=HEADERS))
+    records.extend(ROWS)
+    pd.testing.assert_frame_equal(converter._clean_records(records, HEADERS), expected)
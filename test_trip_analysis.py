@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Testes do pós-processamento de viagens: coordenadas do último parêntese,
+pings repetidos descartados, viagens cortadas na ignição e em paradas longas
+e o resumo gravado ao lado do CSV
+"""
+
+import io
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / "benchmarks"))
+
+import columnar_output
+from pdf_converter import PDFConverter
+from synthetic_pdf import generate_report
+from trip_analysis import TripAnalyzer, parse_coordinates
+
+HEADERS = ['Data/Hora', 'Placa', 'Evento', 'Velocidade', 'Localidade', 'Motorista']
+ROWS = [
+    ["01/03/2020 08:00", "AAA1111", "Ligado", "0", "CURITIBA - PR (-25.000000,-49.000000)", pd.NA],
+    ["01/03/2020 08:02", "BBB2222", "Parado", "0", "JOINVILLE - SC (-26.300000,-48.800000)", pd.NA],
+    ["01/03/2020 08:05", "AAA1111", "Em Movimento", "50", "CURITIBA - PR (-25.010000,-49.000000)", pd.NA],
+    ["01/03/2020 08:05", "AAA1111", "Em Movimento", "50", "CURITIBA - PR (-25.010000,-49.000000)", pd.NA],
+    ["01/03/2020 08:10", "AAA1111", "Em Movimento", "40", "CURITIBA - PR (-25.020000,-49.000000)", pd.NA],
+    ["01/03/2020 08:15", "AAA1111", "Desligado", "0", "CURITIBA - PR (-25.020000,-49.000000)", pd.NA],
+    ["01/03/2020 08:20", "BBB2222", "Em Movimento", "60", "JOINVILLE - SC (-26.300000,-48.810000)", pd.NA],
+    ["01/03/2020 09:30", "AAA1111", "Parado", "0", "CURITIBA - PR (-25.020000,-49.000000)", pd.NA],
+    ["01/03/2020 10:30", "AAA1111", "Em Movimento", "30", "CURITIBA - PR (-25.030000,-49.000000)", pd.NA],
+]
+
+
+def test_coordinates_from_the_last_parenthesis():
+    localities = ["CURITIBA - PR (-25.4280,-49.2700)", "SEM COORDENADAS", pd.NA, "", "X (1,2) ",
+                  "A (-1.5,2.)", "B (--1,2)", "C (1,2) (3.25,-4)", "SÃO JOSÉ (-25.5,-49.1)"]
+
+    latitudes, longitudes = parse_coordinates(localities)
+
+    nan = np.nan
+    np.testing.assert_array_equal(latitudes, [-25.428, nan, nan, nan, 1, -1.5, nan, 3.25, -25.5])
+    np.testing.assert_array_equal(longitudes, [-49.27, nan, nan, nan, 2, 2, nan, -4, -49.1])
+
+
+def test_coordinates_match_the_columnar_parser():
+    rng = np.random.default_rng(3)
+    pieces = np.array(list("0123456789-.,() X\t\u00a0\u0663"))
+    localities = ["".join(rng.choice(pieces, size)) for size in rng.integers(0, 20, 5000)]
+    localities += [f"{name} ({lat},{lon})" for name, lat, lon in zip(
+        ["A", "SÃO", "B)", "C (9,9)"] * 250, rng.uniform(-90, 90, 1000).round(7), rng.uniform(-180, 180, 1000))]
+    localities += ["X (1234567890123456,1)", "X (0.1234567890123456,-2)", "X (1,2)\u2003", "X (-,1)", "X (1.2.3,4)"]
+
+    _, expected_lat, expected_lon = columnar_output.split_localities(localities)
+    latitudes, longitudes = parse_coordinates(localities)
+
+    np.testing.assert_array_equal(latitudes, expected_lat)
+    np.testing.assert_array_equal(longitudes, expected_lon)
+
+
+def test_repeated_pings_dropped_and_trips_split():
+    rows, summary = TripAnalyzer().process(pd.DataFrame(ROWS, columns=HEADERS))
+
+    # O ping repetido sai; os demais ficam na ordem do documento
+    assert rows['Data/Hora'].tolist() == [row[0] for i, row in enumerate(ROWS) if i != 3]
+    assert rows['Viagem'].tolist() == [1, 1, 1, 1, 1, 1, pd.NA, 2]
+    assert rows['Intervalo_min'].tolist() == [pd.NA, pd.NA, 5, 5, 5, 18, 75, 60]
+    assert rows['Latitude'].iloc[2] == -25.01
+    assert rows['Distancia_m'].iloc[3] == pytest.approx(1111.9, abs=0.1)
+
+    assert summary[['Placa', 'Viagem', 'Inicio', 'Fim', 'Registros']].values.tolist() == [
+        ["AAA1111", 1, "01/03/2020 08:00", "01/03/2020 08:15", 4],
+        ["AAA1111", 2, "01/03/2020 10:30", "01/03/2020 10:30", 1],
+        ["BBB2222", 1, "01/03/2020 08:02", "01/03/2020 08:20", 2],
+    ]
+    assert summary['Duracao_min'].tolist() == [15, 0, 18]
+    assert summary['Velocidade_max'].tolist() == [50, 30, 60]
+    assert summary['Distancia_km'].iloc[0] == pytest.approx(2.224, abs=0.001)
+
+
+def test_converter_writes_trip_summary_next_to_rows(tmp_path):
+    generate_report(tmp_path / "frota.pdf", pages=3, seed=5)
+    converter = PDFConverter(str(tmp_path), str(tmp_path / "out"), trips=TripAnalyzer())
+
+    result = converter.convert_pdf("frota.pdf", output_format="csv")
+
+    assert result['success'] and result['trips_file'] == str(tmp_path / "out" / "frota_viagens.csv")
+    summary = pd.read_csv(result['trips_file'], encoding='utf-8-sig')
+    assert len(summary) == result['trips_found'] > 0
+    rows = pd.read_csv(result['output_file'], encoding='utf-8-sig')
+    assert {'Latitude', 'Longitude', 'Intervalo_min', 'Distancia_m', 'Viagem'} <= set(rows.columns)
+    assert summary['Registros'].sum() == rows['Viagem'].notna().sum()
+
+    # Em memória o resumo vem junto das saídas e o Parquet mantém as colunas numéricas
+    in_memory = converter.convert_source((tmp_path / "frota.pdf").read_bytes(), output_format="parquet",
+                                         name="frota.pdf")
+    assert set(in_memory['outputs']) == {"frota.parquet", "frota_viagens.csv"}
+    typed = pd.read_parquet(io.BytesIO(in_memory['outputs']["frota.parquet"]))
+    assert typed['Latitude'].dtype == 'float64' and str(typed['Viagem'].dtype) == 'Int32'
+    pd.testing.assert_frame_equal(in_memory['trips'], summary, check_dtype=False)
@@ -0,0 +1,312 @@
+"""
+Pós-processamento geográfico dos registros de rastreamento.
+
+Depois da extração, os registros de cada placa viram uma sequência de pontos:
+
+- latitude e longitude saem do sufixo "(lat,lon)" da Localidade, em float
+- pontos repetidos em sequência na mesma placa (mesma data/hora, posição,
+  evento e velocidade) são descartados
+- entre pontos seguidos da mesma placa: intervalo em minutos e distância em
+  metros (haversine)
+- viagens: a sequência é cortada na ignição ligada, depois da ignição
+  desligada e em paradas sem sinal maiores que idle_gap_minutes; um trecho só
+  conta como viagem se o veículo andou (velocidade > 0 ou min_trip_meters)
+
+Tudo é feito em colunas do NumPy, sem laço por registro: as coordenadas são
+lidas de um buffer de bytes com todas as localidades e as datas passam pela
+mesma conversão vetorizada do RecordBuffer. O resumo por placa e viagem é gravado ao lado do
+CSV dos registros (<nome>_viagens.csv).
+"""
+
+from __future__ import annotations
+
+from typing import Iterable, List, Tuple
+import logging
+
+import columnar_output
+from lazy_imports import lazy_module
+from record_buffer import NO_DATE, date_minutes
+
+np = lazy_module('numpy')
+pd = lazy_module('pandas')
+
+logger = logging.getLogger(__name__)
+
+REQUIRED_COLUMNS = ('Data/Hora', 'Placa', 'Evento', 'Velocidade', 'Localidade')
+TRIPS_SUFFIX = '_viagens'
+
+DEFAULT_IDLE_GAP_MINUTES = 30
+DEFAULT_MIN_TRIP_METERS = 200.0
+# Eventos de ignição (comparados sem diferença de maiúsculas)
+IGNITION_ON = ('Ligado', 'Ignição Ligada', 'Ignicao Ligada')
+IGNITION_OFF = ('Desligado', 'Ignição Desligada', 'Ignicao Desligada')
+
+EARTH_RADIUS_METERS = 6371008.8
+
+_ON, _OFF = 1, -1
+
+# Espaços ASCII que a regex aceita depois do ")"
+_SPACES = [ord(space) for space in ' \t\r\x0b\x0c']
+
+# Até 15 dígitos a mantissa é um inteiro exato no float e mantissa / 10**casas
+# dá exatamente float(texto) (uma divisão de dois valores exatos, arredondada
+# uma vez só); coordenadas maiores ficam com a regex
+_MAX_DIGITS = 15
+_POWERS_OF_TEN = [float(10 ** exponent) for exponent in range(_MAX_DIGITS + 1)]
+# Registros convertidos por vez (a matriz de bytes de um bloco tem ~20 MB)
+_COORD_BLOCK = 1 << 20
+
+
+def _decimals(buf: np.ndarray, starts: np.ndarray, stops: np.ndarray) -> np.ndarray:
+    """Float de cada texto buf[start:stop] no formato de line_grammar.COORD; NaN nos demais
+
+    Os bytes dos textos viram uma matriz posição x registro (cada linha da
+    matriz é contígua); dígitos, ponto e sinal são conferidos e a mantissa é
+    acumulada posição a posição, sem laço por registro.
+    """
+    values = np.full(len(starts), np.nan)
+    widths = np.where((stops - starts >= 1) & (stops - starts <= _MAX_DIGITS + 2), stops - starts, 0)
+    if not widths.any():
+        return values
+    # Uma posição a mais: o primeiro dígito de "-" sozinho cai no zero do fim
+    positions = np.arange(int(widths.max()) + 1)[:, None]
+    powers = np.array(_POWERS_OF_TEN)
+    for block in range(0, len(starts), _COORD_BLOCK):
+        width = widths[block:block + _COORD_BLOCK]
+        inside = positions < width
+        index = np.minimum(starts[block:block + _COORD_BLOCK] + positions, len(buf) - 1)
+        chars = np.where(inside, buf[index], 0)
+
+        digit = (chars >= ord('0')) & (chars <= ord('9'))
+        dot = chars == ord('.')
+        negative = chars[0] == ord('-')
+        first_digit = np.where(negative, digit[1], digit[0])
+        digits = digit.sum(axis=0)
+        dots = dot.sum(axis=0)
+        # Posição a posição: só dígito, ponto, "-" na primeira ou nada (fim do texto)
+        valid = (width > 0) & first_digit & (dots <= 1) & (digits <= _MAX_DIGITS)
+        valid &= (digit | dot | ~inside)[1:].all(axis=0)
+
+        mantissa = np.zeros(len(width), dtype=np.int64)
+        decimals = np.zeros(len(width), dtype=np.int64)
+        after_dot = np.zeros(len(width), dtype=bool)
+        for position in range(len(positions)):
+            is_digit = digit[position]
+            mantissa = np.where(is_digit, mantissa * 10 + (chars[position] - ord('0')), mantissa)
+            # Casas decimais: dígitos depois do ponto
+            decimals += is_digit & after_dot
+            after_dot |= dot[position]
+        numbers = mantissa / powers[np.minimum(decimals, _MAX_DIGITS)]
+        values[block:block + _COORD_BLOCK] = np.where(valid, np.where(negative, -numbers, numbers), np.nan)
+    return values
+
+
+def parse_coordinates(localities: Iterable) -> Tuple[np.ndarray, np.ndarray]:
+    """Latitude e longitude (float, NaN sem coordenadas) do sufixo "(lat,lon)" de cada localidade
+
+    Mesmo resultado de columnar_output.split_localities, sem regex por
+    registro: as localidades são unidas em um buffer de bytes, o último "(",
+    a última vírgula e o ")" final de cada uma são achados com o NumPy e os
+    números são convertidos por _decimals. Os registros com espaço depois do
+    ")" ou bytes não ASCII nas coordenadas passam pela regex.
+    """
+    texts = list(localities)
+    try:
+        joined = '\n'.join(texts)
+    except TypeError:
+        # Células vazias (NA) viram texto vazio
+        texts = [text if isinstance(text, str) else '' for text in texts]
+        joined = '\n'.join(texts)
+    buf = np.frombuffer((joined + '\n').encode('utf-8'), dtype=np.uint8)
+    ends = np.flatnonzero(buf == ord('\n'))
+    if len(ends) != len(texts):
+        # Alguma localidade com quebra de linha: o buffer não separa os registros
+        _, latitudes, longitudes = columnar_output.split_localities(texts)
+        return latitudes, longitudes
+
+    starts = np.r_[0, ends[:-1] + 1].astype(np.int64)
+    close = ends - 1
+    opens = np.flatnonzero(buf == ord('('))
+    commas = np.flatnonzero(buf == ord(','))
+    # Último "(" e última vírgula antes do fim de cada registro (-1: nenhum no buffer até ali)
+    opened = np.r_[-1, opens][np.searchsorted(opens, close)]
+    comma = np.r_[-1, commas][np.searchsorted(commas, close)]
+    framed = (ends > starts) & (buf[close] == ord(')')) & (opened >= starts) & (comma > opened)
+
+    latitudes = _decimals(buf, opened + 1, np.where(framed, comma, opened + 1))
+    longitudes = _decimals(buf, comma + 1, np.where(framed, close, comma + 1))
+    found = ~(np.isnan(latitudes) | np.isnan(longitudes))
+    latitudes[~found] = np.nan
+    longitudes[~found] = np.nan
+
+    # A regex aceita espaço (inclusive não ASCII) depois do ")", dígitos não ASCII e
+    # números longos: os registros sem coordenadas nesses casos vão para ela
+    non_ascii = np.flatnonzero(buf >= 0x80)
+    long_number = framed & ((comma - opened > _MAX_DIGITS) | (close - comma > _MAX_DIGITS))
+    loose = ((np.searchsorted(non_ascii, ends) > np.searchsorted(non_ascii, opened))
+             | np.isin(buf[np.maximum(close, 0)], _SPACES) | long_number)
+    loose = np.flatnonzero(~found & (ends > starts) & (opened >= starts) & loose)
+    if len(loose):
+        _, latitudes[loose], longitudes[loose] = columnar_output.split_localities([texts[i] for i in loose.tolist()])
+    return latitudes, longitudes
+
+
+def haversine_meters(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """Distância em metros entre pares de pontos (graus), elemento a elemento"""
+    lat1, lon1, lat2, lon2 = (np.radians(values) for values in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_METERS * np.arcsin(np.sqrt(a))
+
+
+def _minutes(values: List) -> np.ndarray:
+    """Minutos desde 1970 de cada Data/Hora; NO_DATE quando não há data"""
+    minutes = date_minutes(np.array(values, dtype=object))
+    irregular = np.flatnonzero(minutes == NO_DATE)
+    if len(irregular):
+        # Fora da forma canônica (espaços irregulares, por exemplo): o parser da saída colunar
+        parsed = columnar_output.parse_dates([values[i] for i in irregular.tolist()])
+        found = parsed.notna().to_numpy()
+        minutes[irregular[found]] = parsed[found].to_numpy().astype('datetime64[m]').astype(np.int64)
+    return minutes
+
+
+def _same(values: np.ndarray) -> np.ndarray:
+    """values[i] == values[i-1], com NaN igual a NaN"""
+    equal = values[1:] == values[:-1]
+    if values.dtype.kind == 'f':
+        equal |= np.isnan(values[1:]) & np.isnan(values[:-1])
+    return equal
+
+
+class TripAnalyzer:
+    """Coordenadas, deduplicação, intervalos e viagens dos registros de rastreamento"""
+
+    def __init__(self, idle_gap_minutes: float = DEFAULT_IDLE_GAP_MINUTES,
+                 min_trip_meters: float = DEFAULT_MIN_TRIP_METERS,
+                 ignition_on: Iterable[str] = IGNITION_ON, ignition_off: Iterable[str] = IGNITION_OFF):
+        self.idle_gap_minutes = idle_gap_minutes
+        self.min_trip_meters = min_trip_meters
+        self.ignition_on = {event.casefold() for event in ignition_on}
+        self.ignition_off = {event.casefold() for event in ignition_off}
+
+    def applies(self, df: pd.DataFrame) -> bool:
+        """O DataFrame tem as colunas de um relatório de rastreamento"""
+        return all(column in df.columns for column in REQUIRED_COLUMNS)
+
+    def _ignition(self, events: List) -> np.ndarray:
+        """_ON, _OFF ou 0 por registro, classificando cada evento distinto uma vez"""
+        codes, uniques = pd.factorize(pd.Series(events, dtype=object))
+        kinds = np.array([_ON if str(event).casefold() in self.ignition_on else
+                          _OFF if str(event).casefold() in self.ignition_off else 0 for event in uniques] + [0],
+                         dtype=np.int8)
+        # Código -1 (evento vazio) cai no 0 do fim
+        return kinds[codes], codes
+
+    def process(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """(registros sem os repetidos e com as colunas novas, resumo por placa e viagem)
+
+        Os registros mantêm a ordem do documento e ganham Latitude, Longitude,
+        Intervalo_min e Distancia_m (até o ponto anterior da mesma placa) e
+        Viagem (número da viagem na placa, vazio fora de viagens).
+        """
+        plates, plate_values = pd.factorize(df['Placa'])
+        events, event_codes = self._ignition(df['Evento'].tolist())
+        speed_codes, speed_values = pd.factorize(df['Velocidade'])
+        speeds = np.append(pd.to_numeric(pd.Series(speed_values, dtype=object), errors='coerce')
+                           .to_numpy(dtype=np.float64), np.nan)[speed_codes]
+        dates = df['Data/Hora'].tolist()
+        minutes = _minutes(dates)
+        latitudes, longitudes = parse_coordinates(df['Localidade'])
+
+        # Ordem de cada placa no tempo (estável: empates ficam na ordem do documento)
+        order = np.lexsort((minutes, plates))
+        plate, minute, lat, lon = plates[order], minutes[order], latitudes[order], longitudes[order]
+        event, event_code, speed = events[order], event_codes[order], speeds[order]
+
+        same_plate = plate[1:] == plate[:-1]
+        repeated = np.r_[False, same_plate & _same(minute) & _same(lat) & _same(lon)
+                         & _same(event_code) & _same(speed)]
+        keep = ~repeated
+        order = order[keep]
+        plate, minute, lat, lon, event, speed = (values[keep] for values in (plate, minute, lat, lon, event, speed))
+
+        count = len(order)
+        same_plate = np.r_[False, plate[1:] == plate[:-1]]
+        dated = minute != NO_DATE
+        interval = np.full(count, np.nan)
+        interval[1:] = np.where(dated[1:] & dated[:-1], minute[1:] - minute[:-1], np.nan)
+        interval[~same_plate] = np.nan
+        distance = np.full(count, np.nan)
+        distance[1:] = haversine_meters(lat[:-1], lon[:-1], lat[1:], lon[1:])
+        distance[~same_plate] = np.nan
+
+        previous_off = np.r_[False, event[:-1] == _OFF]
+        with np.errstate(invalid='ignore'):
+            idle = interval > self.idle_gap_minutes
+        boundary = ~same_plate | (event == _ON) | previous_off | idle
+        segment_starts = np.flatnonzero(boundary)
+        segment = np.cumsum(boundary) - 1
+
+        # Distância e velocidade de cada trecho; o deslocamento até o primeiro ponto fica fora
+        inner = np.where(boundary, 0.0, np.nan_to_num(distance))
+        if count:
+            meters = np.add.reduceat(inner, segment_starts)
+            top_speed = np.maximum.reduceat(np.nan_to_num(speed), segment_starts)
+        else:
+            meters = top_speed = np.zeros(0)
+        moving = (top_speed > 0) | (meters >= self.min_trip_meters)
+
+        # Número da viagem dentro da placa
+        trips_so_far = np.cumsum(moving)
+        segment_plate = plate[segment_starts]
+        first_of_plate = np.r_[True, segment_plate[1:] != segment_plate[:-1]] if count else np.zeros(0, bool)
+        offset = np.maximum.accumulate(np.where(first_of_plate, trips_so_far - moving, 0)) if count else trips_so_far
+        trip_number = trips_so_far - offset
+
+        # Colunas novas de volta na ordem do documento
+        rows = df.iloc[np.sort(order)].reset_index(drop=True)
+        position = np.argsort(order, kind='stable')
+        trip = np.where(moving[segment], trip_number[segment], 0)[position]
+        rows['Latitude'] = lat[position]
+        rows['Longitude'] = lon[position]
+        rows['Intervalo_min'] = pd.array(interval[position], dtype='Float64').round().astype('Int64')
+        rows['Distancia_m'] = np.round(distance[position], 1)
+        trips = pd.array(trip, dtype='Int32')
+        trips[trip == 0] = pd.NA
+        rows['Viagem'] = trips
+        rows.attrs = dict(df.attrs)
+
+        return rows, self._summary(df, order, segment_starts, moving, trip_number, meters, top_speed,
+                                   minute, plate_values, plate, speed, dated)
+
+    def _summary(self, df: pd.DataFrame, order, segment_starts, moving, trip_number, meters, top_speed,
+                 minute, plate_values, plate, speed, dated) -> pd.DataFrame:
+        """Uma linha por viagem, na ordem das placas e do tempo"""
+        count = len(order)
+        segment_ends = np.r_[segment_starts[1:], count][:len(segment_starts)] - 1
+        first, last = segment_starts[moving], segment_ends[moving]
+        source_first, source_last = order[first], order[last]
+
+        duration = np.where(dated[first] & dated[last], minute[last] - minute[first], -1).astype(np.float64)
+        duration[duration < 0] = np.nan
+        kilometers = meters[moving] / 1000
+        with np.errstate(invalid='ignore', divide='ignore'):
+            average = np.where(duration > 0, kilometers / (duration / 60), np.nan)
+
+        records = np.diff(np.r_[segment_starts, count])[moving]
+        dates = df['Data/Hora'].to_numpy(dtype=object)
+        localities = df['Localidade'].to_numpy(dtype=object)
+        placas = np.append(np.asarray(plate_values, dtype=object), pd.NA)[plate[first]]
+        return pd.DataFrame({
+            'Placa': placas,
+            'Viagem': trip_number[moving].astype(np.int32),
+            'Inicio': dates[source_first],
+            'Fim': dates[source_last],
+            'Duracao_min': pd.array(duration, dtype='Float64').astype('Int64'),
+            'Distancia_km': np.round(kilometers, 3),
+            'Velocidade_max': top_speed[moving].astype(np.int64),
+            'Velocidade_media_kmh': np.round(average, 1),
+            'Registros': records,
+            'Origem': localities[source_first],
+            'Destino': localities[source_last],
+        })